@@ -0,0 +1,63 @@
+"""Benchmark retrieval of realisations and generation of surrogates."""
+from idtxl import stats
+from .common import generate_data
+
+
+class TimeRealisations:
+    """Time Data.get_realisations() for all candidates of a network."""
+
+    params = ([5, 20], [1000, 10000], [10, 100], [5, 20])
+    param_names = ['n_nodes', 'n_samples', 'n_replications', 'max_lag']
+    timeout = 600
+
+    def setup(self, n_nodes, n_samples, n_replications, max_lag):
+        self.data = generate_data('var', n_nodes, n_samples, n_replications)
+        self.current_value = (0, max_lag)
+        self.idx_list = [(p, s) for p in range(n_nodes)
+                         for s in range(max_lag)]
+
+    def time_get_realisations(self, n_nodes, n_samples, n_replications,
+                              max_lag):
+        self.data.get_realisations(self.current_value, self.idx_list)
+
+    def time_get_realisations_single(self, n_nodes, n_samples,
+                                     n_replications, max_lag):
+        # Candidates are retrieved one at a time while building the
+        # conditioning set.
+        for idx in self.idx_list:
+            self.data.get_realisations(self.current_value, [idx])
+
+    def time_get_realisations_batch(self, n_nodes, n_samples, n_replications,
+                                    max_lag):
+        self.data.get_realisations_batch(self.current_value, self.idx_list)
+
+
+class TimeSurrogates:
+    """Time generation of surrogates for permutation tests."""
+
+    params = ([1000, 10000], [10, 100], [100, 500])
+    param_names = ['n_samples', 'n_replications', 'n_perm']
+    timeout = 600
+
+    def setup(self, n_samples, n_replications, n_perm):
+        self.data = generate_data('var', 5, n_samples, n_replications)
+        self.current_value = (0, 5)
+        self.idx_list = [(1, 4), (2, 3)]
+        self.perm_settings = {'perm_type': 'random'}
+
+    def time_permute_replications_batch(self, n_samples, n_replications,
+                                        n_perm):
+        self.data.permute_replications_batch(self.current_value,
+                                             self.idx_list, n_perm)
+
+    def time_permute_samples_batch(self, n_samples, n_replications, n_perm):
+        self.data.permute_samples_batch(self.current_value, self.idx_list,
+                                        self.perm_settings, n_perm)
+
+    def time_get_surrogates(self, n_samples, n_replications, n_perm):
+        # Surrogates as requested by statistical tests, permutes replications
+        # if there are sufficient replications, samples otherwise.
+        perm_settings = dict(self.perm_settings, permute_in_time=(
+            not stats._sufficient_replications(self.data, n_perm)))
+        stats._get_surrogates(self.data, self.current_value, self.idx_list,
+                              n_perm, perm_settings)
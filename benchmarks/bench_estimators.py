@@ -0,0 +1,99 @@
+"""Benchmark CMI and PID estimators.
+
+Estimators are benchmarked on average estimates (estimate()), chunked
+estimates of surrogates (estimate_parallel()) as they are requested by
+statistical tests, and, for PID estimators, on discrete logical functions.
+"""
+import numpy as np
+from idtxl.estimator import find_estimator
+from .common import require, SEED
+
+
+class TimeContinuousCMI:
+    """Time CMI estimators for continuous data."""
+
+    params = (['JidtKraskovCMI', 'JidtGaussianCMI', 'PythonGaussianCMI'],
+              [1000, 10000, 100000],
+              [1, 5])
+    param_names = ['estimator', 'n_samples', 'dim']
+    timeout = 600
+    n_chunks = 10
+
+    def setup(self, estimator, n_samples, dim):
+        if estimator.startswith('Jidt'):
+            require('jpype')
+        rng = np.random.RandomState(SEED)
+        self.conditional = rng.normal(size=(n_samples, dim))
+        self.var2 = rng.normal(size=(n_samples, 1))
+        self.var1 = (self.var2 + self.conditional[:, :1] +
+                     rng.normal(size=(n_samples, 1)))
+        self.estimator = find_estimator(estimator)({'noise_level': 0})
+        # Surrogates of var1 are stacked chunks of permuted realisations.
+        self.var1_surrogates = np.vstack(
+            [rng.permutation(self.var1) for i in range(self.n_chunks)])
+
+    def time_estimate(self, estimator, n_samples, dim):
+        self.estimator.estimate(self.var1, self.var2, self.conditional)
+
+    def time_estimate_parallel(self, estimator, n_samples, dim):
+        self.estimator.estimate_parallel(
+            n_chunks=self.n_chunks, re_use=['var2', 'conditional'],
+            var1=self.var1_surrogates, var2=self.var2,
+            conditional=self.conditional)
+
+
+class TimeDiscreteCMI:
+    """Time the JIDT discrete CMI estimator."""
+
+    params = ([1000, 10000, 100000], [2, 4])
+    param_names = ['n_samples', 'alphabet_size']
+    timeout = 600
+    n_chunks = 10
+
+    def setup(self, n_samples, alphabet_size):
+        require('jpype')
+        rng = np.random.RandomState(SEED)
+        self.conditional = rng.randint(alphabet_size, size=(n_samples, 1))
+        self.var2 = rng.randint(alphabet_size, size=(n_samples, 1))
+        self.var1 = np.mod(self.var2 + self.conditional, alphabet_size)
+        self.estimator = find_estimator('JidtDiscreteCMI')(
+            {'n_discrete_bins': alphabet_size, 'discretise_method': 'none'})
+        self.var1_surrogates = np.vstack(
+            [rng.permutation(self.var1) for i in range(self.n_chunks)])
+
+    def time_estimate(self, n_samples, alphabet_size):
+        self.estimator.estimate(self.var1, self.var2, self.conditional)
+
+    def time_estimate_parallel(self, n_samples, alphabet_size):
+        self.estimator.estimate_parallel(
+            n_chunks=self.n_chunks, re_use=['var2', 'conditional'],
+            var1=self.var1_surrogates, var2=self.var2,
+            conditional=self.conditional)
+
+
+class TimePID:
+    """Time PID estimators on a noisy logical XOR."""
+
+    params = (['SydneyPID', 'TartuPID'], [1000, 10000, 100000])
+    param_names = ['estimator', 'n_samples']
+    timeout = 600
+
+    def setup(self, estimator, n_samples):
+        if estimator == 'TartuPID':
+            require('ecos')
+        rng = np.random.RandomState(SEED)
+        self.s1 = rng.randint(2, size=n_samples)
+        self.s2 = rng.randint(2, size=n_samples)
+        flip = rng.rand(n_samples) < 0.1
+        self.t = np.logical_xor(np.logical_xor(self.s1, self.s2),
+                                flip).astype(int)
+        self.estimator = find_estimator(estimator)({
+            'alph_s1': 2,
+            'alph_s2': 2,
+            'alph_t': 2,
+            'max_unsuc_swaps_row_parm': 60,
+            'num_reps': 63,
+            'max_iters': 1000})
+
+    def time_estimate(self, estimator, n_samples):
+        self.estimator.estimate(self.s1, self.s2, self.t)
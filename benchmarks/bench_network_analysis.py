@@ -0,0 +1,62 @@
+"""Benchmark full network analyses.
+
+Networks are analysed serially (analyse_network() with default settings),
+such that timings are comparable between machines with different numbers of
+cores.
+"""
+from idtxl.multivariate_te import MultivariateTE
+from idtxl.bivariate_te import BivariateTE
+from idtxl.active_information_storage import ActiveInformationStorage
+from .common import generate_data, analysis_settings
+
+ANALYSES = {
+    'MultivariateTE': MultivariateTE,
+    'BivariateTE': BivariateTE,
+    'ActiveInformationStorage': ActiveInformationStorage
+}
+
+
+class TimeNetworkAnalysis:
+    """Time analyses of networks generated by all of Data's generators."""
+
+    params = (list(ANALYSES.keys()),
+              ['mute', 'var', 'logistic'],
+              ['JidtKraskovCMI', 'JidtGaussianCMI', 'PythonGaussianCMI'])
+    param_names = ['analysis', 'generator', 'estimator']
+    timeout = 3600
+    number = 1
+    repeat = 1
+
+    def setup(self, analysis, generator, estimator):
+        self.data = generate_data(generator, 5, 1000, 10)
+        self.settings = analysis_settings(estimator, max_lag=3, n_perm=21)
+
+    def time_analyse_network(self, analysis, generator, estimator):
+        ANALYSES[analysis]().analyse_network(self.settings, self.data)
+
+
+class TimeNetworkInferenceScaling:
+    """Time multivariate TE with increasing problem sizes."""
+
+    params = ([5, 10], [1000, 10000], [1, 10], [3, 5], [21, 200])
+    param_names = ['n_nodes', 'n_samples', 'n_replications',
+                   'max_lag_sources', 'n_perm']
+    timeout = 3600
+    number = 1
+    repeat = 1
+
+    def setup(self, n_nodes, n_samples, n_replications, max_lag_sources,
+              n_perm):
+        self.data = generate_data('var', n_nodes, n_samples, n_replications)
+        self.settings = analysis_settings('JidtGaussianCMI', max_lag_sources,
+                                          n_perm)
+
+    def time_multivariate_te(self, n_nodes, n_samples, n_replications,
+                             max_lag_sources, n_perm):
+        MultivariateTE().analyse_network(self.settings, self.data)
+
+    def time_multivariate_te_target(self, n_nodes, n_samples, n_replications,
+                                    max_lag_sources, n_perm):
+        # Analysis of the last node in the chain, which has one true source.
+        MultivariateTE().analyse_single_target(self.settings, self.data,
+                                               n_nodes - 1)
@@ -0,0 +1,86 @@
+"""Provide data and settings shared by IDTxl benchmarks."""
+import importlib
+import numpy as np
+from idtxl.data import Data
+
+# Seed used for all generated data, such that runs are comparable.
+SEED = 0
+
+
+def require(*packages):
+    """Skip a benchmark if optional packages are not installed.
+
+    asv and run_benchmarks.py skip benchmarks whose setup() raises
+    NotImplementedError.
+    """
+    for p in packages:
+        try:
+            importlib.import_module(p)
+        except ImportError:
+            raise NotImplementedError('{0} is not installed.'.format(p))
+
+
+def coupled_coefficients(n_nodes, order=1):
+    """Return coefficient matrices of a chain of unidirectionally coupled nodes.
+
+    Each node i > 0 receives input from node i - 1 at the maximum lag. The
+    sum over coefficients of each node is below one, such that the resulting
+    VAR process is stable and logistic maps stay in the unit interval.
+    """
+    coefficients = np.zeros((order, n_nodes, n_nodes))
+    coefficients[0] = np.eye(n_nodes) * 0.5
+    for i in range(1, n_nodes):
+        coefficients[order - 1, i, i - 1] = 0.4
+    return coefficients
+
+
+def generate_data(generator, n_nodes, n_samples, n_replications):
+    """Return Data instance created by one of Data's data generators.
+
+    Args:
+        generator : str
+            'mute', 'var', or 'logistic'
+        n_nodes : int
+            number of processes, must be 5 for 'mute'
+        n_samples : int
+            number of samples per replication
+        n_replications : int
+            number of replications
+    """
+    np.random.seed(SEED)
+    data = Data(normalise=True)
+    if generator == 'mute':
+        if n_nodes != 5:
+            raise NotImplementedError('MuTE data have 5 nodes.')
+        data.generate_mute_data(n_samples, n_replications)
+    elif generator == 'var':
+        data.generate_var_data(n_samples, n_replications,
+                               coupled_coefficients(n_nodes, order=2))
+    elif generator == 'logistic':
+        data.generate_logistic_maps_data(n_samples, n_replications,
+                                         coupled_coefficients(n_nodes))
+    else:
+        raise ValueError('Unknown generator {0}.'.format(generator))
+    return data
+
+
+def analysis_settings(estimator, max_lag, n_perm):
+    """Return settings for a network analysis with small permutation tests."""
+    settings = {
+        'cmi_estimator': estimator,
+        'max_lag_sources': max_lag,
+        'min_lag_sources': 1,
+        'max_lag_target': max_lag,
+        'max_lag': max_lag,
+        'n_perm_max_stat': n_perm,
+        'n_perm_min_stat': n_perm,
+        'n_perm_omnibus': n_perm,
+        'n_perm_max_seq': n_perm,
+        'n_perm_mi': n_perm,
+        'verbose': False}
+    if estimator.startswith('Jidt'):
+        require('jpype')
+    if estimator == 'JidtDiscreteCMI':
+        settings.update({'discretise_method': 'equal',
+                         'n_discrete_bins': 4})
+    return settings
@@ -0,0 +1,273 @@
+"""Run IDTxl benchmarks and store timings in a machine-readable history.
+
+Benchmarks are written for airspeed velocity (asv, see asv.conf.json in the
+repository root), but can be run without asv:
+
+    $ python -m benchmarks.run_benchmarks --quick
+    $ python -m benchmarks.run_benchmarks --bench TimeRealisations --compare
+
+Each run appends one JSON record to the history file (default:
+benchmarks/history.jsonl) containing the date, git commit, machine and
+package versions, and for each benchmark and combination of parameters the
+measured wall times in seconds. Benchmarks whose setup() raises
+NotImplementedError (e.g., because an optional package is missing) are
+recorded as skipped, benchmarks raising any other error are recorded with the
+error message.
+
+Use --compare to compare the run against the previous record in the history
+(or the last record for a given commit), benchmarks that are slower by more
+than --threshold are reported as regressions.
+"""
+import os
+import re
+import sys
+import json
+import time
+import platform
+import argparse
+import importlib
+import itertools as it
+import subprocess
+import traceback
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = os.path.join(BENCHMARK_DIR, 'history.jsonl')
+MODULES = ['bench_estimators', 'bench_data', 'bench_network_analysis']
+
+
+def discover(pattern=None):
+    """Return benchmarks as list of (name, class, method name).
+
+    Benchmarks are methods starting with 'time_' of classes defined in the
+    benchmark modules. If pattern is given, only benchmarks whose name
+    ('module.Class.method') matches the regular expression are returned.
+    """
+    benchmarks = []
+    for m in MODULES:
+        module = importlib.import_module('benchmarks.' + m)
+        for cls_name, cls in sorted(vars(module).items()):
+            if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                continue
+            for method in sorted(dir(cls)):
+                if not method.startswith('time_'):
+                    continue
+                name = '{0}.{1}.{2}'.format(m, cls_name, method)
+                if pattern is None or re.search(pattern, name):
+                    benchmarks.append((name, cls, method))
+    return benchmarks
+
+
+def get_parameters(cls, quick=False):
+    """Return all combinations of a benchmark's parameters.
+
+    asv allows params to be a single list for benchmarks with one parameter.
+    If quick is True, only the first (smallest) value of each parameter is
+    used.
+    """
+    params = getattr(cls, 'params', [])
+    if params and not isinstance(params[0], (list, tuple)):
+        params = [params]
+    if quick:
+        params = [p[:1] for p in params]
+    return list(it.product(*params))
+
+
+def run_benchmark(cls, method, params, repeat=None):
+    """Run a single benchmark for one combination of parameters.
+
+    Returns:
+        dict
+            'times' with wall times in seconds of each repetition (mean over
+            'number' calls per repetition), or 'skipped' or 'error' with the
+            reason
+    """
+    if repeat is None:
+        repeat = getattr(cls, 'repeat', 3)
+    number = getattr(cls, 'number', 1)
+    benchmark = cls()
+    try:
+        if hasattr(benchmark, 'setup'):
+            benchmark.setup(*params)
+    except NotImplementedError as err:
+        return {'skipped': str(err)}
+    except Exception:
+        return {'error': traceback.format_exc(limit=3)}
+    times = []
+    try:
+        for r in range(repeat):
+            t0 = time.perf_counter()
+            for n in range(number):
+                getattr(benchmark, method)(*params)
+            times.append((time.perf_counter() - t0) / number)
+    except Exception:
+        return {'error': traceback.format_exc(limit=3)}
+    finally:
+        if hasattr(benchmark, 'teardown'):
+            benchmark.teardown(*params)
+    return {'times': times}
+
+
+def get_environment():
+    """Return commit, machine, and package versions of the current run."""
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=BENCHMARK_DIR,
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    packages = {}
+    for p in ['numpy', 'scipy', 'jpype', 'ecos']:
+        try:
+            packages[p] = getattr(importlib.import_module(p), '__version__',
+                                  None)
+        except ImportError:
+            packages[p] = None
+    return {'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': commit,
+            'machine': platform.node(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+            'packages': packages}
+
+
+def run(pattern=None, quick=False, repeat=None, verbose=True):
+    """Run benchmarks and return a history record."""
+    record = get_environment()
+    record['quick'] = quick
+    record['results'] = []
+    for (name, cls, method) in discover(pattern):
+        param_names = getattr(cls, 'param_names', [])
+        for params in get_parameters(cls, quick):
+            result = run_benchmark(cls, method, params, repeat)
+            result['name'] = name
+            result['params'] = dict(zip(param_names, params))
+            if 'times' in result:
+                result['min'] = min(result['times'])
+                result['median'] = float(np.median(result['times']))
+            record['results'].append(result)
+            if verbose:
+                print(_format_result(result))
+    return record
+
+
+def _format_result(result):
+    params = ', '.join('{0}={1}'.format(k, v)
+                       for k, v in result['params'].items())
+    if 'times' in result:
+        status = '{0:10.4f} s'.format(result['min'])
+    elif 'skipped' in result:
+        status = '   skipped'
+    else:
+        status = '    failed'
+    return '{0} {1}({2})'.format(status, result['name'], params)
+
+
+def read_history(filename=HISTORY_FILE):
+    """Return list of records in a history file."""
+    if not os.path.exists(filename):
+        return []
+    with open(filename) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(record, filename=HISTORY_FILE):
+    """Append a record to a history file, one JSON object per line."""
+    with open(filename, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def compare(record, reference, threshold=1.2):
+    """Compare minimum wall times of two records.
+
+    Args:
+        record : dict
+            current run
+        reference : dict
+            earlier run
+        threshold : float [optional]
+            ratio of wall times above which a benchmark is reported as a
+            regression (default=1.2)
+
+    Returns:
+        list of tuples
+            name, parameters, reference time, current time, and ratio for
+            each benchmark run in both records
+        list of tuples
+            regressions in the same format
+    """
+    def key(result):
+        return (result['name'], json.dumps(result['params'], sort_keys=True))
+
+    reference_times = {key(r): r['min'] for r in reference['results']
+                       if 'min' in r}
+    comparison = []
+    for r in record['results']:
+        if 'min' not in r or key(r) not in reference_times:
+            continue
+        t_ref = reference_times[key(r)]
+        comparison.append((r['name'], r['params'], t_ref, r['min'],
+                           r['min'] / t_ref if t_ref > 0 else np.inf))
+    regressions = [c for c in comparison if c[4] > threshold]
+    return comparison, regressions
+
+
+def _find_reference(history, commit=None):
+    if commit is None:
+        return history[-1] if history else None
+    for record in reversed(history):
+        if record['commit'] is not None and record['commit'].startswith(
+                commit):
+            return record
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run IDTxl benchmarks and store timings.')
+    parser.add_argument('--bench', default=None,
+                        help='regular expression selecting benchmarks by '
+                        'name (module.Class.method)')
+    parser.add_argument('--quick', action='store_true',
+                        help='run each benchmark for the smallest problem '
+                        'size only')
+    parser.add_argument('--repeat', type=int, default=None,
+                        help='number of repetitions per benchmark')
+    parser.add_argument('--history', default=HISTORY_FILE,
+                        help='history file, one JSON record per run')
+    parser.add_argument('--no-save', action='store_true',
+                        help='do not append the run to the history')
+    parser.add_argument('--compare', nargs='?', const='', default=None,
+                        metavar='COMMIT',
+                        help='compare against the previous run or the last '
+                        'run of COMMIT')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='ratio of wall times reported as a regression')
+    args = parser.parse_args(argv)
+
+    history = read_history(args.history)
+    record = run(args.bench, args.quick, args.repeat)
+    if not args.no_save:
+        append_history(record, args.history)
+
+    if args.compare is not None:
+        reference = _find_reference(history, args.compare or None)
+        if reference is None:
+            print('No reference run found in {0}.'.format(args.history))
+            return 0
+        comparison, regressions = compare(record, reference, args.threshold)
+        print('\nComparison with run of {0} (commit {1}):'.format(
+            reference['date'], reference['commit']))
+        for (name, params, t_ref, t, ratio) in comparison:
+            print('{0:8.2f}x {1:10.4f} s -> {2:10.4f} s {3}({4})'.format(
+                ratio, t_ref, t, name, params))
+        if regressions:
+            print('\n{0} benchmark(s) slower by more than {1}x.'.format(
+                len(regressions), args.threshold))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
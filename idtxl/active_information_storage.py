@@ -96,6 +96,11 @@ class ActiveInformationStorage(SingleProcessAnalysis):
                 - fdr_correction : bool [optional] - correct results on the
                   network level, see documentation of stats.ais_fdr() for
                   details (default=True)
+                - n_jobs : int [optional] - number of processes analysed in
+                  parallel (default=1)
+                - executor : str [optional] - run parallel analyses in
+                  'processes' or 'threads' (default='processes'), see
+                  documentation of NetworkAnalysis._analyse_parallel()
 
             data : Data instance
                 raw data for analysis
@@ -128,13 +133,21 @@ class ActiveInformationStorage(SingleProcessAnalysis):
             n_nodes=data.n_processes,
             n_realisations=data.n_realisations(),
             normalised=data.normalise)
-        for t in range(len(processes)):
-            if settings['verbose']:
-                print('\n####### analysing process {0} of {1}'.format(
-                                                processes[t], processes))
-            res_single = self.analyse_single_process(
-                settings, data, processes[t])
-            results.combine_results(res_single)
+        # Share realisations of variables between processes if requested.
+        with self._network_realisations_store(settings, data):
+            if settings.get('n_jobs', 1) == 1:
+                for t in range(len(processes)):
+                    if settings['verbose']:
+                        print('\n####### analysing process {0} of {1}'.format(
+                            processes[t], processes))
+                    res_single = self.analyse_single_process(
+                        settings, data, processes[t])
+                    results.combine_results(res_single)
+            else:
+                for res_single in self._analyse_parallel(
+                        settings, data, 'analyse_single_process',
+                        [(p,) for p in processes]):
+                    results.combine_results(res_single)
 
         # Get no. realisations actually used for estimation from single target
         # analysis.
@@ -197,6 +210,62 @@ class ActiveInformationStorage(SingleProcessAnalysis):
                   further settings (default=False)
                 - verbose : bool [optional] - toggle console output
                   (default=True)
+                - estimator_cache : bool [optional] - cache estimates for
+                  identical realisations, see estimator.CachedEstimator
+                  (default=False)
+                - cache_max_bytes : int [optional] - approximate memory
+                  limit of the estimator cache in bytes, see
+                  estimator.CachedEstimator (default=100 MB)
+                - realisations_cache : bool [optional] - cache realisations of
+                  candidates in the data, see Data.enable_realisations_cache
+                  (default=False)
+                - realisations_cache_max_bytes : int [optional] - memory limit
+                  of the realisations cache in bytes (default=100 MB)
+                - realisations_store : bool [optional] - when analysing a
+                  network, retrieve realisations of each variable once and
+                  share them between all processes and parallel workers, see
+                  Data.enable_realisations_store() (default=False)
+                - surrogate_store : bool [optional] - store surrogate values
+                  per candidate and conditioning set and re-use or extend them
+                  whenever a candidate is tested again under the same
+                  conditioning set (default=False)
+                - perm_sequential : bool [optional] - create surrogates in
+                  batches and stop permutation tests as soon as their decision
+                  is settled, see stats._get_surrogate_values()
+                  (default=False)
+                - perm_batch_size : int [optional] - number of permutations
+                  per batch in sequential permutation tests (default=50)
+                - perm_sequential_error : float [optional] - error level of
+                  the stopping rule in sequential permutation tests
+                  (default=0.001)
+                - pvalue_method : str [optional] - 'permutation' to estimate
+                  p-values by counting surrogates, 'gpd' or 'moment' to
+                  extrapolate p-values below 1/n_perm from a fit to the
+                  surrogate distribution (used for p-values entering FDR-
+                  correction), see stats._find_pvalue_tail()
+                  (default='permutation')
+                - pvalue_gof_alpha : float [optional] - critical alpha level
+                  of the goodness-of-fit test for extrapolated p-values
+                  (default=0.05)
+                - checkpoint_dir : str [optional] - directory to which the
+                  state of the analysis is written after each stage and the
+                  final results are written for each process, see documentation
+                  of NetworkAnalysis._init_checkpoints() (default=None)
+                - resume : bool [optional] - if True, read results of
+                  finished processes from checkpoint_dir and continue interrupted
+                  analyses from their last checkpoint (default=False)
+                - profile : bool [optional] - record wall time, estimator
+                  calls, and surrogates for each stage of the analysis and add
+                  the profile to the results of each process, see
+                  profiling.Profiler (default=False)
+                - local_values : bool [optional] - return local AIS instead
+                  of average values (default=False)
+                - local_values_store : str [optional] - if 'memmap' or 'hdf5',
+                  write local values as float32 to a .npy-file or HDF5 file
+                  per process and return references to the files instead of
+                  arrays, see results.LocalValues (default=None)
+                - local_values_dir : str [optional] - directory for local
+                  values files (default=current directory)
 
             data : Data instance
                 raw data for analysis
@@ -208,16 +277,21 @@ class ActiveInformationStorage(SingleProcessAnalysis):
                 results of AIS estimation, see documentation of
                 ResultsSingleProcessAnalysis()
         """
+        # Return results of a finished analysis if resuming from
+        # checkpoints.
+        settings, results = self._init_checkpoints(settings, data, process)
+        if results is not None:
+            return results
+
         # Check input and clean up object if it was used before.
         self._initialise(settings, data, process)
 
-        # Main algorithm.
-        print('\n---------------------------- (1) include candidates')
-        self._include_process_candidates(data)
-        print('\n---------------------------- (2) prune source candidates')
-        self._prune_candidates(data)
-        print('\n---------------------------- (3) final statistics')
-        self._test_final_conditional(data)
+        # Main algorithm, write checkpoints after each stage if requested.
+        self._run_stages([
+            ('(1) include candidates', self._include_process_candidates),
+            ('(2) prune source candidates', self._prune_candidates),
+            ('(3) final statistics', self._test_final_conditional)],
+            data)
 
         # Clean up and return results.
         if self.settings['verbose']:
@@ -235,11 +309,21 @@ class ActiveInformationStorage(SingleProcessAnalysis):
                 'selected_vars': self._idx_to_lag(self.selected_vars_full),
                 'ais': self.ais,
                 'ais_pval': self.pvalue,
-                'ais_sign': self.sign
+                'ais_sign': self.sign,
+                'estimator_cache': self._get_estimator_cache_info(),
+                'realisations_cache': self._release_realisations_cache(data),
+                'surrogate_store': self._get_surrogate_store_info(),
+                'n_perm_used': self._n_perm_used,
+                'pvalue_fit': self._pvalue_fit,
+                'profile': self._get_profile()
             })
+        self._write_checkpoint_results(results)
         self._reset()  # remove realisations and min_stats surrogate table
         return results
 
+    def _get_current_value_sample(self, settings):
+        return settings['max_lag']
+
     def _initialise(self, settings, data, process):
         """Check input, set initial or default values for analysis settings."""
         # Check analysis settings and set defaults.
@@ -259,8 +343,12 @@ class ActiveInformationStorage(SingleProcessAnalysis):
                                '.'.format(self.settings['tau'],
                                           self.settings['max_lag']))
 
-        # Set CMI estimator.
+        # Set CMI estimator, realisations cache, and surrogate store.
         self._set_cmi_estimator()
+        self._set_realisations_cache(data)
+        self._set_surrogate_store()
+        self._n_perm_used = {}
+        self._pvalue_fit = {}
 
         # Initialise class attributes.
         self._min_stats_surr_table = None
@@ -280,7 +368,8 @@ class ActiveInformationStorage(SingleProcessAnalysis):
         assert(data.n_samples >= self.settings['max_lag'] + 1), (
             'Not enough samples in data ({0}) to allow for the chosen maximum '
             'lag ({1})'.format(data.n_samples, self.settings['max_lag']))
-        self.current_value = (process, self.settings['max_lag'])
+        self.current_value = (process,
+                              self._get_current_value_sample(self.settings))
         [cv_realisation, repl_idx] = data.get_realisations(
                                              current_value=self.current_value,
                                              idx_list=[self.current_value])
@@ -354,12 +443,11 @@ class ActiveInformationStorage(SingleProcessAnalysis):
 
             # Calculate the (C)MI for each candidate and the target.
             try:
-                temp_te = self._cmi_estimator.estimate_parallel(
-                                n_chunks=len(candidate_set),
-                                re_use=['var2', 'conditional'],
+                temp_te = self._cmi_estimator.estimate_surrogates(
                                 var1=cand_real,
                                 var2=self._current_value_realisations,
-                                conditional=self._selected_vars_realisations)
+                                conditional=self._selected_vars_realisations,
+                                n_chunks=len(candidate_set))
             except ex.AlgorithmExhaustedError as aee:
                 # The algorithm cannot continue here, so
                 #  we'll terminate the search for more candidates,
@@ -564,8 +652,10 @@ class ActiveInformationStorage(SingleProcessAnalysis):
                         (max(replication_ind) + 1)*sum(replication_ind == 0));
 
                 # Reshape local AIS to a [replications x samples] matrix.
-                self.ais = local_ais.reshape(
-                    max(replication_ind) + 1, sum(replication_ind == 0))
+                self.ais = self._store_local_values(
+                    local_ais.reshape(
+                        max(replication_ind) + 1, sum(replication_ind == 0)),
+                    'local_ais_process_{0}'.format(self.process), 'rs')
             else:
                 self.ais = ais
             self.sign = s
@@ -595,3 +685,5 @@ class ActiveInformationStorage(SingleProcessAnalysis):
         del self.ais
         del self.settings
         del self._cmi_estimator
+        del self._n_perm_used
+        del self._pvalue_fit
@@ -1,8 +1,14 @@
 """Provide data structures for IDTxl analysis."""
+from collections import OrderedDict
+import hashlib
+import mmap
 import numpy as np
 from . import idtxl_utils as utils
+from . import profiling
 
 VERBOSE = False
+REALISATIONS_CACHE_MAX_BYTES = 100 * 1024**2  # default memory limit, 100 MB
+LAZY_BLOCK_BYTES = 64 * 1024**2  # block size for streaming statistics, 64 MB
 
 
 class Data():
@@ -37,6 +43,13 @@ class Data():
         Realisations are stored as attribute 'data'. This can only be set via
         the 'set_data()' method.
 
+        Realisations retrieved for a current value can be cached to avoid
+        repeated retrieval of the same variables during an analysis, see
+        'enable_realisations_cache()'. The cache is cleared whenever data is
+        set. Realisations for a current value may further be kept in a store
+        shared by the analyses of all targets in a network and by parallel
+        workers, see 'enable_realisations_store()'.
+
     Args:
         data : numpy array [optional]
             1/2/3-dimensional array with raw data
@@ -65,6 +78,9 @@ class Data():
 
     def __init__(self, data=None, dim_order='psr', normalise=True):
         self.normalise = normalise
+        self._realisations_cache = None
+        self._realisations_store = None
+        self._fingerprint = None
         if data is not None:
             self.set_data(data, dim_order)
 
@@ -118,6 +134,9 @@ class Data():
                                  ' directly, use the set_data method instead.')
         else:
             self._data = d
+            # Check for nans once, such that retrieved realisations only have
+            # to be checked if the data contain nans at all.
+            self._data_has_nans = bool(np.isnan(d).any())
 
     @data.deleter
     def data(self):
@@ -154,10 +173,13 @@ class Data():
             delattr(self, 'data')
         except AttributeError:
             pass
+        self.clear_realisations_cache()
+        self._realisations_store = None
+        self._fingerprint = None
         if self.normalise:
             self.data = self._normalise_data(data_ordered)
         else:
-            self.data = data_ordered
+            self.data = np.ascontiguousarray(data_ordered)
         self.data_type = type(self.data[0, 0, 0])
 
     def _normalise_data(self, d):
@@ -196,7 +218,8 @@ class Data():
         self.n_samples = data.shape[1]
         self.n_replications = data.shape[2]
 
-    def get_realisations(self, current_value, idx_list, shuffle=False):
+    def get_realisations(self, current_value, idx_list, shuffle=False,
+                         out=None):
         """Return realisations for a list of indices.
 
         Return realisations for indices in list. Optionally, realisations can
@@ -227,11 +250,18 @@ class Data():
                 samples for a process are returned
             shuffle: bool
                 if true permute blocks of replications over trials
+            out : numpy array [optional]
+                pre-allocated array with dimensions (no. samples *
+                no.replications) x number of indices and the data's type,
+                realisations are written into this array instead of a newly
+                allocated one
 
         Returns:
             numpy array
                 realisations with dimensions (no. samples * no.replications) x
-                number of indices
+                number of indices; if the realisations cache or store is
+                enabled and a single index is requested, a read-only reference
+                to the cached realisations is returned
             numpy array
                 replication index for each realisation with dimensions (no.
                 samples * no.replications) x number of indices
@@ -249,11 +279,18 @@ class Data():
             raise RuntimeError('All indices for which data is retrieved must '
                                ' be smaller than the current value.')
 
-        # Allocate memory.
         n_real_time = self.n_realisations_samples(current_value)
         n_real_repl = self.n_realisations_repl()
-        realisations = np.empty((n_real_time * n_real_repl,
-                                 len(idx_list))).astype(self.data_type)
+        shape = (n_real_time * n_real_repl, len(idx_list))
+        if out is not None:
+            assert out.shape == shape, (
+                'Output array has shape {0}, expected {1}.'.format(
+                    out.shape, shape))
+            assert out.dtype == self.data_type, (
+                'Output array has type {0}, expected {1}.'.format(
+                    out.dtype, self.data_type))
+            if not out.flags['C_CONTIGUOUS']:
+                raise ValueError('Output array has to be C-contiguous.')
 
         # Shuffle the replication order if requested. This creates surrogate
         # data by permuting replications while keeping the order of samples
@@ -263,39 +300,325 @@ class Data():
         else:
             replications_order = np.arange(self.n_replications)
 
-        # Retrieve data.
-        i = 0
-        for idx in idx_list:
-            r = 0
-            # get the last sample as negative value, i.e., no. samples from the
-            # end of the array
-            last_sample = idx[1] - current_value[1]  # indexing is much faster
-            if last_sample == 0:                     # than looping over time!
-                last_sample = None
-            for replication in replications_order:
-                try:
-                    realisations[r:r + n_real_time, i] = self.data[
-                                                        idx[0],
-                                                        idx[1]: last_sample,
-                                                        replication]
-                except IndexError:
-                    raise IndexError('You tried to access variable {0} in a '
-                                     'data set with {1} processes and {2} '
-                                     'samples.'.format(idx, self.n_processes,
-                                                       self.n_samples))
-                r += n_real_time
-
-            assert(not np.isnan(realisations[:, i]).any()), ('There are nans '
-                                                             'in the retrieved'
-                                                             ' realisations.')
-            i += 1
+        if (self._realisations_store is not None and not shuffle and
+                self._realisations_store.sample == current_value[1]):
+            out = self._realisations_store.get_realisations(self, idx_list,
+                                                            out)
+        elif self._realisations_cache is not None and not shuffle:
+            out = self._get_cached_realisations(current_value, idx_list,
+                                                n_real_time, out)
+        else:
+            # Retrieve data for all indices and replications in a single
+            # operation from a view of sliding windows over samples.
+            # Realisations are ordered by replication, then sample.
+            if out is None:
+                out = np.empty(shape, dtype=self.data_type)
+            processes, samples = self._check_indices(idx_list, n_real_time)
+            realisations = self._gather_realisations(
+                processes, samples, n_real_time, replications_order)
+            np.copyto(out.reshape(n_real_repl, n_real_time, len(idx_list)),
+                      realisations.transpose(1, 2, 0))
+            if self._data_has_nans:
+                assert(not np.isnan(out).any()), ('There are nans in the '
+                                                  'retrieved realisations.')
 
         # For each realisation keep the index of the replication it came from.
         replications_index = np.repeat(replications_order, n_real_time)
-        assert(replications_index.shape[0] == realisations.shape[0]), (
+        assert(replications_index.shape[0] == out.shape[0]), (
                'There seems to be a problem with the replications index.')
 
-        return realisations, replications_index
+        profiling.count('realisations_bytes', out.nbytes)
+        return out, replications_index
+
+    def get_realisations_batch(self, current_value, idx_list, shuffle=False):
+        """Return realisations for a list of indices as a 3D array.
+
+        Return realisations for indices in list as a 3D array with dimensions
+        [number of indices x no. samples x no. replications], where samples
+        are counted from the current value onwards. If no shuffling is
+        requested and all indices belong to the same process and are evenly
+        spaced in time (e.g., all lags of a single source), a read-only view
+        into the data is returned and no data is copied. Otherwise,
+        realisations are gathered into a new array in a single operation.
+        Shuffling permutes replications as described for get_realisations().
+
+        Args:
+            current_value : tuple
+                index of the current value in current analysis, has to have the
+                form (idx process, idx sample)
+            idx_list: list of tuples
+                variable indices
+            shuffle: bool
+                if true permute blocks of replications over trials
+
+        Returns:
+            numpy array
+                realisations with dimensions number of indices x no. samples x
+                no. replications
+            numpy array
+                replication index for each replication
+        """
+        if not hasattr(self, 'data'):
+            raise AttributeError('No data has been added to this Data() '
+                                 'instance.')
+        if not idx_list:
+            return None, None
+        if not all(np.array([x[1] for x in idx_list]) <= current_value[1]):
+            raise RuntimeError('All indices for which data is retrieved must '
+                               ' be smaller than the current value.')
+        n_real_time = self.n_realisations_samples(current_value)
+        if shuffle:
+            replications_order = np.random.permutation(self.n_replications)
+        else:
+            replications_order = np.arange(self.n_replications)
+
+        processes, samples = self._check_indices(idx_list, n_real_time)
+        windows = self._get_windows(n_real_time)
+        steps = np.diff(samples)
+        if (windows is not None and not shuffle and
+                (processes == processes[0]).all() and
+                (steps.size == 0 or
+                 ((steps == steps[0]).all() and steps[0] != 0))):
+            # Indices are evenly spaced samples of a single process, return
+            # a (strided) view into the data.
+            step = 1 if steps.size == 0 else steps[0]
+            stop = samples[-1] + step
+            realisations = windows[processes[0],
+                                   samples[0]:None if stop < 0 else stop:step]
+        else:
+            realisations = self._gather_realisations(
+                processes, samples, n_real_time, replications_order)
+        realisations = realisations.transpose(0, 2, 1)
+        if self._data_has_nans:
+            assert(not np.isnan(realisations).any()), (
+                'There are nans in the retrieved realisations.')
+        profiling.count('realisations_bytes', realisations.nbytes)
+        return realisations, replications_order
+
+    def enable_realisations_cache(self,
+                                  max_bytes=REALISATIONS_CACHE_MAX_BYTES):
+        """Cache realisations retrieved for a current value.
+
+        Cache realisations returned by get_realisations() for each pair of
+        current value and variable index, such that repeated requests for the
+        same variables (e.g., candidates tested in multiple iterations of an
+        analysis) are served from memory. If a single variable is requested,
+        a read-only reference to the cached realisations is returned without
+        copying. Realisations are not cached if shuffling is requested.
+        Least recently used entries are evicted if the cache exceeds its
+        memory limit. The cache is cleared whenever data is set.
+
+        Args:
+            max_bytes : int [optional]
+                memory limit of the cache in bytes (default=100 MB)
+        """
+        if self._realisations_cache is None:
+            self._realisations_cache = OrderedDict()
+            self._realisations_cache_stats = {'hits': 0, 'misses': 0,
+                                              'n_bytes': 0}
+        self._realisations_cache_max_bytes = int(max_bytes)
+        self._evict_realisations()
+
+    def disable_realisations_cache(self):
+        """Disable and clear the realisations cache."""
+        self._realisations_cache = None
+
+    def clear_realisations_cache(self):
+        """Remove all entries from the realisations cache."""
+        if self._realisations_cache is not None:
+            self._realisations_cache.clear()
+            self._realisations_cache_stats['n_bytes'] = 0
+
+    def realisations_cache_info(self):
+        """Return statistics of the realisations cache.
+
+        Returns:
+            dict | None
+                no. cache hits and misses (counted per variable), no. entries,
+                memory footprint and limit in bytes; None if the cache is not
+                enabled
+        """
+        if self._realisations_cache is None:
+            return None
+        return {'hits': self._realisations_cache_stats['hits'],
+                'misses': self._realisations_cache_stats['misses'],
+                'n_entries': len(self._realisations_cache),
+                'n_bytes': self._realisations_cache_stats['n_bytes'],
+                'max_bytes': self._realisations_cache_max_bytes}
+
+    def enable_realisations_store(self, current_value, buffer=None):
+        """Store realisations of all variables for a current value sample.
+
+        Keep realisations returned by get_realisations() for current values
+        with the same sample index (e.g., all targets of a network analysis
+        with equal maximum lags) in a single store. Realisations of each
+        variable (process and sample index) are materialised at most once, on
+        their first request, as a contiguous column of a [processes x samples
+        x realisations] array. Requests for a single variable return a
+        read-only view into the store without copying. The store is used in
+        addition to the realisations cache and takes precedence for current
+        values with the store's sample index. It is removed whenever data is
+        set.
+
+        Memory for the store is reserved for all variables up to the current
+        value, but is only used by materialised variables. The store can be
+        placed in a buffer provided by the caller, e.g., shared memory
+        attached by multiple processes. The buffer has to be initialised with
+        zeros and to hold at least realisations_store_nbytes(current_value)
+        bytes.
+
+        Args:
+            current_value : tuple
+                index of the current value, has to have the form (idx process,
+                idx sample), the store holds realisations for all current
+                values with sample index idx sample
+            buffer : buffer [optional]
+                zero-initialised memory for the store, e.g., the buffer of a
+                multiprocessing.shared_memory.SharedMemory (default=None)
+        """
+        if not hasattr(self, 'data'):
+            raise AttributeError('No data has been added to this Data() '
+                                 'instance.')
+        self._realisations_store = _RealisationsStore(
+            self, current_value[1], buffer)
+
+    def disable_realisations_store(self):
+        """Remove the realisations store."""
+        self._realisations_store = None
+
+    def realisations_store_nbytes(self, current_value):
+        """Return memory required by a realisations store in bytes.
+
+        Args:
+            current_value : tuple
+                index of the current value, see enable_realisations_store()
+        """
+        return _RealisationsStore.get_nbytes(self, current_value[1])
+
+    def realisations_store_info(self):
+        """Return statistics of the realisations store.
+
+        Returns:
+            dict | None
+                sample index of the current value, no. requests served from
+                the store (hits) and no. variables materialised (misses),
+                counted per variable and by this process only, memory
+                footprint of materialised variables and of the whole store in
+                bytes; None if the store is not enabled
+        """
+        if self._realisations_store is None:
+            return None
+        return self._realisations_store.info()
+
+    def get_fingerprint(self):
+        """Return a fingerprint identifying the data.
+
+        The fingerprint consists of the data dimensions and a hash of the
+        (normalised) data. It is computed once after data are set, reading
+        the data in blocks of at most LAZY_BLOCK_BYTES bytes, such that it can
+        also be computed for LazyData.
+
+        Returns:
+            tuple
+                no. processes, no. samples, no. replications, and hash of the
+                data content
+        """
+        if getattr(self, '_fingerprint', None) is None:
+            h = hashlib.blake2b(digest_size=16)
+            itemsize = np.dtype(self.data.dtype).itemsize
+            block_samples = max(1, int(
+                LAZY_BLOCK_BYTES // (itemsize * self.n_replications)))
+            for process in range(self.n_processes):
+                for start in range(0, self.n_samples, block_samples):
+                    h.update(np.ascontiguousarray(
+                        self.data[process, start:start + block_samples, :]))
+            self._fingerprint = (self.n_processes, self.n_samples,
+                                 self.n_replications, h.hexdigest())
+        return self._fingerprint
+
+    def _get_cached_realisations(self, current_value, idx_list, n_real_time,
+                                 out):
+        """Return realisations from the cache, retrieve missing variables."""
+        cache = self._realisations_cache
+        stats = self._realisations_cache_stats
+        keys = [(tuple(current_value), tuple(idx)) for idx in idx_list]
+        columns = [cache.get(k) for k in keys]
+        missing = [i for i, c in enumerate(columns) if c is None]
+        stats['hits'] += len(keys) - len(missing)
+        stats['misses'] += len(missing)
+        for k, c in zip(keys, columns):
+            if c is not None:
+                cache.move_to_end(k)
+
+        # Retrieve all missing variables at once and add them to the cache.
+        if missing:
+            processes, samples = self._check_indices(
+                [idx_list[i] for i in missing], n_real_time)
+            realisations = self._gather_realisations(
+                processes, samples, n_real_time,
+                np.arange(self.n_replications))
+            realisations = realisations.reshape(len(missing), -1)
+            if self._data_has_nans:
+                assert(not np.isnan(realisations).any()), (
+                    'There are nans in the retrieved realisations.')
+            realisations.flags.writeable = False
+            for i, column in zip(missing, realisations):
+                columns[i] = column
+                if keys[i] not in cache:
+                    cache[keys[i]] = column
+                    stats['n_bytes'] += column.nbytes
+            self._evict_realisations()
+
+        if out is None and len(columns) == 1:
+            return columns[0][:, np.newaxis]
+        if out is None:
+            out = np.empty((columns[0].shape[0], len(columns)),
+                           dtype=self.data_type)
+        for i, column in enumerate(columns):
+            out[:, i] = column
+        return out
+
+    def _evict_realisations(self):
+        """Evict least recently used entries until the memory limit is met."""
+        stats = self._realisations_cache_stats
+        while stats['n_bytes'] > self._realisations_cache_max_bytes:
+            stats['n_bytes'] -= self._realisations_cache.popitem(
+                last=False)[1].nbytes
+
+    def _check_indices(self, idx_list, n_real_time):
+        """Return process and sample indices as arrays, check their bounds."""
+        processes = np.array([idx[0] for idx in idx_list])
+        samples = np.array([idx[1] for idx in idx_list])
+        if ((processes < 0).any() or (processes >= self.n_processes).any() or
+                (samples < 0).any() or
+                (samples + n_real_time > self.n_samples).any()):
+            raise IndexError('You tried to access variables {0} in a data set '
+                             'with {1} processes and {2} samples.'.format(
+                                idx_list, self.n_processes, self.n_samples))
+        return processes, samples
+
+    def _get_windows(self, n_real_time):
+        """Return sliding windows over samples of the data.
+
+        Return a read-only view of the data with dimensions processes x window
+        start x replications x no. samples, where each window has length
+        n_real_time.
+        """
+        return np.lib.stride_tricks.sliding_window_view(
+            self.data, n_real_time, axis=1)
+
+    def _gather_realisations(self, processes, samples, n_real_time,
+                             replications_order):
+        """Gather realisations for all indices and replications at once.
+
+        Returns:
+            numpy array
+                realisations with dimensions number of indices x no.
+                replications x no. samples
+        """
+        windows = self._get_windows(n_real_time)
+        return windows[processes[:, np.newaxis], samples[:, np.newaxis],
+                       replications_order[np.newaxis, :]]
 
     def _get_data_slice(self, process, offset_samples=0, shuffle=False):
         """Return data slice for a single process.
@@ -355,16 +678,18 @@ class Data():
             replication_index = np.arange(self.n_replications)
 
         try:
-            data_slice = self.data[process, offset_samples:, replication_index]
+            data_slice = self.data[process, offset_samples:, :][
+                :, replication_index]
         except IndexError:
             raise IndexError('You tried to access process {0} with an offset '
                              'of {1} in a data set of {2} processes and {3} '
                              'samples.'.format(process, offset_samples,
                                                self.n_processes,
                                                self.n_samples))
-        assert(not np.isnan(data_slice).any()), ('There are nans in the '
-                                                 'retrieved data slice.')
-        return data_slice.T, replication_index
+        if self._data_has_nans:
+            assert(not np.isnan(data_slice).any()), ('There are nans in the '
+                                                     'retrieved data slice.')
+        return data_slice, replication_index
 
     def slice_permute_replications(self, process):
         """Return data slice with permuted replications (time stays intact).
@@ -522,7 +847,10 @@ class Data():
         """
         if type(idx_list) is not list:
             raise TypeError('idx needs to be a list of tuples.')
-        return self.get_realisations(current_value, idx_list, shuffle=True)
+        realisations, replications_index = self.get_realisations(
+            current_value, idx_list, shuffle=True)
+        _count_surrogates(1, realisations)
+        return realisations, replications_index
 
     def permute_samples(self, current_value, idx_list, perm_settings):
         """Return realisations with permuted samples (repl. stays intact).
@@ -648,8 +976,101 @@ class Data():
             data_temp = realisations[mask, :]
             realisations_perm[mask, :] = data_temp[perm, :]
             perm_idx[mask] = perm
+        _count_surrogates(1, realisations_perm)
         return realisations_perm, perm_idx
 
+    def permute_replications_batch(self, current_value, idx_list, n_perm):
+        """Return multiple surrogates with permuted replications.
+
+        Create n_perm surrogates by permuting realisations over replications
+        while keeping the temporal structure (order of samples) intact, see
+        permute_replications(). Realisations are retrieved once and all
+        permutations are applied in a single operation. Calling this method is
+        equivalent to calling permute_replications() n_perm times and stacking
+        the results.
+
+        Args:
+            current_value : tuple
+                index of the current_value in the data
+            idx_list : list of tuples
+                indices of variables
+            n_perm : int
+                number of permutations
+
+        Returns:
+            numpy array
+                permuted realisations with dimensions (realisations * n_perm) x
+                number of indices
+            numpy array
+                permuted order of replications with dimensions n_perm x no.
+                replications
+
+        Raises:
+            TypeError if idx_realisations is not a list
+        """
+        if type(idx_list) is not list:
+            raise TypeError('idx needs to be a list of tuples.')
+        perm = np.empty((n_perm, self.n_replications), dtype=int)
+        for p in range(n_perm):
+            perm[p, :] = np.random.permutation(self.n_replications)
+        realisations = self._get_realisations_repl_samples(current_value,
+                                                           idx_list)
+        # Index replications with the permutation array, this returns
+        # surrogates with dimensions n_perm x repl. x samples x indices.
+        surrogates = realisations[perm]
+        _count_surrogates(n_perm, surrogates)
+        return surrogates.reshape(-1, len(idx_list)), perm
+
+    def permute_samples_batch(self, current_value, idx_list, perm_settings,
+                              n_perm):
+        """Return multiple surrogates with permuted samples.
+
+        Create n_perm surrogates by permuting realisations over samples (time)
+        while keeping the order of replications intact, see permute_samples()
+        for available permutation strategies. Realisations are retrieved once
+        and all permutations are applied in a single operation. Calling this
+        method is equivalent to calling permute_samples() n_perm times and
+        stacking the results.
+
+        Args:
+            current_value : tuple
+                index of the current_value in the data
+            idx_list : list of tuples
+                indices of variables
+            perm_settings : dict
+                settings specifying the allowed permutations, see
+                permute_samples()
+            n_perm : int
+                number of permutations
+
+        Returns:
+            numpy array
+                permuted realisations with dimensions (realisations * n_perm) x
+                number of indices
+            numpy array
+                permuted sample indices with dimensions n_perm x no. samples
+        """
+        n_samples = self.n_realisations_samples(current_value)
+        perm = np.empty((n_perm, n_samples), dtype=int)
+        for p in range(n_perm):
+            perm[p, :] = self._get_permutation_samples(n_samples,
+                                                       perm_settings)
+        realisations = self._get_realisations_repl_samples(current_value,
+                                                           idx_list)
+        # Apply each permutation to all replications, this returns surrogates
+        # with dimensions n_perm x repl. x samples x indices.
+        surrogates = realisations[np.arange(self.n_replications)[:, np.newaxis],
+                                  perm[:, np.newaxis, :]]
+        _count_surrogates(n_perm, surrogates)
+        return surrogates.reshape(-1, len(idx_list)), perm
+
+    def _get_realisations_repl_samples(self, current_value, idx_list):
+        """Return realisations with dimensions repl. x samples x indices."""
+        realisations = self.get_realisations(current_value, idx_list)[0]
+        return realisations.reshape(
+            self.n_replications, self.n_realisations_samples(current_value),
+            len(idx_list))
+
     def _get_permutation_samples(self, n_samples, perm_settings):
         """Generate permutation of n samples.
 
@@ -782,17 +1203,12 @@ class Data():
         idx_blocks = np.hstack((np.repeat(np.arange(n_blocks - 1), block_size),
                                 np.repeat(n_blocks - 1, rem_samples)))
 
-        # Permute samples indices according to permuted block indices.
-        perm = np.zeros(n).astype(int)  # allocate memory
-        idx_orig = np.arange(n)  # original order of sample indices
-        i_0 = 0
-        for b in perm_blocks:  # loop over permuted blocks
-            idx = idx_blocks == b  # indices of samples in curr. permuted block
-            i_1 = i_0 + sum(idx)
-            perm[i_0:i_1] = idx_orig[idx]  # append samples to permutation
-            i_0 = i_1
-
-        return perm
+        # Permute samples indices according to permuted block indices: sort
+        # samples by the position of their block in the block permutation,
+        # a stable sort keeps the order of samples within blocks intact.
+        block_position = np.empty(n_blocks, dtype=int)
+        block_position[perm_blocks] = np.arange(n_blocks)
+        return np.argsort(block_position[idx_blocks], kind='stable')
 
     def _circular_shift(self, n, max_shift):
         """Permute samples through shifting by a random number of samples.
@@ -1041,3 +1457,370 @@ class Data():
 
         # Discard transient effects (only take end of time series)
         self.set_data(x[:, -(n_samples + 1):-1, :], 'psr')
+
+
+def _count_surrogates(n_surrogates, surrogates):
+    """Add generated surrogates to the counters of active profilers."""
+    profiling.count('surrogates', n_surrogates)
+    profiling.count('surrogates_bytes', surrogates.nbytes)
+
+
+class LazyData(Data):
+    """Store data for information dynamics estimation that is read on demand.
+
+    LazyData behaves like Data but does not load the full recording into
+    memory. Instead, it keeps a reference to an array-like data source, e.g., a
+    numpy memmap or an h5py dataset, and only reads the samples required for
+    the current estimation. Normalisation statistics (mean and standard
+    deviation per process) are computed in a single streaming pass over the
+    data source, reading blocks of at most 'block_bytes' bytes, and are
+    applied whenever data are read.
+
+    Example:
+
+        >>> # Data on disk as raw float64 array of 3 processes x 1000000
+        >>> # samples x 10 replications
+        >>> d = np.memmap('data.dat', dtype=np.float64, mode='r',
+        >>>               shape=(3, 1000000, 10))
+        >>> data = LazyData(d, dim_order='psr')
+        >>>
+        >>> # HDF5 dataset with dimensions samples x processes
+        >>> f = h5py.File('data.h5', 'r')
+        >>> data = LazyData(f['data'], dim_order='sp')
+
+    Note:
+        The data source has to provide the attributes 'shape', 'ndim', and
+        'dtype' and has to support indexing with integers and slices (numpy's
+        basic indexing). Data sources are not modified. If data are not
+        normalised, the data source is not read when data are set and
+        retrieved realisations are always checked for nans.
+
+        numpy memmaps and h5py datasets are pickled by reference, i.e., by
+        file name, such that LazyData objects can be passed to other
+        processes without copying the data.
+
+    Args:
+        data : array-like [optional]
+            1/2/3-dimensional data source with raw data
+        dim_order : string [optional]
+            order of dimensions, accepts any combination of the characters
+            'p', 's', and 'r' for processes, samples, and replications; must
+            have the same length as the data dimensionality (default='psr')
+        normalise : bool [optional]
+            if True, data gets normalised per process (default=True)
+        block_bytes : int [optional]
+            maximum size of data blocks read when computing normalisation
+            statistics in bytes (default=64 MB)
+
+    Attributes:
+        data : _LazyArray
+            read-only view of the data source with dimensions processes x
+            samples x replications, can only be set via 'set_data' method
+        n_processes : int
+            number of processes
+        n_replications : int
+            number of replications
+        n_samples : int
+            number of samples in time
+        normalise : bool
+            if true, all data gets z-standardised per process
+    """
+
+    def __init__(self, data=None, dim_order='psr', normalise=True,
+                 block_bytes=LAZY_BLOCK_BYTES):
+        self.block_bytes = block_bytes
+        super().__init__(data, dim_order, normalise)
+
+    def set_data(self, data, dim_order):
+        """Overwrite data in an existing LazyData object.
+
+        Args:
+            data : array-like
+                1- to 3-dimensional data source
+            dim_order : string
+                order of dimensions, accepts any combination of the characters
+                'p', 's', and 'r' for processes, samples, and replications;
+                must have the same length as number of dimensions in data
+        """
+        if len(dim_order) > 3:
+            raise RuntimeError('dim_order can not have more than three '
+                               'entries')
+        if len(dim_order) != data.ndim:
+            raise RuntimeError('Data array dimension ({0}) and length of '
+                               'dim_order ({1}) are not equal.'.format(
+                                           data.ndim, len(dim_order)))
+
+        data_lazy = _LazyArray(data, dim_order)
+        self._set_data_size(data_lazy)
+        print('Adding data with properties: {0} processes, {1} samples, {2} '
+              'replications'.format(self.n_processes, self.n_samples,
+                                    self.n_replications))
+        try:
+            delattr(self, 'data')
+        except AttributeError:
+            pass
+        self.clear_realisations_cache()
+        self._realisations_store = None
+        self._fingerprint = None
+        if self.normalise:
+            mean, scale, has_nans = self._get_normalisation(data_lazy)
+            data_lazy.set_normalisation(mean, scale)
+        else:
+            has_nans = True
+        self._data = data_lazy
+        self._data_has_nans = has_nans
+        self.data_type = type(self.data[0, 0, 0])
+
+    def _get_normalisation(self, data_lazy):
+        """Compute mean and standard deviation per process in blocks.
+
+        Mean and variance are combined over blocks of samples using the
+        pairwise update by Chan et al. (1979). Like Data, the standard
+        deviation is computed with one degree of freedom and processes with
+        zero standard deviation are not scaled.
+        """
+        itemsize = np.dtype(data_lazy.source_dtype).itemsize
+        block_samples = max(
+            1, int(self.block_bytes // (itemsize * self.n_replications)))
+        mean = np.zeros(self.n_processes)
+        scale = np.ones(self.n_processes)
+        has_nans = False
+        for process in range(self.n_processes):
+            n, m, m2 = 0, 0., 0.
+            for start in range(0, self.n_samples, block_samples):
+                block = data_lazy[process, start:start + block_samples, :]
+                block = block.astype(np.float64, copy=False)
+                has_nans = has_nans or bool(np.isnan(block).any())
+                n_b = block.size
+                m_b = block.mean()
+                m2_b = np.sum((block - m_b)**2)
+                if n == 0:
+                    n, m, m2 = n_b, m_b, m2_b
+                else:
+                    delta = m_b - m
+                    m2 += m2_b + delta**2 * n * n_b / (n + n_b)
+                    m += delta * n_b / (n + n_b)
+                    n += n_b
+            mean[process] = m
+            sd = np.sqrt(m2 / (n - 1))
+            # Don't divide by standard devitation if process is constant.
+            if not np.isclose(sd, 0):
+                scale[process] = sd
+        return mean, scale, has_nans
+
+    def _get_windows(self, n_real_time):
+        """Return None, sliding windows are not available for lazy data."""
+        return None
+
+    def _gather_realisations(self, processes, samples, n_real_time,
+                             replications_order):
+        """Gather realisations, reading one block of samples per process.
+
+        Returns:
+            numpy array
+                realisations with dimensions number of indices x no.
+                replications x no. samples
+        """
+        realisations = np.empty(
+            (len(processes), len(replications_order), n_real_time),
+            dtype=self.data_type)
+        for process in np.unique(processes):
+            ind = np.where(processes == process)[0]
+            start = samples[ind].min()
+            block = self.data[process, start:samples[ind].max() + n_real_time,
+                              :]
+            windows = np.lib.stride_tricks.sliding_window_view(
+                block, n_real_time, axis=0)
+            realisations[ind] = windows[(samples[ind] - start)[:, np.newaxis],
+                                        replications_order[np.newaxis, :]]
+        return realisations
+
+
+class _LazyArray():
+    """Read-only view of an array-like data source in IDTxl's data format.
+
+    Map indices in the order processes x samples x replications to the
+    dimensions of the data source, read the requested data, and apply
+    normalisation per process. Only integers and slices are supported as
+    indices.
+    """
+
+    def __init__(self, source, dim_order):
+        self.source = source
+        self.dim_order = dim_order
+        # Source axis for each dimension in IDTxl's order, None for missing
+        # (singleton) dimensions.
+        self._axes = [dim_order.index(d) if d in dim_order else None
+                      for d in 'psr']
+        self.shape = tuple(1 if a is None else source.shape[a]
+                           for a in self._axes)
+        self.ndim = 3
+        self.source_dtype = np.dtype(source.dtype)
+        self.dtype = self.source_dtype
+        self.mean = None
+        self.scale = None
+
+    def set_normalisation(self, mean, scale):
+        """Set mean and scale per process applied to data when read."""
+        self.mean = mean
+        self.scale = scale
+        self.dtype = np.dtype(np.float64)
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 3:
+            raise IndexError('Too many indices for data with three '
+                             'dimensions.')
+        key = list(key) + [slice(None)] * (3 - len(key))
+        for dim, k in enumerate(key):
+            if isinstance(k, (int, np.integer)):
+                if k < 0:
+                    k += self.shape[dim]
+                if not 0 <= k < self.shape[dim]:
+                    raise IndexError(
+                        'Index {0} is out of bounds for dimension {1} with '
+                        'size {2}.'.format(key[dim], dim, self.shape[dim]))
+                key[dim] = int(k)
+            elif not isinstance(k, slice):
+                raise TypeError('Lazily loaded data only support indexing '
+                                'with integers and slices.')
+
+        # Read data and bring the remaining dimensions into IDTxl's order.
+        source_key = [slice(None)] * self.source.ndim
+        for axis, k in zip(self._axes, key):
+            if axis is not None:
+                source_key[axis] = k
+        data = np.asarray(self.source[tuple(source_key)])
+        source_kept = [a for a, k in enumerate(source_key)
+                       if isinstance(k, slice)]
+        kept = [a for a, k in zip(self._axes, key)
+                if a is not None and isinstance(k, slice)]
+        data = data.transpose([source_kept.index(a) for a in kept])
+        n_kept = 0
+        for axis, k in zip(self._axes, key):
+            if isinstance(k, slice):
+                if axis is None:
+                    data = np.expand_dims(data, n_kept)
+                    data = data[(slice(None),) * n_kept + (k,)]
+                n_kept += 1
+
+        if self.mean is not None:
+            mean = self.mean[key[0]]
+            scale = self.scale[key[0]]
+            if isinstance(key[0], slice):
+                mean = mean.reshape((-1,) + (1,) * (data.ndim - 1))
+                scale = scale.reshape((-1,) + (1,) * (data.ndim - 1))
+            data = (data - mean) / scale
+        return data[()] if data.ndim == 0 else data
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        source = self.source
+        if (isinstance(source, np.memmap) and
+                isinstance(source.base, mmap.mmap)):
+            state['source'] = ('memmap', source.filename, source.dtype,
+                               source.shape, source.offset,
+                               'F' if np.isfortran(source) else 'C')
+        elif hasattr(source, 'file') and hasattr(source, 'name'):
+            # h5py dataset, keep file name and path within the file.
+            state['source'] = ('hdf5', source.file.filename, source.name)
+        return state
+
+    def __setstate__(self, state):
+        source = state['source']
+        if isinstance(source, tuple) and source[0] == 'memmap':
+            state['source'] = np.memmap(
+                source[1], dtype=source[2], mode='r', shape=source[3],
+                offset=source[4], order=source[5])
+        elif isinstance(source, tuple) and source[0] == 'hdf5':
+            import h5py
+            state['source'] = h5py.File(source[1], 'r')[source[2]]
+        self.__dict__.update(state)
+
+
+class _RealisationsStore():
+    """Store realisations of variables for a single current value sample.
+
+    Realisations of variable (process, sample) are kept in row [process,
+    sample] of an array with dimensions [processes x (current value sample +
+    1) x realisations], where realisations are ordered as returned by
+    Data.get_realisations(). A flag per variable marks materialised rows.
+    Rows are written before their flag is set, such that a store in shared
+    memory can be filled concurrently by multiple workers: a row may be
+    materialised more than once if requested by two workers at the same time,
+    but a row is never read before it is complete.
+    """
+
+    def __init__(self, data, sample, buffer=None):
+        self.sample = sample
+        self.n_real_time = data.n_realisations_samples((0, sample))
+        self.n_replications = data.n_replications
+        self.shape, self.dtype, n_flag_bytes, nbytes = self._get_layout(
+            data, sample)
+        if buffer is None:
+            # Zero-initialised memory is only committed when written to.
+            buffer = np.zeros(nbytes, dtype=np.uint8)
+        buffer = np.frombuffer(buffer, dtype=np.uint8, count=nbytes)
+        self.filled = buffer[:self.shape[0] * self.shape[1]].reshape(
+            self.shape[:2])
+        self.realisations = buffer[n_flag_bytes:].view(self.dtype).reshape(
+            self.shape)
+        self.nbytes = nbytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _get_layout(data, sample):
+        shape = (data.n_processes, sample + 1,
+                 data.n_realisations_samples((0, sample)) *
+                 data.n_replications)
+        dtype = np.dtype(data.data_type)
+        # Align realisations to 64 bytes after the flags.
+        n_flag_bytes = -(-shape[0] * shape[1] // 64) * 64
+        nbytes = n_flag_bytes + int(np.prod(shape)) * dtype.itemsize
+        return shape, dtype, n_flag_bytes, nbytes
+
+    @classmethod
+    def get_nbytes(cls, data, sample):
+        """Return memory required by the store in bytes."""
+        return cls._get_layout(data, sample)[3]
+
+    def info(self):
+        """Return statistics of the store."""
+        n_filled = int(np.count_nonzero(self.filled))
+        return {'sample': self.sample,
+                'hits': self.hits,
+                'misses': self.misses,
+                'n_entries': n_filled,
+                'n_bytes': n_filled * self.shape[2] * self.dtype.itemsize,
+                'max_bytes': self.nbytes}
+
+    def get_realisations(self, data, idx_list, out):
+        """Return realisations as get_realisations(), materialise missing.
+        """
+        processes, samples = data._check_indices(idx_list, self.n_real_time)
+        missing = np.where(self.filled[processes, samples] == 0)[0]
+        self.hits += len(idx_list) - len(missing)
+        self.misses += len(missing)
+        if missing.size > 0:
+            realisations = data._gather_realisations(
+                processes[missing], samples[missing], self.n_real_time,
+                np.arange(self.n_replications))
+            realisations = realisations.reshape(len(missing), -1)
+            if data._data_has_nans:
+                assert(not np.isnan(realisations).any()), (
+                    'There are nans in the retrieved realisations.')
+            self.realisations[processes[missing], samples[missing]] = (
+                realisations)
+            self.filled[processes[missing], samples[missing]] = 1
+
+        if out is None and len(idx_list) == 1:
+            column = self.realisations[processes[0], samples[0]][:, np.newaxis]
+            column.flags.writeable = False
+            return column
+        if out is None:
+            out = np.empty((self.shape[2], len(idx_list)), dtype=self.dtype)
+        out[:] = self.realisations[processes, samples].T
+        return out
+
@@ -3,13 +3,36 @@ import imp
 import os
 import importlib
 import inspect
+import time
+import hashlib
+import functools
+import threading
+import atexit
+from collections import OrderedDict
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from pprint import pprint
 from abc import ABCMeta, abstractmethod
 import numpy as np
 from . import idtxl_exceptions as ex
+from . import profiling
 
 MODULE_EXTENSIONS = ('.py')  # ('.py', '.pyc', '.pyo')
 ESTIMATOR_PREFIX = ('estimators_')
+PARALLEL_BACKENDS = ('serial', 'threads', 'processes')
+CACHE_MAX_BYTES = 100 * 1024 ** 2  # default memory limit of estimate caches
+# Approx. memory per cache entry in bytes (key, value, and dictionary node),
+# measured with tracemalloc for keys of two and three variables (580 and 630
+# bytes, 64-bit CPython 3.11).
+CACHE_ENTRY_OVERHEAD = 600
+ESTIMATE_MAX_BYTES = 1024 ** 3  # default memory limit of batched calls
+
+# The worker pool is kept alive between calls to estimate_parallel() to avoid
+# the overhead of starting workers (and JVMs) for every call. Only the pool for
+# the most recent (backend, n_workers) is kept, all pools are shut down at exit.
+_worker_pools = {}
+# Estimator instances are created once per worker thread or process.
+_worker_state = threading.local()
 
 
 def _package_contents():
@@ -247,6 +270,19 @@ class Estimator(metaclass=ABCMeta):
         provided in re-use as list of dictionary keys indicating entries in
         data for re-use.
 
+        For estimators that do not support parallel estimation, chunks can be
+        distributed over a pool of workers by setting 'parallel_backend' in
+        the estimator settings to 'threads' or 'processes' (default='serial').
+        The number of workers is set by 'n_workers' (default=no. CPUs). Each
+        worker creates its own estimator instance from the estimator settings.
+        For 'processes', data are passed to workers through shared memory,
+        which requires Python 3.8 or later.
+        Results are always returned in chunk order.
+
+        If the estimator returns local values ('local_values' is True in the
+        estimator settings), local values of all chunks are returned
+        concatenated in chunk order.
+
         Args:
             self : Estimator class instance
                 estimator
@@ -259,7 +295,8 @@ class Estimator(metaclass=ABCMeta):
 
         Returns:
             numpy array
-                estimated values for each chunk
+                estimated values for each chunk, or local values concatenated
+                over chunks
                 
         Raises:
             ex.AlgorithmExhaustedError
@@ -306,29 +343,554 @@ class Estimator(metaclass=ABCMeta):
                                data[slice_vars[0]].shape[0],
                                data[slice_vars[0]].shape[0] % n_chunks))
 
-            # Cut data into chunks and call estimator serially on each chunk.
+            # Cut data into chunks and call estimator on each chunk, either
+            # serially or using a pool of workers.
             chunk_size = int(n_samples_total / n_chunks)
-            idx_1 = 0
-            idx_2 = chunk_size
-            results = np.empty((n_chunks))
-            for i in range(n_chunks):
-                chunk_data = {}
-                # Slice data into single chunks
-                for v in slice_vars:  # NOTE: I am consciously not creating a deep copy here to save memory
-                    if data[v] is not None:
-                        chunk_data[v] = data[v][idx_1:idx_2, :]
-                    else:
-                        chunk_data[v] = data[v]
-                # Collect data that is reused over chunks.
-                for v in re_use:
-                    if data[v] is not None:
-                        assert data[v].shape[0] == chunk_size, (
-                            'No. samples in variable {0} ({1}) is not equal '
-                            'to chunk size ({2}).'.format(
-                                v, data[v].shape[0], chunk_size))
-                    chunk_data[v] = data[v]
-                results[i] = self.estimate(**chunk_data)
-                idx_1 = idx_2
-                idx_2 += chunk_size
-
-            return results
+            for v in re_use:
+                if data[v] is not None:
+                    assert data[v].shape[0] == chunk_size, (
+                        'No. samples in variable {0} ({1}) is not equal '
+                        'to chunk size ({2}).'.format(
+                            v, data[v].shape[0], chunk_size))
+            backend, n_workers = self._get_parallel_backend()
+            if backend == 'serial' or n_chunks == 1:
+                results = [self.estimate(
+                    **_get_chunk(data, slice_vars, i, chunk_size))
+                    for i in range(n_chunks)]
+                return _collect_chunks(results, self._returns_local_values())
+            else:
+                return self._estimate_chunks_pool(
+                    backend, n_workers, n_chunks, chunk_size, slice_vars,
+                    data)
+
+    def estimate_surrogates(self, var1, var2, conditional=None, n_chunks=1):
+        """Estimate measure for multiple chunks of var1 and fixed var2, cond.
+
+        Estimate the measure for multiple data sets ('chunks'), where only the
+        realisations of var1 differ between chunks, while var2 and the
+        conditional are the same for all chunks. This is the case when
+        estimating surrogate distributions, where only var1 is permuted, or
+        when testing multiple candidates against the same current value and
+        conditioning set.
+
+        The default implementation calls estimate_parallel(), re-using var2
+        and the conditional for all chunks. Estimators may overwrite this
+        method to re-use search structures built for var2 and the conditional
+        over chunks (see, e.g., PythonKraskovCMI).
+
+        Args:
+            var1 : numpy array
+                realisations of first variable for all chunks, 2D numpy
+                array with dimensions [(realisations * n_chunks) x variable
+                dimension]
+            var2 : numpy array
+                realisations of the second variable for a single chunk
+                [realisations x variable dimension]
+            conditional : numpy array [optional]
+                realisations of the conditioning variable for a single chunk
+                (similar to var2)
+            n_chunks : int [optional]
+                number of data chunks in var1 (default=1)
+
+        Returns:
+            numpy array
+                estimated values for each chunk
+        """
+        data = {'var1': var1, 'var2': var2}
+        re_use = ['var2']
+        if conditional is not None:
+            data['conditional'] = conditional
+            re_use.append('conditional')
+        return self.estimate_parallel(n_chunks=n_chunks, re_use=re_use,
+                                      **data)
+
+    def get_max_chunks(self, chunk_bytes):
+        """Return the max. number of chunks passed to a single estimator call.
+
+        Batched requests, e.g., surrogates for all candidates in a candidate
+        set, are split into calls such that the data passed to a single call
+        does not exceed the estimator's memory limit. The memory limit is
+        read from 'max_mem' in the estimator settings (default=1 GB); GPU
+        estimators may derive it from the device memory.
+
+        Args:
+            chunk_bytes : int
+                memory required by the data of a single chunk in bytes
+
+        Returns:
+            int
+                max. number of chunks per call (at least one)
+        """
+        return max(1, int(self._get_max_mem() // chunk_bytes))
+
+    def _get_max_mem(self):
+        """Return max. memory in bytes for data passed to a single call."""
+        return getattr(self, 'settings', {}).get('max_mem',
+                                                 ESTIMATE_MAX_BYTES)
+
+    def _returns_local_values(self):
+        return getattr(self, 'settings', {}).get('local_values', False)
+
+    def _get_parallel_backend(self):
+        """Return backend and number of workers for serial chunk estimation.
+
+        Read the settings 'parallel_backend' (default='serial') and
+        'n_workers' (default=no. CPUs) from the estimator settings.
+        """
+        settings = getattr(self, 'settings', {})
+        backend = settings.get('parallel_backend', 'serial')
+        if backend not in PARALLEL_BACKENDS:
+            raise RuntimeError(
+                'Unknown parallel backend {0}, use one of {1}.'.format(
+                    backend, PARALLEL_BACKENDS))
+        n_workers = settings.get('n_workers', None)
+        if n_workers is None:
+            n_workers = os.cpu_count()
+        assert int(n_workers) > 0, 'n_workers must be positive.'
+        return backend, int(n_workers)
+
+    def _estimate_chunks_pool(self, backend, n_workers, n_chunks, chunk_size,
+                              slice_vars, data):
+        """Estimate measure for individual chunks using a pool of workers.
+
+        Each worker creates its own instance of the estimator class from the
+        current estimator settings, such that estimators holding non-thread-
+        safe or non-picklable objects (e.g., JIDT calculators) can be used.
+        For the 'processes' backend, data are passed to the workers once
+        through shared memory and workers only receive indices of the chunks
+        to be estimated. Results are returned in chunk order.
+        """
+        # Tasks are blocks of consecutive chunks, use a few blocks per worker
+        # to balance load between workers.
+        n_blocks = min(n_chunks, 4 * n_workers)
+        blocks = np.array_split(np.arange(n_chunks), n_blocks)
+        settings = self.settings.copy()
+        settings['parallel_backend'] = 'serial'
+        local_values = self._returns_local_values()
+        # Workers re-create the estimator if class or settings change.
+        estimator_id = (type(self), repr(sorted(settings.items())))
+        pool = _get_worker_pool(backend, n_workers)
+
+        if backend == 'threads':
+            tasks = [(settings, estimator_id, data, slice_vars, chunk_size,
+                      b) for b in blocks]
+            results = list(pool.map(_estimate_chunks_worker, tasks))
+        else:
+            # Shared memory is imported here as it requires Python 3.8+.
+            from multiprocessing import shared_memory
+            shm_list = []
+            try:
+                shared_data = {}
+                for k in data.keys():
+                    if data[k] is None:
+                        shared_data[k] = None
+                        continue
+                    a = np.ascontiguousarray(data[k])
+                    shm = shared_memory.SharedMemory(
+                        create=True, size=max(a.nbytes, 1))
+                    shm_list.append(shm)
+                    np.ndarray(a.shape, dtype=a.dtype, buffer=shm.buf)[:] = a
+                    shared_data[k] = (shm.name, a.shape, a.dtype.str)
+                tasks = [(settings, estimator_id, shared_data, slice_vars,
+                          chunk_size, b) for b in blocks]
+                results = list(pool.map(_estimate_chunks_worker, tasks))
+            finally:
+                for shm in shm_list:
+                    shm.close()
+                    shm.unlink()
+        return _collect_chunks([r for block in results for r in block],
+                               local_values)
+
+
+def _get_chunk(data, slice_vars, i, chunk_size):
+    """Return data for the i-th chunk.
+
+    Slice variables in slice_vars, variables that are not sliced are re-used
+    for every chunk.
+    """
+    chunk_data = {}
+    for v in data.keys():
+        # NOTE: I am consciously not creating a deep copy here to save memory
+        if v in slice_vars and data[v] is not None:
+            chunk_data[v] = data[v][i * chunk_size:(i + 1) * chunk_size, :]
+        else:
+            chunk_data[v] = data[v]
+    return chunk_data
+
+
+def _collect_chunks(results, local_values):
+    """Return estimates of individual chunks as a single array.
+
+    Average values are returned as one value per chunk, local values are
+    concatenated over chunks.
+    """
+    if local_values:
+        return np.concatenate([np.ravel(r) for r in results])
+    estimates = np.empty(len(results))
+    for i, r in enumerate(results):
+        estimates[i] = np.ravel(r)[0]
+    return estimates
+
+
+def _get_worker_pool(backend, n_workers):
+    """Return a pool of workers, start a new pool if necessary.
+
+    Processes are started using the 'spawn' method because a JVM that has
+    been started in the parent process can not be used in forked children.
+    A pool with a different backend or number of workers is shut down before
+    a new pool is started, such that at most one pool is alive.
+    """
+    if (backend, n_workers) not in _worker_pools:
+        shutdown_worker_pools()
+        if backend == 'threads':
+            pool = ThreadPoolExecutor(max_workers=n_workers)
+        else:
+            pool = ProcessPoolExecutor(max_workers=n_workers,
+                                       mp_context=mp.get_context('spawn'))
+        _worker_pools[(backend, n_workers)] = pool
+    return _worker_pools[(backend, n_workers)]
+
+
+def shutdown_worker_pools():
+    """Shut down all worker pools used by Estimator.estimate_parallel()."""
+    for pool in _worker_pools.values():
+        pool.shutdown()
+    _worker_pools.clear()
+
+
+atexit.register(shutdown_worker_pools)
+
+
+def _estimate_chunks_worker(task):
+    """Estimate measure for a block of chunks in a worker thread or process.
+
+    Data are either passed as numpy arrays (threads) or as tuples
+    (name, shape, dtype) describing shared memory blocks (processes).
+    """
+    settings, estimator_id, data, slice_vars, chunk_size, chunks = task
+    # Create one estimator instance per worker and calling estimator.
+    if getattr(_worker_state, 'estimator_id', None) != estimator_id:
+        _worker_state.estimator = estimator_id[0](settings)
+        _worker_state.estimator_id = estimator_id
+    estimator = _worker_state.estimator
+
+    shm_list = []
+    worker_data = {}
+    try:
+        for k, v in data.items():
+            if v is None or isinstance(v, np.ndarray):
+                worker_data[k] = v
+            else:
+                from multiprocessing import shared_memory
+                shm = shared_memory.SharedMemory(name=v[0])
+                shm_list.append(shm)
+                worker_data[k] = np.ndarray(v[1], dtype=np.dtype(v[2]),
+                                            buffer=shm.buf)
+        # Convert estimates to numpy, such that JIDT return values can be
+        # passed back from worker processes.
+        results = [np.asarray(estimator.estimate(
+            **_get_chunk(worker_data, slice_vars, c, chunk_size)),
+            dtype=float) for c in chunks]
+    finally:
+        worker_data.clear()
+        for shm in shm_list:
+            shm.close()
+    return results
+
+
+class CachedEstimator(Estimator):
+    """Cache estimates returned by an estimator.
+
+    Wrap an estimator instance and memoise its results. Estimates are cached
+    per chunk, where the cache key is a hash of the realisations of all
+    variables entering the estimation. Hence, repeated estimations on
+    identical realisations are only computed once, independent of whether
+    they were requested through estimate() or estimate_parallel(). Calls to
+    estimate_surrogates() are passed on to the estimator without caching:
+    surrogates are random permutations that are not requested again (see
+    the surrogate store of NetworkAnalysis for re-using surrogates), and
+    caching them would evict re-usable estimates. Estimates of local values
+    and analytic surrogates are not cached either.
+
+    Cached entries are evicted in least-recently-used (LRU) order if the
+    memory used by the cache exceeds max_bytes. The memory used is
+    approximated by CACHE_ENTRY_OVERHEAD bytes per entry. All other
+    attributes and methods are passed on to the wrapped estimator.
+
+    Note that estimators may add random noise to the data before estimation,
+    such that repeated estimations on the same data may return slightly
+    different results. A cached estimator returns the first estimate for all
+    subsequent requests.
+
+    Args:
+        estimator : Estimator instance
+            estimator to be wrapped
+        max_bytes : int [optional]
+            approximate maximum memory used by the cache in bytes
+            (default=100 MB)
+
+    Attributes:
+        hits : int
+            number of estimates returned from the cache
+        misses : int
+            number of estimates that had to be computed
+    """
+
+    def __init__(self, estimator, max_bytes=CACHE_MAX_BYTES):
+        self._estimator = estimator
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._n_bytes = 0
+
+    def __getattr__(self, name):
+        # Pass all other attributes (e.g., settings) on to the estimator.
+        if name == '_estimator':
+            raise AttributeError(name)
+        return getattr(self._estimator, name)
+
+    def is_parallel(self):
+        return self._estimator.is_parallel()
+
+    def is_analytic_null_estimator(self):
+        return self._estimator.is_analytic_null_estimator()
+
+    def get_max_chunks(self, chunk_bytes):
+        return self._estimator.get_max_chunks(chunk_bytes)
+
+    def cache_info(self):
+        """Return cache statistics.
+
+        Returns:
+            dict
+                no. cache hits and misses, no. entries in the cache, memory
+                used by the cache in bytes, and memory limit in bytes
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'n_entries': len(self._cache),
+                'n_bytes': self._n_bytes,
+                'max_bytes': self.max_bytes}
+
+    def clear_cache(self):
+        """Remove all entries from the cache and reset counters."""
+        self._cache.clear()
+        self._n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _use_cache(self):
+        return not self._estimator.settings.get('local_values', False)
+
+    def _lookup(self, key):
+        """Return cached value or None, update LRU order and counters."""
+        try:
+            value = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._cache.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _store(self, key, value):
+        """Add value to the cache, evict entries if memory limit is exceeded.
+        """
+        if key in self._cache:
+            return
+        self._cache[key] = float(value)
+        self._n_bytes += CACHE_ENTRY_OVERHEAD
+        while self._n_bytes > self.max_bytes and self._cache:
+            self._cache.popitem(last=False)
+            self._n_bytes -= CACHE_ENTRY_OVERHEAD
+
+    def _return_value(self, value):
+        # Parallel estimators return arrays from estimate(), JIDT estimators
+        # return floats.
+        if self._estimator.is_parallel():
+            return np.array([value])
+        else:
+            return value
+
+    def estimate(self, *args, **kwargs):
+        """Return cached estimate or call the estimator's estimate().
+
+        See documentation of the wrapped estimator for arguments.
+        """
+        if not self._use_cache():
+            return self._estimator.estimate(*args, **kwargs)
+        arguments = inspect.signature(self._estimator.estimate).bind(
+            *args, **kwargs).arguments
+        if arguments.get('n_chunks', 1) != 1:
+            return self._estimator.estimate(*args, **kwargs)
+        arguments.pop('n_chunks', None)
+        key = _get_chunk_key(
+            {k: _hash_array(v) for k, v in arguments.items()})
+        if key is None:
+            return self._estimator.estimate(*args, **kwargs)
+
+        value = self._lookup(key)
+        if value is None:
+            result = self._estimator.estimate(*args, **kwargs)
+            if np.size(result) == 1:
+                self._store(key, np.ravel(result)[0])
+            return result
+        return self._return_value(value)
+
+    def estimate_parallel(self, n_chunks=1, re_use=None, **data):
+        """Return cached estimates or call estimate_parallel() for new chunks.
+
+        See documentation of Estimator.estimate_parallel() for arguments.
+        """
+        if re_use is None:
+            re_use = []
+        slice_vars = [v for v in data.keys()
+                      if v not in re_use and data[v] is not None]
+        if not self._use_cache() or not slice_vars:
+            return self._estimator.estimate_parallel(
+                n_chunks=n_chunks, re_use=re_use, **data)
+        chunk_size = data[slice_vars[0]].shape[0] // n_chunks
+        return self._estimate_chunks(
+            n_chunks, chunk_size, slice_vars, data,
+            lambda n, d: self._estimator.estimate_parallel(
+                n_chunks=n, re_use=re_use, **d))
+
+    def estimate_surrogates(self, var1, var2, conditional=None, n_chunks=1):
+        """Call the estimator's estimate_surrogates() without caching.
+
+        See documentation of Estimator.estimate_surrogates() for arguments.
+        """
+        return self._estimator.estimate_surrogates(
+            var1=var1, var2=var2, conditional=conditional, n_chunks=n_chunks)
+
+    def _estimate_chunks(self, n_chunks, chunk_size, slice_vars, data,
+                         estimate):
+        """Look up chunks in cache, estimate missing chunks in a single call.
+        """
+        # Hash re-used variables once, sliced variables for every chunk.
+        hashes = {v: _hash_array(data[v]) for v in data.keys()
+                  if v not in slice_vars}
+        keys = []
+        for i in range(n_chunks):
+            chunk = _get_chunk(data, slice_vars, i, chunk_size)
+            for v in slice_vars:
+                hashes[v] = _hash_array(chunk[v])
+            keys.append(_get_chunk_key(hashes))
+        if None in keys:
+            return estimate(n_chunks, data)
+
+        results = np.empty(n_chunks)
+        missing = []
+        for i, k in enumerate(keys):
+            value = self._lookup(k)
+            if value is None:
+                missing.append(i)
+            else:
+                results[i] = value
+        if missing:
+            if len(missing) == n_chunks:
+                missing_data = data
+            else:
+                rows = (np.array(missing)[:, np.newaxis] * chunk_size +
+                        np.arange(chunk_size)).ravel()
+                missing_data = {v: (data[v][rows] if v in slice_vars
+                                    else data[v]) for v in data.keys()}
+            estimates = estimate(len(missing), missing_data)
+            for i, value in zip(missing, estimates):
+                results[i] = value
+                self._store(keys[i], value)
+        return results
+
+
+class ProfiledEstimator(Estimator):
+    """Count calls to an estimator and time spent in the estimator.
+
+    Wrap an estimator instance and add the number of calls to estimate(),
+    estimate_parallel(), and estimate_surrogates(), the number of chunks
+    estimated, the memory of the data passed to the estimator, and the time
+    spent in the estimator to the counters of all active profilers (see
+    documentation of profiling.Profiler). Calls are passed on to the wrapped
+    estimator unchanged if no profiler is active. All other attributes and
+    methods are passed on to the wrapped estimator.
+
+    Args:
+        estimator : Estimator instance
+            estimator to be wrapped
+    """
+
+    def __init__(self, estimator):
+        self._estimator = estimator
+
+        # Expose the signature of the wrapped estimate(), such that wrappers
+        # binding arguments by name (e.g., CachedEstimator) can be stacked.
+        def estimate(*args, **kwargs):
+            return self._call('estimate', kwargs.get('n_chunks', 1), args,
+                              kwargs)
+        self.estimate = functools.update_wrapper(estimate, estimator.estimate)
+
+    def __getattr__(self, name):
+        # Pass all other attributes (e.g., settings) on to the estimator.
+        if name == '_estimator':
+            raise AttributeError(name)
+        return getattr(self._estimator, name)
+
+    def is_parallel(self):
+        return self._estimator.is_parallel()
+
+    def is_analytic_null_estimator(self):
+        return self._estimator.is_analytic_null_estimator()
+
+    def get_max_chunks(self, chunk_bytes):
+        return self._estimator.get_max_chunks(chunk_bytes)
+
+    def estimate(self, *args, **kwargs):
+        """Call the estimator's estimate(), see its documentation."""
+        return self._call('estimate', kwargs.get('n_chunks', 1), args, kwargs)
+
+    def estimate_parallel(self, n_chunks=1, re_use=None, **data):
+        """Call estimate_parallel(), see Estimator.estimate_parallel()."""
+        return self._call('estimate_parallel', n_chunks, (),
+                          dict(data, n_chunks=n_chunks, re_use=re_use))
+
+    def estimate_surrogates(self, var1, var2, conditional=None, n_chunks=1):
+        """Call estimate_surrogates(), see Estimator.estimate_surrogates()."""
+        data = {'var1': var1, 'var2': var2, 'n_chunks': n_chunks}
+        if conditional is not None:
+            data['conditional'] = conditional
+        return self._call('estimate_surrogates', n_chunks, (), data)
+
+    def _call(self, method, n_chunks, args, kwargs):
+        estimate = getattr(self._estimator, method)
+        if not profiling.is_active():
+            return estimate(*args, **kwargs)
+        n_bytes = sum(a.nbytes for a in list(args) + list(kwargs.values())
+                      if isinstance(a, np.ndarray))
+        t0 = time.perf_counter()
+        result = estimate(*args, **kwargs)
+        profiling.count('estimator_time', time.perf_counter() - t0)
+        profiling.count('{0}_calls'.format(method))
+        profiling.count('chunks', n_chunks)
+        profiling.count('estimator_bytes', n_bytes)
+        return result
+
+
+def _hash_array(a):
+    """Return hash of array shape, type, and content (None for None).
+
+    Return False if the input can not be hashed.
+    """
+    if a is None:
+        return None
+    if not isinstance(a, np.ndarray):
+        return False
+    a = np.ascontiguousarray(a)
+    return (a.shape, a.dtype.str,
+            hashlib.blake2b(a.data, digest_size=16).digest())
+
+
+def _get_chunk_key(hashes):
+    """Return cache key from array hashes, return None if not hashable."""
+    if False in hashes.values():
+        return None
+    return tuple(sorted((k, h) for k, h in hashes.items() if h is not None))
@@ -1,6 +1,7 @@
 """Provide JIDT estimators."""
 from pkg_resources import resource_filename
 import numpy as np
+from scipy.stats import chi2
 from abc import abstractmethod
 from idtxl.estimator import Estimator
 from . import idtxl_exceptions as ex
@@ -90,6 +91,19 @@ class JidtEstimator(Estimator):
         assert settings['source_target_delay'] >= 0, 'Source-target delay must be >= 0'
         return settings
 
+    def _get_te_n_observations(self, n_samples):
+        """Return no. observations used by JIDT for TE estimation.
+
+        Observations start at the first sample for which the full target and
+        source embeddings are available.
+        """
+        start = max((self.settings['history_target'] - 1) *
+                    self.settings['tau_target'] + 1,
+                    (self.settings['history_source'] - 1) *
+                    self.settings['tau_source'] +
+                    self.settings['source_target_delay'])
+        return n_samples - start
+
     def is_parallel(self):
         return False
 
@@ -269,27 +283,52 @@ class JidtDiscrete(JidtEstimator):
         """
         pass
 
-    def estimate_surrogates_analytic(self, n_perm=200, **data):
+    @abstractmethod
+    def get_analytic_null_parameters(self, **data):
+        """Return parameters of the analytic (chi-square) null distribution.
+
+        Args:
+            data : numpy arrays
+                realisations of random variables required for the calculation
+                (varies between estimators, e.g. 2 variables for MI, 3 for
+                CMI). Formatted as per the estimate method for this estimator.
+
+        Returns:
+            int
+                degrees of freedom of the chi-square distribution
+            int
+                number of observations used by JIDT for estimation
+        """
+        pass
+
+    def estimate_surrogates_analytic(self, n_perm=200, n_sets=None, **data):
         """Return estimate of the analytical surrogate distribution.
 
         This method must be implemented because this class'
-        is_analytic_null_estimator() method returns true.
+        is_analytic_null_estimator() method returns true. All surrogates are
+        drawn from the chi-square distribution in a single call.
 
         Args:
             n_perms : int [optional]
                 number of permutations (default=200)
+            n_sets : int [optional]
+                if set, return surrogates for n_sets variables with the same
+                dimensions as the variables in data, e.g., for all candidates
+                in a candidate set (default=None)
             data : numpy arrays
                 realisations of random variables required for the calculation
                 (varies between estimators, e.g. 2 variables for MI, 3 for
                 CMI). Formatted as per the estimate method for this estimator.
 
         Returns:
-            float | numpy array
+            numpy array
                 n_perm surrogates of the average MI/CMI/TE over all samples
                 under the null hypothesis of no relationship between var1 and
-                var2 (in the context of conditional)
+                var2 (in the context of conditional), [n_sets x n_perm] if
+                n_sets is set
         """
-        return common_estimate_surrogates_analytic(self, n_perm, **data)
+        return common_estimate_surrogates_analytic(self, n_perm, n_sets,
+                                                   **data)
 
 
 class JidtGaussian(JidtEstimator):
@@ -345,27 +384,52 @@ class JidtGaussian(JidtEstimator):
         self.estimate(**data)
         return self.calc.computeSignificance()
 
-    def estimate_surrogates_analytic(self, n_perm=200, **data):
+    @abstractmethod
+    def get_analytic_null_parameters(self, **data):
+        """Return parameters of the analytic (chi-square) null distribution.
+
+        Args:
+            data : numpy arrays
+                realisations of random variables required for the calculation
+                (varies between estimators, e.g. 2 variables for MI, 3 for
+                CMI). Formatted as per the estimate method for this estimator.
+
+        Returns:
+            int
+                degrees of freedom of the chi-square distribution
+            int
+                number of observations used by JIDT for estimation
+        """
+        pass
+
+    def estimate_surrogates_analytic(self, n_perm=200, n_sets=None, **data):
         """Estimate the surrogate distribution analytically.
 
         This method must be implemented because this class'
-        is_analytic_null_estimator() method returns true
+        is_analytic_null_estimator() method returns true. All surrogates are
+        drawn from the chi-square distribution in a single call.
 
         Args:
             n_perms : int
                 number of permutations (default=200)
+            n_sets : int [optional]
+                if set, return surrogates for n_sets variables with the same
+                dimensions as the variables in data, e.g., for all candidates
+                in a candidate set (default=None)
             data : numpy arrays
                 realisations of random variables required for the calculation
                 (varies between estimators, e.g. 2 variables for MI, 3 for
                 CMI). Formatted as per estimate_parallel for this estimator.
 
         Returns:
-            float | numpy array
+            numpy array
                 n_perm surrogates of the average MI/CMI/TE over all samples
                 under the null hypothesis of no relationship between var1 and
-                var2 (in the context of conditional)
+                var2 (in the context of conditional), [n_sets x n_perm] if
+                n_sets is set
         """
-        return common_estimate_surrogates_analytic(self, n_perm, **data)
+        return common_estimate_surrogates_analytic(self, n_perm, n_sets,
+                                                   **data)
 
 
 class JidtKraskovCMI(JidtKraskov):
@@ -648,6 +712,40 @@ class JidtDiscreteCMI(JidtDiscrete):
         (est, jidt_calc) = self.estimate(var1, var2, conditional, True)
         return jidt_calc.computeSignificance()
 
+    def get_analytic_null_parameters(self, var1, var2, conditional=None):
+        """Return parameters of the analytic (chi-square) null distribution.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, either a 2D numpy array where
+                array dimensions represent [realisations x variable dimension]
+                or a 1D array representing [realisations]
+            var2 : numpy array
+                realisations of the second variable (similar to var1)
+            conditional : numpy array [optional]
+                realisations of the conditioning variable (similar to var), if
+                no conditional is provided, return parameters for the MI
+                between var1 and var2
+
+        Returns:
+            int
+                degrees of freedom of the chi-square distribution
+            int
+                number of observations used by JIDT for estimation
+        """
+        if (conditional is None) or (self.settings['alphc'] == 0):
+            est = JidtDiscreteMI(self.settings)
+            return est.get_analytic_null_parameters(var1, var2)
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        conditional = self._ensure_two_dim_input(conditional)
+        alph1_base = int(np.power(self.settings['alph1'], var1.shape[1]))
+        alph2_base = int(np.power(self.settings['alph2'], var2.shape[1]))
+        cond_base = int(np.power(self.settings['alphc'],
+                                 conditional.shape[1]))
+        return ((alph1_base - 1) * (alph2_base - 1) * cond_base,
+                var1.shape[0])
+
 
 class JidtDiscreteMI(JidtDiscrete):
     """Calculate MI with JIDT's discrete-variable implementation.
@@ -800,6 +898,30 @@ class JidtDiscreteMI(JidtDiscrete):
         (est, jidt_calc) = self.estimate(var1, var2, True)
         return jidt_calc.computeSignificance()
 
+    def get_analytic_null_parameters(self, var1, var2):
+        """Return parameters of the analytic (chi-square) null distribution.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, either a 2D numpy array where
+                array dimensions represent [realisations x variable dimension]
+                or a 1D array representing [realisations]
+            var2 : numpy array
+                realisations of the second variable (similar to var1)
+
+        Returns:
+            int
+                degrees of freedom of the chi-square distribution
+            int
+                number of observations used by JIDT for estimation
+        """
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        base_for_var1 = int(np.power(self.settings['alph1'], var1.shape[1]))
+        base_for_var2 = int(np.power(self.settings['alph2'], var2.shape[1]))
+        return ((base_for_var1 - 1) * (base_for_var2 - 1),
+                var1.shape[0] - self.settings['lag_mi'])
+
 
 class JidtKraskovMI(JidtKraskov):
     """Calculate mutual information with JIDT's Kraskov implementation.
@@ -1131,6 +1253,27 @@ class JidtDiscreteAIS(JidtDiscrete):
         (est, jidt_calc) = self.estimate(process, True)
         return jidt_calc.computeSignificance()
 
+    def get_analytic_null_parameters(self, process):
+        """Return parameters of the analytic (chi-square) null distribution.
+
+        Args:
+            process : numpy array
+                realisations as either a 2D numpy array where array dimensions
+                represent [realisations x variable dimension] or a 1D array
+                representing [realisations]
+
+        Returns:
+            int
+                degrees of freedom of the chi-square distribution
+            int
+                number of observations used by JIDT for estimation
+        """
+        process = self._ensure_one_dim_input(process)
+        alph = self.settings['alph']
+        history = self.settings['history']
+        return ((int(np.power(alph, history)) - 1) * (alph - 1),
+                process.shape[0] - history)
+
 
 class JidtGaussianAIS(JidtGaussian):
     """Calculate active information storage with JIDT's Gaussian implementation.
@@ -1208,6 +1351,26 @@ class JidtGaussianAIS(JidtGaussian):
         else:
             return self.calc.computeAverageLocalOfObservations()
 
+    def get_analytic_null_parameters(self, process):
+        """Return parameters of the analytic (chi-square) null distribution.
+
+        Args:
+            process : numpy array
+                realisations of first variable, either a 2D numpy array where
+                array dimensions represent [realisations x variable dimension]
+                or a 1D array representing [realisations]
+
+        Returns:
+            int
+                degrees of freedom of the chi-square distribution
+            int
+                number of observations used by JIDT for estimation
+        """
+        process = self._ensure_one_dim_input(process)
+        history = self.settings['history']
+        return (history,
+                process.shape[0] - (history - 1) * self.settings['tau'] - 1)
+
 
 class JidtGaussianMI(JidtGaussian):
     """Calculate mutual information with JIDT's Gaussian implementation.
@@ -1278,6 +1441,28 @@ class JidtGaussianMI(JidtGaussian):
         else:
             return self.calc.computeAverageLocalOfObservations()
 
+    def get_analytic_null_parameters(self, var1, var2):
+        """Return parameters of the analytic (chi-square) null distribution.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, either a 2D numpy array where
+                array dimensions represent [realisations x variable dimension]
+                or a 1D array representing [realisations]
+            var2 : numpy array
+                realisations of the second variable (similar to var1)
+
+        Returns:
+            int
+                degrees of freedom of the chi-square distribution
+            int
+                number of observations used by JIDT for estimation
+        """
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        return (var1.shape[1] * var2.shape[1],
+                var1.shape[0] - self.settings['lag_mi'])
+
 
 class JidtGaussianCMI(JidtGaussian):
     """Calculate conditional mutual infor with JIDT's Gaussian implementation.
@@ -1393,6 +1578,35 @@ class JidtGaussianCMI(JidtGaussian):
         else:
             return self.calc.computeSignificance()
 
+    def get_analytic_null_parameters(self, var1, var2, conditional=None):
+        """Return parameters of the analytic (chi-square) null distribution.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, either a 2D numpy array where
+                array dimensions represent [realisations x variable dimension]
+                or a 1D array representing [realisations]
+            var2 : numpy array
+                realisations of the second variable (similar to var1)
+            conditional : numpy array [optional]
+                realisations of the conditioning variable (similar to var), if
+                no conditional is provided, return parameters for the MI
+                between var1 and var2
+
+        Returns:
+            int
+                degrees of freedom of the chi-square distribution
+            int
+                number of observations used by JIDT for estimation
+        """
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        n_samples = var1.shape[0]
+        if conditional is None:
+            # The MI estimator shifts variables to calculate a lagged MI.
+            n_samples -= self.settings.get('lag_mi', 0)
+        return var1.shape[1] * var2.shape[1], n_samples
+
 
 class JidtKraskovTE(JidtKraskov):
     """Calculate transfer entropy with JIDT's Kraskov implementation.
@@ -1649,6 +1863,30 @@ class JidtDiscreteTE(JidtDiscrete):
         (est, jidt_calc) = self.estimate(source, target, True)
         return jidt_calc.computeSignificance()
 
+    def get_analytic_null_parameters(self, source, target):
+        """Return parameters of the analytic (chi-square) null distribution.
+
+        Args:
+            source : numpy array
+                realisations of source variable, either a 2D numpy array where
+                array dimensions represent [realisations x variable dimension]
+                or a 1D array representing [realisations]
+            target : numpy array
+                realisations of target variable (similar to var1)
+
+        Returns:
+            int
+                degrees of freedom of the chi-square distribution
+            int
+                number of observations used by JIDT for estimation
+        """
+        source = self._ensure_one_dim_input(source)
+        max_base = max(self.settings['alph1'], self.settings['alph2'])
+        dof = ((int(np.power(max_base, self.settings['history_source'])) - 1) *
+               (max_base - 1) *
+               int(np.power(max_base, self.settings['history_target'])))
+        return dof, self._get_te_n_observations(source.shape[0])
+
 
 class JidtGaussianTE(JidtGaussian):
     """Calculate transfer entropy with JIDT's Gaussian implementation.
@@ -1734,36 +1972,63 @@ class JidtGaussianTE(JidtGaussian):
         else:
             return self.calc.computeAverageLocalOfObservations()
 
+    def get_analytic_null_parameters(self, source, target):
+        """Return parameters of the analytic (chi-square) null distribution.
+
+        Args:
+            source : numpy array
+                realisations of source variable, either a 2D numpy array where
+                array dimensions represent [realisations x variable dimension]
+                or a 1D array representing [realisations]
+            target : numpy array
+                realisations of target variable (similar to var1)
+
+        Returns:
+            int
+                degrees of freedom of the chi-square distribution
+            int
+                number of observations used by JIDT for estimation
+        """
+        source = self._ensure_one_dim_input(source)
+        return (self.settings['history_source'],
+                self._get_te_n_observations(source.shape[0]))
+
 
-def common_estimate_surrogates_analytic(estimator, n_perm=200, **data):
+def common_estimate_surrogates_analytic(estimator, n_perm=200, n_sets=None,
+                                        **data):
     """Estimate the surrogate distribution analytically for JidtEstimator.
 
     Estimate the surrogate distribution analytically for a JidtEstimator
     which is_analytic_null_estimator(), by sampling estimates at random
-    p-values in the analytic distribution.
+    p-values in the analytic distribution. The chi-square null distribution is
+    parametrised in Python from its degrees of freedom and the number of
+    observations, such that all surrogates are calculated in a single call
+    instead of one call to JIDT per permutation. Returned values are identical
+    to JIDT's AnalyticMeasurementDistribution.computeEstimateForGivenPValue().
 
     Args:
         estimator : a JidtEstimator object, which returns True to a call to
             its is_analytic_null_estimator() method
         n_perms : int
             number of permutations (default=200)
+        n_sets : int [optional]
+            if set, return surrogates for n_sets sets of variables with the
+            same dimensions as the variables in data (default=None)
         data : numpy arrays
             realisations of random variables required for the calculation
             (varies between estimators, e.g. 2 variables for MI, 3 for CMI)
 
     Returns:
-        float | numpy array
+        numpy array
             n_perm surrogates of the average MI/CMI/TE over all samples
             under the null hypothesis of no relationship between var1 and
-            var2 (in the context of conditional)
+            var2 (in the context of conditional), [n_sets x n_perm] if n_sets
+            is set
     """
-    # Compute the statistical significance of the estimate to get an
-    #  AnalyticMeasurementDistribution object:
-    analytic_distribution = estimator.get_analytic_distribution(**data)
-    # Then compute surrogates at n_perm random p-values
-    surrogate_estimates = np.empty(n_perm)
-    for perm in range(n_perm):
-        surrogate_estimates[perm] = \
-            analytic_distribution.computeEstimateForGivenPValue(
-                np.random.random())
-    return surrogate_estimates
+    dof, n_observations = estimator.get_analytic_null_parameters(**data)
+    if n_sets is None:
+        size = n_perm
+    else:
+        size = (n_sets, n_perm)
+    return (chi2.ppf(1 - np.random.random(size), df=dof) /
+            (2 * n_observations))
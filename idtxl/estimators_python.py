@@ -0,0 +1,1474 @@
+"""Provide native Python estimators for information theoretic measures.
+
+Estimators in this module are implemented in NumPy/SciPy only and do not
+require a Java virtual machine or an OpenCL device.
+"""
+import itertools as it
+import numpy as np
+from scipy.special import digamma
+from scipy.stats import chi2
+from scipy.spatial import cKDTree
+from idtxl.estimator import Estimator
+from . import idtxl_utils as utils
+
+
+class PythonKraskov(Estimator):
+    """Abstract class for implementation of native Python Kraskov estimators.
+
+    Abstract class for implementation of Kraskov-Grassberger-Stoegbauer (KSG)
+    estimators for continuous data using SciPy's cKDTree for nearest neighbour
+    and range searches in the maximum norm. Child classes implement estimators
+    for mutual information (MI) and conditional mutual information (CMI).
+
+    References:
+
+    - Kraskov, A., Stoegbauer, H., & Grassberger, P. (2004). Estimating mutual
+      information. Phys Rev E, 69(6), 066138.
+    - Frenzel, S., & Pompe, B. (2007). Partial mutual information for coupling
+      analysis of multivariate time series. Phys Rev Lett, 99(20), 204101.
+    - Lizier, J. T. (2014). JIDT: An information-theoretic toolkit for
+      studying the dynamics of complex systems. Front Robot AI, 1(11).
+
+    Estimators can be used to perform multiple, independent searches in
+    parallel. Each of these parallel searches is called a 'chunk'. To search
+    multiple chunks, provide point sets as 2D arrays, where the first
+    dimension represents samples or points, and the second dimension
+    represents the points' dimensions. Concatenate chunk data in the first
+    dimension and pass the number of chunks to the estimators. Chunks must be
+    of equal size.
+
+    Set common estimation parameters for Python Kraskov estimators. For usage
+    of these estimators see documentation for the child classes.
+
+    Args:
+        settings : dict [optional]
+            set estimator parameters:
+
+            - kraskov_k : int [optional] - no. nearest neighbours for KNN
+              search (default=4)
+            - normalise : bool [optional] - z-standardise data (default=False)
+            - theiler_t : int [optional] - no. next temporal neighbours ignored
+              in KNN and range searches (default=0)
+            - noise_level : float [optional] - random noise added to the data
+              (default=1e-8)
+            - local_values : bool [optional] - return local MI/CMI instead of
+              average MI/CMI (default=False)
+            - algorithm_num : int [optional] - which Kraskov algorithm (1 or 2)
+              to use (default=1)
+    """
+
+    def __init__(self, settings=None):
+        # Get defaults for estimator settings
+        settings = self._check_settings(settings)
+        self.settings = settings.copy()
+        self.settings.setdefault('kraskov_k', int(4))
+        self.settings.setdefault('normalise', False)
+        self.settings.setdefault('theiler_t', int(0))
+        self.settings.setdefault('noise_level', 1e-8)
+        self.settings.setdefault('local_values', False)
+        self.settings.setdefault('algorithm_num', 1)
+        self.settings['kraskov_k'] = int(self.settings['kraskov_k'])
+        self.settings['theiler_t'] = int(self.settings['theiler_t'])
+        assert type(self.settings['algorithm_num']) is int, (
+            'Algorithm number must be an integer.')
+        assert self.settings['algorithm_num'] in [1, 2], (
+            'Algorithm number must be 1 or 2')
+
+    def is_parallel(self):
+        return True
+
+    def is_analytic_null_estimator(self):
+        return False
+
+    def _prepare_chunk(self, var):
+        """Normalise variable and add noise, return a float copy."""
+        var = np.array(var, dtype=np.float64)
+        if self.settings['normalise']:
+            for d in range(var.shape[1]):
+                var[:, d] = utils.standardise(var[:, d])
+        if self.settings['noise_level'] > 0:
+            var += np.random.normal(scale=self.settings['noise_level'],
+                                    size=var.shape)
+        return var
+
+    def _knn_search(self, points):
+        """Find the k nearest neighbours of each point in the max-norm.
+
+        Neighbours within the Theiler window (including the point itself) are
+        excluded from the search.
+
+        Args:
+            points : numpy array
+                2D array of points [n_points x dimension]
+
+        Returns:
+            numpy array
+                indices of the k nearest neighbours [n_points x k]
+            numpy array
+                distances to the k nearest neighbours [n_points x k]
+        """
+        n_points = points.shape[0]
+        kraskov_k = self.settings['kraskov_k']
+        theiler_t = self.settings['theiler_t']
+        n_query = min(kraskov_k + 2 * theiler_t + 1, n_points)
+        dist, idx = cKDTree(points).query(points, k=n_query, p=np.inf)
+        dist = dist.reshape(n_points, n_query)
+        idx = idx.reshape(n_points, n_query)
+        valid = ((np.abs(idx - np.arange(n_points)[:, np.newaxis]) >
+                  theiler_t) & (idx < n_points))
+        valid &= np.cumsum(valid, axis=1) <= kraskov_k
+        if not (valid.sum(axis=1) == kraskov_k).all():
+            raise RuntimeError(
+                'Insufficient number of points ({0}) for the requested number '
+                'of nearest neighbours (kraskov_k: {1}) and Theiler-correction '
+                '(theiler_t: {2}).'.format(n_points, kraskov_k, theiler_t))
+        return (idx[valid].reshape(n_points, kraskov_k),
+                dist[valid].reshape(n_points, kraskov_k))
+
+    def _theiler_matches(self, points, radius, match):
+        """Count points in Theiler window (including the point) within radius.
+
+        Args:
+            points : numpy array
+                2D array of points [n_points x dimension]
+            radius : numpy array
+                search radius for each point
+            match : callable
+                function that returns a boolean mask of points at indices j
+                that lie within the search range of points at indices i,
+                called as match(i, j)
+
+        Returns:
+            numpy array
+                number of points within the Theiler window of each point that
+                fall into its search range
+        """
+        n_points = points.shape[0]
+        theiler_t = self.settings['theiler_t']
+        counts = np.zeros(n_points, dtype=int)
+        idx = np.arange(n_points)
+        for offset in range(-theiler_t, theiler_t + 1):
+            i = idx[max(0, -offset):min(n_points, n_points - offset)]
+            counts[i] += match(i, i + offset)
+        return counts
+
+    def _count_neighbours(self, points, radius, tree=None):
+        """Count neighbours within a radius around each point in the max-norm.
+
+        Points are counted if their distance is smaller or equal to the radius.
+        The point itself and points within the Theiler window are not counted.
+
+        Args:
+            points : numpy array
+                2D array of points [n_points x dimension]
+            radius : numpy array
+                search radius for each point
+            tree : cKDTree instance [optional]
+                search tree built from points, a new tree is built if None
+
+        Returns:
+            numpy array
+                number of neighbours for each point
+        """
+        if tree is None:
+            tree = cKDTree(points)
+        counts = tree.query_ball_point(points, radius, p=np.inf,
+                                       return_length=True)
+        return counts - self._theiler_matches(
+            points, radius,
+            lambda i, j: np.abs(points[i] - points[j]).max(axis=1) <=
+            radius[i])
+
+    def _count_neighbours_rect(self, var_a, var_b, radius_a, radius_b,
+                               tree=None):
+        """Count neighbours within a hyper-rectangle around each point.
+
+        Count points whose distance to the current point is smaller or equal
+        to radius_a in the subspace of var_a and to radius_b in the subspace of
+        var_b (used by the second KSG algorithm for CMI estimation). The point
+        itself and points within the Theiler window are not counted.
+
+        Args:
+            var_a : numpy array
+                2D array of points [n_points x dimension a]
+            var_b : numpy array
+                2D array of points [n_points x dimension b]
+            radius_a : numpy array
+                search radius for each point in the subspace of var_a
+            radius_b : numpy array
+                search radius for each point in the subspace of var_b
+            tree : cKDTree instance [optional]
+                search tree built from the joint points [var_a, var_b], a new
+                tree is built if None
+
+        Returns:
+            numpy array
+                number of neighbours for each point
+        """
+        points = np.hstack((var_a, var_b))
+        if tree is None:
+            tree = cKDTree(points)
+        # Find candidates within the larger radius in the joint space and
+        # test all candidates of all points at once, candidates of point i
+        # are at positions owner == i of the flattened candidate list.
+        n_points = points.shape[0]
+        candidates = tree.query_ball_point(
+            points, np.maximum(radius_a, radius_b), p=np.inf,
+            return_sorted=False)
+        n_candidates = np.fromiter(map(len, candidates), dtype=int,
+                                   count=n_points)
+        idx = np.fromiter(it.chain.from_iterable(candidates), dtype=int,
+                          count=n_candidates.sum())
+        owner = np.repeat(np.arange(n_points), n_candidates)
+        inside = (
+            (np.abs(var_a[idx] - var_a[owner]).max(axis=1) <=
+             radius_a[owner]) &
+            (np.abs(var_b[idx] - var_b[owner]).max(axis=1) <=
+             radius_b[owner]))
+        counts = np.bincount(owner[inside], minlength=n_points)
+        return counts - self._theiler_matches(
+            points, radius_a,
+            lambda i, j: (
+                (np.abs(var_a[i] - var_a[j]).max(axis=1) <= radius_a[i]) &
+                (np.abs(var_b[i] - var_b[j]).max(axis=1) <= radius_b[i])))
+
+    def _marginal_radius(self, var, nn_idx):
+        """Return max-norm distance to the k nearest neighbours in a subspace.
+        """
+        return np.abs(var[nn_idx] - var[:, np.newaxis, :]).max(axis=(1, 2))
+
+    def _collect_results(self, local_values):
+        """Return local or average values over chunks."""
+        if self.settings['local_values']:
+            return np.concatenate(local_values)
+        else:
+            return np.array([np.mean(l) for l in local_values])
+
+
+class PythonKraskovMI(PythonKraskov):
+    """Calculate mutual information with a native Python Kraskov estimator.
+
+    Calculate the mutual information (MI) between two variables using the
+    Kraskov-Grassberger-Stoegbauer estimator implemented in NumPy/SciPy. See
+    parent class for references.
+
+    Args:
+        settings : dict [optional]
+            set estimator parameters:
+
+            - kraskov_k : int [optional] - no. nearest neighbours for KNN
+              search (default=4)
+            - normalise : bool [optional] - z-standardise data (default=False)
+            - theiler_t : int [optional] - no. next temporal neighbours ignored
+              in KNN and range searches (default=0)
+            - noise_level : float [optional] - random noise added to the data
+              (default=1e-8)
+            - local_values : bool [optional] - return local MI instead of
+              average MI (default=False)
+            - algorithm_num : int [optional] - which Kraskov algorithm (1 or 2)
+              to use (default=1)
+            - lag_mi : int [optional] - time difference in samples to calculate
+              the lagged MI between processes (default=0)
+    """
+
+    def __init__(self, settings=None):
+        # Set default estimator settings.
+        super().__init__(settings)
+        self.settings.setdefault('lag_mi', 0)
+
+    def estimate(self, var1, var2, n_chunks=1):
+        """Estimate mutual information.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, either a 2D numpy array where
+                array dimensions represent [(realisations * n_chunks) x
+                variable dimension] or a 1D array representing [realisations]
+            var2 : numpy array
+                realisations of the second variable (similar to var1)
+            n_chunks : int
+                number of data chunks, no. data points has to be the same for
+                each chunk
+
+        Returns:
+            numpy array
+                average MI for each chunk or local MI for individual samples
+                (concatenated over chunks) if 'local_values'=True
+        """
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        assert var1.shape[0] == var2.shape[0], (
+            'Unequal number of observations (var1: {0}, var2: {1}).'.format(
+                var1.shape[0], var2.shape[0]))
+        assert var1.shape[0] % n_chunks == 0, (
+            'No. chunks ({0}) does not match data length ({1}).'.format(
+                n_chunks, var1.shape[0]))
+        chunklength = var1.shape[0] // n_chunks
+        lag = self.settings['lag_mi']
+        self._check_number_of_points(chunklength - lag)
+
+        local_values = []
+        for c in range(n_chunks):
+            chunk1 = var1[c * chunklength:(c + 1) * chunklength - lag, :]
+            chunk2 = var2[c * chunklength + lag:(c + 1) * chunklength, :]
+            local_values.append(self._estimate_chunk(
+                self._prepare_chunk(chunk1), self._prepare_chunk(chunk2)))
+        return self._collect_results(local_values)
+
+    def estimate_surrogates(self, var1, var2, conditional=None, n_chunks=1):
+        """Estimate mutual information for multiple chunks of var1.
+
+        Estimate MI between each chunk of var1 and the same realisations of
+        var2 (e.g., for surrogate data, where only var1 is permuted). The
+        search tree for var2 is built only once and re-used for all chunks.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, a 2D numpy array where array
+                dimensions represent [(realisations * n_chunks) x variable
+                dimension]
+            var2 : numpy array
+                realisations of the second variable for a single chunk
+                [realisations x variable dimension]
+            conditional : None [optional]
+                a conditional is not supported, only None is accepted
+                (default=None)
+            n_chunks : int
+                number of data chunks in var1
+
+        Returns:
+            numpy array
+                average MI for each chunk or local MI for individual samples
+                (concatenated over chunks) if 'local_values'=True
+        """
+        if conditional is not None:
+            raise RuntimeError('{0} does not accept a conditional.'.format(
+                type(self).__name__))
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        chunklength = var2.shape[0]
+        assert var1.shape[0] == chunklength * n_chunks, (
+            'No. realisations in var1 ({0}) does not match no. chunks ({1}) '
+            'and no. realisations in var2 ({2}).'.format(
+                var1.shape[0], n_chunks, chunklength))
+        lag = self.settings['lag_mi']
+        self._check_number_of_points(chunklength - lag)
+
+        var2 = self._prepare_chunk(var2[lag:, :])
+        tree_var2 = cKDTree(var2)
+        local_values = []
+        for c in range(n_chunks):
+            chunk1 = var1[c * chunklength:(c + 1) * chunklength - lag, :]
+            local_values.append(self._estimate_chunk(
+                self._prepare_chunk(chunk1), var2, tree_var2))
+        return self._collect_results(local_values)
+
+    def _estimate_chunk(self, var1, var2, tree_var2=None):
+        """Return local MI values for a single chunk."""
+        n_points = var1.shape[0]
+        kraskov_k = self.settings['kraskov_k']
+        nn_idx, nn_dist = self._knn_search(np.hstack((var1, var2)))
+        if self.settings['algorithm_num'] == 1:
+            # Count points strictly inside the KNN distance.
+            radius = np.nextafter(nn_dist[:, -1], 0)
+            count_var1 = self._count_neighbours(var1, radius)
+            count_var2 = self._count_neighbours(var2, radius, tree_var2)
+            return (digamma(kraskov_k) + digamma(n_points) -
+                    digamma(count_var1 + 1) - digamma(count_var2 + 1))
+        else:
+            count_var1 = self._count_neighbours(
+                var1, self._marginal_radius(var1, nn_idx))
+            count_var2 = self._count_neighbours(
+                var2, self._marginal_radius(var2, nn_idx), tree_var2)
+            return (digamma(kraskov_k) - 1 / kraskov_k + digamma(n_points) -
+                    digamma(count_var1) - digamma(count_var2))
+
+
+class PythonKraskovCMI(PythonKraskov):
+    """Calculate conditional mutual information with a native Kraskov estimator.
+
+    Calculate the conditional mutual information (CMI) between three variables
+    using the Kraskov-Grassberger-Stoegbauer estimator implemented in
+    NumPy/SciPy. If no conditional is given (is None), the function returns
+    the mutual information between var1 and var2. See parent class for
+    references.
+
+    Args:
+        settings : dict [optional]
+            set estimator parameters:
+
+            - kraskov_k : int [optional] - no. nearest neighbours for KNN
+              search (default=4)
+            - normalise : bool [optional] - z-standardise data (default=False)
+            - theiler_t : int [optional] - no. next temporal neighbours ignored
+              in KNN and range searches (default=0)
+            - noise_level : float [optional] - random noise added to the data
+              (default=1e-8)
+            - local_values : bool [optional] - return local CMI instead of
+              average CMI (default=False)
+            - algorithm_num : int [optional] - which Kraskov algorithm (1 or 2)
+              to use (default=1)
+    """
+
+    def __init__(self, settings=None):
+        # Set default estimator settings.
+        super().__init__(settings)
+
+    def estimate(self, var1, var2, conditional=None, n_chunks=1):
+        """Estimate conditional mutual information.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, either a 2D numpy array where
+                array dimensions represent [(realisations * n_chunks) x
+                variable dimension] or a 1D array representing [realisations]
+            var2 : numpy array
+                realisations of the second variable (similar to var1)
+            conditional : numpy array [optional]
+                realisations of conditioning variable (similar to var1), if no
+                conditional is provided, return MI between var1 and var2
+            n_chunks : int
+                number of data chunks, no. data points has to be the same for
+                each chunk
+
+        Returns:
+            numpy array
+                average CMI for each chunk or local CMI for individual samples
+                (concatenated over chunks) if 'local_values'=True
+        """
+        # Return MI if no conditional is provided
+        if conditional is None:
+            est_mi = PythonKraskovMI(self.settings)
+            return est_mi.estimate(var1, var2, n_chunks)
+
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        conditional = self._ensure_two_dim_input(conditional)
+        assert var1.shape[0] == var2.shape[0], (
+            'Unequal number of observations (var1: {0}, var2: {1}).'.format(
+                var1.shape[0], var2.shape[0]))
+        assert var1.shape[0] == conditional.shape[0], (
+            'Unequal number of observations (var1: {0}, cond: {1}).'.format(
+                var1.shape[0], conditional.shape[0]))
+        assert var1.shape[0] % n_chunks == 0, (
+            'No. chunks ({0}) does not match data length ({1}).'.format(
+                n_chunks, var1.shape[0]))
+        chunklength = var1.shape[0] // n_chunks
+        self._check_number_of_points(chunklength)
+
+        local_values = []
+        for c in range(n_chunks):
+            chunk = slice(c * chunklength, (c + 1) * chunklength)
+            local_values.append(self._estimate_chunk(
+                self._prepare_chunk(var1[chunk, :]),
+                self._prepare_chunk(var2[chunk, :]),
+                self._prepare_chunk(conditional[chunk, :])))
+        return self._collect_results(local_values)
+
+    def estimate_surrogates(self, var1, var2, conditional=None, n_chunks=1):
+        """Estimate conditional mutual information for multiple chunks of var1.
+
+        Estimate CMI between each chunk of var1 and the same realisations of
+        var2, conditional on the same realisations of the conditional (e.g.,
+        for surrogate data, where only var1 is permuted). Search trees for the
+        conditional and for the joint space of var2 and the conditional are
+        built only once and re-used for all chunks.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, a 2D numpy array where array
+                dimensions represent [(realisations * n_chunks) x variable
+                dimension]
+            var2 : numpy array
+                realisations of the second variable for a single chunk
+                [realisations x variable dimension]
+            conditional : numpy array [optional]
+                realisations of conditioning variable for a single chunk
+                (similar to var2), if no conditional is provided, return MI
+                between var1 and var2
+            n_chunks : int
+                number of data chunks in var1
+
+        Returns:
+            numpy array
+                average CMI for each chunk or local CMI for individual samples
+                (concatenated over chunks) if 'local_values'=True
+        """
+        # Return MI if no conditional is provided
+        if conditional is None:
+            est_mi = PythonKraskovMI(self.settings)
+            return est_mi.estimate_surrogates(var1, var2, n_chunks=n_chunks)
+
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        conditional = self._ensure_two_dim_input(conditional)
+        chunklength = var2.shape[0]
+        assert chunklength == conditional.shape[0], (
+            'Unequal number of observations (var2: {0}, cond: {1}).'.format(
+                chunklength, conditional.shape[0]))
+        assert var1.shape[0] == chunklength * n_chunks, (
+            'No. realisations in var1 ({0}) does not match no. chunks ({1}) '
+            'and no. realisations in var2 ({2}).'.format(
+                var1.shape[0], n_chunks, chunklength))
+        self._check_number_of_points(chunklength)
+
+        var2 = self._prepare_chunk(var2)
+        conditional = self._prepare_chunk(conditional)
+        tree_var2_cond = cKDTree(np.hstack((var2, conditional)))
+        tree_cond = cKDTree(conditional)
+        local_values = []
+        for c in range(n_chunks):
+            local_values.append(self._estimate_chunk(
+                self._prepare_chunk(
+                    var1[c * chunklength:(c + 1) * chunklength, :]),
+                var2, conditional, tree_var2_cond, tree_cond))
+        return self._collect_results(local_values)
+
+    def _estimate_chunk(self, var1, var2, conditional, tree_var2_cond=None,
+                        tree_cond=None):
+        """Return local CMI values for a single chunk.
+
+        Search trees for the joint space of var2 and the conditional and for
+        the conditional are built if they are not provided.
+        """
+        kraskov_k = self.settings['kraskov_k']
+        nn_idx, nn_dist = self._knn_search(
+            np.hstack((var1, var2, conditional)))
+        if self.settings['algorithm_num'] == 1:
+            # Count points strictly inside the KNN distance.
+            radius = np.nextafter(nn_dist[:, -1], 0)
+            count_var1_cond = self._count_neighbours(
+                np.hstack((var1, conditional)), radius)
+            count_var2_cond = self._count_neighbours(
+                np.hstack((var2, conditional)), radius, tree_var2_cond)
+            count_cond = self._count_neighbours(conditional, radius, tree_cond)
+            return (digamma(kraskov_k) + digamma(count_cond + 1) -
+                    digamma(count_var1_cond + 1) -
+                    digamma(count_var2_cond + 1))
+        else:
+            radius_var1 = self._marginal_radius(var1, nn_idx)
+            radius_var2 = self._marginal_radius(var2, nn_idx)
+            radius_cond = self._marginal_radius(conditional, nn_idx)
+            count_var1_cond = self._count_neighbours_rect(
+                var1, conditional, radius_var1, radius_cond)
+            count_var2_cond = self._count_neighbours_rect(
+                var2, conditional, radius_var2, radius_cond, tree_var2_cond)
+            count_cond = self._count_neighbours(conditional, radius_cond,
+                                                tree_cond)
+            return (digamma(kraskov_k) - 2 / kraskov_k +
+                    digamma(count_cond) -
+                    digamma(count_var1_cond) + 1 / count_var1_cond -
+                    digamma(count_var2_cond) + 1 / count_var2_cond)
+
+
+class PythonGaussian(Estimator):
+    """Abstract class for implementation of native Python Gaussian estimators.
+
+    Abstract class for implementation of linear-Gaussian estimators for
+    continuous data. Child classes implement estimators for mutual
+    information (MI) and conditional mutual information (CMI). Under the
+    assumption of multivariate Gaussian variables, information theoretic
+    quantities are functions of the log-determinants of covariance
+    sub-matrices (Barnett, 2009). Covariances for all chunks are calculated
+    in a single, batched pass.
+
+    References:
+
+    - Barnett, L., Barrett, A. B., & Seth, A. K. (2009). Granger causality and
+      transfer entropy are equivalent for Gaussian variables. Phys Rev Lett,
+      103(23), 238701.
+    - Lizier, J. T. (2014). JIDT: An information-theoretic toolkit for
+      studying the dynamics of complex systems. Front Robot AI, 1(11).
+
+    Chunks are handled as for the Python Kraskov estimators: concatenate
+    chunk data in the first dimension and pass the number of chunks to the
+    estimators. Chunks must be of equal size.
+
+    The estimators implement an analytic null distribution: under the null
+    hypothesis of no relationship between var1 and var2, 2 * N * MI (or CMI)
+    is chi-square distributed with dim(var1) * dim(var2) degrees of freedom,
+    where N is the number of samples (Geweke, 1982; Barnett, 2009).
+
+    Args:
+        settings : dict [optional]
+            set estimator parameters:
+
+            - local_values : bool [optional] - return local MI/CMI instead of
+              average MI/CMI (default=False)
+    """
+
+    def __init__(self, settings=None):
+        # Get defaults for estimator settings
+        settings = self._check_settings(settings)
+        self.settings = settings.copy()
+        self.settings.setdefault('local_values', False)
+
+    def is_parallel(self):
+        return True
+
+    def is_analytic_null_estimator(self):
+        return True
+
+    def _check_number_of_points(self, n_points, dim):
+        """Sanity check for number of points going into the estimator."""
+        if n_points <= dim:
+            raise RuntimeError('Insufficient number of points ({0}) for the '
+                               'estimation of a {1}-dimensional covariance '
+                               'matrix.'.format(n_points, dim))
+
+    def _analytic_null(self, n_perm, n_samples, dim1, dim2, n_sets=None):
+        """Return surrogates drawn from the analytic chi-square distribution.
+
+        Surrogates are estimates at n_perm random p-values in the analytic
+        null distribution, all values are calculated in a single call. If
+        n_sets is set, return [n_sets x n_perm] surrogates.
+        """
+        size = n_perm if n_sets is None else (n_sets, n_perm)
+        return (chi2.ppf(np.random.random(size), df=dim1 * dim2) /
+                (2 * n_samples))
+
+    def _get_chunks(self, var, n_chunks):
+        """Return data as 3D array [n_chunks x realisations x dimension]."""
+        return var.reshape(n_chunks, var.shape[0] // n_chunks, var.shape[1])
+
+    def _covariance(self, points):
+        """Return centred points and covariance matrix for each chunk."""
+        points = points - points.mean(axis=1, keepdims=True)
+        cov = (np.einsum('cni,cnj->cij', points, points) /
+               (points.shape[1] - 1))
+        return points, cov
+
+    def _logdet(self, cov, idx):
+        """Return log-determinant of covariance sub-matrices for all chunks."""
+        if idx.size == 0:
+            return np.zeros(cov.shape[0])
+        sign, logdet = np.linalg.slogdet(cov[:, idx[:, np.newaxis], idx])
+        if np.any(sign <= 0):
+            raise RuntimeError('Covariance matrix is not positive definite, '
+                               'variables may be linearly dependent.')
+        return logdet
+
+    def _local_log_density(self, points, cov, idx, logdet):
+        """Return local log-density for all chunks (up to a constant)."""
+        if idx.size == 0:
+            return np.zeros(points.shape[:2])
+        sub_points = points[:, :, idx]
+        inv_cov = np.linalg.inv(cov[:, idx[:, np.newaxis], idx])
+        mahalanobis = np.einsum('cni,cij,cnj->cn',
+                                sub_points, inv_cov, sub_points)
+        return -0.5 * (logdet[:, np.newaxis] + mahalanobis)
+
+    def _estimate_from_cov(self, cov, dim1, dim2, points=None):
+        """Return CMI for all chunks from joint covariance matrices.
+
+        Columns of the joint covariance matrices are ordered as var1, var2,
+        conditional. The CMI is I(1;2|c) = 0.5 * (log|S_1c| + log|S_2c| -
+        log|S_c| - log|S_12c|). For local values, centred points are required
+        and local values are returned as a 2D array [n_chunks x realisations].
+        """
+        dim = cov.shape[1]
+        idx_cond = np.arange(dim1 + dim2, dim)
+        idx = {
+            'joint': np.arange(dim),
+            'cond': idx_cond,
+            'var1_cond': np.concatenate((np.arange(dim1), idx_cond)),
+            'var2_cond': np.arange(dim1, dim)}
+        logdet = {k: self._logdet(cov, i) for k, i in idx.items()}
+        if points is None:
+            return 0.5 * (logdet['var1_cond'] + logdet['var2_cond'] -
+                          logdet['cond'] - logdet['joint'])
+        log_density = {
+            k: self._local_log_density(points, cov, i, logdet[k])
+            for k, i in idx.items()}
+        return (log_density['joint'] + log_density['cond'] -
+                log_density['var1_cond'] - log_density['var2_cond'])
+
+    def _estimate_chunks(self, points, dim1, dim2):
+        """Return average or local values for data of all chunks."""
+        points, cov = self._covariance(points)
+        if self.settings['local_values']:
+            return self._estimate_from_cov(cov, dim1, dim2, points).ravel()
+        else:
+            return self._estimate_from_cov(cov, dim1, dim2)
+
+    def _estimate_chunks_re_use(self, var1, re_used):
+        """Return average values for chunks of var1 and a re-used variable.
+
+        The covariance of the re-used variable, as well as its mean, is
+        calculated only once. Only the covariance of var1 and the cross-
+        covariance are calculated for each chunk.
+        """
+        n_chunks, n_samples, dim1 = var1.shape
+        var1 = var1 - var1.mean(axis=1, keepdims=True)
+        re_used = re_used - re_used.mean(axis=0)
+        cov = np.empty((n_chunks, dim1 + re_used.shape[1],
+                        dim1 + re_used.shape[1]))
+        cov[:, :dim1, :dim1] = np.einsum('cni,cnj->cij', var1, var1)
+        cov[:, :dim1, dim1:] = np.einsum('cni,nj->cij', var1, re_used)
+        cov[:, dim1:, :dim1] = cov[:, :dim1, dim1:].transpose(0, 2, 1)
+        cov[:, dim1:, dim1:] = np.dot(re_used.T, re_used)
+        return cov / (n_samples - 1)
+
+
+class PythonGaussianMI(PythonGaussian):
+    """Calculate mutual information with a native Python Gaussian estimator.
+
+    Calculate the mutual information (MI) between two variables assuming a
+    multivariate Gaussian distribution. See parent class for references.
+
+    Args:
+        settings : dict [optional]
+            set estimator parameters:
+
+            - local_values : bool [optional] - return local MI instead of
+              average MI (default=False)
+            - lag_mi : int [optional] - time difference in samples to calculate
+              the lagged MI between processes (default=0)
+    """
+
+    def __init__(self, settings=None):
+        # Set default estimator settings.
+        super().__init__(settings)
+        self.settings.setdefault('lag_mi', 0)
+
+    def estimate(self, var1, var2, n_chunks=1):
+        """Estimate mutual information.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, either a 2D numpy array where
+                array dimensions represent [(realisations * n_chunks) x
+                variable dimension] or a 1D array representing [realisations]
+            var2 : numpy array
+                realisations of the second variable (similar to var1)
+            n_chunks : int
+                number of data chunks, no. data points has to be the same for
+                each chunk
+
+        Returns:
+            numpy array
+                average MI for each chunk or local MI for individual samples
+                (concatenated over chunks) if 'local_values'=True
+        """
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        assert var1.shape[0] == var2.shape[0], (
+            'Unequal number of observations (var1: {0}, var2: {1}).'.format(
+                var1.shape[0], var2.shape[0]))
+        assert var1.shape[0] % n_chunks == 0, (
+            'No. chunks ({0}) does not match data length ({1}).'.format(
+                n_chunks, var1.shape[0]))
+        lag = self.settings['lag_mi']
+        self._check_number_of_points(var1.shape[0] // n_chunks - lag,
+                                     var1.shape[1] + var2.shape[1])
+        var1 = self._get_chunks(var1, n_chunks)
+        var2 = self._get_chunks(var2, n_chunks)
+        points = np.concatenate((var1[:, :var1.shape[1] - lag, :],
+                                 var2[:, lag:, :]), axis=2)
+        return self._estimate_chunks(points, var1.shape[2], var2.shape[2])
+
+    def estimate_surrogates(self, var1, var2, conditional=None, n_chunks=1):
+        """Estimate mutual information for multiple chunks of var1.
+
+        Estimate MI between each chunk of var1 and the same realisations of
+        var2 (e.g., for surrogate data, where only var1 is permuted). The
+        covariance of var2 is calculated only once and re-used for all chunks.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, a 2D numpy array where array
+                dimensions represent [(realisations * n_chunks) x variable
+                dimension]
+            var2 : numpy array
+                realisations of the second variable for a single chunk
+                [realisations x variable dimension]
+            conditional : None [optional]
+                a conditional is not supported, only None is accepted
+                (default=None)
+            n_chunks : int
+                number of data chunks in var1
+
+        Returns:
+            numpy array
+                average MI for each chunk or local MI for individual samples
+                (concatenated over chunks) if 'local_values'=True
+        """
+        if conditional is not None:
+            raise RuntimeError('{0} does not accept a conditional.'.format(
+                type(self).__name__))
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        chunklength = var2.shape[0]
+        assert var1.shape[0] == chunklength * n_chunks, (
+            'No. realisations in var1 ({0}) does not match no. chunks ({1}) '
+            'and no. realisations in var2 ({2}).'.format(
+                var1.shape[0], n_chunks, chunklength))
+        if self.settings['local_values']:
+            return self.estimate(var1, np.tile(var2, (n_chunks, 1)),
+                                 n_chunks)
+        lag = self.settings['lag_mi']
+        self._check_number_of_points(chunklength - lag,
+                                     var1.shape[1] + var2.shape[1])
+        var1 = self._get_chunks(var1, n_chunks)[:, :chunklength - lag, :]
+        cov = self._estimate_chunks_re_use(var1, var2[lag:, :])
+        return self._estimate_from_cov(cov, var1.shape[2], var2.shape[1])
+
+    def estimate_surrogates_analytic(self, n_perm=200, n_sets=None, **data):
+        """Return estimate of the analytical surrogate distribution.
+
+        This method must be implemented because this class'
+        is_analytic_null_estimator() method returns true. All surrogates are
+        drawn from the chi-square distribution in a single call.
+
+        Args:
+            n_perm : int [optional]
+                number of permutations (default=200)
+            n_sets : int [optional]
+                if set, return surrogates for n_sets variables with the same
+                dimensions as the variables in data, e.g., for all candidates
+                in a candidate set (default=None)
+            data : numpy arrays
+                realisations of random variables required for the calculation
+                (var1, var2); a conditional, if passed, is ignored
+
+        Returns:
+            numpy array
+                n_perm surrogates of the average MI under the null hypothesis
+                of no relationship between var1 and var2, [n_sets x n_perm]
+                if n_sets is set
+        """
+        var1 = self._ensure_two_dim_input(data['var1'])
+        var2 = self._ensure_two_dim_input(data['var2'])
+        return self._analytic_null(
+            n_perm, var1.shape[0] - self.settings['lag_mi'],
+            var1.shape[1], var2.shape[1], n_sets)
+
+
+class PythonGaussianCMI(PythonGaussian):
+    """Calculate conditional mutual information with a native Python estimator.
+
+    Calculate the conditional mutual information (CMI) between two variables
+    given a third, assuming a multivariate Gaussian distribution. See parent
+    class for references.
+
+    Args:
+        settings : dict [optional]
+            set estimator parameters:
+
+            - local_values : bool [optional] - return local CMI instead of
+              average CMI (default=False)
+    """
+
+    def __init__(self, settings=None):
+        super().__init__(settings)
+
+    def estimate(self, var1, var2, conditional=None, n_chunks=1):
+        """Estimate conditional mutual information.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, either a 2D numpy array where
+                array dimensions represent [(realisations * n_chunks) x
+                variable dimension] or a 1D array representing [realisations]
+            var2 : numpy array
+                realisations of the second variable (similar to var1)
+            conditional : numpy array [optional]
+                realisations of the conditioning variable (similar to var), if
+                no conditional is provided, return MI between var1 and var2
+            n_chunks : int
+                number of data chunks, no. data points has to be the same for
+                each chunk
+
+        Returns:
+            numpy array
+                average CMI for each chunk or local CMI for individual samples
+                (concatenated over chunks) if 'local_values'=True
+        """
+        # Return MI if no conditional was provided.
+        if conditional is None:
+            est_mi = PythonGaussianMI(self.settings)
+            return est_mi.estimate(var1, var2, n_chunks)
+        else:
+            assert conditional.size != 0, 'Conditional Array is empty.'
+
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        cond = self._ensure_two_dim_input(conditional)
+        assert var1.shape[0] == var2.shape[0], (
+            'Unequal number of observations (var1: {0}, var2: {1}).'.format(
+                var1.shape[0], var2.shape[0]))
+        assert var1.shape[0] == cond.shape[0], (
+            'Unequal number of observations (var1: {0}, cond: {1}).'.format(
+                var1.shape[0], cond.shape[0]))
+        assert var1.shape[0] % n_chunks == 0, (
+            'No. chunks ({0}) does not match data length ({1}).'.format(
+                n_chunks, var1.shape[0]))
+        self._check_number_of_points(
+            var1.shape[0] // n_chunks,
+            var1.shape[1] + var2.shape[1] + cond.shape[1])
+        points = self._get_chunks(np.hstack((var1, var2, cond)), n_chunks)
+        return self._estimate_chunks(points, var1.shape[1], var2.shape[1])
+
+    def estimate_surrogates(self, var1, var2, conditional=None, n_chunks=1):
+        """Estimate CMI for multiple chunks of var1.
+
+        Estimate CMI between each chunk of var1 and the same realisations of
+        var2, given the same realisations of the conditional (e.g., for
+        surrogate data, where only var1 is permuted). The covariance of var2
+        and the conditional is calculated only once and re-used for all
+        chunks.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, a 2D numpy array where array
+                dimensions represent [(realisations * n_chunks) x variable
+                dimension]
+            var2 : numpy array
+                realisations of the second variable for a single chunk
+                [realisations x variable dimension]
+            conditional : numpy array [optional]
+                realisations of the conditioning variable for a single chunk
+                (similar to var2), if no conditional is provided, return MI
+                between var1 and var2
+            n_chunks : int
+                number of data chunks in var1
+
+        Returns:
+            numpy array
+                average CMI for each chunk or local CMI for individual samples
+                (concatenated over chunks) if 'local_values'=True
+        """
+        if conditional is None:
+            est_mi = PythonGaussianMI(self.settings)
+            return est_mi.estimate_surrogates(var1, var2, n_chunks=n_chunks)
+        else:
+            assert conditional.size != 0, 'Conditional Array is empty.'
+
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        cond = self._ensure_two_dim_input(conditional)
+        chunklength = var2.shape[0]
+        assert cond.shape[0] == chunklength, (
+            'Unequal number of observations (var2: {0}, cond: {1}).'.format(
+                chunklength, cond.shape[0]))
+        assert var1.shape[0] == chunklength * n_chunks, (
+            'No. realisations in var1 ({0}) does not match no. chunks ({1}) '
+            'and no. realisations in var2 ({2}).'.format(
+                var1.shape[0], n_chunks, chunklength))
+        if self.settings['local_values']:
+            return self.estimate(var1, np.tile(var2, (n_chunks, 1)),
+                                 np.tile(cond, (n_chunks, 1)), n_chunks)
+        self._check_number_of_points(
+            chunklength, var1.shape[1] + var2.shape[1] + cond.shape[1])
+        cov = self._estimate_chunks_re_use(self._get_chunks(var1, n_chunks),
+                                           np.hstack((var2, cond)))
+        return self._estimate_from_cov(cov, var1.shape[1], var2.shape[1])
+
+    def estimate_surrogates_analytic(self, n_perm=200, n_sets=None, **data):
+        """Return estimate of the analytical surrogate distribution.
+
+        This method must be implemented because this class'
+        is_analytic_null_estimator() method returns true. All surrogates are
+        drawn from the chi-square distribution in a single call.
+
+        Args:
+            n_perm : int [optional]
+                number of permutations (default=200)
+            n_sets : int [optional]
+                if set, return surrogates for n_sets variables with the same
+                dimensions as the variables in data, e.g., for all candidates
+                in a candidate set (default=None)
+            data : numpy arrays
+                realisations of random variables required for the calculation
+                (var1, var2, conditional)
+
+        Returns:
+            numpy array
+                n_perm surrogates of the average CMI under the null hypothesis
+                of no relationship between var1 and var2 given the
+                conditional, [n_sets x n_perm] if n_sets is set
+        """
+        var1 = self._ensure_two_dim_input(data['var1'])
+        var2 = self._ensure_two_dim_input(data['var2'])
+        return self._analytic_null(n_perm, var1.shape[0],
+                                   var1.shape[1], var2.shape[1], n_sets)
+
+
+class PythonDiscrete(Estimator):
+    """Abstract class for implementation of native Python discrete estimators.
+
+    Abstract class for implementation of plug-in estimators for discrete data.
+    Child classes implement estimators for mutual information (MI) and
+    conditional mutual information (CMI). Multivariate variables are combined
+    into a single dimension and joint states are counted using NumPy's
+    bincount. States of all chunks are counted in a single pass by adding
+    an offset for each chunk to the joint state index. Estimates are returned
+    in bits, as for JIDT's discrete estimators.
+
+    The estimators implement an analytic null distribution: under the null
+    hypothesis of no relationship between var1 and var2, 2 * N * ln(2) * CMI
+    is chi-square distributed with (alph1 - 1) * (alph2 - 1) * alphc degrees
+    of freedom, where N is the number of samples and alphabet sizes refer to
+    the combined variables (Brillinger, 2004).
+
+    References:
+
+    - Brillinger, D. R. (2004). Some data analyses using mutual information.
+      Braz J Probab Stat, 18(2), 163-183.
+    - Lizier, J. T. (2014). JIDT: An information-theoretic toolkit for
+      studying the dynamics of complex systems. Front Robot AI, 1(11).
+
+    Args:
+        settings : dict [optional]
+            set estimator parameters:
+
+            - local_values : bool [optional] - return local MI/CMI instead of
+              average MI/CMI (default=False)
+            - discretise_method : str [optional] - if and how to discretise
+              incoming continuous data, can be 'max_ent' for maximum entropy
+              binning, 'equal' for equal size bins, and 'none' if no binning is
+              required (default='none'), data are discretised for each chunk
+              individually
+    """
+
+    def __init__(self, settings=None):
+        settings = self._check_settings(settings)
+        self.settings = settings.copy()
+        self.settings.setdefault('local_values', False)
+        self.settings.setdefault('discretise_method', 'none')
+        assert self.settings['discretise_method'] in [
+            'none', 'equal', 'max_ent'], 'Unkown discretisation method.'
+
+    def is_parallel(self):
+        return True
+
+    def is_analytic_null_estimator(self):
+        return True
+
+    def _set_alphabet_sizes(self, variables):
+        """Set alphabet sizes from n_discrete_bins or to a default of 2."""
+        try:
+            n_discrete_bins = int(self.settings['n_discrete_bins'])
+            for v in variables:
+                self.settings[v] = n_discrete_bins
+        except KeyError:
+            pass  # Do nothing and use the default for alph_* set below
+        for v in variables:
+            self.settings.setdefault(v, int(2))
+
+    def _discretise_var(self, var, alph, name, n_chunks=1):
+        """Discretise a variable and combine its dimensions.
+
+        Discretise each chunk of a variable if requested. Otherwise assert
+        data are discrete and the provided alphabet size is correct. Return
+        the variable as a 2D array [n_chunks x realisations], where all
+        variable dimensions are combined into a single dimension, as well as
+        the size of the combined alphabet.
+        """
+        var = self._ensure_two_dim_input(var)
+        if self.settings['discretise_method'] == 'none':
+            assert issubclass(var.dtype.type, np.integer), (
+                '{0} is not an integer numpy array. Discretise data to use '
+                'this estimator.'.format(name))
+            assert np.min(var) >= 0, (
+                'Minimum of {0} is smaller than 0.'.format(name))
+            assert np.max(var) < alph, (
+                'Maximum of {0} is larger than the alphabet size.'.format(
+                    name))
+        else:
+            if self.settings['discretise_method'] == 'equal':
+                discretise = utils.discretise
+            else:
+                discretise = utils.discretise_max_ent
+            chunks = np.split(var, n_chunks)
+            var = np.vstack([discretise(c, alph) for c in chunks])
+        base = int(alph) ** var.shape[1]
+        combined = utils.combine_discrete_dimensions(var, alph)
+        return combined.reshape(n_chunks, combined.size // n_chunks), base
+
+    def _count_states(self, *variables):
+        """Return the count of each sample's joint state within its chunk.
+
+        Variables are given as tuples of combined realisations [n_chunks x
+        realisations] and alphabet size. Joint states are indexed per chunk
+        by adding the chunk number times the no. joint states as an offset.
+        If the joint alphabet is large compared to the no. samples, states
+        are counted on the unique joint states instead.
+        """
+        n_chunks, n_samples = variables[0][0].shape
+        states = np.zeros((n_chunks, n_samples), dtype=np.int_)
+        n_states = 1
+        for var, base in variables:
+            states = states * base + var
+            n_states *= base
+        if n_states * n_chunks > np.iinfo(np.int_).max:
+            raise ArithmeticError('Number of joint states leads to overflow '
+                                  'in indexing joint states of all chunks.')
+        states = (states + np.arange(n_chunks)[:, np.newaxis] *
+                  n_states).ravel()
+        if n_states * n_chunks <= 4 * states.size:
+            counts = np.bincount(states, minlength=n_states * n_chunks)
+            return counts[states].reshape(n_chunks, n_samples)
+        else:
+            _, inverse, counts = np.unique(states, return_inverse=True,
+                                           return_counts=True)
+            return counts[inverse].reshape(n_chunks, n_samples)
+
+    def _collect_results(self, local_values):
+        """Return local or average values [n_chunks x realisations]."""
+        if self.settings['local_values']:
+            return local_values.ravel()
+        else:
+            return local_values.mean(axis=1)
+
+    def _analytic_null(self, n_perm, n_samples, dof, n_sets=None):
+        """Return surrogates drawn from the analytic chi-square distribution.
+
+        Surrogates are estimates (in bits) at n_perm random p-values in the
+        analytic null distribution, all values are calculated in a single
+        call. If n_sets is set, return [n_sets x n_perm] surrogates.
+        """
+        size = n_perm if n_sets is None else (n_sets, n_perm)
+        return (chi2.ppf(np.random.random(size), df=dof) /
+                (2 * n_samples * np.log(2)))
+
+
+class PythonDiscreteMI(PythonDiscrete):
+    """Calculate mutual information with a native Python discrete estimator.
+
+    Calculate the mutual information (MI) between two discrete variables
+    using plug-in estimates of the joint probabilities. See parent class for
+    references.
+
+    Args:
+        settings : dict [optional]
+            set estimator parameters:
+
+            - local_values : bool [optional] - return local MI instead of
+              average MI (default=False)
+            - discretise_method : str [optional] - if and how to discretise
+              incoming continuous data, can be 'max_ent' for maximum entropy
+              binning, 'equal' for equal size bins, and 'none' if no binning is
+              required (default='none')
+            - n_discrete_bins : int [optional] - number of discrete bins/
+              levels or the base of each dimension of the discrete variables
+              (default=2). If set, this parameter overwrites/sets alph1 and
+              alph2
+            - alph1 : int [optional] - number of discrete bins/levels for var1
+              (default=2, or the value set for n_discrete_bins)
+            - alph2 : int [optional] - number of discrete bins/levels for var2
+              (default=2, or the value set for n_discrete_bins)
+            - lag_mi : int [optional] - time difference in samples to calculate
+              the lagged MI between processes (default=0)
+    """
+
+    def __init__(self, settings=None):
+        super().__init__(settings)
+        self.settings.setdefault('lag_mi', int(0))
+        self._set_alphabet_sizes(['alph1', 'alph2'])
+
+    def estimate(self, var1, var2, n_chunks=1):
+        """Estimate mutual information.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, either a 2D numpy array where
+                array dimensions represent [(realisations * n_chunks) x
+                variable dimension] or a 1D array representing [realisations],
+                array type can be float (requires discretisation) or int
+            var2 : numpy array
+                realisations of the second variable (similar to var1)
+            n_chunks : int
+                number of data chunks, no. data points has to be the same for
+                each chunk
+
+        Returns:
+            numpy array
+                average MI for each chunk or local MI for individual samples
+                (concatenated over chunks) if 'local_values'=True
+        """
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        assert var1.shape[0] == var2.shape[0], (
+            'Unequal number of observations (var1: {0}, var2: {1}).'.format(
+                var1.shape[0], var2.shape[0]))
+        assert var1.shape[0] % n_chunks == 0, (
+            'No. chunks ({0}) does not match data length ({1}).'.format(
+                n_chunks, var1.shape[0]))
+        var1 = self._discretise_var(var1, self.settings['alph1'], 'var1',
+                                    n_chunks)
+        var2 = self._discretise_var(var2, self.settings['alph2'], 'var2',
+                                    n_chunks)
+        lag = self.settings['lag_mi']
+        n_samples = var1[0].shape[1] - lag
+        assert n_samples > 0, 'Lag is larger than the no. samples per chunk.'
+        var1 = (var1[0][:, :n_samples], var1[1])
+        var2 = (var2[0][:, lag:], var2[1])
+        return self._collect_results(np.log2(
+            n_samples * self._count_states(var1, var2) /
+            (self._count_states(var1) * self._count_states(var2))))
+
+    def estimate_surrogates(self, var1, var2, conditional=None, n_chunks=1):
+        """Estimate mutual information for multiple chunks of var1.
+
+        Estimate MI between each chunk of var1 and the same realisations of
+        var2 (e.g., for surrogate data, where only var1 is permuted). States
+        of var2 are counted only once and re-used for all chunks.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, a 2D numpy array where array
+                dimensions represent [(realisations * n_chunks) x variable
+                dimension]
+            var2 : numpy array
+                realisations of the second variable for a single chunk
+                [realisations x variable dimension]
+            conditional : None [optional]
+                a conditional is not supported, only None is accepted
+                (default=None)
+            n_chunks : int
+                number of data chunks in var1
+
+        Returns:
+            numpy array
+                average MI for each chunk or local MI for individual samples
+                (concatenated over chunks) if 'local_values'=True
+        """
+        if conditional is not None:
+            raise RuntimeError('{0} does not accept a conditional.'.format(
+                type(self).__name__))
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        chunklength = var2.shape[0]
+        assert var1.shape[0] == chunklength * n_chunks, (
+            'No. realisations in var1 ({0}) does not match no. chunks ({1}) '
+            'and no. realisations in var2 ({2}).'.format(
+                var1.shape[0], n_chunks, chunklength))
+        var1 = self._discretise_var(var1, self.settings['alph1'], 'var1',
+                                    n_chunks)
+        var2 = self._discretise_var(var2, self.settings['alph2'], 'var2')
+        lag = self.settings['lag_mi']
+        n_samples = chunklength - lag
+        assert n_samples > 0, 'Lag is larger than the no. samples per chunk.'
+        var1 = (var1[0][:, :n_samples], var1[1])
+        var2 = (var2[0][:, lag:], var2[1])
+        count_var2 = self._count_states(var2)
+        var2 = (np.repeat(var2[0], n_chunks, axis=0), var2[1])
+        return self._collect_results(np.log2(
+            n_samples * self._count_states(var1, var2) /
+            (self._count_states(var1) * count_var2)))
+
+    def estimate_surrogates_analytic(self, n_perm=200, n_sets=None, **data):
+        """Return estimate of the analytical surrogate distribution.
+
+        This method must be implemented because this class'
+        is_analytic_null_estimator() method returns true. All surrogates are
+        drawn from the chi-square distribution in a single call.
+
+        Args:
+            n_perm : int [optional]
+                number of permutations (default=200)
+            n_sets : int [optional]
+                if set, return surrogates for n_sets variables with the same
+                dimensions as the variables in data, e.g., for all candidates
+                in a candidate set (default=None)
+            data : numpy arrays
+                realisations of random variables required for the calculation
+                (var1, var2); a conditional, if passed, is ignored
+
+        Returns:
+            numpy array
+                n_perm surrogates of the average MI under the null hypothesis
+                of no relationship between var1 and var2, [n_sets x n_perm]
+                if n_sets is set
+        """
+        var1 = self._ensure_two_dim_input(data['var1'])
+        var2 = self._ensure_two_dim_input(data['var2'])
+        base1 = int(self.settings['alph1']) ** var1.shape[1]
+        base2 = int(self.settings['alph2']) ** var2.shape[1]
+        return self._analytic_null(
+            n_perm, var1.shape[0] - self.settings['lag_mi'],
+            (base1 - 1) * (base2 - 1), n_sets)
+
+
+class PythonDiscreteCMI(PythonDiscrete):
+    """Calculate CMI with a native Python discrete estimator.
+
+    Calculate the conditional mutual information (CMI) between two discrete
+    variables given a third, using plug-in estimates of the joint
+    probabilities. See parent class for references.
+
+    Args:
+        settings : dict [optional]
+            set estimator parameters:
+
+            - local_values : bool [optional] - return local CMI instead of
+              average CMI (default=False)
+            - discretise_method : str [optional] - if and how to discretise
+              incoming continuous data, can be 'max_ent' for maximum entropy
+              binning, 'equal' for equal size bins, and 'none' if no binning is
+              required (default='none')
+            - n_discrete_bins : int [optional] - number of discrete bins/
+              levels or the base of each dimension of the discrete variables
+              (default=2). If set, this parameter overwrites/sets alph1, alph2
+              and alphc
+            - alph1 : int [optional] - number of discrete bins/levels for var1
+              (default=2, or the value set for n_discrete_bins)
+            - alph2 : int [optional] - number of discrete bins/levels for var2
+              (default=2, or the value set for n_discrete_bins)
+            - alphc : int [optional] - number of discrete bins/levels for
+              conditional (default=2, or the value set for n_discrete_bins)
+    """
+
+    def __init__(self, settings=None):
+        super().__init__(settings)
+        self._set_alphabet_sizes(['alph1', 'alph2', 'alphc'])
+
+    def estimate(self, var1, var2, conditional=None, n_chunks=1):
+        """Estimate conditional mutual information.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, either a 2D numpy array where
+                array dimensions represent [(realisations * n_chunks) x
+                variable dimension] or a 1D array representing [realisations],
+                array type can be float (requires discretisation) or int
+            var2 : numpy array
+                realisations of the second variable (similar to var1)
+            conditional : numpy array [optional]
+                realisations of the conditioning variable (similar to var), if
+                no conditional is provided, return MI between var1 and var2
+            n_chunks : int
+                number of data chunks, no. data points has to be the same for
+                each chunk
+
+        Returns:
+            numpy array
+                average CMI for each chunk or local CMI for individual samples
+                (concatenated over chunks) if 'local_values'=True
+        """
+        # Return MI if no conditional was provided.
+        if (conditional is None) or (self.settings['alphc'] == 0):
+            est_mi = PythonDiscreteMI(self.settings)
+            return est_mi.estimate(var1, var2, n_chunks)
+        else:
+            assert conditional.size != 0, 'Conditional Array is empty.'
+
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        cond = self._ensure_two_dim_input(conditional)
+        assert var1.shape[0] == var2.shape[0], (
+            'Unequal number of observations (var1: {0}, var2: {1}).'.format(
+                var1.shape[0], var2.shape[0]))
+        assert var1.shape[0] == cond.shape[0], (
+            'Unequal number of observations (var1: {0}, cond: {1}).'.format(
+                var1.shape[0], cond.shape[0]))
+        assert var1.shape[0] % n_chunks == 0, (
+            'No. chunks ({0}) does not match data length ({1}).'.format(
+                n_chunks, var1.shape[0]))
+        var1 = self._discretise_var(var1, self.settings['alph1'], 'var1',
+                                    n_chunks)
+        var2 = self._discretise_var(var2, self.settings['alph2'], 'var2',
+                                    n_chunks)
+        cond = self._discretise_var(cond, self.settings['alphc'],
+                                    'conditional', n_chunks)
+        return self._collect_results(np.log2(
+            self._count_states(var1, var2, cond) * self._count_states(cond) /
+            (self._count_states(var1, cond) *
+             self._count_states(var2, cond))))
+
+    def estimate_surrogates(self, var1, var2, conditional=None, n_chunks=1):
+        """Estimate CMI for multiple chunks of var1.
+
+        Estimate CMI between each chunk of var1 and the same realisations of
+        var2, given the same realisations of the conditional (e.g., for
+        surrogate data, where only var1 is permuted). States of var2 and the
+        conditional are counted only once and re-used for all chunks.
+
+        Args:
+            var1 : numpy array
+                realisations of first variable, a 2D numpy array where array
+                dimensions represent [(realisations * n_chunks) x variable
+                dimension]
+            var2 : numpy array
+                realisations of the second variable for a single chunk
+                [realisations x variable dimension]
+            conditional : numpy array [optional]
+                realisations of the conditioning variable for a single chunk
+                (similar to var2), if no conditional is provided, return MI
+                between var1 and var2
+            n_chunks : int
+                number of data chunks in var1
+
+        Returns:
+            numpy array
+                average CMI for each chunk or local CMI for individual samples
+                (concatenated over chunks) if 'local_values'=True
+        """
+        if (conditional is None) or (self.settings['alphc'] == 0):
+            est_mi = PythonDiscreteMI(self.settings)
+            return est_mi.estimate_surrogates(var1, var2, n_chunks=n_chunks)
+        else:
+            assert conditional.size != 0, 'Conditional Array is empty.'
+
+        var1 = self._ensure_two_dim_input(var1)
+        var2 = self._ensure_two_dim_input(var2)
+        cond = self._ensure_two_dim_input(conditional)
+        chunklength = var2.shape[0]
+        assert cond.shape[0] == chunklength, (
+            'Unequal number of observations (var2: {0}, cond: {1}).'.format(
+                chunklength, cond.shape[0]))
+        assert var1.shape[0] == chunklength * n_chunks, (
+            'No. realisations in var1 ({0}) does not match no. chunks ({1}) '
+            'and no. realisations in var2 ({2}).'.format(
+                var1.shape[0], n_chunks, chunklength))
+        var1 = self._discretise_var(var1, self.settings['alph1'], 'var1',
+                                    n_chunks)
+        var2 = self._discretise_var(var2, self.settings['alph2'], 'var2')
+        cond = self._discretise_var(cond, self.settings['alphc'],
+                                    'conditional')
+        count_cond = self._count_states(cond)
+        count_var2_cond = self._count_states(var2, cond)
+        var2 = (np.repeat(var2[0], n_chunks, axis=0), var2[1])
+        cond = (np.repeat(cond[0], n_chunks, axis=0), cond[1])
+        return self._collect_results(np.log2(
+            self._count_states(var1, var2, cond) * count_cond /
+            (self._count_states(var1, cond) * count_var2_cond)))
+
+    def estimate_surrogates_analytic(self, n_perm=200, n_sets=None, **data):
+        """Return estimate of the analytical surrogate distribution.
+
+        This method must be implemented because this class'
+        is_analytic_null_estimator() method returns true. All surrogates are
+        drawn from the chi-square distribution in a single call.
+
+        Args:
+            n_perm : int [optional]
+                number of permutations (default=200)
+            n_sets : int [optional]
+                if set, return surrogates for n_sets variables with the same
+                dimensions as the variables in data, e.g., for all candidates
+                in a candidate set (default=None)
+            data : numpy arrays
+                realisations of random variables required for the calculation
+                (var1, var2, conditional)
+
+        Returns:
+            numpy array
+                n_perm surrogates of the average CMI under the null hypothesis
+                of no relationship between var1 and var2 given the
+                conditional, [n_sets x n_perm] if n_sets is set
+        """
+        if (data.get('conditional') is None or
+                self.settings['alphc'] == 0):
+            est_mi = PythonDiscreteMI(self.settings)
+            return est_mi.estimate_surrogates_analytic(n_perm, n_sets, **data)
+        var1 = self._ensure_two_dim_input(data['var1'])
+        var2 = self._ensure_two_dim_input(data['var2'])
+        cond = self._ensure_two_dim_input(data['conditional'])
+        base1 = int(self.settings['alph1']) ** var1.shape[1]
+        base2 = int(self.settings['alph2']) ** var2.shape[1]
+        base_cond = int(self.settings['alphc']) ** cond.shape[1]
+        return self._analytic_null(n_perm, var1.shape[0],
+                                   (base1 - 1) * (base2 - 1) * base_cond,
+                                   n_sets)
@@ -10,7 +10,7 @@ import numpy as np
 import copy as cp
 import itertools as it
 from scipy.io import loadmat
-from .data import Data
+from .data import Data, LazyData
 from . import idtxl_exceptions as ex
 try:
     import networkx as nx
@@ -162,7 +162,8 @@ def load_pickle(name):
         return pickle.load(f)
 
 
-def import_fieldtrip(file_name, ft_struct_name, file_version, normalise=True):
+def import_fieldtrip(file_name, ft_struct_name, file_version, normalise=True,
+                     lazy=False):
     """Convert FieldTrip-style MATLAB-file into an IDTxl Data object.
 
     Import a MATLAB structure with fields  "trial" (data), "label" (channel
@@ -185,11 +186,14 @@ def import_fieldtrip(file_name, ft_struct_name, file_version, normalise=True):
             version of the file, e.g. 'v7.3' for MATLAB's 7.3 format
         normalise : bool [optional]
             normalise data after import (default=True)
+        lazy : bool [optional]
+            if True, trial data are not loaded into memory but read from the
+            file on demand, see LazyData (default=False)
 
     Returns:
         Data() instance
             instance of IDTxl Data object, containing data from the 'trial'
-            field
+            field; a LazyData instance if lazy is True
         list of strings
             list of channel labels, corresponding to the 'label' field
         numpy array
@@ -206,12 +210,16 @@ def import_fieldtrip(file_name, ft_struct_name, file_version, normalise=True):
 
     print('Creating Python dictionary from FT data structure: {0}'
           .format(ft_struct_name))
-    trial_data = _ft_import_trial(file_name, ft_struct_name)
     label = _ft_import_label(file_name, ft_struct_name)
     fsample = _ft_fsample_2_float(file_name, ft_struct_name)
     timestamps = _ft_import_time(file_name, ft_struct_name)
 
-    data = Data(data=trial_data, dim_order='spr', normalise=normalise)
+    if lazy:
+        data = LazyData(data=_FieldTripTrials(file_name, ft_struct_name),
+                        dim_order='spr', normalise=normalise)
+    else:
+        trial_data = _ft_import_trial(file_name, ft_struct_name)
+        data = Data(data=trial_data, dim_order='spr', normalise=normalise)
     return data, label, timestamps, fsample
 
 
@@ -247,6 +255,88 @@ def _ft_import_trial(file_name, ft_struct_name):
     return trial_data
 
 
+class _FieldTripTrials():
+    """Read FieldTrip trial data from an hdf5 file on demand.
+
+    Provide the trials of a FieldTrip structure as an array-like with
+    dimensions (first trial dimension x second trial dimension x no. trials)
+    that reads only the requested trials from disk. The file is reopened when
+    the object is unpickled.
+    """
+
+    def __init__(self, file_name, ft_struct_name):
+        self.file_name = file_name
+        self.ft_struct_name = ft_struct_name
+        self._open()
+        first_trial = self._ft_file[self._trial[0][0]]
+        print('Found data with first dimension: {0}, and second: {1}'
+              .format(first_trial.shape[0], first_trial.shape[1]))
+        self.shape = first_trial.shape + (self._trial.shape[0],)
+        self.ndim = 3
+        self.dtype = first_trial.dtype
+
+    def _open(self):
+        self._ft_file = h5py.File(self.file_name, 'r')
+        self._trial = self._ft_file[self.ft_struct_name]['trial']
+
+    def __getitem__(self, key):
+        trials = key[2]
+        if isinstance(trials, slice):
+            trials = range(*trials.indices(self.shape[2]))
+            data = [np.asarray(self._ft_file[self._trial[tt][0]][key[:2]])
+                    for tt in trials]
+            if not data:
+                shape = np.empty(self.shape[:2])[key[:2]].shape
+                return np.empty(shape + (0,), dtype=self.dtype)
+            return np.stack(data, axis=-1)
+        return np.asarray(self._ft_file[self._trial[trials][0]][key[:2]])
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_ft_file'], state['_trial']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+
+class _HDF5Array():
+    """Read a squeezed array from an hdf5 file on demand.
+
+    Provide a dataset in an hdf5 file as an array-like without singleton
+    dimensions that reads only the requested data from disk. The file is
+    reopened when the object is unpickled.
+    """
+
+    def __init__(self, file_name, array_name):
+        self.file_name = file_name
+        self.array_name = array_name
+        self._open()
+        self._kept = [a for a, n in enumerate(self._dataset.shape) if n != 1]
+        self.shape = tuple(self._dataset.shape[a] for a in self._kept)
+        self.ndim = len(self.shape)
+        self.dtype = self._dataset.dtype
+
+    def _open(self):
+        self._dataset = h5py.File(self.file_name, 'r')[self.array_name]
+
+    def __getitem__(self, key):
+        source_key = [0] * self._dataset.ndim
+        for axis, k in zip(self._kept, key):
+            source_key[axis] = k
+        return self._dataset[tuple(source_key)]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_dataset']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+
 def _ft_import_label(file_name, ft_struct_name):
     """Import FieldTrip labels into Python."""
     # for details of the data handling see comments in _ft_import_trial
@@ -302,7 +392,7 @@ def _ft_fsample_2_float(file_name, ft_struct_name):
 
 
 def import_matarray(file_name, array_name, file_version, dim_order,
-                    normalise=True):
+                    normalise=True, lazy=False):
     """Read Matlab hdf5 file into IDTxl.
 
     reads a matlab hdf5 file ("-v7.3' or higher, .mat) or non-hdf5 files with a
@@ -330,12 +420,19 @@ def import_matarray(file_name, array_name, file_version, dim_order,
             two-dimensional array of data from several processes over time
         normalise : bool [optional]
             normalise data after import (default=True)
+        lazy : bool [optional]
+            if True, the array is not loaded into memory but read from the
+            file on demand, see LazyData; only supported for version 'v7.3'
+            (default=False)
 
     Returns:
         Data() instance
             instance of IDTxl Data object, containing data from the 'trial'
-            field
+            field; a LazyData instance if lazy is True
     """
+    if lazy and file_version != 'v7.3':
+        raise RuntimeError('Lazy import is only supported for m-files in '
+                           'format 7.3 (hdf5).')
     if file_version == 'v7.3':
         mat_file = h5py.File(file_name)
         # Assert that at least one of the keys found at the top level of the
@@ -346,6 +443,12 @@ def import_matarray(file_name, array_name, file_version, dim_order,
 
         # 2. Create an object for the matlab array (from the hdf5 hierachy),
         # the trailing [()] ensures everything is read
+        if lazy:
+            mat_file.close()
+            print('Creating LazyData object from matlab array: {0}.'.format(
+                array_name))
+            return LazyData(_HDF5Array(file_name, array_name),
+                            dim_order=dim_order, normalise=normalise)
         mat_data = np.squeeze(np.asarray(mat_file[array_name][()]))
 
     elif file_version in ['v4', 'v6', 'v7']:
@@ -123,35 +123,20 @@ def discretise(a, numBins):
         numpy array
             discretised data
     """
-    num_samples = a.shape[0]
     if (len(a.shape) == 1):
         # It's a unidimensional array
-        discretised_values = np.zeros(num_samples, dtype=np.int_)
-        theMin = a.min()
-        theMax = a.max()
-        binInterval = (theMax - theMin) / numBins
-        for t in range(num_samples):
-            discretised_values[t] = int((a[t] - theMin) / binInterval)
-            if (discretised_values[t] == numBins):
-                # This occurs for the maximum value; put it in the largest
-                # bin (base - 1).
-                discretised_values[t] = discretised_values[t] - 1
-        return discretised_values
-
-    # Else, multivariate array
-    num_dimensions = a.shape[1]
-    discretised_values = np.zeros([num_samples, num_dimensions], dtype=np.int_)
-    for v in range(a.shape[1]):
-        # Bin dimension v:
-        theMin = a[:, v].min()
-        theMax = a[:, v].max()
-        binInterval = (theMax - theMin) / numBins
-        for t in range(num_samples):
-            discretised_values[t, v] = int((a[t, v] - theMin) / binInterval)
-            if (discretised_values[t, v] == numBins):
-                # This occurs for the maximum value; put it in the largest bin
-                # (base - 1)
-                discretised_values[t, v] = discretised_values[t, v] - 1
+        return discretise(a[:, np.newaxis], numBins)[:, 0]
+
+    # Else, multivariate array, bin all dimensions at once
+    theMin = a.min(axis=0)
+    theMax = a.max(axis=0)
+    binInterval = (theMax - theMin) / numBins
+    if np.any(binInterval == 0):
+        raise ValueError('Cannot discretise constant data.')
+    discretised_values = ((a - theMin) / binInterval).astype(np.int_)
+    # The maximum value falls into bin numBins; put it in the largest bin
+    # (base - 1).
+    discretised_values[discretised_values == numBins] = numBins - 1
     return discretised_values
 
 
@@ -177,34 +162,19 @@ def discretise_max_ent(a, numBins):
     num_samples = a.shape[0]
     if (len(a.shape) == 1):
         # It's a unidimensional array
-        discretised_values = np.zeros(num_samples, dtype=np.int_)
-        cuttoff_values = np.zeros(numBins)
-        sorted_copy = np.sort(a)
-        for bin in range(numBins):
-            compartmentSize = int((bin + 1) * (num_samples) / numBins) - 1
-            cuttoff_values[bin] = sorted_copy[compartmentSize]
-        for t in range(num_samples):
-            for m in range(numBins):
-                if (a[t] <= cuttoff_values[m]):
-                    discretised_values[t] = m
-                    break
-        return discretised_values
+        return discretise_max_ent(a[:, np.newaxis], numBins)[:, 0]
 
     # Else, multivariate array
     num_dimensions = a.shape[1]
     discretised_values = np.zeros([num_samples, num_dimensions], dtype=np.int_)
+    compartment_sizes = (np.arange(1, numBins + 1) * num_samples //
+                         numBins) - 1
     for v in range(num_dimensions):
-        # Bin dimension v:
-        cuttoff_values = np.zeros(numBins)
-        sorted_copy = np.sort(a[:, v])
-        for bin in range(numBins):
-            compartmentSize = int((bin + 1) * (num_samples) / numBins) - 1
-            cuttoff_values[bin] = sorted_copy[compartmentSize]
-        for t in range(num_samples):
-            for m in range(numBins):
-                if (a[t, v] <= cuttoff_values[m]):
-                    discretised_values[t, v] = m
-                    break
+        # Bin dimension v: each value goes into the first bin whose cut-off
+        # value is larger or equal.
+        cuttoff_values = np.sort(a[:, v])[compartment_sizes]
+        discretised_values[:, v] = np.searchsorted(cuttoff_values, a[:, v],
+                                                   side='left')
     return discretised_values
 
 
@@ -266,22 +236,14 @@ def combine_discrete_dimensions(a, numBins):
         return a
 
     # Else, 2D array assumed
-    num_samples = a.shape[0]
     dimensions = a.shape[1]
-    combined_values = np.zeros(num_samples, dtype=np.int_)
-    for t in range(num_samples):
-        combined_value = 0
-        multiplier = 1
-        for c in range(dimensions - 1, -1, -1):
-            combined_value = combined_value + a[t][c] * multiplier
-            multiplier = multiplier * numBins
-            if multiplier <= 0:
-                # Multiplier has overflown
-                raise ArithmeticError(
-                    'Combination of numBins and number of dimensions of a '
-                    'leads to overflow in making unidimensional array')
-        combined_values[t] = int(combined_value)
-    return combined_values
+    if int(numBins) ** dimensions > np.iinfo(np.int_).max:
+        # Multiplier has overflown
+        raise ArithmeticError(
+            'Combination of numBins and number of dimensions of a '
+            'leads to overflow in making unidimensional array')
+    multipliers = numBins ** np.arange(dimensions - 1, -1, -1, dtype=np.int_)
+    return np.dot(a.astype(np.int_), multipliers)
 
 
 def equal_dicts(dict_1, dict_2):
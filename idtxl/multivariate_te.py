@@ -107,6 +107,11 @@ class MultivariateTE(NetworkInferenceTE, NetworkInferenceMultivariate):
                 - fdr_correction : bool [optional] - correct results on the
                   network level, see documentation of stats.network_fdr() for
                   details (default=True)
+                - n_jobs : int [optional] - number of targets analysed in
+                  parallel (default=1)
+                - executor : str [optional] - run parallel analyses in
+                  'processes' or 'threads' (default='processes'), see
+                  documentation of NetworkAnalysis._analyse_parallel()
 
             data : Data instance
                 raw data for analysis
@@ -151,13 +156,21 @@ class MultivariateTE(NetworkInferenceTE, NetworkInferenceMultivariate):
         results = ResultsNetworkInference(n_nodes=data.n_processes,
                                           n_realisations=data.n_realisations(),
                                           normalised=data.normalise)
-        for t in range(len(targets)):
-            if settings['verbose']:
-                print('\n####### analysing target with index {0} from list {1}'
-                      .format(t, targets))
-            res_single = self.analyse_single_target(
-                    settings, data, targets[t], sources[t])
-            results.combine_results(res_single)
+        # Share realisations of variables between targets if requested.
+        with self._network_realisations_store(settings, data):
+            if settings.get('n_jobs', 1) == 1:
+                for t in range(len(targets)):
+                    if settings['verbose']:
+                        print('\n####### analysing target with index {0} from '
+                              'list {1}'.format(t, targets))
+                    res_single = self.analyse_single_target(
+                            settings, data, targets[t], sources[t])
+                    results.combine_results(res_single)
+            else:
+                for res_single in self._analyse_parallel(
+                        settings, data, 'analyse_single_target',
+                        list(zip(targets, sources))):
+                    results.combine_results(res_single)
 
         # Get no. realisations actually used for estimation from single target
         # analysis.
@@ -251,6 +264,62 @@ class MultivariateTE(NetworkInferenceTE, NetworkInferenceMultivariate):
                   Data.permute_samples() for further settings (default=False)
                 - verbose : bool [optional] - toggle console output
                   (default=True)
+                - estimator_cache : bool [optional] - cache estimates for
+                  identical realisations, see estimator.CachedEstimator
+                  (default=False)
+                - cache_max_bytes : int [optional] - approximate memory
+                  limit of the estimator cache in bytes, see
+                  estimator.CachedEstimator (default=100 MB)
+                - realisations_cache : bool [optional] - cache realisations of
+                  candidates in the data, see Data.enable_realisations_cache
+                  (default=False)
+                - realisations_cache_max_bytes : int [optional] - memory limit
+                  of the realisations cache in bytes (default=100 MB)
+                - realisations_store : bool [optional] - when analysing a
+                  network, retrieve realisations of each variable once and
+                  share them between all targets and parallel workers, see
+                  Data.enable_realisations_store() (default=False)
+                - surrogate_store : bool [optional] - store surrogate values
+                  per candidate and conditioning set and re-use or extend them
+                  whenever a candidate is tested again under the same
+                  conditioning set (default=False)
+                - perm_sequential : bool [optional] - create surrogates in
+                  batches and stop permutation tests as soon as their decision
+                  is settled, see stats._get_surrogate_values()
+                  (default=False)
+                - perm_batch_size : int [optional] - number of permutations
+                  per batch in sequential permutation tests (default=50)
+                - perm_sequential_error : float [optional] - error level of
+                  the stopping rule in sequential permutation tests
+                  (default=0.001)
+                - pvalue_method : str [optional] - 'permutation' to estimate
+                  p-values by counting surrogates, 'gpd' or 'moment' to
+                  extrapolate p-values below 1/n_perm from a fit to the
+                  surrogate distribution (used for p-values entering FDR-
+                  correction), see stats._find_pvalue_tail()
+                  (default='permutation')
+                - pvalue_gof_alpha : float [optional] - critical alpha level
+                  of the goodness-of-fit test for extrapolated p-values
+                  (default=0.05)
+                - checkpoint_dir : str [optional] - directory to which the
+                  state of the analysis is written after each stage and the
+                  final results are written for each target, see documentation
+                  of NetworkAnalysis._init_checkpoints() (default=None)
+                - resume : bool [optional] - if True, read results of
+                  finished targets from checkpoint_dir and continue interrupted
+                  analyses from their last checkpoint (default=False)
+                - profile : bool [optional] - record wall time, estimator
+                  calls, and surrogates for each stage of the analysis and add
+                  the profile to the results of each target, see
+                  profiling.Profiler (default=False)
+                - local_values : bool [optional] - return local TE instead
+                  of average values (default=False)
+                - local_values_store : str [optional] - if 'memmap' or 'hdf5',
+                  write local values as float32 to a .npy-file or HDF5 file
+                  per target and return references to the files instead of
+                  arrays, see results.LocalValues (default=None)
+                - local_values_dir : str [optional] - directory for local
+                  values files (default=current directory)
 
             data : Data instance
                 raw data for analysis
@@ -266,18 +335,23 @@ class MultivariateTE(NetworkInferenceTE, NetworkInferenceMultivariate):
                 results of network inference, see documentation of
                 ResultsNetworkInference()
         """
+        # Return results of a finished analysis if resuming from
+        # checkpoints.
+        settings, results = self._init_checkpoints(settings, data, target,
+                                                   sources)
+        if results is not None:
+            return results
+
         # Check input and clean up object if it was used before.
         self._initialise(settings, data, sources, target)
 
-        # Main algorithm.
-        print('\n---------------------------- (1) include target candidates')
-        self._include_target_candidates(data)
-        print('\n---------------------------- (2) include source candidates')
-        self._include_source_candidates(data)
-        print('\n---------------------------- (3) prune source candidate')
-        self._prune_candidates(data)
-        print('\n---------------------------- (4) final statistics')
-        self._test_final_conditional(data)
+        # Main algorithm, write checkpoints after each stage if requested.
+        self._run_stages([
+            ('(1) include target candidates', self._include_target_candidates),
+            ('(2) include source candidates', self._include_source_candidates),
+            ('(3) prune source candidate', self._prune_candidates),
+            ('(4) final statistics', self._test_final_conditional)],
+            data)
 
         # Clean up and return results.
         if self.settings['verbose']:
@@ -304,7 +378,14 @@ class MultivariateTE(NetworkInferenceTE, NetworkInferenceMultivariate):
                 'omnibus_te': self.statistic_omnibus,
                 'omnibus_pval': self.pvalue_omnibus,
                 'omnibus_sign': self.sign_omnibus,
-                'te': self.statistic_single_link
+                'te': self.statistic_single_link,
+                'estimator_cache': self._get_estimator_cache_info(),
+                'realisations_cache': self._release_realisations_cache(data),
+                'surrogate_store': self._get_surrogate_store_info(),
+                'n_perm_used': self._n_perm_used,
+                'pvalue_fit': self._pvalue_fit,
+                'profile': self._get_profile()
             })
+        self._write_checkpoint_results(results)
         self._reset()  # remove attributes
         return results
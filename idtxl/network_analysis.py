@@ -1,10 +1,34 @@
 """Parent class for network inference and network comparison.
 """
+import os
+import uuid
+import contextlib
+import functools
 import copy as cp
+import pickle
 import itertools as it
+import threading
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import numpy as np
-from .estimator import find_estimator
+from .estimator import (find_estimator, CachedEstimator, ProfiledEstimator,
+                        CACHE_MAX_BYTES)
+from .data import REALISATIONS_CACHE_MAX_BYTES
+from .results import LocalValues
 from . import idtxl_utils as utils
+from . import profiling
+
+ANALYSIS_EXECUTORS = ('processes', 'threads')
+# Settings controlling the parallel execution of analyse_network(), these are
+# not passed on to the analysis of individual targets or processes.
+PARALLEL_SETTINGS = ('n_jobs', 'executor')
+
+# Settings controlling checkpoints of single target or process analyses, these
+# are not stored with the analysis settings.
+CHECKPOINT_SETTINGS = ('checkpoint_dir', 'resume')
+
+# Data shared with the current worker process by _WorkerPool.
+_worker_data = threading.local()
 
 
 class NetworkAnalysis():
@@ -22,6 +46,9 @@ class NetworkAnalysis():
         self._current_value_realisations = None
         self._selected_vars_realisations = None
         self._min_stats_surr_table = None
+        self._surrogate_store = None
+        self._checkpoint_path = None
+        self._profile = None
 
     @property
     def current_value(self):
@@ -196,6 +223,12 @@ class NetworkAnalysis():
         # average estimator. Internally, the average estimator is used for
         # building the non-uniform embedding, etc. The local estimator is used
         # to estimate single-link MI/TE or single-process AIS in the end.
+        #
+        # If requested, wrap the average estimator in a cache, such that
+        # estimates for identical realisations are only computed once (see
+        # documentation of estimator.CachedEstimator). If profiling, count
+        # calls to the estimators; the cache wraps the profiled estimator such
+        # that only estimates not found in the cache are counted.
         try:
             EstimatorClass = find_estimator(self.settings['cmi_estimator'])
         except KeyError:
@@ -207,6 +240,366 @@ class NetworkAnalysis():
             self._cmi_estimator_local = EstimatorClass(self.settings)
         else:
             self._cmi_estimator = EstimatorClass(self.settings)
+        if self.settings.get('profile', False) or profiling.is_active():
+            self._cmi_estimator = ProfiledEstimator(self._cmi_estimator)
+            if self.settings['local_values']:
+                self._cmi_estimator_local = ProfiledEstimator(
+                    self._cmi_estimator_local)
+        if self.settings.get('estimator_cache', False):
+            self._cmi_estimator = CachedEstimator(
+                self._cmi_estimator,
+                self.settings.get('cache_max_bytes', CACHE_MAX_BYTES))
+
+    def _analyse_parallel(self, settings, data, method, tasks):
+        """Analyse multiple targets or processes on a pool of workers.
+
+        Call method (e.g., 'analyse_single_target') for each task on a pool
+        of 'n_jobs' workers. Each call uses a new instance of the analysis
+        class, such that analyses of individual targets are independent.
+        Workers are either processes (default) or threads, as set by
+        'executor' in the settings (see _WorkerPool).
+
+        To avoid oversubscription of CPUs, the number of threads used by each
+        JIDT estimator ('num_threads') is set to the no. CPUs divided by
+        n_jobs, unless it is set explicitly.
+
+        Args:
+            settings : dict
+                analysis settings, including 'n_jobs' and optionally
+                'executor' ('processes' or 'threads')
+            data : Data instance
+                raw data for analysis
+            method : str
+                name of the analysis method called for each task
+            tasks : list of tuples
+                arguments passed to method after settings and data for each
+                task, e.g., (target, sources)
+
+        Returns:
+            list
+                results of each task in the order of tasks
+        """
+        n_jobs = int(settings['n_jobs'])
+        assert n_jobs > 0, 'n_jobs must be positive.'
+        executor = settings.get('executor', 'processes')
+        settings_task = {k: v for (k, v) in settings.items()
+                         if k not in PARALLEL_SETTINGS}
+        try:
+            EstimatorClass = find_estimator(settings['cmi_estimator'])
+        except KeyError:
+            raise RuntimeError('Please provide an estimator class or name!')
+        if EstimatorClass.__module__.endswith('estimators_jidt'):
+            settings_task.setdefault(
+                'num_threads', max(1, os.cpu_count() // n_jobs))
+
+        return _map_parallel(
+            functools.partial(_analyse_task, type(self), method,
+                              settings_task),
+            data, tasks, n_jobs, executor)
+
+    def _init_checkpoints(self, settings, data, target, sources=None):
+        """Set up checkpoints for the analysis of a single target or process.
+
+        If 'checkpoint_dir' is given in the settings, the state of the
+        analysis is written to a checkpoint after each stage of the
+        algorithm, and the final results are written to a per-target shard
+        in checkpoint_dir. If 'resume' is True, the analysis of a target with
+        an existing shard is skipped and the results are read from the shard.
+        The analysis of an interrupted target is continued from its last
+        checkpoint (see _run_stages()). Checkpoints include the state of
+        numpy's random number generator, such that resumed analyses return
+        the same results as an uninterrupted analysis. Statistics of caches
+        (e.g., 'estimator_cache') are not restored. Checkpoints also include
+        the sources and a fingerprint of the data (dimensions and content
+        hash, see Data.get_fingerprint()), resuming from a checkpoint of an
+        analysis with different settings, sources, or data raises an error.
+
+        Args:
+            settings : dict
+                analysis settings, can contain 'checkpoint_dir' (default=None)
+                and 'resume' (default=False)
+            data : Data instance
+                raw data for analysis
+            target : int
+                index of the target or process
+            sources : list of int | int | 'all' [optional]
+                sources of the target, None for single process analyses
+                (default=None)
+
+        Returns:
+            dict
+                settings without checkpoint settings
+            Results instance | None
+                results read from the shard of a finished analysis, None if
+                the target has to be analysed
+        """
+        checkpoint_dir = settings.get('checkpoint_dir', None)
+        self._resume = settings.get('resume', False)
+        settings = {k: v for (k, v) in settings.items()
+                    if k not in CHECKPOINT_SETTINGS}
+        if checkpoint_dir is None:
+            self._checkpoint_path = None
+            return settings, None
+
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self._checkpoint_path = os.path.join(
+            checkpoint_dir, '{0}_{1}'.format(type(self).__name__, target))
+        if sources == 'all':
+            sources = [p for p in range(data.n_processes) if p != target]
+        elif type(sources) is int:
+            sources = [sources]
+        elif sources is not None:
+            sources = sorted(int(p) for p in sources)
+        self._checkpoint_id = {'sources': sources,
+                               'data': data.get_fingerprint()}
+        if self._resume and os.path.exists(self._checkpoint_path + '.p'):
+            checkpoint = self._read_checkpoint('.p', settings)
+            np.random.set_state(checkpoint['random_state'])
+            print('Read results for {0} from checkpoint {1}.p.'.format(
+                target, self._checkpoint_path))
+            self._checkpoint_path = None
+            return settings, checkpoint['results']
+        return settings, None
+
+    def _run_stages(self, stages, data):
+        """Run stages of the algorithm, write a checkpoint after each stage.
+
+        If resuming from a checkpoint, restore the state of the analysis
+        after the last completed stage and skip all completed stages.
+
+        Each stage is recorded by active profilers. If 'profile' is True in
+        the settings, stages are recorded by a new profiler, whose profile is
+        returned by _get_profile() (see documentation of profiling.Profiler).
+
+        Args:
+            stages : list of tuples
+                name and method of each stage, methods are called with data
+            data : Data instance
+                raw data for analysis
+        """
+        first_stage = 0
+        if (self._checkpoint_path is not None and self._resume and
+                os.path.exists(self._checkpoint_path + '_stage.p')):
+            checkpoint = self._read_checkpoint('_stage.p', self.settings)
+            self.__dict__.update(checkpoint['state'])
+            np.random.set_state(checkpoint['random_state'])
+            first_stage = checkpoint['stage']
+            print('Resuming after stage {0} from checkpoint {1}_stage.p.'
+                  .format(stages[first_stage - 1][0], self._checkpoint_path))
+
+        if self.settings.get('profile', False):
+            profiler = profiling.Profiler()
+        else:
+            profiler = contextlib.nullcontext()
+        with profiler:
+            for i in range(first_stage, len(stages)):
+                print('\n---------------------------- {0}'.format(
+                    stages[i][0]))
+                with profiling.stage(stages[i][0],
+                                     target=self.current_value[0]):
+                    stages[i][1](data)
+                self._write_stage_checkpoint(i, len(stages))
+        if self.settings.get('profile', False):
+            self._profile = profiler.to_dict()
+
+    def _write_stage_checkpoint(self, i, n_stages):
+        """Write state of the analysis after stage i if requested."""
+        if self._checkpoint_path is None or i == n_stages - 1:
+            return
+        # Estimators and worker pools can not be pickled, estimators are
+        # re-created by _initialise() when resuming, as are settings.
+        state = {k: v for (k, v) in self.__dict__.items()
+                 if not (k.startswith('_cmi_estimator') or k in
+                         ['settings', '_checkpoint_path', '_resume',
+                          '_checkpoint_id', '_source_pool'])}
+        self._write_checkpoint('_stage.p', {
+            'stage': i + 1,
+            'state': state,
+            'settings': self.settings,
+            'id': self._checkpoint_id,
+            'random_state': np.random.get_state()})
+
+    def _write_checkpoint_results(self, results):
+        """Write final results to the shard of the current target."""
+        if self._checkpoint_path is None:
+            return
+        self._write_checkpoint('.p', {
+            'results': results,
+            'settings': self.settings,
+            'id': self._checkpoint_id,
+            'random_state': np.random.get_state()})
+        try:
+            os.remove(self._checkpoint_path + '_stage.p')
+        except FileNotFoundError:
+            pass
+
+    def _write_checkpoint(self, suffix, checkpoint):
+        """Write checkpoint to a temporary file and move it into place."""
+        path = self._checkpoint_path + suffix
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(checkpoint, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+    def _read_checkpoint(self, suffix, settings):
+        """Read checkpoint, check that settings, sources, and data match."""
+        with open(self._checkpoint_path + suffix, 'rb') as f:
+            checkpoint = pickle.load(f)
+        if utils.conflicting_entries(checkpoint['settings'], settings):
+            raise RuntimeError(
+                'Can not resume from checkpoint {0}{1} - analysis settings are'
+                ' not equal.'.format(self._checkpoint_path, suffix))
+        checkpoint_id = checkpoint.get('id', {})
+        for key in ['sources', 'data']:
+            if checkpoint_id.get(key) != self._checkpoint_id[key]:
+                raise RuntimeError(
+                    'Can not resume from checkpoint {0}{1} - {2} are not '
+                    'equal.'.format(self._checkpoint_path, suffix, key))
+        return checkpoint
+
+    def _get_profile(self):
+        """Return profile of the last analysis, None if not profiled."""
+        return self._profile
+
+    def _get_estimator_cache_info(self):
+        """Return statistics of the estimator cache, None if not used."""
+        if isinstance(self._cmi_estimator, CachedEstimator):
+            return self._cmi_estimator.cache_info()
+        else:
+            return None
+
+    def _set_realisations_cache(self, data):
+        """Enable caching of realisations in the data if requested."""
+        if self.settings.get('realisations_cache', False):
+            data.enable_realisations_cache(self.settings.get(
+                'realisations_cache_max_bytes', REALISATIONS_CACHE_MAX_BYTES))
+
+    def _release_realisations_cache(self, data):
+        """Return statistics of the realisations cache, None if not used.
+
+        If the cache was enabled for the current analysis, it is disabled and
+        its memory released, such that cached realisations do not outlive the
+        analysis of a single target.
+        """
+        cache_info = data.realisations_cache_info()
+        if self.settings.get('realisations_cache', False):
+            data.disable_realisations_cache()
+        return cache_info
+
+    @contextlib.contextmanager
+    def _network_realisations_store(self, settings, data):
+        """Share a realisations store between the analyses of all targets.
+
+        If 'realisations_store' is True in the settings, enable a store of
+        realisations in the data for the current value used by the analyses
+        of all targets (see Data.enable_realisations_store()), such that each
+        variable is materialised once per network instead of once per target.
+        If targets are analysed in parallel, the store is shared with all
+        workers (see _WorkerPool). The store is removed when the context
+        is left.
+
+        Args:
+            settings : dict
+                analysis settings
+            data : Data instance
+                raw data for analysis
+        """
+        if not settings.get('realisations_store', False):
+            yield
+            return
+        data.enable_realisations_store(
+            (0, self._get_current_value_sample(settings)))
+        try:
+            yield
+        finally:
+            data.disable_realisations_store()
+
+    def _get_current_value_sample(self, settings):
+        """Return sample index of the current value for given settings."""
+        raise NotImplementedError(
+            'A realisations store is not supported by {0}.'.format(
+                type(self).__name__))
+
+    def _set_surrogate_store(self):
+        """Initialise the store of surrogate values if requested.
+
+        The store holds surrogate values created for statistical testing,
+        keyed by candidate, conditioning set, and permutation settings, such
+        that surrogates can be re-used or extended whenever the same candidate
+        is tested again under the same conditioning set (e.g., in different
+        stages of the analysis). The store is only valid for a single target
+        or process and is reset by each call to _initialise().
+        """
+        if self.settings.get('surrogate_store', False):
+            self._surrogate_store = {}
+            self._surrogate_store_stats = {'hits': 0, 'extended': 0,
+                                           'misses': 0}
+        else:
+            self._surrogate_store = None
+
+    def _get_surrogate_store_info(self):
+        """Return statistics of the surrogate store, None if not used."""
+        if self._surrogate_store is None:
+            return None
+        info = dict(self._surrogate_store_stats)
+        info['n_entries'] = len(self._surrogate_store)
+        return info
+
+    def _surrogate_store_key(self, candidate, idx_conditional):
+        """Return key of surrogates for a candidate and conditioning set."""
+        perm_settings = tuple(
+            (k, self.settings.get(k)) for k in [
+                'permute_in_time', 'perm_type', 'max_shift', 'block_size',
+                'perm_range'])
+        return (tuple(candidate), frozenset(idx_conditional), perm_settings)
+
+    def _get_stored_surrogates(self, candidate, idx_conditional, n_perm,
+                               offset=0):
+        """Return up to n_perm stored surrogate values, None if not stored.
+
+        Args:
+            candidate : tuple
+                index of the candidate variable
+            idx_conditional : list of tuples
+                indices of the conditioning set used for surrogate estimation
+            n_perm : int
+                number of requested surrogate values
+            offset : int [optional]
+                index of the first requested surrogate value, values before
+                the offset were already used (default=0)
+
+        Returns:
+            numpy array | None
+                up to n_perm surrogate values starting at offset, None if no
+                values are stored from offset on
+        """
+        values = self._surrogate_store.get(
+            self._surrogate_store_key(candidate, idx_conditional))
+        if values is None or values.shape[0] <= offset:
+            self._surrogate_store_stats['misses'] += 1
+            return None
+        if values.shape[0] >= offset + n_perm:
+            self._surrogate_store_stats['hits'] += 1
+        else:
+            self._surrogate_store_stats['extended'] += 1
+        return values[offset:offset + n_perm]
+
+    def _store_surrogates(self, candidate, idx_conditional, values,
+                          offset=0):
+        """Append surrogate values for a candidate and conditioning set.
+
+        Values are surrogates starting at index offset, only values beyond
+        the stored surrogates are appended. Values are not stored if they do
+        not continue the stored surrogates.
+        """
+        key = self._surrogate_store_key(candidate, idx_conditional)
+        stored = self._surrogate_store.get(key)
+        n_stored = 0 if stored is None else stored.shape[0]
+        if offset > n_stored:
+            return
+        values = values[n_stored - offset:]
+        if stored is not None:
+            values = np.concatenate((stored, values))
+        self._surrogate_store[key] = values
 
     def _separate_realisations(self, idx_full, idx_single):
         """Separate single index realisations from a set of realisations.
@@ -386,6 +779,11 @@ class NetworkAnalysis():
         information (transfer) is calculated conditionally on selected
         variables from further sources in the network.
 
+        Realisations of all source variables are retrieved once. Links with
+        the same number of source and conditioning variables are estimated in
+        a single call to the estimator's estimate_parallel(), where each link
+        is passed as one chunk.
+
         Measures can be estimated either for 'all' sources (determined from the
         selected source variables) or for individual sources. A list of
         estimated values for each link (source-target combination) is returned.
@@ -436,66 +834,327 @@ class NetworkAnalysis():
                                    'nodes in the data ({1}).'.format(
                                        sources, data.n_processes))
 
+        if conditioning not in ['full', 'target', 'none']:
+            raise RuntimeError('Unknown conditioning: {0}.'.format(
+                conditioning))
+
+        # Get realisations of all source variables once, realisations of
+        # individual links and conditioning sets are columns of this array.
+        source_vars = [tuple(v) for v in source_vars]
+        source_realisations, replication_ind = data.get_realisations(
+            current_value, source_vars)
+        n_realisations = current_value_realisations.shape[0]
+        link_columns = []
+        for s in sources:
+            link_columns.append((
+                [j for (j, v) in enumerate(source_vars) if v[0] == s],
+                [j for (j, v) in enumerate(source_vars) if v[0] != s]))
+
         # Allocate memory: either a multidimensional array if local values are
         # required, or a 1D-array for averaged values for each link.
         if self.settings['local_values']:
             # Collect local values in a [sources x samples x replications]
             # matrix.
-            links = np.zeros((
-                len(sources),
-                data.n_realisations_samples(current_value),
-                data.n_replications))
+            links = self._create_local_values(
+                (len(sources),
+                 data.n_realisations_samples(current_value),
+                 data.n_replications),
+                'local_{0}_target_{1}'.format(
+                    getattr(self, 'measure', 'values'), current_value[0]),
+                'lsr')
+            estimator = self._cmi_estimator_local
         else:
             links = np.zeros(len(sources))
+            estimator = self._cmi_estimator
+
+        # Estimate links with equal dimensions in batched calls, where each
+        # link is one chunk. The current value and conditioning sets that are
+        # equal for all links ('target', 'none') are re-used over chunks.
+        def _get_conditional(i):
+            if conditioning == 'target':
+                return target_realisations
+            elif conditioning == 'none':
+                return None
+            conditional_columns = link_columns[i][1]
+            if not conditional_columns:
+                return target_realisations
+            elif target_realisations is None:
+                return source_realisations[:, conditional_columns]
+            else:
+                return np.hstack((
+                    source_realisations[:, conditional_columns],
+                    target_realisations))
 
-        # Loop over individual sources.
-        for (i, s) in enumerate(sources):
-
-            # Separate source variables in variables belonging to the current
-            # link and variables belonging to the conditioning set. Get
-            # realisations for the current link's selected source variables.
-            link_vars = [i for i in source_vars if i[0] == s]
-            conditional_vars = [i for i in source_vars if i[0] != s]
-            source_realisations, replication_ind = data.get_realisations(
-                current_value, link_vars)
-
-            # Determine which type of conditioning is requested.
+        batches = {}
+        for i in range(len(sources)):
             if conditioning == 'full':
-                if target_realisations is None:
-                    # Use sources' pasts only, returns None if conditional vars
-                    # is empty.
-                    conditional_realisations = data.get_realisations(
-                            current_value, conditional_vars)[0]
-                else:
-                    # Use target's and sources' past, check if conditional vars
-                    # is not empty, otherwise np.hstack crashes.
-                    if conditional_vars:
-                        conditional_realisations = np.hstack((
-                            data.get_realisations(
-                                current_value, conditional_vars)[0],
-                            target_realisations))
-                    else:   # use target's past only
-                        conditional_realisations = target_realisations
-
-            elif conditioning == 'target':  # use target's past only (biv. TE)
-                conditional_realisations = target_realisations
-            elif conditioning == 'none':  # no conditioning (bivariate MI)
-                conditional_realisations = None
+                cond_dim = len(link_columns[i][1])
             else:
-                raise RuntimeError('Unknown conditioning: {0}.'.format(
-                    conditioning))
-
-            if self.settings['local_values']:
-                local_values = self._cmi_estimator_local.estimate(
-                    current_value_realisations,
-                    source_realisations,
-                    conditional_realisations)
-                links[i] = local_values.reshape(
-                    max(replication_ind) + 1, sum(replication_ind == 0)).T
+                cond_dim = 0
+            batches.setdefault((len(link_columns[i][0]), cond_dim),
+                               []).append(i)
+        for (link_dim, cond_dim), idx in batches.items():
+            conditional = _get_conditional(idx[0])
+            if conditional is None:
+                cond_dim = 0
             else:
-                links[i] = self._cmi_estimator.estimate(
-                    current_value_realisations,
-                    source_realisations,
-                    conditional_realisations)
+                cond_dim = conditional.shape[1]
+            chunk_bytes = (n_realisations * (1 + link_dim + cond_dim) *
+                           source_realisations.itemsize)
+            max_chunks = estimator.get_max_chunks(chunk_bytes)
+            for b in range(0, len(idx), max_chunks):
+                batch = idx[b:b + max_chunks]
+                data_batch = {
+                    'var1': current_value_realisations,
+                    'var2': np.vstack([
+                        source_realisations[:, link_columns[i][0]]
+                        for i in batch])}
+                re_use = ['var1']
+                if conditional is not None:
+                    data_batch['conditional'] = conditional
+                    if conditioning == 'full':
+                        data_batch['conditional'] = np.vstack([
+                            _get_conditional(i) for i in batch])
+                    else:
+                        re_use.append('conditional')
+                values = estimator.estimate_parallel(
+                    n_chunks=len(batch), re_use=re_use, **data_batch)
+                if self.settings['local_values']:
+                    values = np.reshape(values, (len(batch), n_realisations))
+                    for i, v in zip(batch, values):
+                        links[i] = v.reshape(
+                            max(replication_ind) + 1,
+                            sum(replication_ind == 0)).T
+                else:
+                    links[batch] = values
 
+        if isinstance(links, LocalValues):
+            links.close()
         return links
+
+    def _create_local_values(self, shape, name, dim_order):
+        """Return an array for local values, stored on disk if requested.
+
+        If 'local_values_store' is set in the settings ('memmap' or 'hdf5'),
+        create a file in 'local_values_dir' (default=current directory) and
+        return a writable results.LocalValues instance, which has to be
+        closed after writing. Local values are stored as float32. The file
+        name is made unique by a random suffix, such that later analyses
+        writing to the same directory never overwrite local values referenced
+        by earlier results. Otherwise, return an array of zeros.
+
+        Args:
+            shape : tuple
+                shape of the array
+            name : str
+                prefix of the file name
+            dim_order : str
+                order of dimensions, see results.LocalValues
+
+        Returns:
+            numpy array | LocalValues instance
+        """
+        store = self.settings.get('local_values_store', None)
+        if store is None:
+            return np.zeros(shape)
+        extension = '.h5' if store == 'hdf5' else '.npy'
+        file_name = os.path.join(
+            os.path.abspath(self.settings.get('local_values_dir', '.')),
+            '{0}_{1}{2}'.format(name, uuid.uuid4().hex, extension))
+        return LocalValues.create(file_name, store, dim_order, shape)
+
+    def _store_local_values(self, values, name, dim_order):
+        """Write local values to disk if requested, see _create_local_values.
+
+        Returns:
+            numpy array | LocalValues instance
+                values if no store is set in the settings, reference to the
+                stored values otherwise
+        """
+        if self.settings.get('local_values_store', None) is None:
+            return values
+        local_values = self._create_local_values(values.shape, name,
+                                                 dim_order)
+        local_values[()] = values
+        local_values.close()
+        return local_values
+
+
+def _map_parallel(func, data, tasks, n_jobs, executor):
+    """Call func(data, task) for each task on a new pool of workers.
+
+    See _WorkerPool for the execution of tasks by threads or processes.
+
+    Args:
+        func : callable
+            function called with data and a single task, has to be picklable
+            for processes
+        data : Data instance
+            raw data for analysis
+        tasks : list
+            argument passed to func for each task
+        n_jobs : int
+            number of workers
+        executor : str
+            'processes' or 'threads'
+
+    Returns:
+        list
+            results of each task in the order of tasks
+    """
+    with _WorkerPool(data, n_jobs, executor) as pool:
+        return pool.map(func, tasks)
+
+
+class _WorkerPool():
+    """Pool of workers calling functions on the data of an analysis.
+
+    Workers are either threads or processes. Threads receive a shallow copy
+    of the data object, such that each task holds its own realisations
+    cache. For processes, the data array is placed in shared memory once and
+    attached by each worker when it is started, instead of being pickled for
+    each task; functions are then called with data=None and have to read the
+    data attached by _init_analysis_worker(). Processes are started using the
+    'spawn' method, such that each worker starts its own JVM or OpenCL
+    context when it creates its first estimator. If a realisations store is
+    enabled in the data, it is placed in shared memory and filled by all
+    workers (see Data.enable_realisations_store()). Shared memory requires
+    Python 3.8 or later, use threads for earlier versions.
+
+    Workers are started once and are re-used by all calls to map(), e.g., by
+    all stages of an analysis, until the pool is closed. The data must not
+    change while the pool is open.
+
+    Args:
+        data : Data instance
+            raw data for analysis
+        n_jobs : int
+            number of workers
+        executor : str
+            'processes' or 'threads'
+    """
+
+    def __init__(self, data, n_jobs, executor):
+        if executor not in ANALYSIS_EXECUTORS:
+            raise RuntimeError('Unknown executor {0}, use one of {1}.'.format(
+                executor, ANALYSIS_EXECUTORS))
+        self.data = data
+        self.executor = executor
+        self._shm = []
+        if executor == 'threads':
+            self._pool = ThreadPoolExecutor(max_workers=n_jobs)
+            return
+
+        # Shared memory is imported here as it requires Python 3.8+.
+        from multiprocessing import shared_memory
+        data_ref = _get_data_reference(data)
+        data_ref._realisations_store = None
+        try:
+            if isinstance(data.data, np.ndarray):
+                shm = shared_memory.SharedMemory(
+                    create=True, size=max(data.data.nbytes, 1))
+                self._shm.append(shm)
+                np.ndarray(data.data.shape, dtype=data.data.dtype,
+                           buffer=shm.buf)[:] = data.data
+                data_ref._data = None
+                shared_array = (shm.name, data.data.shape,
+                                data.data.dtype.str)
+            else:  # lazily loaded data are pickled by reference
+                shared_array = None
+            if data._realisations_store is not None:
+                # New shared memory is zero-initialised, i.e., all variables
+                # are marked as not materialised.
+                current_value = (0, data._realisations_store.sample)
+                shm_store = shared_memory.SharedMemory(
+                    create=True,
+                    size=data.realisations_store_nbytes(current_value))
+                self._shm.append(shm_store)
+                shared_store = (shm_store.name, current_value)
+            else:
+                shared_store = None
+            self._pool = ProcessPoolExecutor(
+                max_workers=n_jobs, mp_context=mp.get_context('spawn'),
+                initializer=_init_analysis_worker,
+                initargs=(data_ref, shared_array, shared_store))
+        except BaseException:
+            self._release_shared_memory()
+            raise
+
+    def map(self, func, tasks):
+        """Call func(data, task) for each task.
+
+        Args:
+            func : callable
+                function called with data and a single task, has to be
+                picklable for processes
+            tasks : list
+                argument passed to func for each task
+
+        Returns:
+            list
+                results of each task in the order of tasks
+        """
+        if self.executor == 'threads':
+            futures = [self._pool.submit(func, _get_data_reference(self.data),
+                                         task)
+                       for task in tasks]
+        else:
+            futures = [self._pool.submit(func, None, task) for task in tasks]
+        return [f.result() for f in futures]
+
+    def close(self):
+        """Shut down workers and release shared memory."""
+        try:
+            self._pool.shutdown()
+        finally:
+            self._release_shared_memory()
+
+    def _release_shared_memory(self):
+        for m in self._shm:
+            m.close()
+            m.unlink()
+        self._shm = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _get_data_reference(data):
+    """Return a shallow copy of a data object without cached realisations.
+
+    The copy shares the realisations store with the original object.
+    """
+    data_ref = cp.copy(data)
+    data_ref._realisations_cache = None
+    return data_ref
+
+
+def _init_analysis_worker(data, shared_array, shared_store=None):
+    """Attach data shared by _WorkerPool in a worker process."""
+    from multiprocessing import shared_memory
+    if shared_array is not None:
+        name, shape, dtype = shared_array
+        _worker_data.shm = shared_memory.SharedMemory(name=name)
+        data._data = np.ndarray(shape, dtype=np.dtype(dtype),
+                                buffer=_worker_data.shm.buf)
+        data._data.flags.writeable = False
+    if shared_store is not None:
+        name, current_value = shared_store
+        _worker_data.shm_store = shared_memory.SharedMemory(name=name)
+        data.enable_realisations_store(current_value,
+                                       _worker_data.shm_store.buf)
+    _worker_data.data = data
+
+
+def _analyse_task(analysis_class, method, settings, data, task):
+    """Analyse a single target or process in a worker.
+
+    If data is None, the data attached by _init_analysis_worker() is used.
+    """
+    if data is None:
+        data = _worker_data.data
+    analysis = analysis_class()
+    return getattr(analysis, method)(dict(settings), data, *task)
@@ -744,12 +744,11 @@ class NetworkComparison(NetworkAnalysis):
                     data.get_realisations(current_value, conditional_vars)[0],
                     target_realisations))
 
-            te_surrogates[s] = self._cmi_estimator.estimate_parallel(
-                n_chunks=self.settings['n_perm_comp'],
-                re_use=['var2', 'conditional'],
+            te_surrogates[s] = self._cmi_estimator.estimate_surrogates(
                 var1=current_value_surrogates,
                 var2=source_realisations,
-                conditional=conditional_realisations)
+                conditional=conditional_realisations,
+                n_chunks=self.settings['n_perm_comp'])
         return te_surrogates
 
     def _create_surrogate_distribution_between(self):
@@ -0,0 +1,429 @@
+"""Distribute the analysis of network targets over workers or compute nodes.
+
+Provide a small execution layer around analyse_single_target() and
+analyse_single_process(). A coordinator (NetworkExecutor) holds a queue of
+tasks, one per target or process, and serves it over a socket. Workers
+connect to the coordinator, run individual tasks, and send back partial
+results. Workers can be started on the local machine
+(NetworkExecutor.start_local_workers()) or on other compute nodes that can
+reach the coordinator's address:
+
+    $ python -m idtxl.network_executor --address host:port --authkey key
+
+Once all tasks are done, the coordinator combines partial results and
+performs FDR-correction on the network level. Failed tasks, tasks that
+exceed a timeout, and tasks whose worker stopped sending heartbeats (e.g.,
+because it died) are re-submitted.
+
+Note:
+    Written for Python 3.4+
+"""
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+import traceback
+import multiprocessing as mp
+from multiprocessing.managers import BaseManager
+from . import stats
+from .network_analysis import PARALLEL_SETTINGS
+from .single_process_analysis import SingleProcessAnalysis
+
+
+class _CoordinatorManager(BaseManager):
+    """Manager serving task and result queues to workers."""
+
+
+class _WorkerManager(BaseManager):
+    """Manager used by workers to connect to a coordinator."""
+
+
+for _name in ['get_task_queue', 'get_result_queue', 'get_data']:
+    _WorkerManager.register(_name)
+
+
+class NetworkExecutor():
+    """Distribute network analysis over multiple workers.
+
+    Run the analysis of individual targets (or processes for single process
+    analyses) as tasks on workers connected to the coordinator. Each task
+    contains the analysis class, settings, a reference to the data, and the
+    target and sources to be analysed. The data are sent to each worker once,
+    when it receives its first task for an analysis. For large recordings,
+    use LazyData on storage accessible by all nodes, such that only a
+    reference to the file is sent.
+
+    Example:
+
+        >>> data = Data()
+        >>> data.generate_mute_data(100, 5)
+        >>> settings = {
+        >>>     'cmi_estimator': 'JidtKraskovCMI',
+        >>>     'max_lag_sources': 5,
+        >>>     'min_lag_sources': 2
+        >>>     }
+        >>> with NetworkExecutor({'task_timeout': 3600}) as executor:
+        >>>     executor.start_local_workers(4)
+        >>>     results = executor.analyse_network(
+        >>>         MultivariateTE(), settings, data)
+
+    Args:
+        settings : dict [optional]
+            settings of the coordinator
+
+            - address : tuple [optional] - host and port the coordinator
+              listens on, port 0 selects a free port
+              (default=('127.0.0.1', 0))
+            - authkey : bytes | str [optional] - key used to authenticate
+              workers (default=random key)
+            - task_timeout : float [optional] - time in seconds after which a
+              running task is re-submitted, None for no timeout
+              (default=None)
+            - worker_timeout : float [optional] - time in seconds without a
+              heartbeat from the worker running a task after which the
+              worker is considered lost and the task is re-submitted, None
+              to disable heartbeats; workers send heartbeats every
+              worker_timeout / 4 seconds (default=60.0)
+            - max_retries : int [optional] - number of times a failed or
+              timed-out task is re-submitted before the analysis is aborted
+              (default=2)
+            - poll_interval : float [optional] - interval in seconds for
+              checking timeouts (default=1.0)
+            - verbose : bool [optional] - toggle console output
+              (default=True)
+
+    Attributes:
+        address : tuple
+            host and port the coordinator listens on, set by start()
+        authkey : bytes
+            key used to authenticate workers
+    """
+
+    def __init__(self, settings=None):
+        if settings is None:
+            settings = {}
+        settings.setdefault('address', ('127.0.0.1', 0))
+        settings.setdefault('task_timeout', None)
+        settings.setdefault('worker_timeout', 60.0)
+        settings.setdefault('max_retries', 2)
+        settings.setdefault('poll_interval', 1.0)
+        settings.setdefault('verbose', True)
+        self.settings = settings.copy()
+        authkey = self.settings.get('authkey', None)
+        if authkey is None:
+            authkey = os.urandom(16)
+        elif isinstance(authkey, str):
+            authkey = authkey.encode()
+        self.authkey = authkey
+        self.address = None
+        self._task_queue = queue.Queue()
+        self._result_queue = queue.Queue()
+        self._data = {}
+        self._n_analyses = 0
+        self._server = None
+        self._local_workers = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.shutdown()
+
+    def start(self):
+        """Start serving the task queue to workers."""
+        if self._server is not None:
+            return
+        # Register callables with a subclass, such that the registry of the
+        # manager class is not shared between coordinators.
+        class Manager(_CoordinatorManager):
+            pass
+        Manager.register('get_task_queue', callable=lambda: self._task_queue)
+        Manager.register('get_result_queue',
+                         callable=lambda: self._result_queue)
+        Manager.register('get_data', callable=lambda key: self._data[key])
+        manager = Manager(address=tuple(self.settings['address']),
+                          authkey=self.authkey)
+        self._server = manager.get_server()
+        self._server.stop_event = threading.Event()
+        self.address = self._server.address
+        threading.Thread(target=_accept_connections, args=(self._server,),
+                         daemon=True).start()
+        if self.settings['verbose']:
+            print('Coordinator listening on {0}:{1}.'.format(*self.address))
+
+    def shutdown(self):
+        """Stop local workers and the coordinator."""
+        for _ in self._local_workers:
+            self._task_queue.put(None)
+        for p in self._local_workers:
+            p.join()
+        self._local_workers = []
+        if self._server is not None:
+            self._server.stop_event.set()
+            self._server.listener.close()
+            self._server = None
+
+    def start_local_workers(self, n_workers):
+        """Start workers on the local machine.
+
+        Workers are started as separate processes using the 'spawn' method
+        and are stopped by shutdown().
+
+        Args:
+            n_workers : int
+                number of workers to start
+        """
+        assert n_workers > 0, 'n_workers must be positive.'
+        self.start()
+        ctx = mp.get_context('spawn')
+        for i in range(n_workers):
+            worker_id = 'local-{0}'.format(len(self._local_workers))
+            p = ctx.Process(target=run_worker,
+                            args=(self.address, self.authkey, worker_id))
+            p.start()
+            self._local_workers.append(p)
+
+    def analyse_network(self, analysis, settings, data, targets='all',
+                        sources='all'):
+        """Analyse network targets on connected workers.
+
+        Submit one task per target to the workers, wait for all partial
+        results, combine them, and perform FDR-correction on the network
+        level (see documentation of stats.network_fdr() and
+        stats.ais_fdr()).
+
+        Args:
+            analysis : NetworkAnalysis instance
+                analysis to be performed, e.g., MultivariateTE() or
+                ActiveInformationStorage()
+            settings : dict
+                parameters for estimation and statistical testing, see
+                documentation of the analysis' analyse_network() method
+            data : Data instance
+                raw data for analysis
+            targets : list of int | 'all' [optional]
+                index of target processes or processes analysed
+                (default='all')
+            sources : list of int | list of list | 'all' [optional]
+                indices of source processes for each target, see
+                documentation of the analysis' analyse_network() method,
+                ignored for single process analyses (default='all')
+
+        Returns:
+            ResultsNetworkInference | ResultsSingleProcessAnalysis instance
+                combined results of all targets or processes
+        """
+        settings.setdefault('verbose', True)
+        settings.setdefault('fdr_correction', True)
+        if targets == 'all':
+            targets = [t for t in range(data.n_processes)]
+        if isinstance(analysis, SingleProcessAnalysis):
+            method = 'analyse_single_process'
+            tasks = [(t,) for t in targets]
+        else:
+            method = 'analyse_single_target'
+            if sources == 'all':
+                sources = ['all' for t in targets]
+            elif type(sources[0]) is int:
+                sources = [sources for t in targets]
+            assert len(sources) == len(targets), (
+                'List of targets and list of sources have to have the same '
+                'length')
+            tasks = list(zip(targets, sources))
+
+        settings_task = {k: v for (k, v) in settings.items()
+                         if k not in PARALLEL_SETTINGS}
+        self.start()
+        data_key = self._n_analyses
+        self._n_analyses += 1
+        self._data[data_key] = data
+        try:
+            partial = self._run_tasks(
+                data_key,
+                [(type(analysis), method, settings_task, t) for t in tasks])
+        finally:
+            del self._data[data_key]
+
+        results = partial[0]
+        if len(partial) > 1:
+            results.combine_results(*partial[1:])
+        if settings['fdr_correction']:
+            if isinstance(analysis, SingleProcessAnalysis):
+                results = stats.ais_fdr(settings, results)
+            else:
+                results = stats.network_fdr(settings, results)
+        return results
+
+    def _run_tasks(self, data_key, tasks):
+        """Submit tasks and return partial results in task order.
+
+        Re-submit tasks that failed, exceeded the timeout, or whose worker
+        stopped sending heartbeats until they succeed or exceed the maximum
+        number of retries. Results of tasks that were submitted multiple
+        times are taken from the first attempt to finish. Messages are
+        tagged with the analysis' data key and the attempt, messages from
+        previous analyses or superseded attempts are dropped.
+        """
+        timeout = self.settings['task_timeout']
+        worker_timeout = self.settings['worker_timeout']
+        heartbeat = None if worker_timeout is None else worker_timeout / 4
+        n_attempts = [0 for t in tasks]
+        results = [None for t in tasks]
+        pending = set(range(len(tasks)))
+        started = {}
+        last_seen = {}
+
+        def submit(task_id, reason=None):
+            if n_attempts[task_id] > self.settings['max_retries']:
+                raise RuntimeError(
+                    'Task {0} ({1}) failed after {2} attempts: {3}'.format(
+                        task_id, tasks[task_id][3], n_attempts[task_id],
+                        reason))
+            if reason is not None and self.settings['verbose']:
+                print('Re-submitting task {0}: {1}'.format(task_id, reason))
+            n_attempts[task_id] += 1
+            started.pop(task_id, None)
+            last_seen.pop(task_id, None)
+            self._task_queue.put((data_key, task_id, n_attempts[task_id],
+                                  heartbeat) + tasks[task_id])
+
+        for task_id in range(len(tasks)):
+            submit(task_id)
+        while pending:
+            try:
+                kind, key, task_id, attempt, value = self._result_queue.get(
+                    timeout=self.settings['poll_interval'])
+            except queue.Empty:
+                kind = None
+            if (kind is not None and key == data_key and task_id in pending
+                    and (kind == 'done' or attempt == n_attempts[task_id])):
+                if kind == 'started':
+                    started[task_id] = last_seen[task_id] = time.time()
+                    if self.settings['verbose']:
+                        print('Task {0} ({1}) started on worker {2}.'.format(
+                            task_id, tasks[task_id][3], value))
+                elif kind == 'alive':
+                    last_seen[task_id] = time.time()
+                elif kind == 'done':
+                    results[task_id] = value
+                    pending.remove(task_id)
+                    started.pop(task_id, None)
+                    last_seen.pop(task_id, None)
+                else:
+                    submit(task_id, 'task failed:\n{0}'.format(value))
+            if (self._local_workers and
+                    not any(p.is_alive() for p in self._local_workers)):
+                raise RuntimeError('All local workers have exited.')
+            now = time.time()
+            if timeout is not None:
+                for task_id in [t for (t, t0) in started.items()
+                                if now - t0 > timeout]:
+                    submit(task_id, 'task timed out after {0} s.'.format(
+                        timeout))
+            if worker_timeout is not None:
+                for task_id in [t for (t, t0) in last_seen.items()
+                                if now - t0 > worker_timeout]:
+                    submit(task_id, 'no heartbeat from worker for {0} '
+                                    's.'.format(worker_timeout))
+        return results
+
+
+def _accept_connections(server):
+    """Handle connections to a manager server until its listener is closed.
+
+    Server.serve_forever() is not used because it resets sys.stdout and
+    exits the calling thread when stopped.
+    """
+    while True:
+        try:
+            conn = server.listener.accept()
+        except OSError:
+            return
+        threading.Thread(target=server.handle_request, args=(conn,),
+                         daemon=True).start()
+
+
+def run_worker(address, authkey, worker_id=None):
+    """Connect to a coordinator and run tasks until told to stop.
+
+    Args:
+        address : tuple
+            host and port of the coordinator
+        authkey : bytes | str
+            key used to authenticate with the coordinator
+        worker_id : str [optional]
+            name reported to the coordinator (default=host name and process
+            id)
+    """
+    if isinstance(authkey, str):
+        authkey = authkey.encode()
+    if worker_id is None:
+        worker_id = '{0}-{1}'.format(os.uname()[1], os.getpid())
+    manager = _WorkerManager(address=tuple(address), authkey=authkey)
+    manager.connect()
+    task_queue = manager.get_task_queue()
+    result_queue = manager.get_result_queue()
+    data = {}
+    while True:
+        try:
+            task = task_queue.get()
+        except (EOFError, ConnectionError):  # coordinator has shut down
+            break
+        if task is None:
+            break
+        (data_key, task_id, attempt, heartbeat, analysis_class, method,
+         settings, args) = task
+        result_queue.put(('started', data_key, task_id, attempt, worker_id))
+        stop_heartbeat = threading.Event()
+        if heartbeat is not None:
+            threading.Thread(
+                target=_send_heartbeats,
+                args=(result_queue, ('alive', data_key, task_id, attempt,
+                                     worker_id), heartbeat, stop_heartbeat),
+                daemon=True).start()
+        try:
+            # Data are fetched once per analysis and worker.
+            if data_key not in data:
+                data = {data_key: manager.get_data(data_key)._getvalue()}
+            res = getattr(analysis_class(), method)(
+                dict(settings), data[data_key], *args)
+            message = ('done', data_key, task_id, attempt, res)
+        except Exception:
+            message = ('failed', data_key, task_id, attempt,
+                       traceback.format_exc())
+        finally:
+            stop_heartbeat.set()
+        try:
+            result_queue.put(message)
+        except (EOFError, ConnectionError):
+            break
+
+
+def _send_heartbeats(result_queue, message, interval, stop):
+    """Put message into the result queue every interval seconds until stop."""
+    while not stop.wait(interval):
+        try:
+            result_queue.put(message)
+        except (EOFError, ConnectionError):
+            return
+
+
+def _parse_address(address):
+    host, port = address.rsplit(':', 1)
+    return (host, int(port))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Run an IDTxl worker connected to a coordinator.')
+    parser.add_argument('--address', required=True, type=_parse_address,
+                        help='address of the coordinator, host:port')
+    parser.add_argument('--authkey', required=True,
+                        help='key used to authenticate with the coordinator')
+    parser.add_argument('--worker-id', default=None,
+                        help='name reported to the coordinator')
+    args = parser.parse_args(sys.argv[1:])
+    run_worker(args.address, args.authkey, args.worker_id)
@@ -1,6 +1,10 @@
 """Parent class for all network inference."""
+import os
+import contextlib
+import functools
 import numpy as np
-from .network_analysis import NetworkAnalysis
+from .network_analysis import NetworkAnalysis, _WorkerPool, _worker_data
+from .estimator import find_estimator
 from . import stats
 from . import idtxl_exceptions as ex
 
@@ -112,12 +116,11 @@ class NetworkInference(NetworkAnalysis):
 
             # Calculate the (C)MI for each candidate and the target.
             try:
-                temp_te = self._cmi_estimator.estimate_parallel(
-                                n_chunks=len(candidate_set),
-                                re_use=['var2', 'conditional'],
+                temp_te = self._cmi_estimator.estimate_surrogates(
                                 var1=cand_real,
                                 var2=self._current_value_realisations,
-                                conditional=self._selected_vars_realisations)
+                                conditional=self._selected_vars_realisations,
+                                n_chunks=len(candidate_set))
             except ex.AlgorithmExhaustedError as aee:
                 # The algorithm cannot continue here, so
                 #  we'll terminate the search for more candidates,
@@ -209,6 +212,9 @@ class NetworkInferenceMI(NetworkInference):
         self.measure = 'mi'
         super().__init__()
 
+    def _get_current_value_sample(self, settings):
+        return settings['max_lag_sources']
+
     def _initialise(self, settings, data, sources, target):
         """Check input, set initial or default values for analysis settings."""
         # Check analysis settings and set defaults.
@@ -250,8 +256,12 @@ class NetworkInferenceMI(NetworkInference):
                                    self.settings['tau_sources'],
                                    self.settings['max_lag_sources']))
 
-        # Set CMI estimator.
+        # Set CMI estimator, realisations cache, and surrogate store.
         self._set_cmi_estimator()
+        self._set_realisations_cache(data)
+        self._set_surrogate_store()
+        self._n_perm_used = {}
+        self._pvalue_fit = {}
 
         # Check the provided target and sources.
         self._check_target(target, data.n_processes)
@@ -264,7 +274,8 @@ class NetworkInferenceMI(NetworkInference):
             'lag ({1})'.format(
                 data.n_samples, self.settings['max_lag_sources']))
 
-        self.current_value = (self.target, self.settings['max_lag_sources'])
+        self.current_value = (self.target,
+                              self._get_current_value_sample(self.settings))
         [cv_realisation, repl_idx] = data.get_realisations(
                                              current_value=self.current_value,
                                              idx_list=[self.current_value])
@@ -307,6 +318,8 @@ class NetworkInferenceMI(NetworkInference):
         del self.pvalue_omnibus
         del self.sign_omnibus
         del self._cmi_estimator
+        del self._n_perm_used
+        del self._pvalue_fit
 
 
 class NetworkInferenceTE(NetworkInference):
@@ -316,6 +329,10 @@ class NetworkInferenceTE(NetworkInference):
         self.measure = 'te'
         super().__init__()
 
+    def _get_current_value_sample(self, settings):
+        return max(settings['max_lag_sources'],
+                   settings.get('max_lag_target', settings['max_lag_sources']))
+
     def _initialise(self, settings, data, sources, target):
         """Check input, set initial or default values for analysis settings."""
         # Check analysis settings and set defaults.
@@ -366,8 +383,12 @@ class NetworkInferenceTE(NetworkInference):
                                    self.settings['tau_target'],
                                    self.settings['max_lag_target']))
 
-        # Set CMI estimator.
+        # Set CMI estimator, realisations cache, and surrogate store.
         self._set_cmi_estimator()
+        self._set_realisations_cache(data)
+        self._set_surrogate_store()
+        self._n_perm_used = {}
+        self._pvalue_fit = {}
 
         # Check the provided target and sources.
         self._check_target(target, data.n_processes)
@@ -375,8 +396,7 @@ class NetworkInferenceTE(NetworkInference):
 
         # Check provided search depths (lags) for source and target, set the
         # current_value.
-        max_lag = max(self.settings['max_lag_sources'],
-                      self.settings['max_lag_target'])
+        max_lag = self._get_current_value_sample(self.settings)
 
         assert(data.n_samples >= max_lag + 1), (
             'Not enough samples in data ({0}) to allow for the chosen maximum '
@@ -446,6 +466,8 @@ class NetworkInferenceTE(NetworkInference):
         del self.pvalue_omnibus
         del self.sign_omnibus
         del self._cmi_estimator
+        del self._n_perm_used
+        del self._pvalue_fit
 
 
 class NetworkInferenceBivariate(NetworkInference):
@@ -464,6 +486,9 @@ class NetworkInferenceBivariate(NetworkInference):
         significant using maximum statistics, add the current candidate to the
         conditional set.
 
+        Sources are searched independently and can be searched in parallel
+        (see _map_sources()).
+
         Args:
             data : Data instance
                 raw data
@@ -477,100 +502,127 @@ class NetworkInferenceBivariate(NetworkInference):
                 self.current_value[1] - self.settings['max_lag_sources'] - 1,
                 -self.settings['tau_sources'])
 
-        # Check if target variables were selected to distinguish between TE
-        # and MI analysis.
-        if len(self._selected_vars_target) == 0:
-            conditional_realisations_target = None
-        else:
-            conditional_realisations_target = (
-                self._selected_vars_target_realisations)
-
         # Iterate over all potential sources in the analysis. This way, the
         # conditioning uses past variables from the current source only
         # (opposed to past variables from all sources as in multivariate
-        # network inference).
+        # network inference). Selected variables are added in source order.
         success = False
-        for source in self.source_set:
-            candidate_set = self._define_candidates([source], samples)
+        for selected, realisations in self._map_sources(
+                '_include_source', data,
+                [(source, samples) for source in self.source_set]):
+            if selected:
+                success = True
+                self._append_selected_vars(selected, realisations)
+        return success
+
+    def _include_source(self, data, source, samples):
+        """Select informative past variables of a single source.
+
+        Args:
+            data : Data instance
+                raw data
+            source : int
+                index of the source process
+            samples : numpy array
+                sample indices of candidates
+
+        Returns:
+            list of tuples
+                indices of selected variables in the order of selection
+            numpy array | None
+                realisations of selected variables
+        """
+        candidate_set = self._define_candidates([source], samples)
+        if self.settings['verbose']:
+                print('candidate set current source: {0}\n'.format(
+                        self._idx_to_lag(candidate_set)), end='')
+
+        # Initialise conditional realisations. This gets updated if sources
+        # are selected in the iterative conditioning. Check if target
+        # variables were selected to distinguish between TE and MI analysis.
+        selected = []
+        selected_realisations = []
+        if len(self._selected_vars_target) == 0:
+            conditional_realisations = None
+            idx_conditional = []
+        else:
+            conditional_realisations = self._selected_vars_target_realisations
+            idx_conditional = list(self.selected_vars_target)
+
+        while candidate_set:
+            # Get realisations for all candidates.
+            cand_real = data.get_realisations(self.current_value,
+                                              candidate_set)[0]
+            # Reshape candidates to a 1D-array, where realisations for a
+            # single candidate are treated as one chunk.
+            cand_real = cand_real.T.reshape(cand_real.size, 1)
+
+            # Calculate the (C)MI for each candidate and the target.
+            try:
+                temp_te = self._cmi_estimator.estimate_surrogates(
+                            var1=cand_real,
+                            var2=self._current_value_realisations,
+                            conditional=conditional_realisations,
+                            n_chunks=len(candidate_set))
+            except ex.AlgorithmExhaustedError as aee:
+                # The algorithm cannot continue here, so
+                #  we'll terminate the search for more candidates,
+                #  though those identified already remain valid
+                print('AlgorithmExhaustedError encountered in '
+                    'estimations: ' + aee.message)
+                print('Halting current estimation set.')
+                # For now we don't need a stack trace:
+                # traceback.print_tb(aee.__traceback__)
+                break
+
+            # Test max CMI for significance with maximum statistics.
+            te_max_candidate = max(temp_te)
+            max_candidate = candidate_set[np.argmax(temp_te)]
             if self.settings['verbose']:
-                    print('candidate set current source: {0}\n'.format(
-                            self._idx_to_lag(candidate_set)), end='')
-
-            # Initialise conditional realisations. This gets updated if sources
-            # are selected in the iterative conditioning.
-            conditional_realisations = conditional_realisations_target
-
-            while candidate_set:
-                # Get realisations for all candidates.
-                cand_real = data.get_realisations(self.current_value,
-                                                  candidate_set)[0]
-                # Reshape candidates to a 1D-array, where realisations for a
-                # single candidate are treated as one chunk.
-                cand_real = cand_real.T.reshape(cand_real.size, 1)
-
-                # Calculate the (C)MI for each candidate and the target.
-                try:
-                    temp_te = self._cmi_estimator.estimate_parallel(
-                                n_chunks=len(candidate_set),
-                                re_use=['var2', 'conditional'],
-                                var1=cand_real,
-                                var2=self._current_value_realisations,
-                                conditional=conditional_realisations)
-                except ex.AlgorithmExhaustedError as aee:
-                    # The algorithm cannot continue here, so
-                    #  we'll terminate the search for more candidates,
-                    #  though those identified already remain valid
-                    print('AlgorithmExhaustedError encountered in '
-                        'estimations: ' + aee.message)
-                    print('Halting current estimation set.')
-                    # For now we don't need a stack trace:
-                    # traceback.print_tb(aee.__traceback__)
-                    break
+                print('testing candidate: {0} '.format(
+                    self._idx_to_lag([max_candidate])[0]), end='')
+            try:
+                significant = stats.max_statistic(
+                    self, data, candidate_set,
+                    te_max_candidate, conditional_realisations,
+                    idx_conditional)[0]
+            except ex.AlgorithmExhaustedError as aee:
+                # The algorithm cannot continue here, so
+                #  we'll terminate the significance check for this candidate,
+                #  though those identified already remain valid
+                print('AlgorithmExhaustedError encountered in '
+                    'estimations: ' + aee.message)
+                print('Halting candidate max stats test')
+                # For now we don't need a stack trace:
+                # traceback.print_tb(aee.__traceback__)
+                break
 
-                # Test max CMI for significance with maximum statistics.
-                te_max_candidate = max(temp_te)
-                max_candidate = candidate_set[np.argmax(temp_te)]
-                if self.settings['verbose']:
-                    print('testing candidate: {0} '.format(
-                        self._idx_to_lag([max_candidate])[0]), end='')
-                try:
-                    significant = stats.max_statistic(
-                        self, data, candidate_set,
-                        te_max_candidate, conditional_realisations)[0]
-                except ex.AlgorithmExhaustedError as aee:
-                    # The algorithm cannot continue here, so
-                    #  we'll terminate the significance check for this candidate,
-                    #  though those identified already remain valid
-                    print('AlgorithmExhaustedError encountered in '
-                        'estimations: ' + aee.message)
-                    print('Halting candidate max stats test')
-                    # For now we don't need a stack trace:
-                    # traceback.print_tb(aee.__traceback__)
-                    break
-
-                # If the max is significant move it from the candidate set to
-                # the set of selected sources and test the next candidate. If
-                # it is not significant break. There will be no further
-                # significant sources b/c they all have lesser TE.
-                if significant:
-                    success = True
-                    candidate_set.pop(np.argmax(temp_te))
-                    candidate_realisations = data.get_realisations(
-                        self.current_value, [max_candidate])[0]
-                    self._append_selected_vars(
-                            [max_candidate], candidate_realisations)
-                    # Update conditioning set for max. statistics in the next
-                    # round.
-                    if conditional_realisations is None:
-                        conditional_realisations = candidate_realisations
-                    else:
-                        conditional_realisations = np.hstack((
-                            conditional_realisations, candidate_realisations))
+            # If the max is significant move it from the candidate set to
+            # the set of selected sources and test the next candidate. If
+            # it is not significant break. There will be no further
+            # significant sources b/c they all have lesser TE.
+            if significant:
+                candidate_set.pop(np.argmax(temp_te))
+                candidate_realisations = data.get_realisations(
+                    self.current_value, [max_candidate])[0]
+                selected.append(max_candidate)
+                selected_realisations.append(candidate_realisations)
+                # Update conditioning set for max. statistics in the next
+                # round.
+                idx_conditional.append(max_candidate)
+                if conditional_realisations is None:
+                    conditional_realisations = candidate_realisations
                 else:
-                    if self.settings['verbose']:
-                        print(' -- not significant')
-                    break
-        return success
+                    conditional_realisations = np.hstack((
+                        conditional_realisations, candidate_realisations))
+            else:
+                if self.settings['verbose']:
+                    print(' -- not significant')
+                break
+        if selected:
+            return selected, np.hstack(selected_realisations)
+        else:
+            return selected, None
 
     def _prune_candidates(self, data):
         """Remove uninformative candidates from the final conditional set.
@@ -580,6 +632,9 @@ class NetworkInferenceBivariate(NetworkInference):
         final set. If a sample is not informative, it is removed from the
         final set.
 
+        Sources are pruned independently and can be pruned in parallel (see
+        _map_sources()).
+
         Args:
             data : Data instance
                 raw data
@@ -589,6 +644,35 @@ class NetworkInferenceBivariate(NetworkInference):
             if not self.selected_vars_sources:
                 print('no sources selected, nothing to prune ...')
 
+        # Prune all selected sources separately. This way, the conditioning
+        # uses past variables from the current source only (opposed to past
+        # variables from all sources as in multivariate network inference).
+        # Variables are removed in source order.
+        significant_sources = np.unique(
+            [s[0] for s in self.selected_vars_sources])
+        print('selected vars sources {0}'.format(self.selected_vars_sources))
+        tasks = [(source,
+                  [s for s in self.selected_vars_sources if s[0] == source])
+                 for source in significant_sources]
+        for removed in self._map_sources('_prune_source', data, tasks):
+            for candidate in removed:
+                self._remove_selected_var(candidate)
+
+    def _prune_source(self, data, source, source_vars):
+        """Find uninformative past variables of a single source.
+
+        Args:
+            data : Data instance
+                raw data
+            source : int
+                index of the source process
+            source_vars : list of tuples
+                indices of variables selected for the source
+
+        Returns:
+            list of tuples
+                indices of variables to be removed in the order of removal
+        """
         # Check if target variables were selected to distinguish between TE
         # and MI analysis.
         if len(self._selected_vars_target) == 0:
@@ -598,135 +682,251 @@ class NetworkInferenceBivariate(NetworkInference):
             conditional_realisations_target = (
                 self._selected_vars_target_realisations)
             cond_target_dim = conditional_realisations_target.shape[1]
-        # Prune all selected sources separately. This way, the conditioning
-        # uses past variables from the current source only (opposed to past
-        # variables from all sources as in multivariate network inference).
-        significant_sources = np.unique(
-            [s[0] for s in self.selected_vars_sources])
-        for source in significant_sources:
-            # Find selected past variables for current source
-            print('selected vars sources {0}'.format(self.selected_vars_sources))
-            source_vars = [s for s in self.selected_vars_sources if
-                           s[0] == source]
-            print('selected candidates current source: {0}'.format(
-                        self._idx_to_lag(source_vars)))
-            # If only a single variable was selected for the current source, no
-            # pruning is necessary. The minimum statistic would be equal to the
-            # maximum statistic for this variable.
-            if len(source_vars) == 1:
-                if self.settings['verbose']:
-                        print(' -- significant')
-                continue
-
-            # Find the candidate with the minimum TE/MI into the target.
-            while source_vars:
-                # Allocate memory, collect realisations, and calculate TE/MI
-                # in parallel for all selected variables in the current
-                # process.
-                temp_te = np.empty(len(source_vars))
-                cond_dim = cond_target_dim + len(source_vars) - 1
-                candidate_realisations = np.empty(
-                    (data.n_realisations(self.current_value) *
-                     len(source_vars), 1)).astype(data.data_type)
-                conditional_realisations = np.empty(
-                    (data.n_realisations(self.current_value) *
-                     len(source_vars),
-                     cond_dim)).astype(data.data_type)
-
-                i_1 = 0
-                i_2 = data.n_realisations(self.current_value)
-                for candidate in source_vars:
-                    temp_cond = data.get_realisations(
-                        self.current_value,
-                        set(source_vars).difference(set([candidate])))[0]
-                    temp_cand = data.get_realisations(
-                        self.current_value, [candidate])[0]
-
-                    if temp_cond is None:
-                        conditional_realisations = conditional_realisations_target
-                        re_use = ['var2', 'conditional']
-                    else:
-                        re_use = ['var2']
-                        if conditional_realisations_target is None:
-                            conditional_realisations[i_1:i_2, ] = temp_cond
-                        else:
-                            conditional_realisations[i_1:i_2, ] = np.hstack((
-                                temp_cond, conditional_realisations_target))
-                    candidate_realisations[i_1:i_2, ] = temp_cand
-                    i_1 = i_2
-                    i_2 += data.n_realisations(self.current_value)
 
-                try:
-                    temp_te = self._cmi_estimator.estimate_parallel(
-                                    n_chunks=len(source_vars),
-                                    re_use=re_use,
-                                    var1=candidate_realisations,
-                                    var2=self._current_value_realisations,
-                                    conditional=conditional_realisations)
-                except ex.AlgorithmExhaustedError as aee:
-                    # The algorithm cannot continue here, so
-                    #  we'll terminate the pruning check,
-                    #  assuming that we need not prune any more
-                    print('AlgorithmExhaustedError encountered in '
-                        'estimations: ' + aee.message)
-                    print('Halting current pruning and allowing others to'
-                        ' remain.')
-                    # For now we don't need a stack trace:
-                    # traceback.print_tb(aee.__traceback__)
-                    break
+        removed = []
+        print('selected candidates current source: {0}'.format(
+                    self._idx_to_lag(source_vars)))
+        # If only a single variable was selected for the current source, no
+        # pruning is necessary. The minimum statistic would be equal to the
+        # maximum statistic for this variable.
+        if len(source_vars) == 1:
+            if self.settings['verbose']:
+                    print(' -- significant')
+            return removed
+
+        # Find the candidate with the minimum TE/MI into the target.
+        while source_vars:
+            # Allocate memory, collect realisations, and calculate TE/MI
+            # in parallel for all selected variables in the current
+            # process.
+            temp_te = np.empty(len(source_vars))
+            cond_dim = cond_target_dim + len(source_vars) - 1
+            candidate_realisations = np.empty(
+                (data.n_realisations(self.current_value) *
+                 len(source_vars), 1)).astype(data.data_type)
+            conditional_realisations = np.empty(
+                (data.n_realisations(self.current_value) *
+                 len(source_vars),
+                 cond_dim)).astype(data.data_type)
 
-                # Find variable with minimum MI/TE. Test min TE/MI for
-                # significance with minimum statistics. Build conditioning set
-                # for minimum statistics by removing the minimum candidate.
-                te_min_candidate = min(temp_te)
-                min_candidate = source_vars[np.argmin(temp_te)]
-                if self.settings['verbose']:
-                    print('testing candidate: {0} '.format(
-                        self._idx_to_lag([min_candidate])[0]), end='')
+            i_1 = 0
+            i_2 = data.n_realisations(self.current_value)
+            for candidate in source_vars:
+                temp_cond = data.get_realisations(
+                    self.current_value,
+                    set(source_vars).difference(set([candidate])))[0]
+                temp_cand = data.get_realisations(
+                    self.current_value, [candidate])[0]
 
-                remaining_candidates = set(source_vars).difference(
-                    set([min_candidate]))
-                conditional_realisations_sources = data.get_realisations(
-                        self.current_value, remaining_candidates)[0]
-                if conditional_realisations_target is None:
-                    conditional_realisations = conditional_realisations_sources
-                elif conditional_realisations_sources is None:
+                if temp_cond is None:
                     conditional_realisations = conditional_realisations_target
+                    re_use = ['var2', 'conditional']
                 else:
-                    conditional_realisations = np.hstack((
-                        conditional_realisations_target,
-                        conditional_realisations_sources))
-                try:
-                    [significant, p, surr_table] = stats.min_statistic(
-                                                self, data,
-                                                source_vars,
-                                                te_min_candidate,
-                                                conditional_realisations)
-                except ex.AlgorithmExhaustedError as aee:
-                    # The algorithm cannot continue here, so
-                    #  we'll terminate the pruning check,
-                    #  assuming that we need not prune any more
-                    print('AlgorithmExhaustedError encountered in '
-                        'estimations: ' + aee.message)
-                    print('Halting current pruning and allowing others to'
-                        ' remain.')
-                    # For now we don't need a stack trace:
-                    # traceback.print_tb(aee.__traceback__)
-                    break
-
-                # Remove the minimum it is not significant and test the next
-                # min. candidate. If the minimum is significant, break. All
-                # other sources will be significant as well (b/c they have
-                # higher TE/MI).
-                if not significant:
-                    self._remove_selected_var(min_candidate)
-                    source_vars.pop(np.argmin(temp_te))
-                    if len(source_vars) == 0:
-                        print('No remaining candidates after pruning.')
-                else:
-                    if self.settings['verbose']:
-                        print(' -- significant')
-                    break
+                    re_use = ['var2']
+                    if conditional_realisations_target is None:
+                        conditional_realisations[i_1:i_2, ] = temp_cond
+                    else:
+                        conditional_realisations[i_1:i_2, ] = np.hstack((
+                            temp_cond, conditional_realisations_target))
+                candidate_realisations[i_1:i_2, ] = temp_cand
+                i_1 = i_2
+                i_2 += data.n_realisations(self.current_value)
+
+            try:
+                temp_te = self._cmi_estimator.estimate_parallel(
+                                n_chunks=len(source_vars),
+                                re_use=re_use,
+                                var1=candidate_realisations,
+                                var2=self._current_value_realisations,
+                                conditional=conditional_realisations)
+            except ex.AlgorithmExhaustedError as aee:
+                # The algorithm cannot continue here, so
+                #  we'll terminate the pruning check,
+                #  assuming that we need not prune any more
+                print('AlgorithmExhaustedError encountered in '
+                    'estimations: ' + aee.message)
+                print('Halting current pruning and allowing others to'
+                    ' remain.')
+                # For now we don't need a stack trace:
+                # traceback.print_tb(aee.__traceback__)
+                break
+
+            # Find variable with minimum MI/TE. Test min TE/MI for
+            # significance with minimum statistics. Build conditioning set
+            # for minimum statistics by removing the minimum candidate.
+            te_min_candidate = min(temp_te)
+            min_candidate = source_vars[np.argmin(temp_te)]
+            if self.settings['verbose']:
+                print('testing candidate: {0} '.format(
+                    self._idx_to_lag([min_candidate])[0]), end='')
+
+            remaining_candidates = set(source_vars).difference(
+                set([min_candidate]))
+            conditional_realisations_sources = data.get_realisations(
+                    self.current_value, remaining_candidates)[0]
+            if conditional_realisations_target is None:
+                conditional_realisations = conditional_realisations_sources
+                idx_conditional = list(remaining_candidates)
+            elif conditional_realisations_sources is None:
+                conditional_realisations = conditional_realisations_target
+                idx_conditional = list(self.selected_vars_target)
+            else:
+                conditional_realisations = np.hstack((
+                    conditional_realisations_target,
+                    conditional_realisations_sources))
+                idx_conditional = (list(self.selected_vars_target) +
+                                   list(remaining_candidates))
+            try:
+                [significant, p, surr_table] = stats.min_statistic(
+                                            self, data,
+                                            source_vars,
+                                            te_min_candidate,
+                                            conditional_realisations,
+                                            idx_conditional)
+            except ex.AlgorithmExhaustedError as aee:
+                # The algorithm cannot continue here, so
+                #  we'll terminate the pruning check,
+                #  assuming that we need not prune any more
+                print('AlgorithmExhaustedError encountered in '
+                    'estimations: ' + aee.message)
+                print('Halting current pruning and allowing others to'
+                    ' remain.')
+                # For now we don't need a stack trace:
+                # traceback.print_tb(aee.__traceback__)
+                break
+
+            # Remove the minimum it is not significant and test the next
+            # min. candidate. If the minimum is significant, break. All
+            # other sources will be significant as well (b/c they have
+            # higher TE/MI).
+            if not significant:
+                removed.append(min_candidate)
+                source_vars.pop(np.argmin(temp_te))
+                if len(source_vars) == 0:
+                    print('No remaining candidates after pruning.')
+            else:
+                if self.settings['verbose']:
+                    print(' -- significant')
+                break
+        return removed
+
+    @contextlib.contextmanager
+    def _source_workers(self, settings, data):
+        """Keep a pool of workers for the per-source searches open.
+
+        If 'n_jobs_sources' in the settings is larger than one, start a pool
+        of workers that is used by all calls to _map_sources() until the
+        context is left, i.e., by the inclusion and pruning of sources of all
+        targets analysed within the context. If a pool is already open, it
+        is kept.
+
+        Args:
+            settings : dict
+                analysis settings
+            data : Data instance
+                raw data for analysis
+        """
+        n_jobs = int(settings.get('n_jobs_sources', 1))
+        assert n_jobs > 0, 'n_jobs_sources must be positive.'
+        if n_jobs == 1 or getattr(self, '_source_pool', None) is not None:
+            yield
+            return
+        executor = settings.get('executor_sources', 'processes')
+        with _WorkerPool(data, n_jobs, executor) as pool:
+            self._source_pool = pool
+            try:
+                yield
+            finally:
+                self._source_pool = None
+
+    def _map_sources(self, method, data, tasks):
+        """Call a per-source method for each task, in parallel if requested.
+
+        If 'n_jobs_sources' in the settings is larger than one, tasks are run
+        on the pool of workers opened by _source_workers(), either processes
+        (default) or threads as set by 'executor_sources' (see
+        network_analysis._WorkerPool). Each task runs on a new analysis with
+        its own estimator, because estimators (e.g., JIDT calculators) are not
+        thread-safe. The analysis is set up from the state needed by
+        per-source searches only (the current value, the target's selected
+        variables, and surrogates stored for the task's source), instead of
+        the full state of the calling analysis. The no. permutations used,
+        fit diagnostics, surrogate store entries, and settings changed by
+        statistical tests are merged back in task order, such that results
+        are independent of the order in which tasks finish.
+
+        For processes, each task seeds numpy's random number generator with a
+        seed drawn from the analysis' generator before tasks are submitted,
+        such that results are reproducible and independent of the number of
+        workers (but differ from a serial analysis). Threads share numpy's
+        global generator, such that results are not reproducible.
+
+        Args:
+            method : str
+                name of the per-source method, called with data and the
+                task's arguments
+            data : Data instance
+                raw data
+            tasks : list of tuples
+                arguments passed to method after data for each source, the
+                first argument is the index of the source process
+
+        Returns:
+            list
+                return values of method in the order of tasks
+        """
+        n_jobs = int(self.settings.get('n_jobs_sources', 1))
+        assert n_jobs > 0, 'n_jobs_sources must be positive.'
+        if n_jobs == 1 or len(tasks) < 2:
+            return [getattr(self, method)(data, *t) for t in tasks]
+        if getattr(self, '_source_pool', None) is None:
+            with self._source_workers(self.settings, data):
+                return self._map_sources(method, data, tasks)
+
+        # Avoid oversubscription of CPUs by JIDT estimators, see
+        # NetworkAnalysis._analyse_parallel().
+        estimator_settings = {}
+        EstimatorClass = find_estimator(self.settings['cmi_estimator'])
+        if (EstimatorClass.__module__.endswith('estimators_jidt') and
+                'num_threads' not in self.settings):
+            estimator_settings['num_threads'] = max(
+                1, os.cpu_count() // n_jobs)
+        if self._source_pool.executor == 'processes':
+            seeds = np.random.randint(2**31, size=len(tasks))
+        else:
+            seeds = [None for t in tasks]
+        # Estimators are not passed to workers, they are re-created by each
+        # task. Conditioning on the full set of selected variables is kept
+        # for tests called without a conditional, see
+        # stats._create_surrogate_table().
+        state = {
+            'settings': self.settings,
+            'current_value': self.current_value,
+            '_current_value_realisations': self._current_value_realisations,
+            'selected_vars_full': self.selected_vars_full,
+            'selected_vars_target': self.selected_vars_target,
+            '_selected_vars_realisations': self._selected_vars_realisations}
+        if self._surrogate_store is None:
+            stores = [None for t in tasks]
+        else:
+            stores = [{k: v for (k, v) in self._surrogate_store.items()
+                       if k[0][0] == t[0]} for t in tasks]
+        results = self._source_pool.map(
+            functools.partial(_source_task, type(self), method, state,
+                              estimator_settings),
+            list(zip(seeds, tasks, stores)))
+
+        for (result, records) in results:
+            for k, v in records['n_perm_used'].items():
+                self._n_perm_used.setdefault(k, []).extend(v)
+            for k, v in records['pvalue_fit'].items():
+                self._pvalue_fit.setdefault(k, []).extend(v)
+            if self._surrogate_store is not None:
+                self._surrogate_store.update(records['surrogate_store'])
+                for k, v in records['surrogate_store_stats'].items():
+                    self._surrogate_store_stats[k] += v
+            self.settings.update(records['settings'])
+        return [result for (result, records) in results]
 
     def _test_final_conditional(self, data):
         """Perform statistical test on the final conditional set."""
@@ -919,7 +1119,8 @@ class NetworkInferenceMultivariate(NetworkInference):
                                               self, data,
                                               self.selected_vars_sources,
                                               te_min_candidate,
-                                              conditional_realisations)
+                                              conditional_realisations,
+                                              list(remaining_candidates))
             except ex.AlgorithmExhaustedError as aee:
                 # The algorithm cannot continue here, so
                 #  we'll terminate the pruning check,
@@ -1021,3 +1222,46 @@ class NetworkInferenceMultivariate(NetworkInference):
                 self.pvalues_sign_sources = None
                 self.statistic_sign_sources = None
                 self.statistic_single_link = None
+
+
+def _source_task(analysis_class, method, state, estimator_settings, data,
+                 task):
+    """Call a per-source method on a new analysis in a worker.
+
+    See NetworkInferenceBivariate._map_sources(). The analysis is set up from
+    the state of the calling analysis and the surrogates stored for the
+    task's source. If data is None, the data attached by
+    network_analysis._init_analysis_worker() is used.
+
+    Returns:
+        return value of the method
+        dict
+            records of statistical tests and settings of the new analysis
+    """
+    if data is None:
+        data = _worker_data.data
+    seed, args, surrogate_store = task
+    if seed is not None:
+        np.random.seed(seed)
+    # The analysis holds its own settings, records, and estimator.
+    analysis = analysis_class()
+    for k, v in state.items():
+        setattr(analysis, k, v)
+    analysis.settings = dict(state['settings'], **estimator_settings)
+    analysis._set_cmi_estimator()
+    for k in estimator_settings:
+        del analysis.settings[k]
+    analysis._n_perm_used = {}
+    analysis._pvalue_fit = {}
+    analysis._surrogate_store = surrogate_store
+    if surrogate_store is not None:
+        analysis._surrogate_store_stats = {'hits': 0, 'extended': 0,
+                                           'misses': 0}
+    result = getattr(analysis, method)(data, *args)
+    return result, {
+        'n_perm_used': analysis._n_perm_used,
+        'pvalue_fit': analysis._pvalue_fit,
+        'surrogate_store': analysis._surrogate_store,
+        'surrogate_store_stats': getattr(analysis, '_surrogate_store_stats',
+                                         None),
+        'settings': analysis.settings}
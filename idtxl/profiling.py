@@ -0,0 +1,236 @@
+"""Profile stages of network analyses.
+
+Record wall time and counters (e.g., number of estimator calls, chunks
+estimated, surrogates generated, bytes allocated for realisations) for
+stages of network analyses and statistical tests. Profiling is enabled
+either by setting 'profile' to True in the analysis settings, which adds a
+profile to the results of each target, or by using a Profiler as context
+manager:
+
+    >>> with Profiler() as profiler:
+    >>>     results = network_analysis.analyse_network(settings, data)
+    >>> profiler.write_chrome_trace('trace.json')
+
+Profilers are active for the thread that entered them. Recorded counters are
+
+    - estimate_calls : calls to the estimator's estimate() method
+    - estimate_parallel_calls : calls to estimate_parallel()
+    - estimate_surrogates_calls : calls to estimate_surrogates()
+    - chunks : no. chunks estimated by all estimator calls
+    - estimator_bytes : memory of data passed to the estimator in bytes
+    - estimator_time : time spent in the estimator in seconds
+    - realisations_bytes : memory of realisations returned by
+      Data.get_realisations() and Data.get_realisations_batch() in bytes
+    - surrogates : no. surrogate data sets generated by Data
+    - surrogates_bytes : memory of generated surrogates in bytes
+
+Counters of a stage include counters of all stages nested within it.
+
+Note:
+    Written for Python 3.4+
+"""
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+
+# Profilers that are active for the current thread.
+_state = threading.local()
+
+
+class Profiler():
+    """Record wall time and counters for stages of an analysis.
+
+    Attributes:
+        events : list of dict
+            recorded stages with entries 'name', 'args' (e.g., target),
+            'start' and 'duration' in seconds relative to the creation of the
+            profiler, 'depth' of nesting, and 'counters'
+        totals : dict
+            counters summed over the whole profiling period
+    """
+
+    def __init__(self):
+        self.events = []
+        self.totals = {}
+        self._open = []
+        self._t0 = time.perf_counter()
+
+    def __enter__(self):
+        _get_active().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        _get_active().remove(self)
+
+    def _start(self, name, args):
+        event = {'name': name, 'args': args,
+                 'start': time.perf_counter() - self._t0,
+                 'depth': len(self._open), 'counters': {}}
+        self._open.append(event)
+        return event
+
+    def _stop(self, event):
+        event['duration'] = time.perf_counter() - self._t0 - event['start']
+        self._open.remove(event)
+        self.events.append(event)
+
+    def count(self, key, n=1):
+        """Add n to counter key for the profiling period and open stages."""
+        self.totals[key] = self.totals.get(key, 0) + n
+        for event in self._open:
+            event['counters'][key] = event['counters'].get(key, 0) + n
+
+    def summary(self):
+        """Return wall time and counters summed over stages with equal names.
+
+        Returns:
+            dict
+                for each stage name, the no. calls ('n_calls'), total wall
+                time in seconds ('time'), and summed counters
+        """
+        summary = {}
+        for event in self.events:
+            s = summary.setdefault(event['name'], {'n_calls': 0, 'time': 0.0})
+            s['n_calls'] += 1
+            s['time'] += event['duration']
+            for k, v in event['counters'].items():
+                s[k] = s.get(k, 0) + v
+        return summary
+
+    def to_dict(self):
+        """Return recorded events, totals, and summary as a dictionary."""
+        return {'events': sorted(self.events, key=lambda e: e['start']),
+                'totals': dict(self.totals),
+                'summary': self.summary()}
+
+    def write_json(self, filename):
+        """Write recorded events, totals, and summary to a JSON file."""
+        write_json(self.to_dict(), filename)
+
+    def write_chrome_trace(self, filename):
+        """Write recorded events in Chrome's trace event format.
+
+        The file can be opened in chrome://tracing or https://ui.perfetto.dev.
+        """
+        write_chrome_trace(self.to_dict(), filename)
+
+
+def _get_active():
+    if not hasattr(_state, 'profilers'):
+        _state.profilers = []
+    return _state.profilers
+
+
+def is_active():
+    """Return True if a profiler is active for the current thread."""
+    return len(_get_active()) > 0
+
+
+def count(key, n=1):
+    """Add n to counter key of all active profilers."""
+    for profiler in _get_active():
+        profiler.count(key, n)
+
+
+@contextmanager
+def stage(name, **args):
+    """Record wall time and counters of a stage in all active profilers.
+
+    Args:
+        name : str
+            name of the stage
+        args : [optional]
+            additional information stored with the stage, e.g., target
+    """
+    profilers = list(_get_active())
+    events = [p._start(name, args) for p in profilers]
+    try:
+        yield
+    finally:
+        for p, e in zip(profilers, events):
+            p._stop(e)
+
+
+def profiled(func):
+    """Decorate function to record each call as a stage."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not is_active():
+            return func(*args, **kwargs)
+        with stage(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _collect_profiles(profile):
+    """Return list of (process, profile) from a profile or results object."""
+    if isinstance(profile, Profiler):
+        return [(None, profile.to_dict())]
+    if isinstance(profile, dict):
+        return [(None, profile)]
+    profiles = []
+    for p in profile._processes_analysed:
+        try:
+            res = profile._single_target[p]
+        except AttributeError:
+            res = profile._single_process[p]
+        if res.get('profile') is not None:
+            profiles.append((p, res['profile']))
+    return profiles
+
+
+def write_json(profile, filename):
+    """Write profile(s) to a JSON file.
+
+    Args:
+        profile : Profiler | dict | Results instance
+            profiler, profile returned by Profiler.to_dict(), or results of
+            a network analysis with profiles for individual targets
+            (analysis setting 'profile' is True)
+        filename : str
+            output file
+    """
+    profiles = _collect_profiles(profile)
+    if len(profiles) == 1 and profiles[0][0] is None:
+        out = profiles[0][1]
+    else:
+        out = {str(p): prof for (p, prof) in profiles}
+    with open(filename, 'w') as f:
+        json.dump(out, f, indent=1, default=_to_json)
+
+
+def write_chrome_trace(profile, filename):
+    """Write profile(s) in Chrome's trace event format.
+
+    Each target is shown as a separate thread in the trace.
+
+    Args:
+        profile : Profiler | dict | Results instance
+            profiler, profile returned by Profiler.to_dict(), or results of
+            a network analysis with profiles for individual targets
+            (analysis setting 'profile' is True)
+        filename : str
+            output file
+    """
+    trace = []
+    for (p, prof) in _collect_profiles(profile):
+        tid = 0 if p is None else int(p)
+        for event in prof['events']:
+            args = dict(event['args'])
+            args.update(event['counters'])
+            trace.append({'name': event['name'], 'ph': 'X', 'pid': 0,
+                          'tid': tid, 'ts': event['start'] * 1e6,
+                          'dur': event['duration'] * 1e6, 'args': args})
+    with open(filename, 'w') as f:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f,
+                  default=_to_json)
+
+
+def _to_json(obj):
+    # Convert numpy scalars and other objects (e.g., tuples of numpy ints).
+    try:
+        return obj.item()
+    except AttributeError:
+        return str(obj)
@@ -1,4 +1,5 @@
 """Provide results class for IDTxl network analysis."""
+import os
 import sys
 import warnings
 import copy as cp
@@ -7,6 +8,8 @@ from . import idtxl_utils as utils
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
 MIN_INT = -sys.maxsize - 1  # minimum integer for initializing adj. matrix
+LOCAL_VALUES_STORES = ('memmap', 'hdf5')
+LOCAL_VALUES_DTYPE = np.float32
 
 
 class DotDict(dict):
@@ -54,6 +57,197 @@ class DotDict(dict):
         # self.__dict__ = self
 
 
+class LocalValues():
+    """Reference local values stored on disk.
+
+    Local values (e.g., local TE for each link into a target or local AIS of a
+    process) are written as float32 to a file, either as a numpy .npy-file
+    that is read through a memory map ('memmap') or as an HDF5 dataset
+    ('hdf5'). Results hold LocalValues instead of the arrays, data are only
+    read from disk when indexed. The file is opened on first access and is
+    reopened when the object is unpickled, such that results can be pickled
+    and passed between processes without copying local values.
+
+    Example:
+
+        >>> local_te = results.get_single_target(1).te
+        >>> # Local TE of the first source, samples 0 to 999 of replication 2
+        >>> local_te.get_window(samples=(0, 1000), replications=2)[0]
+        >>> # Read all local values into memory
+        >>> a = np.asarray(local_te)
+
+    Args:
+        file_name : str
+            path to the file holding local values
+        store : str
+            file format, 'memmap' or 'hdf5'
+        dim_order : str
+            order of dimensions, 's' and 'r' denote samples and replications,
+            e.g., 'lsr' for links x samples x replications
+
+    Attributes:
+        shape : tuple
+            shape of the stored array
+        dtype : numpy dtype
+            data type of the stored array
+    """
+
+    def __init__(self, file_name, store, dim_order):
+        if store not in LOCAL_VALUES_STORES:
+            raise RuntimeError('Unknown local values store: {0}, use one of '
+                               '{1}.'.format(store, LOCAL_VALUES_STORES))
+        self.file_name = file_name
+        self.store = store
+        self.dim_order = dim_order
+        self._array = None
+        self._file = None
+        self.shape = self._get_array().shape
+        self.dtype = self._get_array().dtype
+
+    @classmethod
+    def create(cls, file_name, store, dim_order, shape):
+        """Create a file for local values and return a writable reference.
+
+        Values are written by assigning to the returned object, e.g.,
+        local_values[i] = values. Call close() once all values are written.
+
+        Args:
+            file_name : str
+                path to the file, an existing file is overwritten
+            store : str
+                file format, 'memmap' or 'hdf5'
+            dim_order : str
+                order of dimensions, see LocalValues
+            shape : tuple
+                shape of the stored array
+
+        Returns:
+            LocalValues instance
+        """
+        if store not in LOCAL_VALUES_STORES:
+            raise RuntimeError('Unknown local values store: {0}, use one of '
+                               '{1}.'.format(store, LOCAL_VALUES_STORES))
+        directory = os.path.dirname(file_name)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        local_values = cls.__new__(cls)
+        local_values.file_name = file_name
+        local_values.store = store
+        local_values.dim_order = dim_order
+        local_values.shape = tuple(shape)
+        local_values.dtype = np.dtype(LOCAL_VALUES_DTYPE)
+        if store == 'memmap':
+            local_values._file = None
+            local_values._array = np.lib.format.open_memmap(
+                file_name, mode='w+', dtype=LOCAL_VALUES_DTYPE, shape=shape)
+        else:
+            import h5py
+            local_values._file = h5py.File(file_name, 'w')
+            local_values._array = local_values._file.create_dataset(
+                'local_values', shape=shape, dtype=LOCAL_VALUES_DTYPE)
+        return local_values
+
+    @property
+    def ndim(self):
+        """Number of dimensions of the stored array."""
+        return len(self.shape)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _get_array(self):
+        if self._array is None:
+            if self.store == 'memmap':
+                self._array = np.load(self.file_name, mmap_mode='r')
+            else:
+                import h5py
+                self._file = h5py.File(self.file_name, 'r')
+                self._array = self._file['local_values']
+        return self._array
+
+    def __getitem__(self, key):
+        return np.asarray(self._get_array()[key])
+
+    def __setitem__(self, key, value):
+        self._get_array()[key] = value
+
+    def __array__(self, dtype=None, copy=None):
+        a = self[()]
+        return a if dtype is None else a.astype(dtype)
+
+    def get_window(self, samples=None, replications=None):
+        """Return local values for a range of samples and replications.
+
+        Args:
+            samples : tuple of int | slice [optional]
+                start and stop index of the samples to be returned or slice
+                over samples, if None, all samples are returned (default=None)
+            replications : int | list of int | tuple of int | slice [optional]
+                index or list of indices of replications, start and stop
+                index, or slice over replications, if None, all replications
+                are returned (default=None)
+
+        Returns:
+            numpy array
+                local values in the requested window, the dimension of
+                replications is dropped if a single replication is requested
+        """
+        key = [slice(None)] * self.ndim
+        if samples is not None:
+            key[self.dim_order.index('s')] = _get_window_key(samples)
+        if replications is not None:
+            key[self.dim_order.index('r')] = _get_window_key(replications)
+        if isinstance(key[self.dim_order.index('r')], list):
+            # Read a block of replications and select within memory, h5py
+            # datasets do not support fancy indexing with unsorted indices.
+            r = self.dim_order.index('r')
+            indices = key[r]
+            key[r] = slice(min(indices), max(indices) + 1)
+            return np.take(self[tuple(key)],
+                           np.array(indices) - min(indices), axis=r)
+        return self[tuple(key)]
+
+    def flush(self):
+        """Write pending changes to disk."""
+        if self._file is not None:
+            self._file.flush()
+        elif self._array is not None:
+            self._array.flush()
+
+    def close(self):
+        """Write pending changes and close the file.
+
+        The file is reopened read-only on the next access.
+        """
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+        self._array = None
+        self._file = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_array'] = None
+        state['_file'] = None
+        return state
+
+    def __deepcopy__(self, memo):
+        # Copies reference the same file.
+        return LocalValues(self.file_name, self.store, self.dim_order)
+
+    def __repr__(self):
+        return 'LocalValues(file_name={0!r}, store={1!r}, shape={2})'.format(
+            self.file_name, self.store, self.shape)
+
+
+def _get_window_key(index):
+    if isinstance(index, tuple):
+        return slice(*index)
+    elif isinstance(index, (list, np.ndarray)):
+        return [int(i) for i in index]
+    return index
+
+
 class AdjacencyMatrix():
     """Adjacency matrix representing inferred networks."""
     def __init__(self, n_nodes, weight_type):
@@ -177,6 +371,20 @@ class Results():
             raise RuntimeError(
                 'Can not add single result - analysis settings are not equal.')
 
+    def _shallow_copy(self):
+        """Return a copy that shares single-process results with this object.
+
+        Copy containers that are modified when combining results or adding
+        FDR-corrected results (settings, list and dict of analysed processes),
+        but keep references to the results for individual processes. Results
+        for individual processes must thus be replaced, not modified in place
+        (copy-on-write).
+        """
+        results = cp.copy(self)
+        results.settings = DotDict(self.settings)
+        results._processes_analysed = list(self._processes_analysed)
+        return results
+
     def _is_duplicate_process(self, process):
         # Test if process is already present in object
         if process in self._processes_analysed:
@@ -297,6 +505,11 @@ class ResultsSingleProcessAnalysis(Results):
         self._single_process[process] = DotDict(results)
         self.processes_analysed = list(self._single_process.keys())
 
+    def _shallow_copy(self):
+        results = super()._shallow_copy()
+        results._single_process = dict(self._single_process)
+        return results
+
     def _add_fdr(self, fdr, alpha=None, constant=None):
         """Add settings and results of FDR correction."""
         # Add settings of FDR-correction
@@ -316,7 +529,10 @@ class ResultsSingleProcessAnalysis(Results):
 
         Return results for individual processes, contains for each process
 
-            - ais : float - AIS-value for current process
+            - ais : float | numpy array | LocalValues - AIS-value for
+                current process, local AIS values if 'local_values' is True
+                (a reference to the values on disk if 'local_values_store' is
+                set, see LocalValues)
             - ais_pval : float - p-value of AIS estimate
             - ais_sign : bool - significance of AIS estimate wrt. to the
                 alpha_mi specified in the settings
@@ -327,6 +543,14 @@ class ResultsSingleProcessAnalysis(Results):
                 in samples
             - current_value : tuple - current value used for analysis,
                 described by target and sample index in the data
+            - n_perm_used : dict - number of permutations used by each call
+                of a statistical test, keys are tests ('max_stat',
+                'min_stat', 'mi')
+            - pvalue_fit : dict - fit diagnostics of extrapolated p-values
+                for each call of a statistical test (if 'pvalue_method' is
+                'gpd' or 'moment'), keys are tests ('mi')
+            - profile : dict - wall time and counters for each stage of the
+                analysis (if 'profile' is True), see profiling.Profiler
 
         Setting fdr to True returns FDR-corrected results (Benjamini, 1995).
 
@@ -415,6 +639,11 @@ class ResultsNetworkAnalysis(Results):
         self._single_target[target] = DotDict(results)
         self.targets_analysed = list(self._single_target.keys())
 
+    def _shallow_copy(self):
+        results = super()._shallow_copy()
+        results._single_target = dict(self._single_target)
+        return results
+
     def get_single_target(self, target, fdr=True):
         """Return results for a single target in the network.
 
@@ -440,6 +669,14 @@ class ResultsNetworkAnalysis(Results):
           target
         - current_value : tuple - current value used for analysis, described by
           target and sample index in the data
+        - n_perm_used : dict - number of permutations used by each call of a
+          statistical test, keys are tests ('max_stat', 'min_stat',
+          'omnibus', 'max_seq')
+        - pvalue_fit : dict - fit diagnostics of extrapolated p-values for each
+          call of a statistical test (if 'pvalue_method' is 'gpd' or
+          'moment'), keys are tests ('omnibus', 'max_seq')
+        - profile : dict - wall time and counters for each stage of the
+          analysis (if 'profile' is True), see profiling.Profiler
 
         Setting fdr to True returns FDR-corrected results (Benjamini, 1995).
 
@@ -1,10 +1,30 @@
 """Provide statistics functions."""
 import copy as cp
 import numpy as np
+from scipy.stats import beta, genpareto, pearson3, skew
 from . import idtxl_utils as utils
 from . import idtxl_exceptions as ex
-
-
+from .results import DotDict
+from .profiling import profiled
+
+# Critical values of the Anderson-Darling statistic A^2 for a generalized
+# Pareto distribution (GPD) with shape and scale estimated by maximum
+# likelihood, see _gpd_gof_pvalue(). Rows correspond to shapes (scipy's
+# parametrisation, negative shapes have bounded support), columns to
+# significance levels. Values were obtained by simulating 2000 samples of 100
+# exceedances for shapes -0.5 to 0.5 in steps of 0.1 and smoothing the
+# quantiles by a linear fit over shapes.
+_GPD_AD_SHAPES = np.array([-0.5, -0.25, 0., 0.25, 0.5])
+_GPD_AD_LEVELS = np.array([0.5, 0.25, 0.1, 0.05, 0.025, 0.01, 0.005])
+_GPD_AD_CRITICAL = np.array([
+    [0.44, 0.64, 0.93, 1.17, 1.41, 1.77, 2.01],
+    [0.42, 0.60, 0.87, 1.08, 1.29, 1.60, 1.83],
+    [0.40, 0.57, 0.81, 0.99, 1.18, 1.43, 1.64],
+    [0.38, 0.53, 0.74, 0.91, 1.06, 1.26, 1.45],
+    [0.35, 0.49, 0.68, 0.82, 0.95, 1.09, 1.27]])
+
+
+@profiled
 def ais_fdr(settings=None, *results):
     """Perform FDR-correction on results of network AIS estimation.
 
@@ -16,6 +36,14 @@ def ais_fdr(settings=None, *results):
     Input can be a list of partial results to combine results from parallel
     analysis.
 
+    The FDR-correction requires p-values smaller than the FDR-thresholds,
+    i.e., a sufficiently high number of permutations. If p-values were
+    extrapolated from the surrogate distribution ('pvalue_method' is 'gpd' or
+    'moment' in the analysis settings, see stats._find_pvalue_tail()), fewer
+    permutations are required. The check uses the fit diagnostics and
+    numbers of permutations recorded in the results, see
+    _min_n_perm_bounded().
+
     References:
 
     - Genovese, C.R., Lazar, N.A., & Nichols, T. (2002). Thresholding of
@@ -47,24 +75,25 @@ def ais_fdr(settings=None, *results):
     alpha = settings.get('alpha_fdr', 0.05)
     constant = settings.get('fdr_constant', 2)
 
-    # Combine results into single results dict.
+    # Combine results into single results object. The combined object shares
+    # results for individual processes with the input objects, which are
+    # therefore never modified in place below.
+    results_comb = results[0]._shallow_copy()
     if len(results) > 1:
-        results_comb = cp.deepcopy(results[0])
         results_comb.combine_results(*results[1:])
-    else:
-        results_comb = cp.deepcopy(results[0])
 
     # Collect p-values of whole processes (determined by the omnibus test).
-    pval = np.arange(0)
-    process_idx = np.arange(0).astype(int)
-    n_perm = np.arange(0).astype(int)
-    for process in results_comb.processes_analysed:
+    processes = results_comb.processes_analysed
+    pval = np.empty(len(processes))
+    process_idx = np.empty(len(processes), dtype=int)
+    n_sign = 0
+    for process in processes:
         if results_comb._single_process[process].ais_sign:
-            pval = np.append(
-                pval, results_comb._single_process[process].ais_pval)
-            process_idx = np.append(process_idx, process)
-            n_perm = np.append(
-                    n_perm, results_comb.settings.n_perm_mi)
+            pval[n_sign] = results_comb._single_process[process].ais_pval
+            process_idx[n_sign] = process
+            n_sign += 1
+    pval = pval[:n_sign]
+    process_idx = process_idx[:n_sign]
 
     if pval.size == 0:
         print('FDR correction: no links in final results ...\n')
@@ -74,29 +103,34 @@ def ais_fdr(settings=None, *results):
     sign, thresh = _perform_fdr_corretion(pval, constant, alpha)
 
     # If the number of permutations for calculating p-values for individual
-    # variables is too low, return without performing any correction.
-    if (1 / min(n_perm)) > thresh[0]:
-        print('WARNING: Number of permutations (''n_perm_max_seq'') for at '
+    # variables is too low, return without performing any correction. P-values
+    # extrapolated from the surrogate distribution are not bounded by
+    # 1/n_perm. Sequential tests may have used fewer than n_perm_mi
+    # permutations, use the smallest number recorded for any process.
+    n_perm = _min_n_perm_bounded(
+        [results_comb._single_process[p] for p in process_idx], 'mi',
+        results_comb.settings.n_perm_mi, results_comb.settings)
+    if n_perm is not None and (1 / n_perm) > thresh[0]:
+        print('WARNING: Number of permutations (''n_perm_mi'') for at '
               'least one target is too low to allow for FDR correction '
               '(FDR-threshold: {0:.4f}, min. theoretically possible p-value: '
-              '{1}).'.format(thresh[0], 1 / min(n_perm)))
+              '{1}).'.format(thresh[0], 1 / n_perm))
         results_comb._add_fdr(fdr=None, alpha=alpha, constant=constant)
         return results_comb
 
-    # Go over list of all candidates and remove non-significant results from
-    # the results object. Create a copy of the results object to leave the
-    # original intact.
-    fdr = cp.deepcopy(results_comb._single_process)
-    for s in range(sign.shape[0]):
-        if not sign[s]:
-            t = process_idx[s]
-            fdr[t].selected_vars = []
-            fdr[t].ais_pval = 1
-            fdr[t].ais_sign = False
+    # Remove non-significant results. Only results for processes that change
+    # are copied, all other entries reference the uncorrected results.
+    fdr = dict(results_comb._single_process)
+    for t in process_idx[np.invert(sign)]:
+        fdr[t] = DotDict(fdr[t])
+        fdr[t].selected_vars = []
+        fdr[t].ais_pval = 1
+        fdr[t].ais_sign = False
     results_comb._add_fdr(fdr, alpha, constant)
     return results_comb
 
 
+@profiled
 def network_fdr(settings=None, *results):
     """Perform FDR-correction on results of network inference.
 
@@ -108,6 +142,14 @@ def network_fdr(settings=None, *results):
     Input can be a list of partial results to combine results from parallel
     analysis.
 
+    The FDR-correction requires p-values smaller than the FDR-thresholds,
+    i.e., a sufficiently high number of permutations. If p-values were
+    extrapolated from the surrogate distribution ('pvalue_method' is 'gpd' or
+    'moment' in the analysis settings, see stats._find_pvalue_tail()), fewer
+    permutations are required. The check uses the fit diagnostics and
+    numbers of permutations recorded in the results, see
+    _min_n_perm_bounded().
+
     References:
 
     - Genovese, C.R., Lazar, N.A., & Nichols, T. (2002). Thresholding of
@@ -144,44 +186,40 @@ def network_fdr(settings=None, *results):
     correct_by_target = settings.get('correct_by_target', True)
     constant = settings.get('fdr_constant', 2)
 
-    # Combine results into single results dict.
+    # Combine results into single results object. The combined object shares
+    # results for individual targets with the input objects, which are
+    # therefore never modified in place below.
+    results_comb = results[0]._shallow_copy()
     if len(results) > 1:
-        results_comb = cp.deepcopy(results[0])
         results_comb.combine_results(*results[1:])
-    else:
-        results_comb = cp.deepcopy(results[0])
 
     # Collect significant source variables for all targets. Either correct
     # p-value of whole target (all candidates), or correct p-value of
     # individual source variables. Use targets with significant input only
-    # (determined by the omnibus test).
-    pval = np.arange(0)
-    target_idx = np.arange(0).astype(int)
-    n_perm = np.arange(0).astype(int)
-    cands = []
+    # (determined by the omnibus test). For individual variables, also record
+    # the index of each variable in the target's list of selected sources.
+    single_target = results_comb._single_target
+    targets = [t for t in results_comb.targets_analysed
+               if single_target[t].omnibus_sign]
     if correct_by_target:  # whole target
-        for target in results_comb.targets_analysed:
-            if results_comb._single_target[target].omnibus_sign:
-                pval = np.append(
-                    pval, results_comb._single_target[target].omnibus_pval)
-                target_idx = np.append(target_idx, target)
-                n_perm = np.append(
-                        n_perm, results_comb.settings.n_perm_omnibus)
+        pval = np.empty(len(targets))
+        for i, target in enumerate(targets):
+            pval[i] = single_target[target].omnibus_pval
+        target_idx = np.array(targets, dtype=int)
+        test = 'omnibus'
+        n_perm = results_comb.settings.n_perm_omnibus
     else:  # individual variables
-        for target in results_comb.targets_analysed:
-            if results_comb._single_target[target].omnibus_sign:
-                n_sign = (results_comb._single_target[target].
-                          selected_sources_pval.size)
-                pval = np.append(
-                    pval, (results_comb._single_target[target].
-                           selected_sources_pval))
-                target_idx = np.append(target_idx,
-                                       np.ones(n_sign) * target).astype(int)
-                cands = (cands +
-                         (results_comb._single_target[target].
-                          selected_vars_sources))
-                n_perm = np.append(
-                    n_perm, results_comb.settings.n_perm_max_seq)
+        n_vars = [len(single_target[t].selected_vars_sources) for t in targets]
+        pval = np.empty(sum(n_vars))
+        target_idx = np.repeat(np.array(targets, dtype=int), n_vars)
+        var_idx = np.empty(pval.size, dtype=int)
+        i = 0
+        for target, n in zip(targets, n_vars):
+            pval[i:i + n] = single_target[target].selected_sources_pval
+            var_idx[i:i + n] = np.arange(n)
+            i += n
+        test = 'max_seq'
+        n_perm = results_comb.settings.n_perm_max_seq
 
     if pval.size == 0:
         print('No links in final results ...')
@@ -193,47 +231,96 @@ def network_fdr(settings=None, *results):
     sign, thresh = _perform_fdr_corretion(pval, constant, alpha)
 
     # If the number of permutations for calculating p-values for individual
-    # variables is too low, return without performing any correction.
-    if (1 / min(n_perm)) > thresh[0]:
-        print('WARNING: Number of permutations (''n_perm_max_seq'') for at '
+    # variables is too low, return without performing any correction. P-values
+    # extrapolated from the surrogate distribution are not bounded by
+    # 1/n_perm. Sequential tests may have used fewer than the requested
+    # permutations, use the smallest number recorded for any target.
+    n_perm = _min_n_perm_bounded([single_target[t] for t in targets], test,
+                                 n_perm, results_comb.settings)
+    if n_perm is not None and (1 / n_perm) > thresh[0]:
+        print('WARNING: Number of permutations (''n_perm_{0}'') for at '
               'least one target is too low to allow for FDR correction '
-              '(FDR-threshold: {0:.4f}, min. theoretically possible p-value: '
-              '{1}).'.format(thresh[0], 1 / min(n_perm)))
+              '(FDR-threshold: {1:.4f}, min. theoretically possible p-value: '
+              '{2}).'.format(test, thresh[0], 1 / n_perm))
         results_comb._add_fdr(
             fdr=None, alpha=alpha, correct_by_target=correct_by_target,
             constant=constant)
         return results_comb
 
-    # Go over list of all candidates and remove non-significant results from
-    # the results object. Create a copy of the results object to leave the
-    # original intact.
-    fdr = cp.deepcopy(results_comb._single_target)
-    for s in range(sign.shape[0]):
-        if not sign[s]:
-            if correct_by_target:
-                t = target_idx[s]
-                fdr[t].selected_vars_full = cp.deepcopy(
-                    results_comb._single_target[t].selected_vars_target)
-                fdr[t].selected_sources_te = None
-                fdr[t].selected_sources_pval = None
-                fdr[t].selected_vars_sources = []
-                fdr[t].omnibus_pval = 1
-                fdr[t].omnibus_sign = False
-            else:
-                t = target_idx[s]
-                cand = cands[s]
-                cand_ind = (fdr[t].selected_vars_sources.index(cand))
-                fdr[t].selected_vars_sources.pop(cand_ind)
-                fdr[t].selected_sources_pval = np.delete(
-                    fdr[t].selected_sources_pval, cand_ind)
-                fdr[t].selected_sources_te = np.delete(
-                    fdr[t].selected_sources_te, cand_ind)
-                fdr[t].selected_vars_full.pop(
-                    fdr[t].selected_vars_full.index(cand))
+    # Remove non-significant results. Only results for targets that change
+    # are copied, all other entries reference the uncorrected results.
+    fdr = dict(single_target)
+    if correct_by_target:
+        for t in target_idx[np.invert(sign)]:
+            fdr[t] = DotDict(fdr[t])
+            fdr[t].selected_vars_full = cp.copy(fdr[t].selected_vars_target)
+            fdr[t].selected_sources_te = None
+            fdr[t].selected_sources_pval = None
+            fdr[t].selected_vars_sources = []
+            fdr[t].omnibus_pval = 1
+            fdr[t].omnibus_sign = False
+    else:
+        for t in np.unique(target_idx[np.invert(sign)]):
+            keep = np.ones(
+                len(single_target[t].selected_vars_sources), dtype=bool)
+            keep[var_idx[(target_idx == t) & np.invert(sign)]] = False
+            fdr[t] = DotDict(fdr[t])
+            removed = [v for (v, k) in zip(fdr[t].selected_vars_sources, keep)
+                       if not k]
+            fdr[t].selected_vars_sources = [
+                v for (v, k) in zip(fdr[t].selected_vars_sources, keep) if k]
+            fdr[t].selected_sources_pval = fdr[t].selected_sources_pval[keep]
+            fdr[t].selected_sources_te = fdr[t].selected_sources_te[keep]
+            fdr[t].selected_vars_full = [
+                v for v in fdr[t].selected_vars_full if v not in removed]
     results_comb._add_fdr(fdr, alpha, correct_by_target, constant)
     return results_comb
 
 
+def _min_n_perm_bounded(results, test, n_perm, settings):
+    """Return the smallest no. permutations bounding p-values of a test.
+
+    P-values estimated by counting surrogates are bounded below by 1/n_perm.
+    A result's p-values are bounded if they were counted, i.e., if the fit
+    diagnostics recorded in 'pvalue_fit' contain a failed fit, or if no fits
+    were recorded and 'pvalue_method' is 'permutation' (see _get_pvalue()).
+    P-values extrapolated from the surrogate distribution or counted from
+    sufficiently many exceeding surrogates are not bounded. The number of
+    permutations is taken from 'n_perm_used' (sequential tests may stop
+    early, see _get_surrogate_values()). Results without records fall back
+    to n_perm and the pvalue_method in the settings.
+
+    Args:
+        results : list of dicts
+            single target or process results
+        test : str
+            name of the test whose p-values are corrected
+        n_perm : int
+            number of permutations requested for the test
+        settings : dict
+            analysis settings
+
+    Returns:
+        int | None
+            smallest number of permutations over results with bounded
+            p-values, None if no p-values are bounded
+    """
+    counted = settings.get('pvalue_method', 'permutation') == 'permutation'
+    n_perm_bounded = []
+    for r in results:
+        fits = r.get('pvalue_fit', {}).get(test, [])
+        if fits:
+            bounded = any(f.get('fit_failed', False) for f in fits)
+        else:
+            bounded = counted
+        if bounded:
+            recorded = r.get('n_perm_used', {}).get(test, [])
+            n_perm_bounded.append(min(recorded) if recorded else n_perm)
+    if not n_perm_bounded:
+        return None
+    return min(n_perm_bounded)
+
+
 def _perform_fdr_corretion(pval, constant, alpha):
     """Calculate sequential threshold for FDR-correction.
 
@@ -264,15 +351,15 @@ def _perform_fdr_corretion(pval, constant, alpha):
         array of floats
             FDR-thresholds for each p-value
     """
-    # Sort all p-values in ascending order.
-    sort_idx = np.argsort(pval)
-    pval.sort()
+    # Sort all p-values in ascending order, leave the input array intact.
+    sort_idx = np.argsort(pval, kind='stable')
+    pval = pval[sort_idx]
 
     # Calculate threshold
     n = pval.size
     if constant == 2:  # pick the requested constant (see Genovese, p.872)
         if n < 1000:
-            const = sum(1 / np.arange(1, n + 1))
+            const = np.sum(1 / np.arange(1, n + 1))
         else:
             const = np.log(n) + np.e  # aprx. harmonic sum with Euler's number
     elif constant == 1:
@@ -283,15 +370,16 @@ def _perform_fdr_corretion(pval, constant, alpha):
         const = 1
     thresh = (np.arange(1, n + 1) / n) * alpha / const
 
-    # Compare data to threshold.
-    sign = pval <= thresh
-    if np.invert(sign).any():
-        first_false = np.where(np.invert(sign))[0][0]
-        sign[first_false:] = False  # avoids false positives due to equal pvals
-    sign = sign[sort_idx]  # restore original ordering of significance values
+    # Compare data to threshold. All p-values after the first one exceeding
+    # its threshold are non-significant (avoids false positives due to equal
+    # p-values).
+    sign_sorted = np.logical_and.accumulate(pval <= thresh)
+    sign = np.empty(n, dtype=bool)
+    sign[sort_idx] = sign_sorted  # restore original ordering of p-values
     return sign, thresh
 
 
+@profiled
 def omnibus_test(analysis_setup, data):
     """Perform an omnibus test on identified conditional variables.
 
@@ -313,6 +401,16 @@ def omnibus_test(analysis_setup, data):
             - permute_in_time : bool [optional] - generate surrogates by
               shuffling samples in time instead of shuffling whole replications
               (default=False)
+            - perm_sequential : bool [optional] - create surrogates in
+              batches and stop as soon as the test decision is settled, see
+              _get_surrogate_values() (default=False)
+            - pvalue_method : str [optional] - 'permutation' to estimate
+              p-values by counting surrogates, 'gpd' or 'moment' to
+              extrapolate p-values smaller than 1/n_perm from the surrogate
+              distribution, see _find_pvalue_tail() (default='permutation')
+            - pvalue_gof_alpha : float [optional] - critical alpha level of
+              the goodness-of-fit test for extrapolated p-values
+              (default=0.05)
 
         data : Data instance
             raw data
@@ -372,20 +470,28 @@ def omnibus_test(analysis_setup, data):
                                conditional=cond_target_realisations))
     else:
         analysis_setup.settings['analytical_surrogates'] = False
-        surr_cond_real = _get_surrogates(data,
-                                         analysis_setup.current_value,
-                                         analysis_setup.selected_vars_sources,
-                                         n_permutations,
-                                         analysis_setup.settings)
-
-        surr_distribution = analysis_setup._cmi_estimator.estimate_parallel(
-                            n_chunks=n_permutations,
-                            re_use=['var2', 'conditional'],
+
+        def get_surrogate_distribution(n_perm, offset):
+            surr_cond_real = _get_surrogates(
+                                        data,
+                                        analysis_setup.current_value,
+                                        analysis_setup.selected_vars_sources,
+                                        n_perm,
+                                        analysis_setup.settings)
+            return analysis_setup._cmi_estimator.estimate_surrogates(
                             var1=surr_cond_real,
                             var2=analysis_setup._current_value_realisations,
-                            conditional=cond_target_realisations)
-    [significance, pvalue] = _find_pvalue(statistic, surr_distribution,
-                                          alpha, 'one_bigger')
+                            conditional=cond_target_realisations,
+                            n_chunks=n_perm)
+
+        surr_distribution = _get_surrogate_values(
+            analysis_setup, n_permutations, get_surrogate_distribution,
+            lambda dist, error: _decision_settled(
+                statistic, dist, alpha, error,
+                not _feeds_fdr(analysis_setup, 'omnibus')))
+    _record_n_perm(analysis_setup, 'omnibus', surr_distribution.shape[0])
+    [significance, pvalue] = _get_pvalue(analysis_setup, 'omnibus', statistic,
+                                         surr_distribution, alpha)
     if analysis_setup.settings['verbose']:
         if significance:
             print(' -- significant\n')
@@ -394,8 +500,9 @@ def omnibus_test(analysis_setup, data):
     return significance, pvalue, statistic
 
 
+@profiled
 def max_statistic(analysis_setup, data, candidate_set, te_max_candidate,
-                  conditional=None):
+                  conditional=None, idx_conditional=None):
     """Perform maximum statistics for one candidate source.
 
     Test if a transfer entropy value is significantly bigger than the maximum
@@ -413,6 +520,9 @@ def max_statistic(analysis_setup, data, candidate_set, te_max_candidate,
             - permute_in_time : bool [optional] - generate surrogates by
               shuffling samples in time instead of shuffling whole replications
               (default=False)
+            - perm_sequential : bool [optional] - create surrogates in
+              batches and stop as soon as the test decision is settled, see
+              _get_surrogate_values() (default=False)
 
         data : Data instance
             raw data
@@ -425,6 +535,9 @@ def max_statistic(analysis_setup, data, candidate_set, te_max_candidate,
             represent [realisations x variable dimension] (per default all
             already selected source and target variables from the
             analysis_setup are used)
+        idx_conditional : list of tuples [optional]
+            indices of the variables in conditional, used to re-use stored
+            surrogates, see _create_surrogate_table()
 
     Returns:
         bool
@@ -449,8 +562,14 @@ def max_statistic(analysis_setup, data, candidate_set, te_max_candidate,
         print('maximum statistic, n_perm: {0}'.format(
                             analysis_setup.settings['n_perm_max_stat']))
 
-    surr_table = _create_surrogate_table(analysis_setup, data, candidate_set,
-                                         n_perm, conditional)
+    surr_table = _get_surrogate_values(
+        analysis_setup, n_perm,
+        lambda n, offset: _create_surrogate_table(
+            analysis_setup, data, candidate_set, n, conditional,
+            idx_conditional, offset),
+        lambda table, error: _decision_settled(
+            te_max_candidate, _find_table_max(table), alpha, error))
+    _record_n_perm(analysis_setup, 'max_stat', surr_table.shape[1])
     max_distribution = _find_table_max(surr_table)
     [significance, pvalue] = _find_pvalue(statistic=te_max_candidate,
                                           distribution=max_distribution,
@@ -459,6 +578,7 @@ def max_statistic(analysis_setup, data, candidate_set, te_max_candidate,
     return significance, pvalue, surr_table
 
 
+@profiled
 def max_statistic_sequential(analysis_setup, data):
     """Perform sequential maximum statistics for a set of candidate sources.
 
@@ -498,6 +618,16 @@ def max_statistic_sequential(analysis_setup, data):
             - permute_in_time : bool [optional] - generate surrogates by
               shuffling samples in time instead of shuffling whole replications
               (default=False)
+            - perm_sequential : bool [optional] - create surrogates in
+              batches and stop as soon as the test decision is settled, see
+              _get_surrogate_values() (default=False)
+            - pvalue_method : str [optional] - 'permutation' to estimate
+              p-values by counting surrogates, 'gpd' or 'moment' to
+              extrapolate p-values smaller than 1/n_perm from the surrogate
+              distribution, see _find_pvalue_tail() (default='permutation')
+            - pvalue_gof_alpha : float [optional] - critical alpha level of
+              the goodness-of-fit test for extrapolated p-values
+              (default=0.05)
 
         data : Data instance
             raw data
@@ -590,18 +720,33 @@ def max_statistic_sequential(analysis_setup, data):
 
     # Re-use surrogate table from previous pruning using min stats, if it
     # already exists. This saves some time. Otherwise create surrogate table.
+    # In sequential mode, a smaller table is extended by further surrogates.
     # Sort surrogate table.
     if (analysis_setup._min_stats_surr_table is not None and
             n_permutations <= analysis_setup._min_stats_surr_table.shape[1]):
         surr_table = analysis_setup._min_stats_surr_table[:, :n_permutations]
         assert len(analysis_setup.selected_vars_sources) == surr_table.shape[0]
     else:
+        if (analysis_setup._min_stats_surr_table is not None and
+                analysis_setup.settings.get('perm_sequential', False)):
+            surr_table = analysis_setup._min_stats_surr_table
+            assert (len(analysis_setup.selected_vars_sources) ==
+                    surr_table.shape[0])
+        else:
+            surr_table = None
         try:
-            surr_table = _create_surrogate_table(
+            surr_table = _get_surrogate_values(
+                analysis_setup, n_permutations,
+                lambda n, offset: _create_surrogate_table(
                             analysis_setup=analysis_setup,
                             data=data,
                             idx_test_set=analysis_setup.selected_vars_sources,
-                            n_perm=n_permutations)
+                            n_perm=n,
+                            offset=offset),
+                lambda table, error: _max_seq_settled(
+                    individual_stat_sorted, table, alpha, error,
+                    not _feeds_fdr(analysis_setup, 'max_seq')),
+                surr_table)
         except ex.AlgorithmExhaustedError as aee:
             # The aglorithm cannot continue here, so
             #  we'll terminate the max sequential stats test,
@@ -616,6 +761,7 @@ def max_statistic_sequential(analysis_setup, data):
                 (np.zeros(len(analysis_setup.selected_vars_sources)).astype(bool),
                 np.ones(len(analysis_setup.selected_vars_sources)),
                 np.zeros(len(analysis_setup.selected_vars_sources)))
+    _record_n_perm(analysis_setup, 'max_seq', surr_table.shape[1])
     max_distribution = _sort_table_max(surr_table)
 
     # Compare each original value with the distribution of the same rank,
@@ -623,8 +769,9 @@ def max_statistic_sequential(analysis_setup, data):
     significance = np.zeros(individual_stat.shape[0]).astype(bool)
     pvalue = np.ones(individual_stat.shape[0])
     for c in range(individual_stat.shape[0]):
-        [s, p] = _find_pvalue(individual_stat_sorted[c],
-                              max_distribution[c, ], alpha, tail='one_bigger')
+        [s, p] = _get_pvalue(analysis_setup, 'max_seq',
+                             individual_stat_sorted[c], max_distribution[c, ],
+                             alpha)
         significance[c] = s
         pvalue[c] = p
         if not s:  # break as soon as a candidate is no longer significant
@@ -639,6 +786,7 @@ def max_statistic_sequential(analysis_setup, data):
     return significance, pvalue, individual_stat
 
 
+@profiled
 def max_statistic_sequential_bivariate(analysis_setup, data):
     """Perform sequential maximum statistics for a set of candidate sources.
 
@@ -678,6 +826,16 @@ def max_statistic_sequential_bivariate(analysis_setup, data):
             - permute_in_time : bool [optional] - generate surrogates by
               shuffling samples in time instead of shuffling whole replications
               (default=False)
+            - perm_sequential : bool [optional] - create surrogates in
+              batches and stop as soon as the test decision is settled, see
+              _get_surrogate_values() (default=False)
+            - pvalue_method : str [optional] - 'permutation' to estimate
+              p-values by counting surrogates, 'gpd' or 'moment' to
+              extrapolate p-values smaller than 1/n_perm from the surrogate
+              distribution, see _find_pvalue_tail() (default='permutation')
+            - pvalue_gof_alpha : float [optional] - critical alpha level of
+              the goodness-of-fit test for extrapolated p-values
+              (default=0.05)
 
         data : Data instance
             raw data
@@ -810,12 +968,19 @@ def max_statistic_sequential_bivariate(analysis_setup, data):
                 conditional_realisations_sources,
                 conditional_realisations_target))
         try:
-            surr_table = _create_surrogate_table(
+            surr_table = _get_surrogate_values(
+                analysis_setup, n_permutations,
+                lambda n, offset: _create_surrogate_table(
                         analysis_setup=analysis_setup,
                         data=data,
                         idx_test_set=analysis_setup.selected_vars_sources,
-                        n_perm=n_permutations,
-                        conditional=conditional_realisations)
+                        n_perm=n,
+                        conditional=conditional_realisations,
+                        idx_conditional=idx_conditional,
+                        offset=offset),
+                lambda table, error: _max_seq_settled(
+                    individual_stat_sorted, table, alpha, error,
+                    not _feeds_fdr(analysis_setup, 'max_seq')))
         except ex.AlgorithmExhaustedError as aee:
             # The algorithm cannot continue here, so
             #  we'll terminate the max sequential stats test,
@@ -830,14 +995,15 @@ def max_statistic_sequential_bivariate(analysis_setup, data):
                 (np.zeros(len(analysis_setup.selected_vars_sources)).astype(bool),
                 np.ones(len(analysis_setup.selected_vars_sources)),
                 np.zeros(len(analysis_setup.selected_vars_sources)))
+        _record_n_perm(analysis_setup, 'max_seq', surr_table.shape[1])
         max_distribution = _sort_table_max(surr_table)
 
         # Compare each original value with the distribution of the same rank,
         # starting with the highest value.
         for c in range(individual_stat.shape[0]):
-            [s, p] = _find_pvalue(individual_stat_sorted[c],
-                                  max_distribution[c, ],
-                                  alpha, tail='one_bigger')
+            [s, p] = _get_pvalue(analysis_setup, 'max_seq',
+                                 individual_stat_sorted[c],
+                                 max_distribution[c, ], alpha)
             # Write results into an array with the same order as the set of
             # selected sources from all process. Find the currently tested
             # variable and its index in the list of all selected variables.
@@ -857,8 +1023,9 @@ def max_statistic_sequential_bivariate(analysis_setup, data):
     return significance, pvalue, stat
 
 
+@profiled
 def min_statistic(analysis_setup, data, candidate_set, te_min_candidate,
-                  conditional=None):
+                  conditional=None, idx_conditional=None):
     """Perform minimum statistics for one candidate source.
 
     Test if a transfer entropy value is significantly bigger than the minimum
@@ -876,6 +1043,9 @@ def min_statistic(analysis_setup, data, candidate_set, te_min_candidate,
             - permute_in_time : bool [optional] - generate surrogates by
               shuffling samples in time instead of shuffling whole replications
               (default=False)
+            - perm_sequential : bool [optional] - create surrogates in
+              batches and stop as soon as the test decision is settled, see
+              _get_surrogate_values() (default=False)
 
         data : Data instance
             raw data
@@ -888,6 +1058,9 @@ def min_statistic(analysis_setup, data, candidate_set, te_min_candidate,
             represent [realisations x variable dimension] (per default all
             already selected source and target variables from the
             analysis_setup are used)
+        idx_conditional : list of tuples [optional]
+            indices of the variables in conditional, used to re-use stored
+            surrogates, see _create_surrogate_table()
 
     Returns:
         bool
@@ -913,8 +1086,14 @@ def min_statistic(analysis_setup, data, candidate_set, te_min_candidate,
 
     assert(candidate_set), 'The candidate set is empty.'
 
-    surr_table = _create_surrogate_table(analysis_setup, data, candidate_set,
-                                         n_perm, conditional)
+    surr_table = _get_surrogate_values(
+        analysis_setup, n_perm,
+        lambda n, offset: _create_surrogate_table(
+            analysis_setup, data, candidate_set, n, conditional,
+            idx_conditional, offset),
+        lambda table, error: _decision_settled(
+            te_min_candidate, _find_table_min(table), alpha, error))
+    _record_n_perm(analysis_setup, 'min_stat', surr_table.shape[1])
     min_distribution = _find_table_min(surr_table)
     [significance, pvalue] = _find_pvalue(statistic=te_min_candidate,
                                           distribution=min_distribution,
@@ -923,6 +1102,7 @@ def min_statistic(analysis_setup, data, candidate_set, te_min_candidate,
     return significance, pvalue, surr_table
 
 
+@profiled
 def mi_against_surrogates(analysis_setup, data):
     """Test estimated mutual information for significance against surrogate data.
 
@@ -943,6 +1123,16 @@ def mi_against_surrogates(analysis_setup, data):
             - permute_in_time : bool [optional] - generate surrogates by
               shuffling samples in time instead of shuffling whole replications
               (default=False)
+            - perm_sequential : bool [optional] - create surrogates in
+              batches and stop as soon as the test decision is settled, see
+              _get_surrogate_values() (default=False)
+            - pvalue_method : str [optional] - 'permutation' to estimate
+              p-values by counting surrogates, 'gpd' or 'moment' to
+              extrapolate p-values smaller than 1/n_perm from the surrogate
+              distribution, see _find_pvalue_tail() (default='permutation')
+            - pvalue_gof_alpha : float [optional] - critical alpha level of
+              the goodness-of-fit test for extrapolated p-values
+              (default=0.05)
 
         data : Data instance
             raw data
@@ -995,6 +1185,11 @@ def mi_against_surrogates(analysis_setup, data):
                                             analysis_setup.current_value,
                                             [analysis_setup.current_value])
         '''
+    orig_mi = analysis_setup._cmi_estimator.estimate(
+                            var1=analysis_setup._current_value_realisations,
+                            var2=analysis_setup._selected_vars_realisations,
+                            conditional=None
+                            )
     if (analysis_setup._cmi_estimator.is_analytic_null_estimator() and
             permute_in_time):
         # Generate the surrogates analytically
@@ -1007,30 +1202,31 @@ def mi_against_surrogates(analysis_setup, data):
                             conditional=None))
     else:
         analysis_setup.settings['analytical_surrogates'] = False
-        surr_realisations = _get_surrogates(data,
-                                            analysis_setup.current_value,
-                                            [analysis_setup.current_value],
-                                            n_perm,
-                                            analysis_setup.settings)
 
-        surr_dist = analysis_setup._cmi_estimator.estimate_parallel(
-                            n_chunks=n_perm,
-                            re_use=['var2', 'conditional'],
+        def get_surrogate_distribution(n_perm, offset):
+            surr_realisations = _get_surrogates(data,
+                                                analysis_setup.current_value,
+                                                [analysis_setup.current_value],
+                                                n_perm,
+                                                analysis_setup.settings)
+            return analysis_setup._cmi_estimator.estimate_surrogates(
                             var1=surr_realisations,
                             var2=analysis_setup._selected_vars_realisations,
-                            conditional=None)
-    orig_mi = analysis_setup._cmi_estimator.estimate(
-                            var1=analysis_setup._current_value_realisations,
-                            var2=analysis_setup._selected_vars_realisations,
-                            conditional=None
-                            )
-    [significance, p_value] = _find_pvalue(statistic=orig_mi,
-                                           distribution=surr_dist,
-                                           alpha=alpha,
-                                           tail='one_bigger')
+                            conditional=None,
+                            n_chunks=n_perm)
+
+        surr_dist = _get_surrogate_values(
+            analysis_setup, n_perm, get_surrogate_distribution,
+            lambda dist, error: _decision_settled(
+                orig_mi, dist, alpha, error,
+                not _feeds_fdr(analysis_setup, 'mi')))
+    _record_n_perm(analysis_setup, 'mi', surr_dist.shape[0])
+    [significance, p_value] = _get_pvalue(analysis_setup, 'mi', orig_mi,
+                                          surr_dist, alpha)
     return [orig_mi, significance, p_value]
 
 
+@profiled
 def unq_against_surrogates(analysis_setup, data):
     """Test the unique information in the PID estimate against surrogate data.
 
@@ -1152,6 +1348,7 @@ def unq_against_surrogates(analysis_setup, data):
     return [orig_pid, sign_1, p_val_1, sign_2, p_val_2]
 
 
+@profiled
 def syn_shd_against_surrogates(analysis_setup, data):
     """Test the shared/synergistic information in the PID estimate.
 
@@ -1265,8 +1462,10 @@ def check_n_perm(n_perm, alpha):
                            .format(n_perm, alpha))
 
 
+@profiled
 def _create_surrogate_table(analysis_setup, data, idx_test_set, n_perm,
-                            conditional=None):
+                            conditional=None, idx_conditional=None,
+                            offset=0):
     """Create a table of surrogate MI/CMI/TE values.
 
     Calculate MI/CMI/TE between surrogates for each source variable in the test
@@ -1279,6 +1478,23 @@ def _create_surrogate_table(analysis_setup, data, idx_test_set, n_perm,
     for bivariate TE only the past variables from the target are required (not
     the variables selected from other relevant sources).
 
+    If the analysis setup holds a surrogate store (see
+    NetworkAnalysis._set_surrogate_store()), surrogate values are re-used for
+    candidates that were already tested with the same conditioning set, and
+    are extended if more permutations are requested than are stored. This
+    requires the indices of the conditioning set, which are known if the
+    default conditional is used or if idx_conditional is provided. An offset
+    requests stored surrogates starting at this permutation, e.g., if
+    previous batches of a sequential test already used the first offset
+    permutations, see _get_surrogate_values().
+
+    Surrogates of all candidates are estimated in a single batched call to
+    the estimator with one chunk per candidate and permutation, such that
+    parallel estimators (e.g., GPU estimators or estimators using a pool of
+    workers) can process all candidates at once. The batch is split into
+    multiple calls if the data exceed the estimator's memory limit, see
+    Estimator.get_max_chunks().
+
     Args:
         analysis_setup : instance of NetworkAnalysis or child class
             information on the current analysis, must contain an attribute
@@ -1294,6 +1510,13 @@ def _create_surrogate_table(analysis_setup, data, idx_test_set, n_perm,
             represent [realisations x variable dimension] (per default all
             already selected source and target variables from the
             analysis_setup are used)
+        idx_conditional : list of tuples [optional]
+            indices of the variables in conditional, used to look up stored
+            surrogates; surrogates are not stored if a conditional is
+            provided without indices
+        offset : int [optional]
+            number of the first requested permutation in the surrogate store
+            (default=0)
     Returns:
         numpy array
             surrogate MI/CMI/TE values, dimensions: (length test set, number of
@@ -1309,50 +1532,115 @@ def _create_surrogate_table(analysis_setup, data, idx_test_set, n_perm,
     # Check what type of conditioning is requested.
     if conditional is None:
         conditional = analysis_setup._selected_vars_realisations
+        idx_conditional = analysis_setup.selected_vars_full
+    use_store = (idx_conditional is not None and
+                 getattr(analysis_setup, '_surrogate_store', None) is not None)
 
-    # Create surrogate table.
-    # if analysis_setup.settings['verbose']:
-    #     print('\ncreating surrogate table with {0} permutations:'.format(
-    #                                                                 n_perm))
-    #     print('\tcand.', end='')
+    # Create surrogate table. Use stored surrogates for each candidate and only
+    # create missing permutations.
     surr_table = np.zeros((len(idx_test_set), n_perm))
+    n_stored = np.zeros(len(idx_test_set), dtype=int)
+    if use_store:
+        for idx_c, candidate in enumerate(idx_test_set):
+            stored = analysis_setup._get_stored_surrogates(
+                candidate, idx_conditional, n_perm, offset)
+            if stored is not None:
+                n_stored[idx_c] = stored.shape[0]
+                surr_table[idx_c, :n_stored[idx_c]] = stored
+    missing = [idx_c for idx_c in range(len(idx_test_set))
+               if n_stored[idx_c] < n_perm]
+    if not missing:
+        return surr_table
+
     current_value_realisations = analysis_setup._current_value_realisations
-    idx_c = 0
-    for candidate in idx_test_set:
-        # if analysis_setup.settings['verbose']:
-        #     print('\t{0}'.format(analysis_setup._idx_to_lag([candidate])[0]),
-        #           end='')
-        if (analysis_setup._cmi_estimator.is_analytic_null_estimator() and
-                permute_in_time):
-            # Generate the surrogates analytically
-            analysis_setup.settings['analytical_surrogates'] = True
-            surr_table[idx_c, :] = (
+    if (analysis_setup._cmi_estimator.is_analytic_null_estimator() and
+            permute_in_time):
+        # Generate the surrogates analytically. The analytic null depends on
+        # the dimensions of the variables only, such that surrogates for all
+        # candidates missing the same number of permutations are drawn in a
+        # single call.
+        analysis_setup.settings['analytical_surrogates'] = True
+        for n_stored_group in np.unique(n_stored[missing]):
+            group = [idx_c for idx_c in missing
+                     if n_stored[idx_c] == n_stored_group]
+            surr_table[group, n_stored_group:] = (
                 analysis_setup._cmi_estimator.estimate_surrogates_analytic(
-                    n_perm=n_perm,
+                    n_perm=n_perm - n_stored_group,
+                    n_sets=len(group),
                     var1=data.get_realisations(analysis_setup.current_value,
-                                               [candidate])[0],
-                    var2=current_value_realisations,
-                    conditional=conditional))
-        else:
-            analysis_setup.settings['analytical_surrogates'] = False
-            surr_candidate_realisations = _get_surrogates(
-                                                 data,
-                                                 analysis_setup.current_value,
-                                                 [candidate],
-                                                 n_perm,
-                                                 analysis_setup.settings)
-            surr_table[idx_c, :] = (
-                analysis_setup._cmi_estimator.estimate_parallel(
-                    n_chunks=n_perm,
-                    re_use=['var2', 'conditional'],
-                    var1=surr_candidate_realisations,
+                                               [idx_test_set[group[0]]])[0],
                     var2=current_value_realisations,
                     conditional=conditional))
-        idx_c += 1
-
+    else:
+        # Estimate surrogates for all candidates in as few calls as the
+        # estimator's memory limit allows.
+        analysis_setup.settings['analytical_surrogates'] = False
+        n_dim = 1 + current_value_realisations.shape[1]
+        if conditional is not None:
+            n_dim += conditional.shape[1]
+        max_chunks = analysis_setup._cmi_estimator.get_max_chunks(
+            current_value_realisations.shape[0] * n_dim *
+            np.dtype(np.float64).itemsize)
+        for surr_realisations, table_idx in _get_surrogate_batches(
+                analysis_setup, data, idx_test_set, missing, n_perm,
+                n_stored, max_chunks):
+            surr_values = analysis_setup._cmi_estimator.estimate_surrogates(
+                var1=surr_realisations,
+                var2=current_value_realisations,
+                conditional=conditional,
+                n_chunks=len(table_idx[0]))
+            surr_table[table_idx] = surr_values
+    if use_store:
+        for idx_c in missing:
+            analysis_setup._store_surrogates(
+                idx_test_set[idx_c], idx_conditional,
+                surr_table[idx_c, n_stored[idx_c]:], offset + n_stored[idx_c])
     return surr_table
 
 
+def _get_surrogate_batches(analysis_setup, data, idx_test_set, missing,
+                           n_perm, n_stored, max_chunks):
+    """Yield surrogate realisations for multiple candidates in batches.
+
+    Surrogates are created for each candidate with missing permutations and
+    collected into batches of at most max_chunks chunks, where each chunk
+    holds the realisations of one permutation of one candidate. Surrogates of
+    a single candidate may be split over batches.
+
+    Yields:
+        numpy array
+            surrogate realisations of all chunks in the batch,
+            [(realisations * n_chunks) x 1]
+        tuple of numpy arrays
+            row and column indices of the chunks in the surrogate table
+    """
+    n_realisations = analysis_setup._current_value_realisations.shape[0]
+    batch = []
+    rows = []
+    cols = []
+    for idx_c in missing:
+        surr = _get_surrogates(data,
+                               analysis_setup.current_value,
+                               [idx_test_set[idx_c]],
+                               n_perm - n_stored[idx_c],
+                               analysis_setup.settings)
+        perm = n_stored[idx_c]
+        while perm < n_perm:
+            n_chunks = min(max_chunks - len(rows), n_perm - perm)
+            i_1 = (perm - n_stored[idx_c]) * n_realisations
+            batch.append(surr[i_1:i_1 + n_chunks * n_realisations])
+            rows += [idx_c] * n_chunks
+            cols += range(perm, perm + n_chunks)
+            perm += n_chunks
+            if len(rows) == max_chunks:
+                yield np.concatenate(batch), (np.array(rows), np.array(cols))
+                batch = []
+                rows = []
+                cols = []
+    if rows:
+        yield np.concatenate(batch), (np.array(rows), np.array(cols))
+
+
 def _find_table_max(table):
     """Find maximum for each column of a table."""
     return np.max(table, axis=0)
@@ -1427,6 +1715,244 @@ def _find_pvalue(statistic, distribution, alpha, tail):
     return significance, pvalue
 
 
+def _get_pvalue(analysis_setup, test, statistic, distribution, alpha):
+    """Find p-value of a one-tailed test (H1 > H0) for an analysis.
+
+    P-values are estimated by counting surrogates or are extrapolated from
+    the surrogate distribution if requested by 'pvalue_method' in the
+    analysis settings, see _find_pvalue_tail(). Fit diagnostics of
+    extrapolated p-values are recorded in the analysis setup.
+
+    Args:
+        analysis_setup : instance of NetworkAnalysis or child class
+            information on the current analysis, can have an attribute
+            settings with entries 'pvalue_method' and 'pvalue_gof_alpha'
+        test : str
+            name of the test, used to record fit diagnostics
+        statistic : numeric
+            value to be tested against distribution
+        distribution : numpy array
+            1-dimensional distribution of values, test distribution
+        alpha : float
+            critical alpha level for statistical significance
+
+    Returns:
+        bool
+            statistical significance
+        float
+            the test's p-value
+    """
+    analysis_setup.settings.setdefault('pvalue_method', 'permutation')
+    method = analysis_setup.settings['pvalue_method']
+    if method == 'permutation':
+        return _find_pvalue(statistic, distribution, alpha, tail='one_bigger')
+    analysis_setup.settings.setdefault('pvalue_gof_alpha', 0.05)
+    [significance, pvalue, fit] = _find_pvalue_tail(
+        statistic, distribution, alpha, method,
+        analysis_setup.settings['pvalue_gof_alpha'])
+    _record_pvalue_fit(analysis_setup, test, fit)
+    return significance, pvalue
+
+
+def _find_pvalue_tail(statistic, distribution, alpha, method='gpd',
+                      gof_alpha=0.05, n_exceed_min=10):
+    """Find p-value of a test statistic from a fit to the surrogate tail.
+
+    Find the p-value of a one-tailed test (H1 > H0). If at least n_exceed_min
+    surrogates are equal to or bigger than the statistic, the p-value is
+    estimated by counting, as in _find_pvalue(). Otherwise, the p-value is
+    extrapolated from a parametric fit to the surrogate distribution, which
+    allows for p-values smaller than 1/n_perm, e.g., for FDR-correction with
+    fewer permutations:
+
+    - 'gpd': fit a generalized Pareto distribution (GPD) to the surrogates
+      exceeding a threshold by maximum likelihood (Knijnenburg, 2009). The
+      tail size is chosen by searching: the threshold is lowered in steps of
+      10 exceedances, starting at min(250, n_perm / 4) exceedances, until
+      the fit passes an Anderson-Darling goodness-of-fit test, see
+      _gpd_gof_pvalue(). The first accepted fit is used; the search is not
+      corrected for testing multiple tail sizes.
+    - 'moment': fit a Pearson type III (shifted gamma) distribution matching
+      the mean, standard deviation, and skewness of the surrogates. The
+      goodness-of-fit is assessed by a Kolmogorov-Smirnov test calibrated by
+      a parametric bootstrap, see _pearson3_gof_pvalue().
+
+    If the fit is rejected at gof_alpha, or if the statistic lies at or
+    beyond the upper endpoint of a fitted distribution with bounded support
+    (e.g., a GPD with negative shape), the p-value is not extrapolated but
+    estimated by counting. Extrapolated p-values are bounded below by
+    1/n_perm**2, i.e., extrapolation improves the resolution of the
+    permutation test by at most a factor n_perm.
+
+    References:
+
+    - Knijnenburg, T.A., Wessels, L.F.A., Reinders, M.J.T., & Shmulevich, I.
+      (2009). Fewer permutations, more accurate P-values. Bioinformatics,
+      25(12), i161-i168.
+    - Choulakian, V., & Stephens, M.A. (2001). Goodness-of-fit tests for the
+      generalized Pareto distribution. Technometrics, 43(4), 478-484.
+
+    Args:
+        statistic : numeric
+            value to be tested against distribution
+        distribution : numpy array
+            1-dimensional distribution of values, test distribution
+        alpha : float
+            critical alpha level for statistical significance
+        method : str [optional]
+            'gpd' or 'moment' (default='gpd')
+        gof_alpha : float [optional]
+            critical alpha level of the goodness-of-fit test (default=0.05)
+        n_exceed_min : int [optional]
+            minimum number of surrogates equal to or bigger than the
+            statistic for which the p-value is estimated by counting
+            (default=10)
+
+    Returns:
+        bool
+            statistical significance
+        float
+            the test's p-value
+        dict
+            fit diagnostics with entries 'method' (method used to estimate
+            the p-value: 'gpd', 'moment', or 'permutation'), 'gof_pvalue'
+            (p-value of the goodness-of-fit test, None if no fit was
+            attempted), 'n_tail' (number of surrogates used for the fit),
+            and 'fit_failed' (True if the p-value had to be extrapolated but
+            no fit was accepted or the statistic lies beyond the fitted
+            distribution, such that the counted p-value is bounded by
+            1/n_perm)
+    """
+    if method not in ['gpd', 'moment']:
+        raise ValueError('Unknown p-value method: {0}.'.format(method))
+    [significance, pvalue] = _find_pvalue(statistic, distribution, alpha,
+                                          tail='one_bigger')
+    fit = {'method': 'permutation', 'gof_pvalue': None, 'n_tail': None,
+           'fit_failed': False}
+    if np.sum(distribution >= statistic) >= n_exceed_min:
+        return significance, pvalue, fit
+
+    if method == 'gpd':
+        [pvalue_fit, gof_pvalue, n_tail] = _fit_gpd_tail(
+            statistic, distribution, gof_alpha)
+    else:
+        [pvalue_fit, gof_pvalue, n_tail] = _fit_pearson3(
+            statistic, distribution)
+    fit['gof_pvalue'] = gof_pvalue
+    if pvalue_fit is None or gof_pvalue < gof_alpha:
+        fit['fit_failed'] = True
+        return significance, pvalue, fit
+
+    fit['method'] = method
+    fit['n_tail'] = n_tail
+    pvalue = max(pvalue_fit, 1 / distribution.shape[0] ** 2)
+    return pvalue < alpha, pvalue, fit
+
+
+def _fit_gpd_tail(statistic, distribution, gof_alpha):
+    """Extrapolate a p-value from a GPD fitted to the surrogate tail.
+
+    Returns:
+        float | None
+            extrapolated p-value, None if no fit was possible or the
+            statistic lies at or beyond the upper endpoint of the fitted GPD
+        float | None
+            p-value of the goodness-of-fit test of the last fit
+        int | None
+            number of exceedances used for the fit
+    """
+    n_perm = distribution.shape[0]
+    surr_sorted = utils.sort_descending(distribution)
+    gof_pvalue = None
+    for n_tail in range(min(250, n_perm // 4), 9, -10):
+        threshold = (surr_sorted[n_tail - 1] + surr_sorted[n_tail]) / 2
+        exceedances = surr_sorted[:n_tail] - threshold
+        if np.ptp(exceedances) == 0:
+            continue
+        shape, loc, scale = genpareto.fit(exceedances, floc=0)
+        gof_pvalue = _gpd_gof_pvalue(exceedances, shape, scale)
+        if gof_pvalue >= gof_alpha:
+            if shape < 0 and statistic - threshold >= -scale / shape:
+                return None, gof_pvalue, n_tail
+            return (n_tail / n_perm *
+                    genpareto.sf(statistic - threshold, shape, 0, scale),
+                    gof_pvalue, n_tail)
+    return None, gof_pvalue, None
+
+
+def _gpd_gof_pvalue(exceedances, shape, scale):
+    """Return p-value of the Anderson-Darling test of a fitted GPD.
+
+    The Anderson-Darling statistic A^2 of the exceedances is compared
+    against critical values for a GPD with shape and scale estimated by
+    maximum likelihood (Choulakian & Stephens, 2001), see _GPD_AD_CRITICAL.
+    Critical values are interpolated linearly between tabulated shapes,
+    shapes outside the table use the nearest tabulated shape. The p-value is
+    interpolated log-linearly between tabulated levels and is clipped to the
+    range of levels, [0.005, 0.5].
+    """
+    z = np.sort(genpareto.cdf(exceedances, shape, 0, scale))
+    z = np.clip(z, np.finfo(float).eps, 1 - np.finfo(float).eps)
+    n = z.shape[0]
+    i = np.arange(1, n + 1)
+    a2 = -n - np.mean((2 * i - 1) * (np.log(z) + np.log1p(-z[::-1])))
+    critical = [np.interp(shape, _GPD_AD_SHAPES, c)
+                for c in _GPD_AD_CRITICAL.T]
+    return float(np.exp(np.interp(a2, critical, np.log(_GPD_AD_LEVELS))))
+
+
+def _fit_pearson3(statistic, distribution, n_boot=199):
+    """Extrapolate a p-value from a moment-matched Pearson III distribution.
+
+    Returns:
+        float | None
+            extrapolated p-value, None if no fit was possible or the
+            statistic lies at or beyond the upper endpoint of the fitted
+            distribution (for negative skewness)
+        float | None
+            p-value of the goodness-of-fit test
+        int
+            number of surrogates used for the fit
+    """
+    sd = np.std(distribution, ddof=1)
+    if sd == 0:
+        return None, None, None
+    params = (skew(distribution), np.mean(distribution), sd)
+    gof_pvalue = _pearson3_gof_pvalue(distribution, params, n_boot)
+    if params[0] < 0 and statistic >= params[1] - 2 * sd / params[0]:
+        return None, gof_pvalue, distribution.shape[0]
+    return (pearson3.sf(statistic, *params), gof_pvalue,
+            distribution.shape[0])
+
+
+def _pearson3_gof_pvalue(distribution, params, n_boot):
+    """Return p-value of the KS test of a moment-matched Pearson III fit.
+
+    Because the parameters are estimated from the same data, the p-value of
+    the Kolmogorov-Smirnov statistic is calibrated by a parametric bootstrap:
+    n_boot samples are drawn from the fitted distribution and refitted, and
+    the p-value is the fraction of bootstrap statistics equal to or bigger
+    than the observed statistic. Bootstrap samples are drawn from a
+    generator with a fixed seed, such that p-values are reproducible and the
+    global random state is not changed.
+    """
+    def ks_statistic(samples, skewness, loc, scale):
+        n = samples.shape[-1]
+        cdf = pearson3.cdf(np.sort(samples, axis=-1), skewness, loc, scale)
+        return np.maximum(
+            np.max(np.arange(1, n + 1) / n - cdf, axis=-1),
+            np.max(cdf - np.arange(n) / n, axis=-1))
+
+    d = ks_statistic(distribution, *params)
+    boot = pearson3.rvs(*params, size=(n_boot, distribution.shape[0]),
+                        random_state=np.random.RandomState(0))
+    d_boot = ks_statistic(
+        boot, skew(boot, axis=1)[:, np.newaxis],
+        np.mean(boot, axis=1)[:, np.newaxis],
+        np.std(boot, axis=1, ddof=1)[:, np.newaxis])
+    return (1 + np.sum(d_boot >= d)) / (n_boot + 1)
+
+
 def _sufficient_replications(data, n_perm):
     """Test if no. replications is high enough for surrogate creation.
 
@@ -1472,37 +1998,21 @@ def _get_surrogates(data, current_value, idx_list, n_perm, perm_settings):
             surrogate data with dimensions
             (realisations * n_perm) x len(idx_list)
     """
-    # Allocate memory for surrogates
-    n_realisations = data.n_realisations(current_value)
-    surrogates = np.empty((n_realisations * n_perm,
-                           len(idx_list))).astype(data.data_type)
-
     # Check if the user requested to permute samples in time and not over
     # replications
     permute_in_time = perm_settings['permute_in_time']
 
     # Generate surrogates by permuting over replications if possible (no.
     # replications needs to be sufficient); else permute samples over time.
-    i_1 = 0
-    i_2 = n_realisations
-    # permute samples
+    # All permutations are generated at once.
     if permute_in_time:
-        for perm in range(n_perm):
-            surrogates[i_1:i_2, ] = data.permute_samples(current_value,
-                                                         idx_list,
-                                                         perm_settings)[0]
-            i_1 = i_2
-            i_2 += n_realisations
-
+        return data.permute_samples_batch(current_value, idx_list,
+                                          perm_settings, n_perm)[0]
     else:  # permute replications
         assert _sufficient_replications(data, n_perm), (
                 'Not enough replications for surrogate creation.')
-        for perm in range(n_perm):
-            surrogates[i_1:i_2, ] = data.permute_replications(current_value,
-                                                              idx_list)[0]
-            i_1 = i_2
-            i_2 += n_realisations
-    return surrogates
+        return data.permute_replications_batch(current_value, idx_list,
+                                               n_perm)[0]
 
 
 def _generate_spectral_surrogates(data, scale, n_perm, perm_settings):
@@ -1576,3 +2086,180 @@ def _check_permute_in_time(analysis_setup, data, n_perm):
     if analysis_setup.settings['permute_in_time']:
         analysis_setup.settings.setdefault('perm_type', 'random')
     return analysis_setup.settings['permute_in_time']
+
+
+def _get_surrogate_values(analysis_setup, n_perm, get_values, is_settled,
+                          values=None):
+    """Return surrogate values for a permutation test.
+
+    Obtain surrogate values, e.g., a surrogate distribution or table, for up
+    to n_perm permutations by calling get_values(n, offset), which returns
+    values for n permutations along the last axis, starting at permutation
+    number offset (the offset allows to continue with stored surrogates not
+    yet used, see _create_surrogate_table()). Per default, values for all
+    n_perm permutations are created at once.
+
+    If 'perm_sequential' is True in the analysis settings, surrogates are
+    created in batches and the test stops as soon as its decision at the
+    critical alpha level is statistically settled (sequential Monte Carlo
+    test). After each batch, is_settled(values, error) is called to test
+    whether a (Clopper-Pearson) confidence interval of the p-value with
+    error level 'error' excludes alpha, see _decision_settled(). Clearly
+    significant or clearly non-significant statistics thus require only a
+    fraction of the n_perm permutations. P-values are estimated from the
+    permutations used. Significant p-values of tests that enter an
+    FDR-correction are compared against thresholds much smaller than alpha
+    and thus require all n_perm permutations; for these tests, only
+    non-significant decisions stop early, see _feeds_fdr().
+
+    Args:
+        analysis_setup : instance of NetworkAnalysis or child class
+            information on the current analysis, can have an attribute
+            settings with entries
+
+            - perm_sequential : bool [optional] - create surrogates in
+              batches and stop early (default=False)
+            - perm_batch_size : int [optional] - number of permutations per
+              batch (default=50)
+            - perm_sequential_error : float [optional] - probability that the
+              confidence interval of the p-value does not contain the true
+              p-value, i.e., error level of the stopping rule (default=0.001)
+
+        n_perm : int
+            maximum number of permutations
+        get_values : callable
+            returns surrogate values for n permutations along the last axis,
+            starting at permutation number offset
+        is_settled : callable
+            returns True if the test decision is settled given surrogate
+            values and the error level
+        values : numpy array [optional]
+            surrogate values that are already available, these are extended
+            in sequential mode
+
+    Returns:
+        numpy array
+            surrogate values with up to n_perm permutations along the last
+            axis
+    """
+    analysis_setup.settings.setdefault('perm_sequential', False)
+    if not analysis_setup.settings['perm_sequential']:
+        return get_values(n_perm, 0)
+
+    analysis_setup.settings.setdefault('perm_batch_size', 50)
+    analysis_setup.settings.setdefault('perm_sequential_error', 0.001)
+    batch_size = analysis_setup.settings['perm_batch_size']
+    error = analysis_setup.settings['perm_sequential_error']
+    if type(batch_size) is not int or batch_size < 1:
+        raise TypeError('perm_batch_size has to be an int > 0.')
+    assert 0 < error < 1, 'perm_sequential_error has to be in (0, 1).'
+
+    if values is not None:
+        values = values[..., :n_perm]
+    while values is None or (values.shape[-1] < n_perm and
+                             not is_settled(values, error)):
+        offset = 0 if values is None else values.shape[-1]
+        batch = get_values(min(batch_size, n_perm - offset), offset)
+        if values is None:
+            values = batch
+        else:
+            values = np.concatenate((values, batch), axis=-1)
+    return values
+
+
+def _decision_settled(statistic, distribution, alpha, error,
+                      settle_significant=True):
+    """Test if the decision of a permutation test is settled.
+
+    Compute the exact (Clopper-Pearson) confidence interval of the p-value
+    of a one-tailed test (H1 > H0) from the number of surrogate values that
+    are equal to or bigger than the statistic. The decision is settled if the
+    interval with error level 'error' excludes the critical alpha level. No
+    decision is possible as long as the number of permutations is too small
+    to test alpha, see check_n_perm(). If settle_significant is False, only
+    non-significant decisions are settled.
+
+    Args:
+        statistic : float
+            value to be tested against distribution
+        distribution : numpy array
+            1-dimensional distribution of surrogate values
+        alpha : float
+            critical alpha level for statistical significance
+        error : float
+            error level of the confidence interval
+        settle_significant : bool [optional]
+            if False, significant decisions are never settled, e.g., if the
+            p-value enters an FDR-correction (default=True)
+
+    Returns:
+        bool
+            True if the decision is settled
+    """
+    n_perm = distribution.shape[0]
+    if not 1.0 / n_perm < alpha:
+        return False
+    n_bigger = np.sum(distribution >= statistic)
+    if n_bigger == 0:
+        lower = 0.
+    else:
+        lower = beta.ppf(error / 2, n_bigger, n_perm - n_bigger + 1)
+    if n_bigger == n_perm:
+        upper = 1.
+    else:
+        upper = beta.ppf(1 - error / 2, n_bigger + 1, n_perm - n_bigger)
+    return (upper < alpha and settle_significant) or lower > alpha
+
+
+def _max_seq_settled(statistic_sorted, surr_table, alpha, error,
+                     settle_significant=True):
+    """Test if decisions of sequential maximum statistics are settled.
+
+    Decisions are settled if the decisions for all ranks up to and including
+    the first non-significant rank are settled (all smaller ranks are
+    considered non-significant without testing).
+    """
+    max_distribution = _sort_table_max(surr_table)
+    for c in range(statistic_sorted.shape[0]):
+        if not _decision_settled(statistic_sorted[c], max_distribution[c, ],
+                                 alpha, error, settle_significant):
+            return False
+        if not _find_pvalue(statistic_sorted[c], max_distribution[c, ],
+                            alpha, tail='one_bigger')[0]:
+            return True
+    return True
+
+
+def _feeds_fdr(analysis_setup, test):
+    """Return True if p-values of a test enter a network FDR-correction.
+
+    The omnibus test enters the correction if 'correct_by_target' is True,
+    sequential maximum statistics otherwise, see network_fdr(). The AIS test
+    against surrogates ('mi') enters the correction of ais_fdr().
+    """
+    settings = analysis_setup.settings
+    if not settings.get('fdr_correction', False):
+        return False
+    if test == 'omnibus':
+        return settings.get('correct_by_target', True)
+    if test == 'max_seq':
+        return not settings.get('correct_by_target', True)
+    return test == 'mi'
+
+
+def _record_n_perm(analysis_setup, test, n_perm):
+    """Record the no. permutations used by a test in the analysis setup."""
+    try:
+        n_perm_used = analysis_setup._n_perm_used
+    except AttributeError:
+        return
+    n_perm_used.setdefault(test, []).append(n_perm)
+
+
+def _record_pvalue_fit(analysis_setup, test, fit):
+    """Record fit diagnostics of a p-value in the analysis setup."""
+    try:
+        pvalue_fit = analysis_setup._pvalue_fit
+    except AttributeError:
+        return
+    pvalue_fit.setdefault(test, []).append(fit)
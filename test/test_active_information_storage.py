@@ -2,10 +2,13 @@
 
 This module provides unit tests for the AIS analysis class.
 """
+import os
 import pytest
 import random as rn
+from tempfile import TemporaryDirectory
 import numpy as np
 from idtxl.data import Data
+from idtxl.results import LocalValues
 from idtxl.active_information_storage import ActiveInformationStorage
 from idtxl.estimators_jidt import JidtDiscreteCMI
 from test_estimators_jidt import jpype_missing
@@ -52,6 +55,42 @@ def test_return_local_values():
             'Wrong dim (no. samples) in LAIS estimate: {0}'.format(lais.shape))
 
 
+def test_local_values_store():
+    """Test storage of local AIS on disk."""
+    data = Data()
+    data.generate_mute_data(100, 3)
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'local_values': True,
+        'n_perm_max_stat': 21,
+        'n_perm_min_stat': 21,
+        'n_perm_mi': 21,
+        'max_lag': 3,
+        'tau': 1,
+        'verbose': False}
+    process = 1
+    np.random.seed(0)
+    lais = ActiveInformationStorage().analyse_single_process(
+        settings, data, process).get_single_process(process, fdr=False).ais
+    tmp_dir = TemporaryDirectory()
+    np.random.seed(0)
+    results = ActiveInformationStorage().analyse_single_process(
+        dict(settings, local_values_store='memmap',
+             local_values_dir=tmp_dir.name), data, process)
+    lais_stored = results.get_single_process(process, fdr=False).ais
+    if lais is np.nan:
+        return
+    assert isinstance(lais_stored, LocalValues)
+    assert os.path.dirname(lais_stored.file_name) == tmp_dir.name
+    assert os.path.basename(lais_stored.file_name).startswith(
+        'local_ais_process_{0}_'.format(process))
+    assert lais_stored.file_name.endswith('.npy')
+    assert np.allclose(np.asarray(lais_stored), lais, atol=1e-5), (
+        'Stored local AIS differs from local AIS returned as array.')
+    assert np.allclose(lais_stored.get_window(replications=[0, 2]),
+                       lais[[0, 2]], atol=1e-5)
+
+
 @jpype_missing
 def test_ActiveInformationStorage_init():
     """Test instance creation for ActiveInformationStorage class."""
@@ -242,6 +281,48 @@ def test_discrete_input():
     nw.analyse_single_process(settings=settings, data=data, process=0)
 
 
+def test_parallel_processes():
+    """Test AIS estimation for processes on a pool of workers."""
+    data = Data()
+    data.generate_mute_data(100, 3)
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'n_perm_max_stat': 21,
+        'n_perm_min_stat': 21,
+        'n_perm_mi': 21,
+        'max_lag': 2,
+        'verbose': False,
+        'n_jobs': 2}
+    results = ActiveInformationStorage().analyse_network(settings, data)
+    assert results.processes_analysed == [0, 1, 2, 3, 4]
+    assert 'n_jobs' not in results.settings
+
+
+def test_python_mi_estimators():
+    """Test AIS estimation with Python MI estimators."""
+    # MI estimators can not condition on selected past variables, use
+    # uncorrelated data such that no variables are selected.
+    np.random.seed(0)
+    data = Data(np.random.normal(size=(1, 200)), dim_order='ps',
+                normalise=False)
+    settings = {
+        'n_perm_max_stat': 21,
+        'n_perm_min_stat': 21,
+        'n_perm_mi': 21,
+        'max_lag': 3,
+        'verbose': False}
+    for estimator_settings in [
+            {'cmi_estimator': 'PythonKraskovMI'},
+            {'cmi_estimator': 'PythonGaussianMI'},
+            {'cmi_estimator': 'PythonDiscreteMI',
+             'discretise_method': 'max_ent'}]:
+        # Estimators are used without a profiling or cache wrapper.
+        results = ActiveInformationStorage().analyse_single_process(
+            dict(settings, **estimator_settings), data, process=0)
+        assert results.processes_analysed == [0]
+        assert not results.get_single_process(0, fdr=False).selected_vars
+
+
 @jpype_missing
 def test_define_candidates():
     """Test candidate definition from a list of procs and a list of samples."""
@@ -278,8 +359,11 @@ def test_define_candidates():
 
 
 if __name__ == '__main__':
+    test_parallel_processes()
+    test_python_mi_estimators()
     test_define_candidates()
     test_return_local_values()
+    test_local_values_store()
     test_discrete_input()
     test_analyse_network()
     test_ActiveInformationStorage_init()
@@ -2,11 +2,15 @@
 
 This module provides unit tests for the bivariate TE analysis class.
 """
+import os
 import pytest
 import itertools as it
+from tempfile import TemporaryDirectory
 import numpy as np
 from idtxl.bivariate_te import BivariateTE
+from idtxl import network_inference
 from idtxl.data import Data
+from idtxl.results import LocalValues
 from idtxl.estimators_jidt import JidtDiscreteCMI, JidtKraskovCMI, JidtKraskovTE
 from test_estimators_jidt import jpype_missing
 from idtxl.idtxl_utils import calculate_mi
@@ -126,6 +130,72 @@ def test_return_local_values():
                 'Single link average TE {0:.6f} and single source TE {1:.6f} '
                 'deviate.'.format(te_single_link[i1], te_selected_sources[i1]))
 
+def test_local_values_store():
+    """Test storage of local TE on disk."""
+    np.random.seed(0)
+    coefficients = np.zeros((1, 3, 3))
+    coefficients[0] = np.eye(3) * 0.5
+    coefficients[0, 2, 0] = 0.4
+    coefficients[0, 2, 1] = 0.4
+    data = Data()
+    data.generate_var_data(200, 5, coefficients)
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'local_values': True,
+        'n_perm_max_stat': 21,
+        'n_perm_min_stat': 21,
+        'n_perm_omnibus': 21,
+        'n_perm_max_seq': 21,
+        'max_lag_sources': 2,
+        'min_lag_sources': 1,
+        'max_lag_target': 1,
+        'verbose': False}
+    target = 2
+    np.random.seed(1)
+    lte = BivariateTE().analyse_single_target(
+        settings, data, target).get_single_target(target, fdr=False).te
+    assert type(lte) is np.ndarray
+    tmp_dir = TemporaryDirectory()
+    for store, extension in [('memmap', '.npy'), ('hdf5', '.h5')]:
+        np.random.seed(1)
+        results = BivariateTE().analyse_single_target(
+            dict(settings, local_values_store=store,
+                 local_values_dir=tmp_dir.name),
+            data, target)
+        lte_stored = results.get_single_target(target, fdr=False).te
+        assert isinstance(lte_stored, LocalValues)
+        assert os.path.dirname(lte_stored.file_name) == tmp_dir.name
+        assert os.path.basename(lte_stored.file_name).startswith(
+            'local_te_target_{0}_'.format(target))
+        assert lte_stored.file_name.endswith(extension)
+        assert lte_stored.shape == lte.shape
+        assert lte_stored.dtype == np.float32
+        assert np.allclose(np.asarray(lte_stored), lte, atol=1e-5), (
+            'Stored local TE differs from local TE returned as array.')
+        assert np.allclose(lte_stored.get_window(samples=(5, 10),
+                                                 replications=1),
+                           lte[:, 5:10, 1], atol=1e-5)
+
+    # A second analysis writing to the same directory does not overwrite the
+    # local values of the first one.
+    results_2 = BivariateTE().analyse_single_target(
+        dict(settings, local_values_store='memmap',
+             local_values_dir=tmp_dir.name),
+        data, target)
+    lte_stored_2 = results_2.get_single_target(target, fdr=False).te
+    assert lte_stored_2.file_name != lte_stored.file_name
+    data.generate_var_data(200, 5, coefficients)
+    results_3 = BivariateTE().analyse_single_target(
+        dict(settings, local_values_store='memmap',
+             local_values_dir=tmp_dir.name),
+        data, target)
+    lte_stored_3 = results_3.get_single_target(target, fdr=False).te
+    assert not np.allclose(np.asarray(lte_stored_3),
+                           np.asarray(lte_stored_2), atol=1e-5)
+    assert np.allclose(np.asarray(lte_stored_2), lte, atol=1e-5), (
+        'Local TE of an earlier analysis was overwritten.')
+
+
 @jpype_missing
 def test_bivariate_te_init():
     """Test instance creation for BivariateTE class."""
@@ -512,6 +582,112 @@ def test_mute_data():
     te.analyse_network(settings, data, targets=[target])
 
 
+def test_parallel_sources():
+    """Test parallel search and pruning of sources."""
+    np.random.seed(0)
+    coefficients = np.zeros((1, 4, 4))
+    coefficients[0] = np.eye(4) * 0.5
+    coefficients[0, 3, 0] = 0.4
+    coefficients[0, 3, 1] = 0.4
+    data = Data()
+    data.generate_var_data(200, 10, coefficients)
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'n_perm_max_stat': 21,
+        'n_perm_min_stat': 21,
+        'n_perm_omnibus': 21,
+        'n_perm_max_seq': 21,
+        'max_lag_sources': 3,
+        'min_lag_sources': 1,
+        'max_lag_target': 1,
+        'surrogate_store': True,
+        'verbose': False}
+    results = {}
+    for (n_jobs, executor) in [(1, 'processes'), (2, 'threads'),
+                               (2, 'processes'), (3, 'processes')]:
+        np.random.seed(1)
+        res = BivariateTE().analyse_single_target(
+            dict(settings, n_jobs_sources=n_jobs, executor_sources=executor),
+            data, target=3)
+        results[(n_jobs, executor)] = res.get_single_target(3, fdr=False)
+
+    # Coupled sources are found independent of the number of workers.
+    for res in results.values():
+        assert res.sources_tested == [0, 1, 2]
+        assert set(s[0] for s in res.selected_vars_sources) == {0, 1}, (
+            'Coupled sources were not found.')
+        assert res.surrogate_store['n_entries'] > 0
+        assert len(res.n_perm_used['max_stat']) == len(
+            results[(1, 'processes')].n_perm_used['max_stat'])
+    # Processes use a random seed per source, results are reproducible and
+    # independent of the number of workers.
+    res_2 = results[(2, 'processes')]
+    res_3 = results[(3, 'processes')]
+    assert res_2.selected_vars_sources == res_3.selected_vars_sources
+    assert np.array_equal(res_2.selected_sources_pval,
+                          res_3.selected_sources_pval)
+    assert res_2.n_perm_used == res_3.n_perm_used
+
+
+def test_parallel_sources_pool():
+    """Test re-use of the worker pool and state sent to source tasks."""
+    pools = []
+    tasks = []
+
+    class _RecordingPool(network_inference._WorkerPool):
+        def __init__(self, *args):
+            super().__init__(*args)
+            pools.append(self)
+
+        def map(self, func, tasks_map):
+            tasks.extend(tasks_map)
+            return super().map(func, tasks_map)
+
+    np.random.seed(0)
+    coefficients = np.zeros((1, 3, 3))
+    coefficients[0] = np.eye(3) * 0.5
+    coefficients[0, 2, 0] = 0.4
+    coefficients[0, 1, 0] = 0.4
+    data = Data()
+    data.generate_var_data(200, 10, coefficients)
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'n_perm_max_stat': 21,
+        'n_perm_min_stat': 21,
+        'n_perm_omnibus': 21,
+        'n_perm_max_seq': 21,
+        'max_lag_sources': 2,
+        'min_lag_sources': 1,
+        'max_lag_target': 1,
+        'surrogate_store': True,
+        'verbose': False}
+    results = {}
+    WorkerPool = network_inference._WorkerPool
+    network_inference._WorkerPool = _RecordingPool
+    try:
+        for n_jobs in [2, 3]:
+            pools.clear()
+            tasks.clear()
+            np.random.seed(1)
+            results[n_jobs] = BivariateTE().analyse_network(
+                dict(settings, n_jobs_sources=n_jobs), data, targets=[1, 2])
+            # One pool serves all stages of all targets.
+            assert len(pools) == 1, 'Expected a single pool per network.'
+            assert len(tasks) >= 4, 'Expected tasks of two targets.'
+            for (seed, args, store) in tasks:
+                assert all(k[0][0] == args[0] for k in store), (
+                    'Task received surrogates of other sources.')
+    finally:
+        network_inference._WorkerPool = WorkerPool
+
+    # Results are independent of the number of workers.
+    for t in [1, 2]:
+        res_2 = results[2].get_single_target(t, fdr=False)
+        res_3 = results[3].get_single_target(t, fdr=False)
+        assert res_2.selected_vars_sources == res_3.selected_vars_sources
+        assert res_2.n_perm_used == res_3.n_perm_used
+
+
 def test_include_target_candidates():
     pass
 
@@ -549,3 +725,6 @@ if __name__ == '__main__':
     test_add_conditional_manually()
     test_check_source_set()
     test_define_candidates()
+    test_parallel_sources()
+    test_parallel_sources_pool()
+    test_local_values_store()
@@ -1,7 +1,11 @@
 """Test data class."""
+import os
+import pickle
+from tempfile import TemporaryDirectory
 import pytest
 import numpy as np
-from idtxl.data import Data
+import h5py
+from idtxl.data import Data, LazyData
 import idtxl.idtxl_utils as utils
 
 
@@ -114,6 +118,197 @@ def test_get_realisations():
     realisations = d.get_realisations(current_value, [current_value])[0]
 
 
+def test_get_realisations_out_and_batch():
+    """Test retrieval into pre-allocated arrays and as 3D arrays."""
+    n_samples = 20
+    n_replications = 4
+    d = Data(np.arange(3 * n_samples * n_replications).reshape(
+        (3, n_samples, n_replications)), 'psr', normalise=False)
+    current_value = (0, 5)
+    idx_list = [(0, 1), (2, 3), (1, 5)]
+    realisations, ind = d.get_realisations(current_value, idx_list)
+    assert realisations.shape == ((n_samples - 5) * n_replications, 3)
+    for i, idx in enumerate(idx_list):
+        for r in range(n_replications):
+            assert (realisations[ind == r, i] ==
+                    d.data[idx[0], idx[1]:idx[1] + n_samples - 5, r]).all()
+
+    # Write into a pre-allocated output array.
+    out = np.empty(realisations.shape, dtype=d.data_type)
+    realisations_out = d.get_realisations(current_value, idx_list, out=out)[0]
+    assert realisations_out is out
+    assert (out == realisations).all()
+    with pytest.raises(AssertionError):
+        d.get_realisations(current_value, idx_list, out=out[:, :2])
+    with pytest.raises(AssertionError):
+        d.get_realisations(current_value, idx_list,
+                           out=out.astype(np.float32))
+
+    # Retrieve 3D arrays, a view is returned for evenly spaced indices of a
+    # single process.
+    for idx in [idx_list, [(1, 1), (1, 3), (1, 5)], [(2, 4), (2, 0)]]:
+        batch, repl = d.get_realisations_batch(current_value, idx)
+        assert batch.shape == (len(idx), n_samples - 5, n_replications)
+        assert (batch.transpose(2, 1, 0).reshape(-1, len(idx)) ==
+                d.get_realisations(current_value, idx)[0]).all()
+    batch = d.get_realisations_batch(current_value, [(1, 1), (1, 3)])[0]
+    assert np.shares_memory(batch, d.data)
+    assert not batch.flags['WRITEABLE']
+    batch, repl = d.get_realisations_batch(current_value, [(1, 1), (1, 3)],
+                                           shuffle=True)
+    assert not np.shares_memory(batch, d.data)
+    assert (batch[0] == d.data[1, 1:n_samples - 4][:, repl]).all()
+
+    with pytest.raises(IndexError):
+        d.get_realisations(current_value, [(3, 1)])
+
+    # Nans are detected in the retrieved realisations only.
+    data = np.random.rand(2, n_samples, n_replications)
+    data[1, 0, 0] = np.nan
+    d = Data(data, 'psr', normalise=False)
+    d.get_realisations(current_value, [(0, 1)])
+    with pytest.raises(AssertionError):
+        d.get_realisations(current_value, [(1, 0)])
+    with pytest.raises(AssertionError):
+        d.get_realisations_batch(current_value, [(1, 0)])
+
+
+def test_realisations_cache():
+    """Test caching of realisations per current value and index."""
+    n_samples = 20
+    n_replications = 4
+    d = Data(np.random.rand(3, n_samples, n_replications), 'psr',
+             normalise=False)
+    current_value = (0, 5)
+    idx_list = [(0, 1), (2, 3), (1, 5)]
+    assert d.realisations_cache_info() is None
+    realisations = d.get_realisations(current_value, idx_list)[0]
+
+    d.enable_realisations_cache()
+    cached = d.get_realisations(current_value, idx_list)[0]
+    assert (cached == realisations).all()
+    info = d.realisations_cache_info()
+    assert info['hits'] == 0
+    assert info['misses'] == 3
+    assert info['n_entries'] == 3
+    assert info['n_bytes'] == realisations.nbytes
+
+    # Single variables are returned as references to the cache.
+    single = d.get_realisations(current_value, [(2, 3)])[0]
+    assert (single[:, 0] == realisations[:, 1]).all()
+    assert not single.flags['WRITEABLE']
+    assert np.shares_memory(
+        single, d.get_realisations(current_value, [(2, 3)])[0])
+    cached = d.get_realisations(current_value, [(1, 5), (0, 1), (0, 2)])[0]
+    assert (cached[:, :2] == realisations[:, [2, 0]]).all()
+    info = d.realisations_cache_info()
+    assert info['hits'] == 4
+    assert info['misses'] == 4
+    out = np.empty(realisations.shape)
+    assert d.get_realisations(current_value, idx_list, out=out)[0] is out
+    assert (out == realisations).all()
+
+    # Shuffled realisations are not cached.
+    d.get_realisations(current_value, idx_list, shuffle=True)
+    assert d.realisations_cache_info()['hits'] == 7
+    # Keys include the current value.
+    d.get_realisations((0, 6), [(0, 1)])
+    assert d.realisations_cache_info()['n_entries'] == 5
+
+    # Evict least recently used entries if the memory limit is exceeded.
+    d.enable_realisations_cache(max_bytes=2 * realisations.nbytes / 3)
+    assert d.realisations_cache_info()['n_entries'] == 2
+    d.get_realisations(current_value, [(1, 1)])
+    info = d.realisations_cache_info()
+    assert info['n_entries'] == 2
+    assert info['n_bytes'] <= info['max_bytes']
+    d.get_realisations(current_value, [(1, 1)])
+    assert d.realisations_cache_info()['hits'] == info['hits'] + 1
+
+    # Setting data clears the cache.
+    d.set_data(np.random.rand(3, n_samples, n_replications), 'psr')
+    info = d.realisations_cache_info()
+    assert info['n_entries'] == 0
+    assert info['n_bytes'] == 0
+    assert not (d.get_realisations(current_value, [(0, 1)])[0] ==
+                realisations[:, [0]]).all()
+    d.disable_realisations_cache()
+    assert d.realisations_cache_info() is None
+
+
+def test_realisations_store():
+    """Test store of realisations shared between current values."""
+    n_samples = 20
+    n_replications = 4
+    d = Data(np.random.rand(3, n_samples, n_replications), 'psr',
+             normalise=False)
+    idx_list = [(0, 1), (2, 3), (1, 5)]
+    assert d.realisations_store_info() is None
+    realisations = d.get_realisations((0, 5), idx_list)[0]
+
+    d.enable_realisations_store((0, 5))
+    info = d.realisations_store_info()
+    assert info['sample'] == 5
+    assert info['n_entries'] == 0
+    assert info['max_bytes'] == d.realisations_store_nbytes((0, 5))
+    stored = d.get_realisations((0, 5), idx_list)[0]
+    assert (stored == realisations).all()
+    # Current values with the same sample share the store, e.g., targets of
+    # a network analysis.
+    stored = d.get_realisations((1, 5), [(1, 5), (0, 1), (0, 2)])[0]
+    assert (stored[:, :2] == realisations[:, [2, 0]]).all()
+    assert (stored[:, 2] == d.data[0, 2:2 + n_samples - 5, :].T.ravel()).all()
+    info = d.realisations_store_info()
+    assert info['hits'] == 2
+    assert info['misses'] == 4
+    assert info['n_entries'] == 4
+    assert info['n_bytes'] == 4 * realisations.shape[0] * 8
+
+    # Single variables are returned as views into the store.
+    single = d.get_realisations((2, 5), [(2, 3)])[0]
+    assert (single[:, 0] == realisations[:, 1]).all()
+    assert not single.flags['WRITEABLE']
+    assert np.shares_memory(single, d.get_realisations((0, 5), [(2, 3)])[0])
+    out = np.empty(realisations.shape)
+    assert d.get_realisations((0, 5), idx_list, out=out)[0] is out
+    assert (out == realisations).all()
+
+    # Shuffled realisations and other current values are not stored.
+    info = d.realisations_store_info()
+    d.get_realisations((0, 5), idx_list, shuffle=True)
+    d.get_realisations((0, 6), [(0, 1)])
+    assert d.realisations_store_info() == info
+    with pytest.raises(IndexError):
+        d.get_realisations((0, 5), [(3, 1)])
+
+    # The store can be placed in shared memory and attached by other data
+    # objects, e.g., in worker processes (requires Python 3.8+).
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(
+        create=True, size=d.realisations_store_nbytes((0, 5)))
+    try:
+        d.enable_realisations_store((0, 5), shm.buf)
+        d.get_realisations((0, 5), [(0, 1)])
+        d_worker = Data(d.data, 'psr', normalise=False)
+        d_worker.enable_realisations_store((0, 5), shm.buf)
+        stored = d_worker.get_realisations((0, 5), idx_list)[0]
+        assert (stored == realisations).all()
+        assert d_worker.realisations_store_info()['hits'] == 1
+        assert d_worker.realisations_store_info()['n_entries'] == 3
+        assert d.realisations_store_info()['n_entries'] == 3
+        del stored
+        d.disable_realisations_store()
+        d_worker.disable_realisations_store()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # Setting data removes the store.
+    d.enable_realisations_store((0, 5))
+    d.set_data(np.random.rand(3, n_samples, n_replications), 'psr')
+    assert d.realisations_store_info() is None
+
+
 def test_permute_replications():
     """Test surrogate creation by permuting replications."""
     n = 20
@@ -396,14 +591,169 @@ def test_data_type():
         'Permuted samples type is not an int.')
 
 
+
+def test_lazy_data():
+    """Test lazily loaded data from memmaps and hdf5 files."""
+    n_samples = 100
+    raw = np.random.randn(n_samples, 3, 4) * 3 + 1
+    raw[:, 2, :] = 2.  # constant process, is not scaled during normalisation
+    current_value = (0, 10)
+    idx_list = [(0, 2), (2, 9), (0, 5), (1, 0)]
+    with TemporaryDirectory() as tmp_dir:
+        file_mmap = os.path.join(tmp_dir, 'data.dat')
+        d = np.memmap(file_mmap, dtype=np.float64, mode='w+', shape=raw.shape)
+        d[:] = raw
+        d.flush()
+        d = np.memmap(file_mmap, dtype=np.float64, mode='r', shape=raw.shape)
+        file_hdf5 = os.path.join(tmp_dir, 'data.h5')
+        with h5py.File(file_hdf5, 'w') as f:
+            f['data'] = raw
+        f = h5py.File(file_hdf5, 'r')
+
+        for source in [d, f['data']]:
+            for normalise in [True, False]:
+                data = Data(raw, 'spr', normalise=normalise)
+                # Use small blocks to test the streaming normalisation.
+                data_lazy = LazyData(source, 'spr', normalise=normalise,
+                                     block_bytes=200)
+                assert data_lazy.n_processes == 3
+                assert data_lazy.n_samples == n_samples
+                assert data_lazy.n_replications == 4
+                assert data_lazy.data_type == data.data_type
+                assert np.allclose(data_lazy.data[:, :, :], data.data)
+                assert np.allclose(data_lazy.data[1, 5:, 2],
+                                   data.data[1, 5:, 2])
+
+                # Realisations, data slices, and surrogates.
+                real = data.get_realisations(current_value, idx_list)[0]
+                real_lazy = data_lazy.get_realisations(
+                    current_value, idx_list)[0]
+                assert np.allclose(real, real_lazy)
+                real_lazy = data_lazy.get_realisations_batch(
+                    current_value, idx_list[:1])[0]
+                assert np.allclose(
+                    data.get_realisations_batch(
+                        current_value, idx_list[:1])[0], real_lazy)
+                np.random.seed(0)
+                real = data.get_realisations(
+                    current_value, idx_list, shuffle=True)[0]
+                np.random.seed(0)
+                real_lazy = data_lazy.get_realisations(
+                    current_value, idx_list, shuffle=True)[0]
+                assert np.allclose(real, real_lazy)
+                assert np.allclose(data._get_data_slice(1, 3)[0],
+                                   data_lazy._get_data_slice(1, 3)[0])
+                with pytest.raises(IndexError):
+                    data_lazy._get_data_slice(3)
+                with pytest.raises(IndexError):
+                    data_lazy.get_realisations(current_value, [(3, 0)])
+
+                # Data sources are pickled by reference.
+                data_pickled = pickle.loads(pickle.dumps(data_lazy))
+                assert np.allclose(data_pickled.data[:, :, :], data.data)
+        f.close()
+        del d, data_lazy, data_pickled
+
+    # Missing dimensions and in-memory arrays as data source.
+    raw = np.random.rand(50, 2)
+    data = Data(raw, 'sp')
+    data_lazy = LazyData(raw, 'sp')
+    assert np.allclose(data_lazy.data[:, :, :], data.data)
+    assert data_lazy.data[:, :, 1:].shape == (2, 50, 0)
+    assert data_lazy.data[0, 0, 0] == data.data[0, 0, 0]
+    with pytest.raises(TypeError):
+        data_lazy.data[[0, 1], :, :]
+    with pytest.raises(RuntimeError):
+        LazyData(raw, 'psr')
+
+
+
+def test_permute_batch():
+    """Test generation of multiple surrogates at once."""
+    n_perm = 7
+    data = Data(np.random.randn(3, 50, 8), 'psr')
+    current_value = (0, 10)
+    idx_list = [(0, 8), (1, 3), (2, 9)]
+    n_realisations = data.n_realisations(current_value)
+
+    # Permuting replications is equivalent to repeated single permutations.
+    np.random.seed(0)
+    surr, perm = data.permute_replications_batch(current_value, idx_list,
+                                                 n_perm)
+    assert surr.shape == (n_realisations * n_perm, len(idx_list))
+    assert perm.shape == (n_perm, data.n_replications)
+    np.random.seed(0)
+    for p in range(n_perm):
+        surr_single, repl_idx = data.permute_replications(current_value,
+                                                          idx_list)
+        assert np.array_equal(
+            surr[p * n_realisations:(p + 1) * n_realisations], surr_single)
+        assert np.array_equal(repl_idx[::data.n_realisations_samples(
+            current_value)], perm[p])
+    with pytest.raises(TypeError):
+        data.permute_replications_batch(current_value, (0, 8), n_perm)
+
+    # Permuting samples is equivalent to repeated single permutations for all
+    # permutation types.
+    perm_settings = [
+        {'perm_type': 'random'},
+        {'perm_type': 'circular', 'max_shift': 10},
+        {'perm_type': 'block', 'block_size': 3, 'perm_range': 4},
+        {'perm_type': 'local', 'perm_range': 5}]
+    n_samples = data.n_realisations_samples(current_value)
+    for settings in perm_settings:
+        np.random.seed(0)
+        surr, perm = data.permute_samples_batch(current_value, idx_list,
+                                                settings, n_perm)
+        assert surr.shape == (n_realisations * n_perm, len(idx_list))
+        assert perm.shape == (n_perm, n_samples)
+        np.random.seed(0)
+        for p in range(n_perm):
+            surr_single, perm_idx = data.permute_samples(
+                current_value, idx_list, settings)
+            assert np.array_equal(
+                surr[p * n_realisations:(p + 1) * n_realisations],
+                surr_single), (
+                    'Surrogates differ for {0}.'.format(settings['perm_type']))
+            assert np.array_equal(perm_idx[:n_samples], perm[p])
+
+
+def test_fingerprint():
+    """Test fingerprints identifying data sets."""
+    d = np.random.rand(3, 100, 2)
+    data = Data(d, 'psr', normalise=False)
+    fingerprint = data.get_fingerprint()
+    assert fingerprint[:3] == (3, 100, 2)
+    assert Data(d.copy(), 'psr', normalise=False).get_fingerprint() == (
+        fingerprint)
+    assert LazyData(d, 'psr', normalise=False).get_fingerprint() == (
+        fingerprint)
+    d_changed = d.copy()
+    d_changed[2, 99, 1] += 1e-6
+    assert Data(d_changed, 'psr', normalise=False).get_fingerprint() != (
+        fingerprint)
+    assert Data(d[:, :, :1], 'psr', normalise=False).get_fingerprint() != (
+        fingerprint)
+
+    # The fingerprint is updated if data are overwritten.
+    data.set_data(d_changed, 'psr')
+    assert data.get_fingerprint() != fingerprint
+
+
 if __name__ == '__main__':
     test_permute_samples()
+    test_permute_batch()
     test_data_type()
     test_swap_blocks()
     test_circular_shift()
     test_swap_local()
     test_get_data_slice()
     test_get_realisations()
+    test_get_realisations_out_and_batch()
+    test_realisations_cache()
+    test_realisations_store()
+    test_fingerprint()
+    test_lazy_data()
     test_data_normalisation()
     test_set_data()
     test_permute_replications()
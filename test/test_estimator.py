@@ -7,11 +7,25 @@ This functionality is handled by the estimator class and tested here.
 import inspect
 import pytest
 import numpy as np
-from idtxl.estimator import find_estimator
+from idtxl import estimator
+from idtxl.estimator import (find_estimator, shutdown_worker_pools,
+                             CachedEstimator, CACHE_ENTRY_OVERHEAD)
 from idtxl.multivariate_te import MultivariateTE
 from idtxl.estimators_jidt import JidtKraskovMI
+from idtxl.estimators_python import PythonKraskovCMI
 from test_estimators_jidt import jpype_missing, _get_gauss_data
 
+
+class SerialKraskovCMI(PythonKraskovCMI):
+    """Kraskov CMI estimator that does not support parallel estimation."""
+
+    def is_parallel(self):
+        return False
+
+    def estimate(self, var1, var2, conditional=None):
+        return super().estimate(var1, var2, conditional)[0]
+
+
 def test_find_estimator():
     """Test dynamic loading of classes."""
 
@@ -83,6 +97,134 @@ def test_estimate_parallel():
                 var2=target[:100])
 
 
+def test_parallel_backends():
+    """Test estimation of chunks using different worker pools."""
+    expected_mi, source1, source2, target = _get_gauss_data(n=1000)
+    n_chunks = 6
+    source_chunks = np.vstack([np.roll(source1, i) for i in range(n_chunks)])
+    settings = {'noise_level': 0, 'n_workers': 2}
+
+    results = {}
+    for backend in ['serial', 'threads', 'processes']:
+        settings['parallel_backend'] = backend
+        est = SerialKraskovCMI(settings)
+        results[backend] = est.estimate_parallel(
+            n_chunks=n_chunks,
+            re_use=['var2', 'conditional'],
+            var1=source_chunks,
+            var2=target,
+            conditional=source2)
+        assert len(results[backend]) == n_chunks
+    shutdown_worker_pools()
+
+    # Results have to be returned in chunk order by all backends.
+    assert np.allclose(results['serial'], results['threads'])
+    assert np.allclose(results['serial'], results['processes'])
+    assert np.isclose(results['serial'][0], expected_mi, atol=0.1)
+
+    est = SerialKraskovCMI({'parallel_backend': 'gpu'})
+    with pytest.raises(RuntimeError):
+        est.estimate_parallel(
+            n_chunks=n_chunks,
+            re_use=['var2', 'conditional'],
+            var1=source_chunks,
+            var2=target,
+            conditional=source2)
+
+
+def test_worker_pool_lifetime():
+    """Test that at most one worker pool is kept alive."""
+    expected_mi, source1, source2, target = _get_gauss_data(n=200)
+    source_chunks = np.vstack([np.roll(source1, i) for i in range(4)])
+    pools = []
+    for n_workers in [2, 2, 3]:
+        est = SerialKraskovCMI({'noise_level': 0, 'n_workers': n_workers,
+                                'parallel_backend': 'threads'})
+        est.estimate_parallel(n_chunks=4, re_use=['var2'],
+                              var1=source_chunks, var2=target)
+        assert len(estimator._worker_pools) == 1, (
+            'More than one worker pool is alive.')
+        pools.append(estimator._worker_pools[('threads', n_workers)])
+    assert pools[0] is pools[1], 'Worker pool was not re-used.'
+    assert pools[0]._shutdown, 'Replaced worker pool was not shut down.'
+    assert not pools[2]._shutdown
+    shutdown_worker_pools()
+    assert not estimator._worker_pools
+    assert pools[2]._shutdown
+
+
+def test_cached_estimator():
+    """Test caching of estimates."""
+    expected_mi, source1, source2, target = _get_gauss_data(n=1000)
+    n_chunks = 3
+    source_chunks = np.vstack([np.roll(source1, i) for i in range(n_chunks)])
+    for est_class in [PythonKraskovCMI, SerialKraskovCMI]:
+        est = est_class({'noise_level': 0})
+        cached = CachedEstimator(est_class({'noise_level': 0}))
+        assert cached.settings['noise_level'] == 0
+        assert cached.is_parallel() == est.is_parallel()
+
+        # Repeated estimation should be returned from the cache.
+        cmi = est.estimate(source1, target, source2)
+        cmi_cached = cached.estimate(source1, target, source2)
+        assert cached.hits == 0 and cached.misses == 1
+        assert cached.estimate(var1=source1, var2=target,
+                               conditional=source2) == cmi_cached
+        assert cached.hits == 1
+        assert np.isclose(cmi_cached, cmi)
+        assert type(cmi_cached) == type(cmi)
+
+        # Only chunks not in the cache should be estimated, results are
+        # returned in chunk order.
+        cmi_parallel = est.estimate_parallel(
+            n_chunks=n_chunks, re_use=['var2', 'conditional'],
+            var1=source_chunks, var2=target, conditional=source2)
+        cmi_parallel_cached = cached.estimate_parallel(
+            n_chunks=n_chunks, re_use=['var2', 'conditional'],
+            var1=source_chunks, var2=target, conditional=source2)
+        assert np.allclose(cmi_parallel, cmi_parallel_cached)
+        assert cached.hits == 2 and cached.misses == 3
+        cmi_parallel_cached = cached.estimate_parallel(
+            n_chunks=n_chunks, re_use=['var2', 'conditional'],
+            var1=source_chunks, var2=target, conditional=source2)
+        assert np.allclose(cmi_parallel, cmi_parallel_cached)
+        assert cached.hits == 5 and cached.misses == 3
+        assert cached.cache_info()['n_entries'] == n_chunks
+
+        # Surrogates are neither looked up nor stored.
+        cmi_surr_cached = cached.estimate_surrogates(
+            var1=source_chunks[::-1], var2=target, conditional=source2,
+            n_chunks=n_chunks)
+        assert np.allclose(cmi_surr_cached, est.estimate_surrogates(
+            var1=source_chunks[::-1], var2=target, conditional=source2,
+            n_chunks=n_chunks))
+        assert cached.hits == 5 and cached.misses == 3
+        assert cached.cache_info()['n_entries'] == n_chunks
+
+    # Test LRU eviction.
+    cached = CachedEstimator(PythonKraskovCMI({'noise_level': 0}),
+                             max_bytes=2 * CACHE_ENTRY_OVERHEAD)
+    cached.estimate_parallel(
+        n_chunks=n_chunks, re_use=['var2', 'conditional'],
+        var1=source_chunks, var2=target, conditional=source2)
+    assert cached.cache_info()['n_entries'] == 2
+    cached.estimate(source_chunks[-1000:], target, source2)
+    assert cached.hits == 1
+    cached.estimate(source_chunks[:1000], target, source2)
+    assert cached.hits == 1
+    cached.clear_cache()
+    assert cached.cache_info()['n_entries'] == 0
+
+    # Local values are not cached.
+    cached = CachedEstimator(PythonKraskovCMI({'local_values': True}))
+    local_cmi = cached.estimate(source1, target, source2)
+    assert local_cmi.shape == (source1.shape[0],)
+    assert cached.misses == 0
+
+
 if __name__ == '__main__':
     test_find_estimator()
     test_estimate_parallel()
+    test_parallel_backends()
+    test_worker_pool_lifetime()
+    test_cached_estimator()
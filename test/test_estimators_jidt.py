@@ -791,7 +791,56 @@ def test_jidt_kraskov_alg1And2():
         assert caughtAssertionError, 'Assertion error not raised for KSG algorithm 3 request'
 
 
+def test_analytic_surrogates():
+    """Test analytic surrogates against JIDT's analytic distributions."""
+    n = 1000
+    source = np.random.randint(0, 2, size=(n, 2))
+    target = np.random.randint(0, 3, size=n)
+    cond = np.random.randint(0, 2, size=(n, 1))
+    source_gauss = np.random.randn(n)
+    target_gauss = np.random.randn(n)
+    settings_te = {'history_target': 2, 'history_source': 2, 'tau_source': 2,
+                   'source_target_delay': 2}
+    estimators = [
+        (JidtDiscreteCMI({'alph1': 2, 'alph2': 3, 'alphc': 2}),
+         {'var1': source, 'var2': target, 'conditional': cond}),
+        (JidtDiscreteCMI({'alph1': 2, 'alph2': 3}),
+         {'var1': source, 'var2': target}),
+        (JidtDiscreteMI({'alph1': 2, 'alph2': 3, 'lag_mi': 2}),
+         {'var1': source, 'var2': target}),
+        (JidtDiscreteTE(dict(settings_te, n_discrete_bins=2)),
+         {'source': source[:, 0], 'target': cond[:, 0]}),
+        (JidtDiscreteAIS({'history': 3, 'alph': 3}), {'process': target}),
+        (JidtGaussianTE(settings_te.copy()),
+         {'source': source_gauss, 'target': target_gauss}),
+        (JidtGaussianAIS({'history': 3, 'tau': 2}),
+         {'process': source_gauss})]
+    n_perm = 50
+    for est, data in estimators:
+        assert est.is_analytic_null_estimator()
+        # Surrogates must be identical to JIDT's estimates at the same random
+        # p-values.
+        distribution = est.get_analytic_distribution(**data)
+        np.random.seed(0)
+        p_values = np.random.random(n_perm)
+        surr_jidt = np.array(
+            [distribution.computeEstimateForGivenPValue(p) for p in p_values])
+        np.random.seed(0)
+        surr = est.estimate_surrogates_analytic(n_perm=n_perm, **data)
+        assert surr.shape == (n_perm,), 'Wrong no. surrogates.'
+        assert np.allclose(surr, surr_jidt, rtol=1e-9), (
+            'Analytic surrogates differ from JIDT for {0}.'.format(
+                type(est).__name__))
+        # Surrogates for a whole candidate set are returned in a single call.
+        np.random.seed(0)
+        surr_set = est.estimate_surrogates_analytic(
+            n_perm=n_perm, n_sets=3, **data)
+        assert surr_set.shape == (3, n_perm), 'Wrong no. surrogates.'
+        assert np.allclose(surr_set[0, :], surr_jidt, rtol=1e-9)
+
+
 if __name__ == '__main__':
+    test_analytic_surrogates()
     test_insufficient_no_points()
     test_lagged_mi()
     # test_discretisation()
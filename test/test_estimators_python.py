@@ -0,0 +1,472 @@
+"""Test native Python estimators.
+
+This module provides unit tests for estimators implemented in NumPy/SciPy.
+Estimators are tested against analytic results for Gaussian data.
+"""
+import pytest
+import numpy as np
+from idtxl.estimators_python import (PythonKraskovMI, PythonKraskovCMI,
+                                     PythonGaussianMI, PythonGaussianCMI,
+                                     PythonDiscreteMI, PythonDiscreteCMI)
+from idtxl.estimator import find_estimator
+from idtxl.estimators_jidt import JidtDiscreteCMI, JidtDiscreteMI
+from test_estimators_jidt import _get_gauss_data, _assert_result
+
+
+def test_find_estimator():
+    """Test if estimators are found by name."""
+    assert find_estimator('PythonKraskovCMI') is PythonKraskovCMI
+    assert find_estimator('PythonKraskovMI') is PythonKraskovMI
+    assert find_estimator('PythonGaussianCMI') is PythonGaussianCMI
+    assert find_estimator('PythonGaussianMI') is PythonGaussianMI
+    assert find_estimator('PythonDiscreteCMI') is PythonDiscreteCMI
+    assert find_estimator('PythonDiscreteMI') is PythonDiscreteMI
+
+
+def test_user_input():
+    """Test handling of settings."""
+    est = PythonKraskovCMI()
+    assert est.settings['kraskov_k'] == 4
+    assert est.settings['theiler_t'] == 0
+    assert not est.settings['local_values']
+    assert est.is_parallel()
+    assert not est.is_analytic_null_estimator()
+    est = PythonKraskovMI({'kraskov_k': '3'})
+    assert est.settings['kraskov_k'] == 3
+    assert est.settings['lag_mi'] == 0
+    with pytest.raises(AssertionError):
+        PythonKraskovCMI({'algorithm_num': 3})
+    with pytest.raises(TypeError):
+        PythonKraskovCMI(settings=1)
+
+
+def test_mi_gauss_data():
+    """Test MI estimation on correlated and uncorrelated Gaussian data."""
+    expected_mi, source1, source2, target = _get_gauss_data(n=5000)
+    for alg in [1, 2]:
+        est = PythonKraskovMI({'algorithm_num': alg})
+        mi_cor = est.estimate(source1, target)
+        mi_uncor = est.estimate(source2, target)
+        assert mi_cor.shape == (1,)
+        _assert_result(mi_cor[0], expected_mi, 'PythonKraskovMI',
+                       'MI (alg. {0})'.format(alg))
+        _assert_result(mi_uncor[0], 0, 'PythonKraskovMI',
+                       'MI uncorr. (alg. {0})'.format(alg))
+
+
+def test_cmi_gauss_data():
+    """Test CMI estimation on correlated and uncorrelated Gaussian data."""
+    expected_mi, source1, source2, target = _get_gauss_data(n=5000)
+    for alg in [1, 2]:
+        est = PythonKraskovCMI({'algorithm_num': alg})
+        # Conditioning on an independent variable should not change the MI.
+        cmi_cor = est.estimate(source1, target, source2)
+        cmi_uncor = est.estimate(source2, target, source1)
+        mi_no_cond = est.estimate(source1, target)
+        _assert_result(cmi_cor[0], expected_mi, 'PythonKraskovCMI',
+                       'CMI (alg. {0})'.format(alg))
+        _assert_result(cmi_uncor[0], 0, 'PythonKraskovCMI',
+                       'CMI uncorr. (alg. {0})'.format(alg))
+        _assert_result(mi_no_cond[0], expected_mi, 'PythonKraskovCMI',
+                       'CMI no cond. (alg. {0})'.format(alg))
+
+
+def test_chunks_and_local_values():
+    """Test estimation for multiple chunks and local values."""
+    expected_mi, source1, source2, target = _get_gauss_data(n=2000)
+    n_chunks = 3
+    source_chunks = np.tile(source1, (n_chunks, 1))
+    target_chunks = np.tile(target, (n_chunks, 1))
+    cond_chunks = np.tile(source2, (n_chunks, 1))
+
+    settings = {'noise_level': 0}
+    est = PythonKraskovCMI(settings)
+    cmi = est.estimate(source1, target, source2)
+    cmi_chunks = est.estimate(source_chunks, target_chunks, cond_chunks,
+                              n_chunks=n_chunks)
+    assert cmi_chunks.shape == (n_chunks,)
+    assert np.allclose(cmi_chunks, cmi[0])
+
+    settings['local_values'] = True
+    est = PythonKraskovCMI(settings)
+    cmi_local = est.estimate(source_chunks, target_chunks, cond_chunks,
+                             n_chunks=n_chunks)
+    assert cmi_local.shape == (n_chunks * source1.shape[0],)
+    assert np.isclose(np.mean(cmi_local[:source1.shape[0]]), cmi[0])
+
+    est = PythonKraskovMI(settings)
+    mi_local = est.estimate(source_chunks, target_chunks, n_chunks=n_chunks)
+    assert mi_local.shape == (n_chunks * source1.shape[0],)
+
+    # Chunk sizes must match the data.
+    with pytest.raises(AssertionError):
+        est.estimate(source_chunks, target_chunks, n_chunks=7)
+
+
+def test_estimate_surrogates():
+    """Test batched estimation with re-used var2 and conditional."""
+    expected_mi, source1, source2, target = _get_gauss_data(n=1000)
+    n_chunks = 4
+    source_chunks = np.vstack([np.roll(source1, 10 * i)
+                               for i in range(n_chunks)])
+    settings = {'noise_level': 0}
+    for alg in [1, 2]:
+        settings['algorithm_num'] = alg
+        est = PythonKraskovCMI(settings)
+        cmi_parallel = est.estimate_parallel(
+            n_chunks=n_chunks,
+            re_use=['var2', 'conditional'],
+            var1=source_chunks,
+            var2=target,
+            conditional=source2)
+        cmi_surr = est.estimate_surrogates(
+            var1=source_chunks,
+            var2=target,
+            conditional=source2,
+            n_chunks=n_chunks)
+        assert np.allclose(cmi_parallel, cmi_surr)
+
+        # Estimate MI if no conditional is provided.
+        mi_parallel = est.estimate_parallel(
+            n_chunks=n_chunks,
+            re_use=['var2'],
+            var1=source_chunks,
+            var2=target)
+        mi_surr = est.estimate_surrogates(
+            var1=source_chunks,
+            var2=target,
+            n_chunks=n_chunks)
+        assert np.allclose(mi_parallel, mi_surr)
+
+    with pytest.raises(AssertionError):
+        est.estimate_surrogates(var1=source_chunks, var2=target,
+                                conditional=source2, n_chunks=3)
+
+
+def test_theiler_and_lag():
+    """Test Theiler correction and lagged MI."""
+    expected_mi, source1, source2, target = _get_gauss_data(n=5000)
+    est = PythonKraskovCMI({'theiler_t': 5})
+    cmi = est.estimate(source1, target, source2)
+    _assert_result(cmi[0], expected_mi, 'PythonKraskovCMI',
+                   'CMI (theiler_t=5)')
+
+    lag = 2
+    source_lagged = np.vstack((source1, np.zeros((lag, 1))))
+    target_lagged = np.vstack((np.zeros((lag, 1)), target))
+    est = PythonKraskovMI({'lag_mi': lag, 'noise_level': 0})
+    mi_lag = est.estimate(source_lagged, target_lagged)
+    mi = PythonKraskovMI({'noise_level': 0}).estimate(source1, target)
+    assert np.isclose(mi_lag[0], mi[0])
+
+
+def test_count_neighbours_rect():
+    """Test neighbour counts in a hyper-rectangle against a brute force."""
+    np.random.seed(0)
+    var_a = np.random.normal(size=(300, 2))
+    var_b = np.random.normal(size=(300, 1))
+    radius_a = np.random.uniform(0.1, 0.5, size=300)
+    radius_b = np.random.uniform(0.1, 0.5, size=300)
+    for theiler_t in [0, 3]:
+        est = PythonKraskovCMI({'theiler_t': theiler_t})
+        counts = est._count_neighbours_rect(var_a, var_b, radius_a, radius_b)
+        dist_a = np.abs(var_a[:, None, :] - var_a[None, :, :]).max(axis=2)
+        dist_b = np.abs(var_b[:, None, :] - var_b[None, :, :]).max(axis=2)
+        inside = ((dist_a <= radius_a[:, None]) &
+                  (dist_b <= radius_b[:, None]))
+        lag = np.abs(np.subtract.outer(np.arange(300), np.arange(300)))
+        inside[lag <= theiler_t] = False
+        assert np.array_equal(counts, inside.sum(axis=1)), (
+            'Neighbour counts differ from brute force (theiler_t={0}).'.format(
+                theiler_t))
+
+
+def test_insufficient_no_points():
+    """Test if estimation aborts for too few data points."""
+    expected_mi, source1, source2, target = _get_gauss_data(n=4)
+    settings = {'kraskov_k': 4, 'theiler_t': 0}
+    with pytest.raises(RuntimeError):
+        PythonKraskovMI(settings).estimate(source1, target)
+    with pytest.raises(RuntimeError):
+        PythonKraskovCMI(settings).estimate(source1, target, target)
+
+    settings = {'kraskov_k': 2, 'theiler_t': 1}
+    with pytest.raises(RuntimeError):
+        PythonKraskovMI(settings).estimate(source1, target)
+    with pytest.raises(RuntimeError):
+        PythonKraskovCMI(settings).estimate(source1, target, target)
+
+
+def test_gaussian_gauss_data():
+    """Test Gaussian estimators against analytic results."""
+    expected_mi, source1, source2, target = _get_gauss_data(n=5000)
+    est = PythonGaussianCMI()
+    assert est.is_parallel()
+    assert est.is_analytic_null_estimator()
+    cmi_cor = est.estimate(source1, target, source2)
+    cmi_uncor = est.estimate(source2, target, source1)
+    mi_cor = PythonGaussianMI().estimate(source1, target)
+    _assert_result(cmi_cor[0], expected_mi, 'PythonGaussianCMI', 'CMI')
+    _assert_result(cmi_uncor[0], 0, 'PythonGaussianCMI', 'CMI uncorr.')
+    _assert_result(mi_cor[0], expected_mi, 'PythonGaussianMI', 'MI')
+
+    # Compare to log-determinants of the sample covariance.
+    cov = np.cov(np.hstack((source1, target, source2)).T)
+
+    def logdet(idx):
+        return np.linalg.slogdet(cov[np.ix_(idx, idx)])[1]
+
+    cmi_cov = 0.5 * (logdet([0, 2]) + logdet([1, 2]) - logdet([2]) -
+                     logdet([0, 1, 2]))
+    assert np.isclose(cmi_cor[0], cmi_cov)
+
+    # Linearly dependent variables have a singular covariance matrix.
+    with pytest.raises(RuntimeError):
+        est.estimate(source1, target, 2 * source1)
+    with pytest.raises(RuntimeError):
+        est.estimate(source1[:2], target[:2], source2[:2])
+
+
+def test_gaussian_chunks_and_surrogates():
+    """Test Gaussian estimators for chunks, local values, and surrogates."""
+    expected_mi, source1, source2, target = _get_gauss_data(n=1000)
+    n_chunks = 5
+    source_chunks = np.vstack([np.random.permutation(source1)
+                               for i in range(n_chunks)])
+    target_chunks = np.tile(target, (n_chunks, 1))
+    cond_chunks = np.tile(source2, (n_chunks, 1))
+
+    est = PythonGaussianCMI()
+    cmi_chunks = est.estimate(source_chunks, target_chunks, cond_chunks,
+                              n_chunks=n_chunks)
+    assert cmi_chunks.shape == (n_chunks,)
+    for c in range(n_chunks):
+        chunk = slice(c * 1000, (c + 1) * 1000)
+        assert np.isclose(cmi_chunks[c], est.estimate(
+            source_chunks[chunk], target, source2)[0])
+    cmi_surr = est.estimate_surrogates(source_chunks, target, source2,
+                                       n_chunks=n_chunks)
+    assert np.allclose(cmi_chunks, cmi_surr)
+    mi_chunks = est.estimate(source_chunks, target_chunks, n_chunks=n_chunks)
+    mi_surr = est.estimate_surrogates(source_chunks, target,
+                                      n_chunks=n_chunks)
+    assert np.allclose(mi_chunks, mi_surr)
+
+    # Local values average to the CMI for each chunk.
+    est = PythonGaussianCMI({'local_values': True})
+    cmi_local = est.estimate(source_chunks, target_chunks, cond_chunks,
+                             n_chunks=n_chunks)
+    assert cmi_local.shape == (n_chunks * 1000,)
+    assert np.allclose(cmi_local.reshape(n_chunks, 1000).mean(axis=1),
+                       cmi_chunks)
+    assert np.allclose(est.estimate_surrogates(
+        source_chunks, target, source2, n_chunks=n_chunks), cmi_local)
+
+    # Lagged MI.
+    lag = 2
+    source_lagged = np.vstack((source1, np.zeros((lag, 1))))
+    target_lagged = np.vstack((np.zeros((lag, 1)), target))
+    mi_lag = PythonGaussianMI({'lag_mi': lag}).estimate(source_lagged,
+                                                        target_lagged)
+    mi = PythonGaussianMI().estimate(source1, target)
+    assert np.isclose(mi_lag[0], mi[0])
+
+
+def test_gaussian_analytic_null():
+    """Test analytic surrogates for Gaussian estimators."""
+    expected_mi, source1, source2, target = _get_gauss_data(n=1000)
+    n_perm = 5000
+    est = PythonGaussianCMI()
+    surr = est.estimate_surrogates_analytic(
+        n_perm=n_perm, var1=source1, var2=target, conditional=source2)
+    assert surr.shape == (n_perm,)
+    assert (surr >= 0).all()
+    # 2 * N * CMI is chi-square distributed with df=dim1*dim2, mean df.
+    assert np.isclose(np.mean(surr) * 2 * 1000, 1, atol=0.1)
+    surr = PythonGaussianMI().estimate_surrogates_analytic(
+        n_perm=n_perm, var1=np.hstack((source1, source2)), var2=target)
+    assert np.isclose(np.mean(surr) * 2 * 1000, 2, atol=0.2)
+    # Surrogates for multiple sets of variables are drawn in a single call.
+    np.random.seed(0)
+    surr_sets = PythonGaussianMI().estimate_surrogates_analytic(
+        n_perm=n_perm, n_sets=3, var1=np.hstack((source1, source2)),
+        var2=target)
+    assert surr_sets.shape == (3, n_perm)
+    np.random.seed(0)
+    assert np.allclose(surr_sets[0], PythonGaussianMI(
+        ).estimate_surrogates_analytic(n_perm=n_perm,
+                                       var1=np.hstack((source1, source2)),
+                                       var2=target))
+
+
+def _get_discrete_data(n=1000, flip_prob=0.2):
+    """Return binary source, noisy copy as target, and independent var."""
+    source = np.random.randint(0, 2, size=(n, 2))
+    flip = (np.random.rand(n) < flip_prob).astype(int)
+    target = np.bitwise_xor(source[:, 0], flip)
+    independent = np.random.randint(0, 2, size=(n, 1))
+    # MI in bits is 1 - H(flip_prob).
+    expected_mi = 1 + (flip_prob * np.log2(flip_prob) +
+                       (1 - flip_prob) * np.log2(1 - flip_prob))
+    return expected_mi, source, target, independent
+
+
+def test_discrete_input():
+    """Test handling of settings and discrete input data."""
+    est = PythonDiscreteCMI()
+    assert est.settings['alph1'] == 2
+    assert est.settings['alphc'] == 2
+    assert est.settings['discretise_method'] == 'none'
+    assert est.is_parallel()
+    assert est.is_analytic_null_estimator()
+    est = PythonDiscreteMI({'n_discrete_bins': 4, 'alph1': 3})
+    assert est.settings['alph1'] == 4
+    assert est.settings['alph2'] == 4
+    assert est.settings['lag_mi'] == 0
+    with pytest.raises(AssertionError):
+        PythonDiscreteCMI({'discretise_method': 'foo'})
+
+    expected_mi, source, target, independent = _get_discrete_data()
+    with pytest.raises(AssertionError):
+        est.estimate(source.astype(float), target)
+    with pytest.raises(AssertionError):
+        est.estimate(source * 4, target)
+    with pytest.raises(AssertionError):
+        est.estimate(source - 1, target)
+
+
+def test_discrete_data():
+    """Test discrete estimators against analytic results."""
+    expected_mi, source, target, independent = _get_discrete_data(n=10000)
+    est = PythonDiscreteCMI()
+    cmi_cor = est.estimate(source, target, independent)
+    cmi_uncor = est.estimate(independent, target, source)
+    mi_cor = PythonDiscreteMI().estimate(source, target)
+    _assert_result(cmi_cor[0], expected_mi, 'PythonDiscreteCMI', 'CMI')
+    _assert_result(cmi_uncor[0], 0, 'PythonDiscreteCMI', 'CMI uncorr.')
+    _assert_result(mi_cor[0], expected_mi, 'PythonDiscreteMI', 'MI')
+    assert np.isclose(est.estimate(source, target)[0], mi_cor[0])
+
+    # Local values average to the CMI.
+    est = PythonDiscreteCMI({'local_values': True})
+    cmi_local = est.estimate(source, target, independent)
+    assert cmi_local.shape == (10000,)
+    assert np.isclose(np.mean(cmi_local), cmi_cor[0])
+
+    # Lagged MI.
+    lag = 2
+    source_lagged = np.vstack((source, np.zeros((lag, 2), dtype=int)))
+    target_lagged = np.hstack((np.zeros(lag, dtype=int), target))
+    mi_lag = PythonDiscreteMI({'lag_mi': lag}).estimate(source_lagged,
+                                                        target_lagged)
+    assert np.isclose(mi_lag[0], mi_cor[0])
+
+    # Discretisation of continuous data.
+    expected_mi, source1, source2, target = _get_gauss_data(n=5000)
+    for method in ['equal', 'max_ent']:
+        est = PythonDiscreteCMI({'discretise_method': method,
+                                 'n_discrete_bins': 5})
+        cmi_cor = est.estimate(source1, target, source2)
+        cmi_uncor = est.estimate(source2, target, source1)
+        assert cmi_cor[0] > 0.5 * expected_mi / np.log(2)
+        assert cmi_uncor[0] < 0.05
+
+
+def test_discrete_compare_jidt():
+    """Test if discrete estimators return the same results as JIDT."""
+    expected_mi, source, target, independent = _get_discrete_data(n=1000)
+    for local_values in [False, True]:
+        settings = {'local_values': local_values}
+        assert np.allclose(
+            PythonDiscreteCMI(settings).estimate(source, target, independent),
+            JidtDiscreteCMI(settings).estimate(source, target, independent))
+        assert np.allclose(
+            PythonDiscreteMI(settings).estimate(source, target),
+            JidtDiscreteMI(settings).estimate(source, target))
+    expected_mi, source1, source2, target = _get_gauss_data(n=1000)
+    for method in ['equal', 'max_ent']:
+        settings = {'discretise_method': method, 'n_discrete_bins': 3}
+        assert np.isclose(
+            PythonDiscreteCMI(settings).estimate(source1, target, source2)[0],
+            JidtDiscreteCMI(settings).estimate(source1, target, source2))
+
+
+def test_discrete_chunks_and_surrogates():
+    """Test discrete estimators for chunks, local values, and surrogates."""
+    expected_mi, source, target, independent = _get_discrete_data(n=1000)
+    n_chunks = 5
+    source_chunks = np.vstack([np.random.permutation(source)
+                               for i in range(n_chunks)])
+    target_chunks = np.tile(target, n_chunks)
+    cond_chunks = np.tile(independent, (n_chunks, 1))
+
+    for local_values in [False, True]:
+        est = PythonDiscreteCMI({'local_values': local_values})
+        cmi_chunks = est.estimate(source_chunks, target_chunks, cond_chunks,
+                                  n_chunks=n_chunks)
+        cmi_single = np.concatenate([est.estimate(
+            source_chunks[c * 1000:(c + 1) * 1000], target, independent)
+            for c in range(n_chunks)])
+        assert np.allclose(cmi_chunks, cmi_single)
+        cmi_surr = est.estimate_surrogates(source_chunks, target,
+                                           independent, n_chunks=n_chunks)
+        assert np.allclose(cmi_chunks, cmi_surr)
+        mi_chunks = est.estimate(source_chunks, target_chunks,
+                                 n_chunks=n_chunks)
+        mi_surr = est.estimate_surrogates(source_chunks, target,
+                                          n_chunks=n_chunks)
+        assert np.allclose(mi_chunks, mi_surr)
+
+    # Continuous data are discretised per chunk.
+    expected_mi, source1, source2, target = _get_gauss_data(n=1000)
+    est = PythonDiscreteMI({'discretise_method': 'max_ent'})
+    mi_chunks = est.estimate(np.vstack((source1, 2 * source1)),
+                             np.vstack((target, target)), n_chunks=2)
+    assert np.isclose(mi_chunks[0], mi_chunks[1])
+
+
+def test_discrete_analytic_null():
+    """Test analytic surrogates for discrete estimators."""
+    expected_mi, source, target, independent = _get_discrete_data(n=1000)
+    n_perm = 5000
+    est = PythonDiscreteCMI()
+    surr = est.estimate_surrogates_analytic(
+        n_perm=n_perm, var1=source, var2=target, conditional=independent)
+    assert surr.shape == (n_perm,)
+    # 2 * N * ln(2) * CMI is chi-square distributed with mean df, where
+    # df = (4 - 1) * (2 - 1) * 2.
+    assert np.isclose(np.mean(surr) * 2 * 1000 * np.log(2), 6, atol=0.3)
+    # Compare to permutation surrogates.
+    source_perm = np.vstack([np.random.permutation(source)
+                             for i in range(500)])
+    surr_perm = est.estimate_surrogates(source_perm, target, independent,
+                                        n_chunks=500)
+    assert np.isclose(np.mean(surr), np.mean(surr_perm), rtol=0.1)
+    surr = est.estimate_surrogates_analytic(
+        n_perm=n_perm, var1=source, var2=target, conditional=None)
+    assert np.isclose(np.mean(surr) * 2 * 1000 * np.log(2), 3, atol=0.2)
+    for conditional in [independent, None]:
+        surr_sets = est.estimate_surrogates_analytic(
+            n_perm=n_perm, n_sets=3, var1=source, var2=target,
+            conditional=conditional)
+        assert surr_sets.shape == (3, n_perm)
+
+
+if __name__ == '__main__':
+    test_find_estimator()
+    test_user_input()
+    test_mi_gauss_data()
+    test_cmi_gauss_data()
+    test_chunks_and_local_values()
+    test_estimate_surrogates()
+    test_theiler_and_lag()
+    test_count_neighbours_rect()
+    test_insufficient_no_points()
+    test_gaussian_gauss_data()
+    test_gaussian_chunks_and_surrogates()
+    test_gaussian_analytic_null()
+    test_discrete_input()
+    test_discrete_data()
+    test_discrete_compare_jidt()
+    test_discrete_chunks_and_surrogates()
+    test_discrete_analytic_null()
@@ -5,7 +5,7 @@ import pytest
 import numpy as np
 from pkg_resources import resource_filename
 from idtxl import idtxl_io as io
-from idtxl.data import Data
+from idtxl.data import Data, LazyData
 from idtxl.network_comparison import NetworkComparison
 
 # Generate data and load network inference results.
@@ -143,6 +143,14 @@ def test_import_fieldtrip():
     assert fsample == 600, ('Wrong sampling frequency: {0}'.format(fsample))
     print(timestamps)  # TODO add assertion for this
 
+    # Lazy import reads the same data from disk on demand.
+    data_lazy = io.import_fieldtrip(file_name=file_path,
+                                    ft_struct_name='data',
+                                    file_version='v7.3',
+                                    lazy=True)[0]
+    assert isinstance(data_lazy, LazyData)
+    assert np.allclose(data_lazy.data[:, :, :10], data.data[:, :, :10])
+
 
 def test_import_matarray():
     """Test MATLAB importer."""
@@ -245,8 +253,43 @@ def test_import_matarray():
             normalise=False)
 
 
+
+def test_import_matarray_lazy():
+    """Test lazy MATLAB import."""
+    files = [('one_dim_v7_3.mat', 'a', 's'),
+             ('two_dim_v7_3.mat', 'b', 'sp'),
+             ('three_dim_v7_3.mat', 'c', 'rsp')]
+    for file_name, array_name, dim_order in files:
+        for normalise in [True, False]:
+            kwargs = {
+                'file_name': resource_filename(__name__, 'data/' + file_name),
+                'array_name': array_name,
+                'dim_order': dim_order,
+                'file_version': 'v7.3',
+                'normalise': normalise}
+            data = io.import_matarray(**kwargs)
+            data_lazy = io.import_matarray(lazy=True, **kwargs)
+            assert isinstance(data_lazy, LazyData)
+            assert data_lazy.n_samples == data.n_samples
+            assert data_lazy.n_processes == data.n_processes
+            assert data_lazy.n_replications == data.n_replications
+            assert np.allclose(data_lazy.data[:, :, :], data.data)
+            data_pickled = pickle.loads(pickle.dumps(data_lazy))
+            assert np.allclose(data_pickled.data[:, :, :], data.data)
+
+    # Lazy import is only supported for hdf5 files.
+    with pytest.raises(RuntimeError):
+        io.import_matarray(
+            file_name=resource_filename(__name__, 'data/two_dim_v7.mat'),
+            array_name='b',
+            dim_order='ps',
+            file_version='v7',
+            lazy=True)
+
+
 if __name__ == '__main__':
     test_export_brain_net()
     test_export_networkx()
     test_import_matarray()
+    test_import_matarray_lazy()
     test_import_fieldtrip()
@@ -1,4 +1,6 @@
 """Provide unit tests for multivariate TE estimation."""
+import os
+from tempfile import TemporaryDirectory
 import pytest
 import itertools as it
 import numpy as np
@@ -7,6 +9,7 @@ from idtxl.data import Data
 from idtxl.estimators_jidt import JidtDiscreteCMI, JidtKraskovTE
 from test_estimators_jidt import jpype_missing
 from idtxl.idtxl_utils import calculate_mi
+from idtxl import idtxl_utils as utils
 from test_estimators_jidt import _get_gauss_data
 
 
@@ -511,6 +514,210 @@ def test_discrete_input():
                 expected_mi, res._single_target[1].omnibus_te))
 
 
+def test_realisations_cache():
+    """Test if caching realisations returns identical results."""
+    data = Data()
+    data.generate_mute_data(100, 5)
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'n_perm_max_stat': 21,
+        'n_perm_min_stat': 21,
+        'n_perm_max_seq': 21,
+        'n_perm_omnibus': 21,
+        'max_lag_sources': 3,
+        'min_lag_sources': 1,
+        'verbose': False}
+    results = []
+    for cache in [False, True]:
+        np.random.seed(0)
+        settings['realisations_cache'] = cache
+        results.append(MultivariateTE().analyse_single_target(
+            settings, data, target=1).get_single_target(1, fdr=False))
+    assert results[0]['realisations_cache'] is None
+    assert results[1]['realisations_cache']['hits'] > 0
+    assert (results[0]['selected_vars_sources'] ==
+            results[1]['selected_vars_sources'])
+    assert np.array_equal(results[0]['te'], results[1]['te'])
+    # The cache is released after the analysis.
+    assert data.realisations_cache_info() is None
+
+
+def test_parallel_targets():
+    """Test analysis of targets on a pool of workers."""
+    n = 1000
+    source = np.random.normal(0, 1, size=n)
+    target = np.roll(source, 1) * 0.8 + np.random.normal(0, 0.5, size=n)
+    data = Data(np.vstack((source, target)), dim_order='ps')
+    data_copy = data.data.copy()
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'n_perm_max_stat': 21,
+        'n_perm_min_stat': 21,
+        'n_perm_max_seq': 21,
+        'n_perm_omnibus': 21,
+        'max_lag_sources': 2,
+        'min_lag_sources': 1,
+        'max_lag_target': 1,
+        'verbose': False,
+        'n_jobs': 2}
+    for executor in ['processes', 'threads']:
+        settings['executor'] = executor
+        results = MultivariateTE().analyse_network(settings, data)
+        assert results.targets_analysed == [0, 1]
+        assert results.get_adjacency_matrix(
+            'binary', fdr=False)._edge_matrix[0, 1], (
+                'Coupling was not detected using {0}.'.format(executor))
+        assert 'n_jobs' not in results.settings
+        assert 'executor' not in results.settings
+        # Estimators that are not JIDT are not given a number of threads.
+        assert 'num_threads' not in results.settings
+    assert np.array_equal(data.data, data_copy)
+    assert data.data.flags.writeable
+
+    settings['executor'] = 'cluster'
+    with pytest.raises(RuntimeError):
+        MultivariateTE().analyse_network(settings, data)
+
+
+def test_realisations_store():
+    """Test sharing of realisations between targets of a network."""
+
+    class _Data(Data):
+        def disable_realisations_store(self):
+            self.store_info = self.realisations_store_info()
+            super().disable_realisations_store()
+
+    np.random.seed(0)
+    coefficients = np.zeros((1, 3, 3))
+    coefficients[0] = np.eye(3) * 0.5
+    coefficients[0, 1, 0] = 0.4
+    coefficients[0, 2, 1] = 0.4
+    data = _Data()
+    data.generate_var_data(200, 5, coefficients)
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'n_perm_max_stat': 21,
+        'n_perm_min_stat': 21,
+        'n_perm_max_seq': 21,
+        'n_perm_omnibus': 21,
+        'max_lag_sources': 3,
+        'min_lag_sources': 1,
+        'max_lag_target': 2,
+        'verbose': False}
+    np.random.seed(1)
+    results = MultivariateTE().analyse_network(settings, data)
+    assert not hasattr(data, 'store_info')
+
+    settings['realisations_store'] = True
+    np.random.seed(1)
+    results_store = MultivariateTE().analyse_network(settings, data)
+    # Each variable is retrieved once for all targets.
+    info = data.store_info
+    assert info['sample'] == 3
+    assert info['misses'] == info['n_entries'] <= data.n_processes * 4
+    assert info['hits'] > 0
+    assert data.realisations_store_info() is None
+    for t in range(data.n_processes):
+        res = results.get_single_target(t, fdr=False)
+        res_store = results_store.get_single_target(t, fdr=False)
+        assert res.selected_vars_full == res_store.selected_vars_full
+        assert np.array_equal(res.omnibus_te, res_store.omnibus_te)
+
+    # The store is shared with parallel workers.
+    data = Data(data.data, 'psr', normalise=False)
+    for executor in ['threads', 'processes']:
+        results_parallel = MultivariateTE().analyse_network(
+            dict(settings, n_jobs=2, executor=executor), data)
+        for t in range(data.n_processes):
+            res = results.get_single_target(t, fdr=False)
+            res_parallel = results_parallel.get_single_target(t, fdr=False)
+            assert set(s[0] for s in res.selected_vars_sources) == set(
+                s[0] for s in res_parallel.selected_vars_sources)
+        assert data.realisations_store_info() is None
+
+
+def test_checkpoints():
+    """Test if resuming from checkpoints returns identical results."""
+    data = Data()
+    data.generate_mute_data(100, 5)
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'n_perm_max_stat': 21,
+        'n_perm_min_stat': 21,
+        'n_perm_max_seq': 21,
+        'n_perm_omnibus': 21,
+        'max_lag_sources': 3,
+        'min_lag_sources': 1,
+        'verbose': False}
+    targets = [0, 1, 2]
+    np.random.seed(0)
+    res_uninterrupted = MultivariateTE().analyse_network(
+        settings, data, targets=targets)
+
+    # Interrupt the analysis of the second target after the inclusion of
+    # source candidates, such that the first target is finished and the
+    # second target has a checkpoint.
+    class InterruptedTE(MultivariateTE):
+        interrupt = True
+
+        def _prune_candidates(self, data):
+            if self.interrupt and self.target == 1:
+                raise MemoryError('Interrupted analysis.')
+            super()._prune_candidates(data)
+
+    with TemporaryDirectory() as tmp_dir:
+        settings_ckpt = dict(settings, checkpoint_dir=tmp_dir)
+        np.random.seed(0)
+        with pytest.raises(MemoryError):
+            InterruptedTE().analyse_network(
+                settings_ckpt, data, targets=targets)
+        files = sorted(os.listdir(tmp_dir))
+        assert files == ['InterruptedTE_0.p', 'InterruptedTE_1_stage.p']
+
+        # Resume with a different random state, which is restored from the
+        # checkpoints.
+        np.random.seed(1)
+        InterruptedTE.interrupt = False
+        settings_ckpt['resume'] = True
+        res_resumed = InterruptedTE().analyse_network(
+            settings_ckpt, data, targets=targets)
+        assert sorted(os.listdir(tmp_dir)) == [
+            'InterruptedTE_0.p', 'InterruptedTE_1.p', 'InterruptedTE_2.p']
+
+        # Resuming with different settings raises an error.
+        settings_ckpt['n_perm_omnibus'] = 50
+        with pytest.raises(RuntimeError):
+            InterruptedTE().analyse_network(
+                settings_ckpt, data, targets=targets)
+        settings_ckpt['n_perm_omnibus'] = 21
+
+        # Resuming with different sources or data raises an error.
+        with pytest.raises(RuntimeError):
+            InterruptedTE().analyse_single_target(
+                settings_ckpt, data, target=0, sources=[1])
+        data_changed = Data(data.data.copy(), 'psr', normalise=False)
+        data_changed.data[0, 0, 0] += 1.
+        with pytest.raises(RuntimeError):
+            InterruptedTE().analyse_single_target(
+                settings_ckpt, data_changed, target=0)
+        InterruptedTE().analyse_single_target(
+            settings_ckpt, Data(data.data, 'psr', normalise=False), target=0,
+            sources=[4, 3, 2, 1])
+
+    for t in targets:
+        r_1 = res_uninterrupted.get_single_target(t, fdr=False)
+        r_2 = res_resumed.get_single_target(t, fdr=False)
+        assert r_1['selected_vars_sources'] == r_2['selected_vars_sources']
+        assert r_1['selected_vars_target'] == r_2['selected_vars_target']
+        assert r_1['omnibus_pval'] == r_2['omnibus_pval']
+        assert np.array_equal(r_1['selected_sources_pval'],
+                              r_2['selected_sources_pval'])
+        assert np.array_equal(r_1['te'], r_2['te'])
+    assert 'checkpoint_dir' not in res_resumed.settings
+    assert not utils.conflicting_entries(res_uninterrupted.settings,
+                                         res_resumed.settings)
+
+
 def test_include_target_candidates():
     pass
 
@@ -546,3 +753,7 @@ if __name__ == '__main__':
     test_add_conditional_manually()
     test_check_source_set()
     test_define_candidates()
+    test_realisations_cache()
+    test_parallel_targets()
+    test_realisations_store()
+    test_checkpoints()
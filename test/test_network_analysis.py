@@ -8,6 +8,7 @@ from idtxl.network_analysis import NetworkAnalysis
 from idtxl.data import Data
 from test_estimators_jidt import _get_gauss_data
 from idtxl.estimators_jidt import JidtKraskovCMI, JidtKraskovMI
+from idtxl.estimators_python import PythonGaussianCMI
 
 
 def test_calculate_single_link():
@@ -123,6 +124,58 @@ def test_calculate_single_link():
             data, current_value, source_vars=[(0, 0)], conditioning='test')
 
 
+def test_calculate_single_link_batched():
+    """Test batched link estimation against estimation of individual links."""
+    np.random.seed(0)
+    data = Data()
+    data.generate_mute_data(100, 5)
+    current_value = (0, 3)
+    # Sources with different numbers of selected variables.
+    source_vars = [(1, 0), (1, 2), (2, 1), (3, 0), (3, 1), (4, 2)]
+    target_vars = [(0, 2)]
+    sources = [1, 2, 3, 4]
+    current_value_realisations = data.get_realisations(
+        current_value, [current_value])[0]
+    target_realisations = data.get_realisations(current_value, target_vars)[0]
+
+    for local_values in [False, True]:
+        n = NetworkAnalysis()
+        n.settings = {'local_values': local_values}
+        estimator = PythonGaussianCMI({'local_values': local_values})
+        n._cmi_estimator = estimator
+        n._cmi_estimator_local = estimator
+        for conditioning in ['full', 'target', 'none']:
+            links = n._calculate_single_link(
+                data, current_value, source_vars, target_vars,
+                sources='all', conditioning=conditioning)
+            assert links.shape[0] == len(sources), (
+                'Wrong number of links returned.')
+            for (i, s) in enumerate(sources):
+                link_vars = [v for v in source_vars if v[0] == s]
+                conditional_vars = [v for v in source_vars if v[0] != s]
+                if conditioning == 'full':
+                    conditional = np.hstack((
+                        data.get_realisations(
+                            current_value, conditional_vars)[0],
+                        target_realisations))
+                elif conditioning == 'target':
+                    conditional = target_realisations
+                else:
+                    conditional = None
+                expected = estimator.estimate(
+                    current_value_realisations,
+                    data.get_realisations(current_value, link_vars)[0],
+                    conditional)
+                if local_values:
+                    expected = expected.reshape(
+                        data.n_replications,
+                        data.n_realisations_samples(current_value)).T
+                assert np.allclose(links[i], expected), (
+                    'Batched estimate for source {0} ({1}) differs from '
+                    'single-link estimate ({2}).'.format(
+                        s, links[i], expected))
+
+
 def test_separate_realisations():
     n = NetworkAnalysis()
     r_1 = np.ones((10, 1))
@@ -179,6 +232,7 @@ def test_lag_to_idx():
 
 if __name__ == '__main__':
     test_calculate_single_link()
+    test_calculate_single_link_batched()
     test_idx_to_lag()
     test_lag_to_idx()
     test_separate_realisations()
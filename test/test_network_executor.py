@@ -0,0 +1,146 @@
+"""Provide unit tests for distributed network analysis."""
+import os
+import time
+from tempfile import TemporaryDirectory
+import pytest
+import numpy as np
+from idtxl.data import Data
+from idtxl.multivariate_te import MultivariateTE
+from idtxl.active_information_storage import ActiveInformationStorage
+from idtxl.network_executor import NetworkExecutor
+from idtxl.results import ResultsSingleProcessAnalysis
+
+
+def _get_coupled_data():
+    n = 1000
+    source = np.random.normal(0, 1, size=n)
+    target = np.roll(source, 1) * 0.8 + np.random.normal(0, 0.5, size=n)
+    return Data(np.vstack((source, target)), dim_order='ps')
+
+
+class _FirstAttemptTE(MultivariateTE):
+    """Sleep or exit on the first attempt of analysing each target."""
+
+    def analyse_single_target(self, settings, data, target, sources='all'):
+        marker = os.path.join(settings['marker_dir'], str(target))
+        if not os.path.exists(marker):
+            open(marker, 'w').close()
+            if settings['first_attempt'] == 'exit':
+                os._exit(1)
+            time.sleep(settings['sleep'])
+        return super().analyse_single_target(settings, data, target, sources)
+
+
+def test_analyse_network():
+    """Test network analysis on local workers."""
+    data = _get_coupled_data()
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'n_perm_max_stat': 21,
+        'n_perm_min_stat': 21,
+        'n_perm_max_seq': 21,
+        'n_perm_omnibus': 21,
+        'n_perm_mi': 21,
+        'max_lag_sources': 2,
+        'min_lag_sources': 1,
+        'max_lag_target': 1,
+        'max_lag': 2,
+        'verbose': False}
+    with NetworkExecutor({'verbose': False}) as executor:
+        executor.start_local_workers(2)
+        results = executor.analyse_network(MultivariateTE(), settings, data)
+        assert results.targets_analysed == [0, 1]
+        assert results.get_adjacency_matrix(
+            'binary', fdr=False)._edge_matrix[0, 1], (
+                'Coupling was not detected.')
+        # FDR-corrected results have been added.
+        results.get_adjacency_matrix('binary', fdr=True)
+
+        # Workers are re-used for subsequent analyses.
+        results = executor.analyse_network(
+            ActiveInformationStorage(), settings, data, targets=[1])
+        assert results.processes_analysed == [1]
+
+
+def test_failed_tasks():
+    """Test re-submission and abort of failing tasks."""
+    data = _get_coupled_data()
+    settings = {'cmi_estimator': 'UnknownEstimator', 'max_lag_sources': 2,
+                'min_lag_sources': 1, 'verbose': False}
+    executor = NetworkExecutor({'max_retries': 1, 'verbose': False})
+    executor.start_local_workers(1)
+    try:
+        with pytest.raises(RuntimeError) as err:
+            executor.analyse_network(MultivariateTE(), settings, data,
+                                     targets=[1])
+        assert 'failed after 2 attempts' in str(err.value)
+    finally:
+        executor.shutdown()
+
+
+def test_timeout_and_lost_workers():
+    """Test re-submission of slow tasks and tasks of lost workers."""
+    data = _get_coupled_data()
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'n_perm_max_stat': 21,
+        'n_perm_min_stat': 21,
+        'n_perm_max_seq': 21,
+        'n_perm_omnibus': 21,
+        'n_perm_mi': 21,
+        'max_lag_sources': 2,
+        'min_lag_sources': 1,
+        'max_lag_target': 1,
+        'max_lag': 2,
+        'fdr_correction': False,
+        'verbose': False}
+    tmp_dir = TemporaryDirectory()
+    executor = NetworkExecutor({'task_timeout': 2., 'poll_interval': 0.1,
+                                'verbose': False})
+    executor.start_local_workers(2)
+    try:
+        # A task exceeding the timeout is re-submitted to the second worker.
+        t0 = time.time()
+        results = executor.analyse_network(
+            _FirstAttemptTE(),
+            dict(settings, marker_dir=tmp_dir.name, sleep=8.,
+                 first_attempt='sleep'),
+            data, targets=[1])
+        assert time.time() - t0 < 8., 'Task was not re-submitted.'
+        assert results.targets_analysed == [1]
+
+        # The result of the slow first attempt is received by the next
+        # analysis and is dropped.
+        while not any(m[0] == 'done' for m in list(
+                executor._result_queue.queue)):
+            assert time.time() - t0 < 60., 'Slow attempt did not finish.'
+            time.sleep(0.1)
+        results = executor.analyse_network(
+            ActiveInformationStorage(), settings, data, targets=[1])
+        assert isinstance(results, ResultsSingleProcessAnalysis), (
+            'Result of a previous analysis was accepted.')
+        assert results.processes_analysed == [1]
+    finally:
+        executor.shutdown()
+
+    # A task whose worker dies is re-submitted once the worker stops sending
+    # heartbeats, also without a task timeout.
+    marker_dir = os.path.join(tmp_dir.name, 'exit')
+    os.mkdir(marker_dir)
+    executor = NetworkExecutor({'worker_timeout': 2., 'poll_interval': 0.1,
+                                'verbose': False})
+    executor.start_local_workers(2)
+    try:
+        results = executor.analyse_network(
+            _FirstAttemptTE(),
+            dict(settings, marker_dir=marker_dir, first_attempt='exit'),
+            data, targets=[1])
+        assert results.targets_analysed == [1]
+    finally:
+        executor.shutdown()
+
+
+if __name__ == '__main__':
+    test_analyse_network()
+    test_failed_tasks()
+    test_timeout_and_lost_workers()
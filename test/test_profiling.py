@@ -0,0 +1,170 @@
+"""Provide unit tests for profiling of network analyses."""
+import os
+import json
+import tempfile
+import numpy as np
+from idtxl.data import Data
+from idtxl.multivariate_te import MultivariateTE
+from idtxl.active_information_storage import ActiveInformationStorage
+from idtxl.estimator import ProfiledEstimator
+from idtxl.estimators_python import PythonGaussianCMI
+from idtxl import profiling
+
+SETTINGS = {
+    'cmi_estimator': 'PythonGaussianCMI',
+    'n_perm_max_stat': 21,
+    'n_perm_min_stat': 21,
+    'n_perm_max_seq': 21,
+    'n_perm_omnibus': 21,
+    'n_perm_mi': 21,
+    'max_lag_sources': 2,
+    'min_lag_sources': 1,
+    'max_lag_target': 1,
+    'max_lag': 2,
+    'verbose': False}
+
+
+def test_profiler():
+    """Test recording of stages and counters."""
+    with profiling.Profiler() as profiler:
+        assert profiling.is_active()
+        with profiling.stage('outer', target=1):
+            profiling.count('chunks', 2)
+            with profiling.stage('inner'):
+                profiling.count('chunks', 3)
+                profiling.count('surrogates')
+    assert not profiling.is_active()
+    profiling.count('chunks', 10)  # not recorded
+    with profiling.stage('ignored'):
+        pass
+
+    profile = profiler.to_dict()
+    assert profile['totals'] == {'chunks': 5, 'surrogates': 1}
+    events = profile['events']
+    assert [e['name'] for e in events] == ['outer', 'inner']
+    assert events[0]['args'] == {'target': 1}
+    assert events[0]['counters'] == {'chunks': 5, 'surrogates': 1}
+    assert events[1]['counters'] == {'chunks': 3, 'surrogates': 1}
+    assert events[1]['depth'] == 1
+    assert events[0]['duration'] >= events[1]['duration']
+    assert profile['summary']['inner']['n_calls'] == 1
+
+    @profiling.profiled
+    def f(x):
+        return x + 1
+    assert f(1) == 2
+    with profiling.Profiler() as profiler:
+        f(1)
+        f(2)
+    assert profiler.summary()['f']['n_calls'] == 2
+
+
+def test_profiled_estimator():
+    """Test counting of estimator calls."""
+    est = ProfiledEstimator(PythonGaussianCMI())
+    n = 100
+    var1 = np.random.normal(size=(n, 1))
+    var2 = np.random.normal(size=(n, 1))
+    cond = np.random.normal(size=(n, 1))
+    # Estimates are equal to estimates of the wrapped estimator.
+    assert np.allclose(est.estimate(var1, var2, cond),
+                       PythonGaussianCMI().estimate(var1, var2, cond))
+    with profiling.Profiler() as profiler:
+        est.estimate(var1, var2, cond)
+        est.estimate_parallel(n_chunks=2, re_use=['var2'], var1=np.vstack(
+            (var1, var1)), var2=var2, conditional=np.vstack((cond, cond)))
+        est.estimate_surrogates(np.vstack((var1, var1)), var2, cond,
+                                n_chunks=2)
+    totals = profiler.totals
+    assert totals['estimate_calls'] == 1
+    assert totals['estimate_parallel_calls'] == 1
+    assert totals['estimate_surrogates_calls'] == 1
+    assert totals['chunks'] == 5
+    assert totals['estimator_bytes'] == 3 * n * 8 + 5 * n * 8 + 4 * n * 8
+    assert totals['estimator_time'] > 0
+
+
+def test_data_counters():
+    """Test counting of realisations and surrogates."""
+    data = Data()
+    data.generate_mute_data(100, 5)
+    current_value = (0, 5)
+    idx_list = [(1, 3), (2, 2)]
+    perm_settings = {'perm_type': 'random'}
+    with profiling.Profiler() as profiler:
+        real = data.get_realisations(current_value, idx_list)[0]
+        surr = data.permute_replications_batch(current_value, idx_list, 3)[0]
+        data.permute_samples(current_value, idx_list, perm_settings)
+    assert profiler.totals['surrogates'] == 4
+    assert profiler.totals['surrogates_bytes'] == surr.nbytes + real.nbytes
+    # Realisations are retrieved once by each call.
+    assert profiler.totals['realisations_bytes'] == 3 * real.nbytes
+
+
+def test_analysis_profile():
+    """Test profiles returned with the results of network analyses."""
+    n = 1000
+    source = np.random.normal(0, 1, size=n)
+    target = np.roll(source, 1) * 0.8 + np.random.normal(0, 0.5, size=n)
+    data = Data(np.vstack((source, target)), dim_order='ps')
+
+    settings = dict(SETTINGS, profile=True)
+    results = MultivariateTE().analyse_network(settings, data)
+    for t in [0, 1]:
+        profile = results.get_single_target(t, fdr=False)['profile']
+        stages = [e['name'] for e in profile['events'] if e['depth'] == 0]
+        assert stages == ['(1) include target candidates',
+                          '(2) include source candidates',
+                          '(3) prune source candidate',
+                          '(4) final statistics']
+        assert all(e['args']['target'] == t for e in profile['events']
+                   if e['depth'] == 0)
+        assert profile['totals']['realisations_bytes'] > 0
+        assert sum(v for (k, v) in profile['totals'].items()
+                   if k.endswith('_calls')) > 0
+        assert profile['totals']['chunks'] > 0
+        assert 'max_statistic' in profile['summary']
+
+    # Without profiling, no profile is returned. Profiling with an external
+    # profiler records all targets.
+    with profiling.Profiler() as profiler:
+        results = MultivariateTE().analyse_network(SETTINGS, data)
+    assert results.get_single_target(1, fdr=False)['profile'] is None
+    targets = [e['args']['target'] for e in profiler.events
+               if 'target' in e['args']]
+    assert sorted(set(targets)) == [0, 1]
+    assert profiler.summary()['network_fdr']['n_calls'] == 1
+
+    # Profiles of cached estimators only count estimates that were not
+    # found in the cache.
+    res = {}
+    for estimator_cache in [False, True]:
+        np.random.seed(0)
+        res[estimator_cache] = MultivariateTE().analyse_single_target(
+            dict(SETTINGS, profile=True, estimator_cache=estimator_cache),
+            data, target=1).get_single_target(1, fdr=False)
+    assert res[True]['estimator_cache']['hits'] > 0
+    assert res[True]['profile']['totals']['chunks'] == (
+        res[False]['profile']['totals']['chunks'] -
+        res[True]['estimator_cache']['hits'])
+    settings = dict(SETTINGS, profile=True, estimator_cache=True)
+    results = ActiveInformationStorage().analyse_network(settings, data)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'trace.json')
+        profiling.write_chrome_trace(results, filename)
+        with open(filename) as f:
+            trace = json.load(f)
+        assert {e['tid'] for e in trace['traceEvents']} == {0, 1}
+        assert all(e['ph'] == 'X' for e in trace['traceEvents'])
+        filename = os.path.join(tmpdir, 'profile.json')
+        profiler.write_json(filename)
+        with open(filename) as f:
+            assert json.load(f)['totals'] == profiler.totals
+
+
+if __name__ == '__main__':
+    test_profiler()
+    test_profiled_estimator()
+    test_data_counters()
+    test_analysis_profile()
@@ -2,11 +2,11 @@
 import os
 import pickle
 import pytest
-from tempfile import TemporaryFile
+from tempfile import TemporaryFile, TemporaryDirectory
 import itertools as it
 import copy as cp
 import numpy as np
-from idtxl.results import AdjacencyMatrix
+from idtxl.results import AdjacencyMatrix, LocalValues
 from idtxl.multivariate_te import MultivariateTE
 from idtxl.bivariate_te import BivariateTE
 from idtxl.multivariate_mi import MultivariateMI
@@ -379,6 +379,46 @@ def test_results_network_comparison():
                 test[i]))
 
 
+def test_local_values():
+    """Test storage of local values on disk."""
+    tmp_dir = TemporaryDirectory()
+    values = np.random.rand(3, 50, 4)
+    for store, extension in [('memmap', '.npy'), ('hdf5', '.h5')]:
+        file_name = os.path.join(tmp_dir.name, 'local_values' + extension)
+        local_values = LocalValues.create(file_name, store, 'lsr',
+                                          values.shape)
+        for i in range(values.shape[0]):
+            local_values[i] = values[i]
+        local_values.close()
+        assert local_values.shape == values.shape
+        assert local_values.dtype == np.float32
+        assert np.allclose(np.asarray(local_values), values, atol=1e-6)
+        assert np.allclose(local_values[1, :10], values[1, :10], atol=1e-6)
+
+        # Windows by samples and replications.
+        assert np.allclose(local_values.get_window(samples=(10, 20)),
+                           values[:, 10:20, :], atol=1e-6)
+        assert np.allclose(local_values.get_window(replications=2),
+                           values[:, :, 2], atol=1e-6)
+        assert np.allclose(
+            local_values.get_window(samples=(0, 5), replications=[3, 1]),
+            values[:, 0:5, [3, 1]], atol=1e-6)
+
+        # Copies and pickled objects reference the same file.
+        for c in [cp.deepcopy(local_values),
+                  pickle.loads(pickle.dumps(local_values))]:
+            assert c.file_name == file_name
+            assert np.allclose(np.asarray(c), values, atol=1e-6)
+
+        # Existing files can be referenced directly.
+        local_values = LocalValues(file_name, store, 'lsr')
+        assert local_values.shape == values.shape
+
+    with pytest.raises(RuntimeError):
+        LocalValues.create(os.path.join(tmp_dir.name, 'local_values'),
+                           'test', 'lsr', values.shape)
+
+
 def test_adjacency_matrix():
     # Test AdjacencyMatrix class
     n_nodes = 5
@@ -436,3 +476,4 @@ if __name__ == '__main__':
     test_delay_reconstruction()
     test_combine_results()
     test_add_single_result()
+    test_local_values()
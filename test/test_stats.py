@@ -1,6 +1,7 @@
 """Unit tests for stats module."""
 import pytest
 import numpy as np
+from scipy.stats import genpareto, skew
 from idtxl import stats
 from idtxl.multivariate_te import MultivariateTE
 from idtxl.active_information_storage import ActiveInformationStorage
@@ -188,6 +189,57 @@ def test_ais_fdr():
         res_pruned.get_significant_processes(fdr=True)
 
 
+def test_fdr_copy_on_write():
+    """Test FDR-correction without modifying or copying input results."""
+    settings = {'n_perm_max_seq': 1000, 'n_perm_omnibus': 1000}
+    target_0 = {
+        'selected_vars_sources': [(1, 1), (1, 2), (2, 1)],
+        'selected_vars_full': [(0, 1), (1, 1), (1, 2), (2, 1)],
+        'selected_vars_target': [(0, 1)],
+        'omnibus_pval': 0.0001,
+        'omnibus_sign': True,
+        'selected_sources_pval': np.array([0.04, 0.00001, 0.0001]),
+        'selected_sources_te': np.array([0.7, 1.1, 1.0]),
+        }
+    target_1 = {
+        'selected_vars_sources': [(0, 1)],
+        'selected_vars_full': [(1, 1), (0, 1)],
+        'selected_vars_target': [(1, 1)],
+        'omnibus_pval': 0.0002,
+        'omnibus_sign': True,
+        'selected_sources_pval': np.array([0.0002]),
+        'selected_sources_te': np.array([0.9]),
+        }
+    res = ResultsNetworkInference(
+        n_nodes=3, n_realisations=1000, normalised=True)
+    res._add_single_result(target=0, settings=settings, results=target_0)
+    res._add_single_result(target=1, settings=settings, results=target_1)
+
+    res_pruned = stats.network_fdr({'correct_by_target': False}, res)
+    # The non-significant first variable of target 0 is removed, the input
+    # results are left intact and unchanged targets are shared, not copied.
+    t0 = res_pruned.get_single_target(0, fdr=True)
+    assert t0.selected_vars_sources == [(1, 2), (2, 1)]
+    assert t0.selected_vars_full == [(0, 1), (1, 2), (2, 1)]
+    assert np.array_equal(t0.selected_sources_pval, [0.00001, 0.0001])
+    assert np.array_equal(t0.selected_sources_te, [1.1, 1.0])
+    assert res._single_target[0].selected_vars_sources == [
+        (1, 1), (1, 2), (2, 1)]
+    assert res._single_target[0].selected_sources_pval.size == 3
+    assert res_pruned.get_single_target(1, fdr=True) is res._single_target[1]
+    assert res_pruned._single_target[0] is res._single_target[0]
+    assert 'alpha_fdr' not in res.settings
+    with pytest.raises(RuntimeError):
+        res.get_single_target(0, fdr=True)
+
+    # Significance is returned in the original order of p-values.
+    pval = np.array([0.04, 0.00001, 0.0001, 0.0002])
+    sign, thresh = stats._perform_fdr_corretion(pval, 2, 0.05)
+    assert np.array_equal(sign, [False, True, True, True])
+    assert np.array_equal(pval, [0.04, 0.00001, 0.0001, 0.0002])
+    assert np.all(np.diff(thresh) > 0)
+
+
 def test_find_pvalue():
     test_val = 1
     distribution = np.random.rand(500)  # normally distributed floats in [0,1)
@@ -325,11 +377,555 @@ def test_analytical_surrogates():
         'Surrogates were not created analytically.')
 
 
+
+def test_decision_settled():
+    """Test stopping rule of sequential permutation tests."""
+    alpha = 0.05
+    error = 0.001
+    # Statistic bigger than all surrogates: settled after enough permutations.
+    assert not stats._decision_settled(1., np.zeros(10), alpha, error)
+    assert not stats._decision_settled(1., np.zeros(50), alpha, error)
+    assert stats._decision_settled(1., np.zeros(200), alpha, error)
+    # Statistic smaller than all surrogates: settled immediately.
+    assert stats._decision_settled(0., np.ones(50), alpha, error)
+    # p-value close to alpha: not settled.
+    dist = np.zeros(200)
+    dist[:10] = 2.
+    assert not stats._decision_settled(1., dist, alpha, error)
+
+
+def test_sequential_permutation_test():
+    """Test creation of surrogates in batches with early stopping."""
+    setup = MultivariateTE()
+    setup.settings = {'perm_sequential': False}
+    n_calls = []
+
+    def get_values(n, offset):
+        n_calls.append(n)
+        return np.zeros((2, n))
+
+    # Without sequential testing, all surrogates are created at once.
+    table = stats._get_surrogate_values(
+        setup, 300, get_values, lambda values, error: True)
+    assert table.shape == (2, 300)
+    assert n_calls == [300]
+
+    # Stop once the decision is settled.
+    n_calls = []
+    setup.settings = {'perm_sequential': True, 'perm_batch_size': 40}
+    table = stats._get_surrogate_values(
+        setup, 300, get_values,
+        lambda values, error: stats._decision_settled(
+            1., stats._find_table_max(values), 0.05, error))
+    assert table.shape == (2, 160), 'Sequential test did not stop early.'
+    assert n_calls == [40] * 4
+    assert setup.settings['perm_sequential_error'] == 0.001
+
+    # Never create more than n_perm surrogates, extend existing surrogates.
+    n_calls = []
+    table = stats._get_surrogate_values(
+        setup, 100, get_values, lambda values, error: False,
+        np.ones((2, 30)))
+    assert table.shape == (2, 100)
+    assert n_calls == [40, 30]
+    assert (table[:, :30] == 1).all()
+
+    # Test sequential mode in a network analysis, the no. permutations used
+    # are returned for each test.
+    np.random.seed(0)
+    n = 1000
+    source = np.random.randn(n)
+    target = np.zeros(n)
+    target[1:] = 0.8 * source[:-1] + 0.2 * np.random.randn(n - 1)
+    data = Data(np.vstack((source, target, np.random.randn(n))), 'ps')
+    n_perm = 500
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'n_perm_max_stat': n_perm,
+        'n_perm_min_stat': n_perm,
+        'n_perm_omnibus': n_perm,
+        'n_perm_max_seq': n_perm,
+        'max_lag_sources': 2,
+        'min_lag_sources': 1,
+        'perm_sequential': True,
+        'verbose': False}
+    results = MultivariateTE().analyse_single_target(settings, data, target=1)
+    res = results.get_single_target(1, fdr=False)
+    assert res.selected_vars_sources == [(0, 1)], (
+        'Wrong sources selected: {0}.'.format(res.selected_vars_sources))
+    for test in ['max_stat', 'omnibus', 'max_seq']:
+        assert test in res.n_perm_used, 'No. perm. not recorded: {0}.'.format(
+            test)
+    n_perm_used = [n for t in res.n_perm_used.values() for n in t]
+    assert max(n_perm_used) <= n_perm
+    assert min(n_perm_used) < n_perm, 'Sequential tests did not stop early.'
+
+
+
+def test_sequential_permutation_fdr():
+    """Test sequential permutation tests entering an FDR-correction."""
+    # Significant decisions are not settled if p-values enter an FDR-
+    # correction, non-significant decisions are.
+    alpha = 0.05
+    error = 0.001
+    dist = np.zeros(200)
+    assert stats._decision_settled(1., dist, alpha, error)
+    assert not stats._decision_settled(1., dist, alpha, error,
+                                       settle_significant=False)
+    assert stats._decision_settled(-1., dist, alpha, error,
+                                   settle_significant=False)
+
+    # Significant targets use all permutations in a network analysis with
+    # FDR-correction, such that true links survive the correction.
+    np.random.seed(0)
+    n_samples = 200
+    n_repl = 10
+    source = np.random.randn(n_samples, n_repl)
+    data = np.random.randn(4, n_samples, n_repl)
+    data[0] = source
+    for t in [1, 2]:
+        data[t, 1:] = 0.8 * source[:-1] + 0.2 * np.random.randn(
+            n_samples - 1, n_repl)
+    data = Data(data, 'psr')
+    n_perm = 300
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'n_perm_max_stat': n_perm,
+        'n_perm_min_stat': n_perm,
+        'n_perm_omnibus': n_perm,
+        'n_perm_max_seq': n_perm,
+        'max_lag_sources': 2,
+        'min_lag_sources': 1,
+        'permute_in_time': False,
+        'perm_sequential': True,
+        'fdr_correction': True,
+        'verbose': False}
+    results = MultivariateTE().analyse_network(settings, data, targets=[1, 2])
+    for t in [1, 2]:
+        res = results.get_single_target(t, fdr=True)
+        assert (0, 1) in res.selected_vars_sources, (
+            'True link into target {0} was removed.'.format(t))
+        assert res.n_perm_used['omnibus'] == [n_perm], (
+            'Omnibus test entering the FDR-correction stopped early.')
+
+    # The FDR-correction is skipped if sequential tests stopped at too few
+    # permutations.
+    target = {
+        'selected_vars_sources': [(1, 1)],
+        'selected_vars_full': [(0, 1), (1, 1)],
+        'omnibus_pval': 0.0001,
+        'omnibus_sign': True,
+        'selected_sources_pval': np.array([0.0001]),
+        'selected_sources_te': np.array([1.1]),
+        'n_perm_used': {'omnibus': [50], 'max_seq': [50]},
+        }
+    res = ResultsNetworkInference(
+        n_nodes=3, n_realisations=1000, normalised=True)
+    for t in range(3):
+        res._add_single_result(
+            target=t, settings={'n_perm_omnibus': 10000,
+                                'n_perm_max_seq': 10000},
+            results=target)
+    for correct_by_target in [True, False]:
+        res_pruned = stats.network_fdr(
+            {'alpha_fdr': 0.05, 'correct_by_target': correct_by_target}, res)
+        with pytest.raises(RuntimeError):
+            res_pruned.get_adjacency_matrix('binary', fdr=True)
+
+
+def test_surrogate_store():
+    """Test re-use of surrogates over stages of the analysis."""
+    data = Data()
+    data.generate_mute_data(104, 10)
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'max_lag_sources': 5,
+        'min_lag_sources': 1,
+        'max_lag_target': 5,
+        'surrogate_store': True}
+    setup = MultivariateTE()
+    setup._initialise(settings, data, sources=[0, 1], target=2)
+    setup.settings['permute_in_time'] = False
+    setup.current_value = (2, 5)
+    setup._current_value_realisations = data.get_realisations(
+        setup.current_value, [setup.current_value])[0]
+    setup._append_selected_vars(
+        [(2, 4)], data.get_realisations(setup.current_value, [(2, 4)])[0])
+    candidates = [(0, 3), (1, 2)]
+
+    # Surrogates are created once and re-used for the same conditioning set.
+    table = stats._create_surrogate_table(setup, data, candidates, 30)
+    assert setup._get_surrogate_store_info() == {
+        'hits': 0, 'extended': 0, 'misses': 2, 'n_entries': 2}
+    table_reused = stats._create_surrogate_table(setup, data, candidates, 20)
+    assert np.array_equal(table[:, :20], table_reused)
+    table_reused = stats._create_surrogate_table(
+        setup, data, candidates, 30,
+        conditional=setup._selected_vars_realisations,
+        idx_conditional=[(2, 4)])
+    assert np.array_equal(table, table_reused)
+    assert setup._get_surrogate_store_info()['hits'] == 4
+
+    # Stored surrogates are extended if more permutations are requested.
+    table_extended = stats._create_surrogate_table(
+        setup, data, candidates, 50)
+    assert np.array_equal(table, table_extended[:, :30])
+    assert setup._get_surrogate_store_info()['extended'] == 2
+    assert np.array_equal(
+        table_extended,
+        stats._create_surrogate_table(setup, data, candidates, 50))
+
+    # Surrogates are not re-used for a different conditioning set or if the
+    # indices of the conditional are unknown.
+    setup._append_selected_vars(
+        [(1, 1)], data.get_realisations(setup.current_value, [(1, 1)])[0])
+    stats._create_surrogate_table(setup, data, candidates, 30)
+    stats._create_surrogate_table(
+        setup, data, candidates, 30,
+        conditional=setup._selected_vars_realisations)
+    info = setup._get_surrogate_store_info()
+    assert info['misses'] == 4
+    assert info['n_entries'] == 4
+
+    # Store statistics are returned with the results.
+    results = MultivariateTE().analyse_single_target(
+        {'cmi_estimator': 'PythonGaussianCMI',
+         'max_lag_sources': 3,
+         'min_lag_sources': 1,
+         'n_perm_max_stat': 50,
+         'n_perm_min_stat': 50,
+         'n_perm_omnibus': 50,
+         'n_perm_max_seq': 50,
+         'surrogate_store': True,
+         'verbose': False},
+        data, target=1, sources=[0])
+    assert results.get_single_target(1, fdr=False).surrogate_store[
+        'n_entries'] > 0
+
+
+def test_surrogate_store_sequential():
+    """Test the surrogate store with sequential permutation tests."""
+    data = Data()
+    data.generate_mute_data(104, 10)
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'max_lag_sources': 5,
+        'min_lag_sources': 1,
+        'max_lag_target': 5,
+        'surrogate_store': True,
+        'perm_sequential': True,
+        'perm_batch_size': 40}
+    setup = MultivariateTE()
+    setup._initialise(settings, data, sources=[0, 1], target=2)
+    setup.settings['permute_in_time'] = False
+    setup.current_value = (2, 5)
+    setup._current_value_realisations = data.get_realisations(
+        setup.current_value, [setup.current_value])[0]
+    setup._append_selected_vars(
+        [(2, 4)], data.get_realisations(setup.current_value, [(2, 4)])[0])
+    candidates = [(0, 3), (1, 2)]
+
+    # Each batch extends the stored surrogates instead of returning the
+    # surrogates of the first batch again.
+    def get_table(n_perm):
+        return stats._get_surrogate_values(
+            setup, n_perm,
+            lambda n, offset: stats._create_surrogate_table(
+                setup, data, candidates, n, offset=offset),
+            lambda values, error: False)
+
+    table = get_table(100)
+    assert table.shape == (2, 100)
+    for i in range(2):
+        assert np.unique(table[i]).size == 100, (
+            'Surrogates were re-used within a sequential test.')
+    assert setup._get_surrogate_store_info() == {
+        'hits': 0, 'extended': 0, 'misses': 6, 'n_entries': 2}
+
+    # A repeated sequential test re-uses and extends stored surrogates in the
+    # same order.
+    table_reused = get_table(120)
+    assert np.array_equal(table, table_reused[:, :100])
+    assert np.unique(table_reused).size == 240
+    info = setup._get_surrogate_store_info()
+    assert info['hits'] == 4
+    assert info['extended'] == 2
+    assert np.array_equal(
+        table_reused,
+        stats._create_surrogate_table(setup, data, candidates, 120))
+
+    # Both settings in an analysis.
+    results = MultivariateTE().analyse_single_target(
+        {'cmi_estimator': 'PythonGaussianCMI',
+         'max_lag_sources': 3,
+         'min_lag_sources': 1,
+         'n_perm_max_stat': 100,
+         'n_perm_min_stat': 100,
+         'n_perm_omnibus': 100,
+         'n_perm_max_seq': 100,
+         'permute_in_time': False,
+         'surrogate_store': True,
+         'perm_sequential': True,
+         'verbose': False},
+        data, target=1, sources=[0])
+    assert results.get_single_target(1, fdr=False).surrogate_store[
+        'n_entries'] > 0
+
+
+def test_find_pvalue_tail():
+    np.random.seed(0)
+    n_perm = 200
+    alpha = 0.05
+    distribution = np.random.exponential(size=n_perm)
+
+    # Statistics in the bulk of the distribution are tested by counting.
+    statistic = np.percentile(distribution, 80)
+    for method in ['gpd', 'moment']:
+        [s, p, fit] = stats._find_pvalue_tail(statistic, distribution, alpha,
+                                              method)
+        assert (s, p) == stats._find_pvalue(statistic, distribution, alpha,
+                                            'one_bigger')
+        assert fit['method'] == 'permutation'
+        assert fit['gof_pvalue'] is None
+
+    # P-values of statistics beyond all surrogates are extrapolated below
+    # 1/n_perm.
+    statistic = 10.
+    p_true = np.exp(-statistic)
+    for method in ['gpd', 'moment']:
+        [s, p, fit] = stats._find_pvalue_tail(statistic, distribution, alpha,
+                                              method)
+        assert s, 'Statistic is not significant.'
+        assert fit['method'] == method
+        assert fit['gof_pvalue'] >= 0.05
+        assert not fit['fit_failed']
+        assert p < 1 / n_perm, 'P-value was not extrapolated.'
+        assert p_true / 100 < p < p_true * 100, (
+            'Extrapolated p-value ({0}) is far from the true p-value '
+            '({1}).'.format(p, p_true))
+
+    # Fall back to counting if the fit is rejected.
+    [s, p, fit] = stats._find_pvalue_tail(statistic, distribution, alpha,
+                                          'moment', gof_alpha=1.)
+    assert p == 1 / n_perm
+    assert fit['method'] == 'permutation'
+    assert fit['gof_pvalue'] is not None
+    assert fit['fit_failed']
+    with pytest.raises(ValueError):
+        stats._find_pvalue_tail(statistic, distribution, alpha, 'unknown')
+
+    # Extrapolated p-values allow for FDR-correction with few permutations.
+    target_0 = {
+        'selected_vars_sources': [(1, 1), (2, 1)],
+        'selected_vars_full': [(0, 1), (1, 1), (2, 1)],
+        'omnibus_pval': 0.0001,
+        'omnibus_sign': True,
+        'selected_sources_pval': np.array([0.00001, 0.0002]),
+        'selected_sources_te': np.array([1.1, 1.0]),
+        }
+    target_1 = {
+        'selected_vars_sources': [(0, 1)],
+        'selected_vars_full': [(1, 1), (0, 1)],
+        'omnibus_pval': 0.0003,
+        'omnibus_sign': True,
+        'selected_sources_pval': np.array([0.0003]),
+        'selected_sources_te': np.array([0.8]),
+        }
+    for pvalue_method in ['permutation', 'gpd']:
+        settings = {'n_perm_max_seq': 20, 'n_perm_omnibus': 20,
+                    'pvalue_method': pvalue_method}
+        res = ResultsNetworkInference(
+            n_nodes=3, n_realisations=1000, normalised=True)
+        res._add_single_result(target=0, settings=settings, results=target_0)
+        res._add_single_result(target=1, settings=settings, results=target_1)
+        res_pruned = stats.network_fdr({'alpha_fdr': 0.05}, res)
+        if pvalue_method == 'permutation':
+            with pytest.raises(RuntimeError):
+                res_pruned.get_adjacency_matrix('binary', fdr=True)
+        else:
+            adj = res_pruned.get_adjacency_matrix('binary', fdr=True)
+            assert adj.n_edges() == 3
+
+    # The check for a sufficient no. permutations is based on the recorded
+    # fit diagnostics: counted p-values of failed fits are bounded, while
+    # extrapolated p-values are not, independent of the settings.
+    fit_ok = {'method': 'gpd', 'gof_pvalue': 0.5, 'n_tail': 10,
+              'fit_failed': False}
+    fit_failed = {'method': 'permutation', 'gof_pvalue': 0.01,
+                  'n_tail': None, 'fit_failed': True}
+    for fits, bounded in [([fit_ok], False), ([fit_ok, fit_failed], True)]:
+        for pvalue_method in ['permutation', 'gpd']:
+            settings = {'n_perm_max_seq': 1000, 'n_perm_omnibus': 1000,
+                        'pvalue_method': pvalue_method}
+            res = ResultsNetworkInference(
+                n_nodes=3, n_realisations=1000, normalised=True)
+            for t, target in enumerate([target_0, target_1]):
+                target = dict(target)
+                target['n_perm_used'] = {'omnibus': [20]}
+                target['pvalue_fit'] = {'omnibus': fits}
+                res._add_single_result(target=t, settings=settings,
+                                       results=target)
+            res_pruned = stats.network_fdr({'alpha_fdr': 0.05}, res)
+            if bounded:
+                with pytest.raises(RuntimeError):
+                    res_pruned.get_adjacency_matrix('binary', fdr=True)
+            else:
+                adj = res_pruned.get_adjacency_matrix('binary', fdr=True)
+                assert adj.n_edges() == 3
+
+
+
+def test_find_pvalue_tail_bounds():
+    """Test extrapolated p-values for bounded and light-tailed nulls."""
+    alpha = 0.05
+
+    # Statistics beyond the endpoint of a bounded null are not extrapolated.
+    n_perm = 1000
+    distribution = np.random.RandomState(1).uniform(size=n_perm)
+    [s, p, fit] = stats._find_pvalue_tail(1.0005, distribution, alpha, 'gpd')
+    assert fit['fit_failed']
+    assert fit['method'] == 'permutation'
+    assert p == 1 / n_perm
+
+    # Extrapolated p-values of light-tailed nulls are bounded by 1/n_perm^2.
+    n_perm = 200
+    distribution = np.random.RandomState(2).normal(size=n_perm)
+    for method in ['gpd', 'moment']:
+        [s, p, fit] = stats._find_pvalue_tail(5., distribution, alpha,
+                                              method)
+        assert p >= 1 / n_perm ** 2, 'P-value is below the floor.'
+    distribution = np.random.RandomState(0).exponential(size=n_perm)
+    for method in ['gpd', 'moment']:
+        [s, p, fit] = stats._find_pvalue_tail(20., distribution, alpha,
+                                              method)
+        assert not fit['fit_failed']
+        assert p == 1 / n_perm ** 2, 'P-value was not bounded.'
+
+    # The goodness-of-fit tests account for estimated parameters and reject
+    # fits of true GPD or Pearson III samples at about the nominal level.
+    rng = np.random.RandomState(3)
+    n_reject = [0, 0]
+    for i in range(100):
+        exceedances = genpareto.rvs(-0.2, size=100, random_state=rng)
+        shape, loc, scale = genpareto.fit(exceedances, floc=0)
+        n_reject[0] += stats._gpd_gof_pvalue(exceedances, shape, scale) < 0.1
+        sample = rng.gamma(4, size=100)
+        params = (skew(sample), np.mean(sample), np.std(sample, ddof=1))
+        n_reject[1] += stats._pearson3_gof_pvalue(sample, params, 99) < 0.1
+    assert 2 <= n_reject[0] <= 20 and 2 <= n_reject[1] <= 20, (
+        'Goodness-of-fit tests are not calibrated: {0}.'.format(n_reject))
+
+    # Misfits are rejected.
+    exceedances = np.concatenate((np.linspace(0, 0.1, 50),
+                                  np.linspace(2, 2.1, 50)))
+    shape, loc, scale = genpareto.fit(exceedances, floc=0)
+    assert stats._gpd_gof_pvalue(exceedances, shape, scale) < 0.05
+
+def test_surrogate_table_batches():
+    """Test batched estimation of surrogate tables."""
+    data = Data()
+    data.generate_mute_data(104, 10)
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'max_lag_sources': 5,
+        'min_lag_sources': 1,
+        'max_lag_target': 5}
+    setup = MultivariateTE()
+    setup._initialise(settings, data, sources=[0, 1], target=2)
+    setup.settings['permute_in_time'] = False
+    setup.current_value = (2, 5)
+    setup._current_value_realisations = data.get_realisations(
+        setup.current_value, [setup.current_value])[0]
+    setup._append_selected_vars(
+        [(2, 4)], data.get_realisations(setup.current_value, [(2, 4)])[0])
+    candidates = [(0, 3), (1, 2), (1, 1)]
+    n_perm = 20
+
+    # Count calls to the estimator.
+    estimator = setup._cmi_estimator
+    estimate_surrogates = estimator.estimate_surrogates
+    n_chunks = []
+
+    def count_calls(**kwargs):
+        n_chunks.append(kwargs['n_chunks'])
+        return estimate_surrogates(**kwargs)
+    estimator.estimate_surrogates = count_calls
+
+    # Surrogates for all candidates are estimated in a single call, values
+    # are identical to tables created for each candidate separately.
+    np.random.seed(0)
+    table = stats._create_surrogate_table(setup, data, candidates, n_perm)
+    assert n_chunks == [len(candidates) * n_perm]
+    np.random.seed(0)
+    for i, c in enumerate(candidates):
+        assert np.allclose(
+            table[i, :], stats._create_surrogate_table(setup, data, [c],
+                                                       n_perm)[0, :])
+
+    # Calls are split according to the estimator's memory limit.
+    chunk_bytes = (setup._current_value_realisations.shape[0] * 3 *
+                   np.dtype(np.float64).itemsize)
+    estimator.settings['max_mem'] = 7 * chunk_bytes
+    assert estimator.get_max_chunks(chunk_bytes) == 7
+    n_chunks = []
+    np.random.seed(0)
+    table_split = stats._create_surrogate_table(setup, data, candidates,
+                                                n_perm)
+    assert n_chunks == [7] * 8 + [4]
+    assert np.allclose(table, table_split)
+    estimator.settings['max_mem'] = 1
+    assert estimator.get_max_chunks(chunk_bytes) == 1
+
+
+def test_surrogate_table_analytic():
+    """Test grouped estimation of analytic surrogate tables."""
+    data = Data()
+    data.generate_mute_data(104, 10)
+    settings = {
+        'cmi_estimator': 'PythonGaussianCMI',
+        'max_lag_sources': 5,
+        'min_lag_sources': 1,
+        'max_lag_target': 5,
+        'surrogate_store': True}
+    setup = MultivariateTE()
+    setup._initialise(settings, data, sources=[0, 1], target=2)
+    setup.settings['permute_in_time'] = True
+    setup.current_value = (2, 5)
+    setup._current_value_realisations = data.get_realisations(
+        setup.current_value, [setup.current_value])[0]
+    setup._append_selected_vars(
+        [(2, 4)], data.get_realisations(setup.current_value, [(2, 4)])[0])
+
+    # Count calls to the estimator.
+    estimator = setup._cmi_estimator
+    estimate_surrogates_analytic = estimator.estimate_surrogates_analytic
+    n_sets = []
+
+    def count_calls(**kwargs):
+        n_sets.append((kwargs['n_sets'], kwargs['n_perm']))
+        return estimate_surrogates_analytic(**kwargs)
+    estimator.estimate_surrogates_analytic = count_calls
+
+    # Candidates missing the same no. permutations are drawn in one call.
+    table = stats._create_surrogate_table(setup, data, [(0, 3), (1, 2)], 20)
+    assert setup.settings['analytical_surrogates']
+    assert n_sets == [(2, 20)]
+    assert table.shape == (2, 20)
+    assert np.unique(table).size == 40
+    n_sets = []
+    table = stats._create_surrogate_table(
+        setup, data, [(0, 3), (1, 2), (1, 1), (0, 1)], 30)
+    assert sorted(n_sets) == [(2, 10), (2, 30)]
+    assert table.shape == (4, 30)
+    assert np.unique(table).size == 120
+
+
 if __name__ == '__main__':
     test_ais_fdr()
     test_analytical_surrogates()
     test_data_type()
     test_network_fdr()
+    test_fdr_copy_on_write()
     test_find_pvalue()
     test_find_table_max()
     test_find_table_min()
@@ -339,3 +935,12 @@ if __name__ == '__main__':
     test_max_statistic()
     test_min_statistic()
     test_max_statistic_sequential()
+    test_decision_settled()
+    test_sequential_permutation_test()
+    test_sequential_permutation_fdr()
+    test_surrogate_store()
+    test_surrogate_store_sequential()
+    test_find_pvalue_tail()
+    test_find_pvalue_tail_bounds()
+    test_surrogate_table_batches()
+    test_surrogate_table_analytic()